@@ -78,15 +78,21 @@ if import_capi_exception:
     raise import_capi_exception
 
 from onnxruntime.capi.onnxruntime_inference_collection import (
+    AdapterCache,  # noqa: F401
     AdapterFormat,  # noqa: F401
+    DynamicBatcher,  # noqa: F401
     InferenceSession,  # noqa: F401
     IOBinding,  # noqa: F401
     ModelCompiler,  # noqa: F401
     OrtDevice,  # noqa: F401
     OrtDeviceVendorId,  # noqa: F401
     OrtValue,  # noqa: F401
+    RunLatencyHistograms,  # noqa: F401
+    SamplingProfiler,  # noqa: F401
+    SessionPool,  # noqa: F401
     SparseTensor,  # noqa: F401
     copy_tensors,  # noqa: F401
+    get_session_cache_stats,  # noqa: F401
 )
 
 # TODO: thiagofc: Temporary experimental namespace for new PyTorch front-end
@@ -4,9 +4,22 @@
 # --------------------------------------------------------------------------
 from __future__ import annotations
 
+import bisect
 import collections
 import collections.abc
+import concurrent.futures
+import contextlib
+import copy
+import functools
+import hashlib
+import itertools
+import json
+import math
 import os
+import platform
+import tempfile
+import threading
+import time
 import typing
 import warnings
 from collections.abc import Callable, Sequence
@@ -116,6 +129,618 @@ class AdapterFormat:
         return {k: OrtValue(v) for k, v in self._adapter.parameters.items()}
 
 
+# numpy types of the data types of adapter parameters, which have the same values as onnx TensorProto data types.
+# Other data types, e.g. bfloat16 and float8, are stored as unsigned integers of the same size.
+_ADAPTER_NUMPY_TYPES = {
+    1: np.float32,
+    2: np.uint8,
+    3: np.int8,
+    4: np.uint16,
+    5: np.int16,
+    6: np.int32,
+    7: np.int64,
+    9: np.bool_,
+    10: np.float16,
+    11: np.float64,
+    12: np.uint32,
+    13: np.uint64,
+    14: np.complex64,
+    15: np.complex128,
+}
+_ADAPTER_STORAGE_TYPES = {16: np.uint16, 17: np.uint8, 18: np.uint8, 19: np.uint8, 20: np.uint8}
+# Same as kSupportedAdapterFormatVersions in onnxruntime/lora/adapter_format_version.h.
+_ADAPTER_SUPPORTED_FORMAT_VERSIONS = (1,)
+# Field slots of tables in onnxruntime/lora/adapter_format/adapter_schema.fbs, in order of declaration.
+# Fields may only be appended to the schema, so that slots of existing fields stay the same.
+_ADAPTER_FORMAT_VERSION_SLOT = 0  # Adapter.format_version:int
+_ADAPTER_PARAMETERS_SLOT = 3  # Adapter.parameters:[Parameter]
+_PARAMETER_NAME_SLOT = 0  # Parameter.name:string
+_PARAMETER_DIMS_SLOT = 1  # Parameter.dims:[int64]
+_PARAMETER_DATA_TYPE_SLOT = 2  # Parameter.data_type:TensorDataType (int32)
+_PARAMETER_RAW_DATA_SLOT = 3  # Parameter.raw_data:[uint8]
+
+
+def _map_adapter_parameters(file_path: str | os.PathLike) -> dict[str, tuple[np.ndarray, int]]:
+    """
+    Memory-map an adapter file, and return the parameters as name -> (read-only array, onnx data type).
+    The arrays are views of the mapped file, which stays mapped as long as any of them is referenced.
+    """
+    import mmap  # noqa: PLC0415
+
+    from flatbuffers import number_types, table  # noqa: PLC0415
+
+    with open(file_path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if buf[4:8] != b"TORT":
+        raise ValueError(f"{file_path} is not an adapter file.")
+
+    def field(t: table.Table, slot: int) -> int:
+        # Offset of the field relative to the table, 0 when the field is absent.
+        return t.Offset(4 + 2 * slot)
+
+    adapter = table.Table(buf, int.from_bytes(buf[0:4], "little"))
+    o = field(adapter, _ADAPTER_FORMAT_VERSION_SLOT)
+    format_version = adapter.Get(number_types.Int32Flags, adapter.Pos + o) if o else 0
+    if format_version not in _ADAPTER_SUPPORTED_FORMAT_VERSIONS:
+        raise ValueError(f"{file_path} has unsupported adapter format version {format_version}.")
+
+    parameters = {}
+    o = field(adapter, _ADAPTER_PARAMETERS_SLOT)
+    if o == 0:
+        return parameters
+    vector = adapter.Vector(o)
+    for i in range(adapter.VectorLen(o)):
+        param = table.Table(buf, adapter.Indirect(vector + 4 * i))
+        name = param.String(param.Pos + field(param, _PARAMETER_NAME_SLOT)).decode("utf-8")
+        o = field(param, _PARAMETER_DIMS_SLOT)
+        dims = np.frombuffer(buf, "<i8", param.VectorLen(o), param.Vector(o)).tolist() if o else []
+        o = field(param, _PARAMETER_DATA_TYPE_SLOT)
+        data_type = param.Get(number_types.Int32Flags, param.Pos + o) if o else 0
+        if data_type in _ADAPTER_NUMPY_TYPES:
+            dtype = np.dtype(_ADAPTER_NUMPY_TYPES[data_type])
+        elif data_type in _ADAPTER_STORAGE_TYPES:
+            dtype = np.dtype(_ADAPTER_STORAGE_TYPES[data_type])
+        else:
+            raise ValueError(f"Adapter parameter {name} has unsupported data type {data_type}.")
+        o = field(param, _PARAMETER_RAW_DATA_SLOT)
+        count = param.VectorLen(o) // dtype.itemsize if o else 0
+        data = np.frombuffer(buf, dtype.newbyteorder("<"), count, param.Vector(o) if o else 0)
+        parameters[name] = (data.reshape(dims), data_type)
+    return parameters
+
+
+class AdapterCache:
+    """
+    LRU cache of LoRA adapters, so that a session can serve many adapters and choose one per run.
+
+    Adapter files are memory-mapped, and their parameters are loaded as :class:`OrtValue` on the target device
+    when an adapter is used for the first time. Parameters on CPU are zero-copy views of the mapped file. Later
+    runs with the adapter feed the cached OrtValues as inputs of the session without reading the file again.
+    The least recently used adapters are evicted when there are more than ``max_adapters`` adapters, or the
+    parameters take more than ``max_bytes`` bytes.
+
+    ::
+
+        cache = onnxruntime.AdapterCache(max_adapters=256)
+        outputs = cache.run(sess, None, {input_name: x}, "adapters/customer_1.onnx_adapter")
+        # or
+        outputs = sess.run(None, {input_name: x, **cache.get("adapters/customer_1.onnx_adapter")})
+    """
+
+    def __init__(
+        self,
+        max_adapters: int = 64,
+        max_bytes: int | None = None,
+        device_type: str = "cpu",
+        device_id: int = 0,
+        vendor_id: int | OrtDeviceVendorId = -1,
+    ):
+        """
+        :param max_adapters: max number of cached adapters.
+        :param max_bytes: max bytes of the parameters of cached adapters, unlimited by default. The most recently
+            used adapter is kept even if it is larger.
+        :param device_type: device of the parameters, e.g. cpu or cuda.
+        :param device_id: device id of the parameters.
+        :param vendor_id: vendor id of the device. See :meth:`OrtValue.ortvalue_from_numpy`.
+        """
+        if max_adapters < 1:
+            raise ValueError(f"max_adapters shall be positive, got {max_adapters}.")
+        self._max_adapters = max_adapters
+        self._max_bytes = max_bytes
+        self._device = (device_type, device_id, vendor_id)
+        # path -> (parameters, bytes of parameters), in the order of use from the least recent one.
+        self._adapters: collections.OrderedDict[str, tuple[dict[str, OrtValue], int]] = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _load(self, file_path: str) -> tuple[dict[str, OrtValue], int]:
+        device_type, device_id, vendor_id = self._device
+        parameters = {}
+        total_bytes = 0
+        for name, (data, data_type) in _map_adapter_parameters(file_path).items():
+            if data_type in _ADAPTER_NUMPY_TYPES:
+                value = OrtValue.ortvalue_from_numpy(data)
+            else:
+                value = OrtValue.ortvalue_from_numpy_with_onnx_type(data, data_type)
+            if device_type.lower() != "cpu":
+                host_value = value
+                value = OrtValue.ortvalue_from_shape_and_type(data.shape, data_type, device_type, device_id, vendor_id)
+                value.update_inplace(host_value)
+            parameters[name] = value
+            total_bytes += data.nbytes
+        return parameters, total_bytes
+
+    def get(self, file_path: str | os.PathLike) -> dict[str, OrtValue]:
+        """
+        Return the parameters of an adapter as name -> OrtValue, loading the adapter on a miss.
+        The parameters shall not be modified.
+        """
+        key = os.path.abspath(file_path)
+        with self._lock:
+            entry = self._adapters.get(key)
+            if entry is not None:
+                self._adapters.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+
+        # Load without holding the lock so that runs with cached adapters are not blocked.
+        entry = self._load(key)
+        with self._lock:
+            self._adapters[key] = entry
+            self._adapters.move_to_end(key)
+            self._evict()
+        return entry[0]
+
+    def _evict(self) -> None:
+        resident_bytes = sum(size for _, size in self._adapters.values())
+        while len(self._adapters) > 1 and (
+            len(self._adapters) > self._max_adapters
+            or (self._max_bytes is not None and resident_bytes > self._max_bytes)
+        ):
+            # Evicted parameters stay valid for runs that still use them.
+            _, (_, size) = self._adapters.popitem(last=False)
+            resident_bytes -= size
+            self._evictions += 1
+
+    def preload(self, file_paths: Sequence[str | os.PathLike]) -> None:
+        """Load adapters ahead of the runs that use them."""
+        for file_path in file_paths:
+            self.get(file_path)
+
+    def run(
+        self,
+        session: Session,
+        output_names: Sequence[str] | None,
+        input_feed: dict[str, Any],
+        adapter_path: str | os.PathLike,
+        run_options: C.RunOptions | None = None,
+    ) -> Sequence[np.ndarray | SparseTensor | list | dict]:
+        """
+        Run the session with the parameters of an adapter. See :meth:`Session.run`.
+        """
+        return session.run(output_names, {**input_feed, **self.get(adapter_path)}, run_options)
+
+    def get_stats(self) -> dict[str, int | float]:
+        """
+        Return the numbers of cached adapters, hits, misses and evictions, the hit rate, and the bytes of the
+        parameters of cached adapters.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "adapters": len(self._adapters),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "resident_bytes": sum(size for _, size in self._adapters.values()),
+            }
+
+
+class SamplingProfiler:
+    """
+    Sampling profiler that records per-node latency of a fraction of the runs of sessions, so that it can stay
+    enabled on live traffic.
+
+    Only sampled runs are profiled, with run-level profiling (see :attr:`RunOptions.enable_profiling`), so other
+    runs have no profiling overhead. Profile files of sampled runs are parsed and removed by a background thread,
+    so that the calling thread does not wait for them. Node latencies of the most recent ``max_samples`` sampled
+    runs are kept in memory.
+
+    ::
+
+        profiler = onnxruntime.SamplingProfiler(sample_every=1000)
+        sess.set_sampling_profiler(profiler)
+        ...
+        for item in profiler.get_node_summary(group_by="op_type", top_k=5):
+            print(item["op_type"], item["mean_us"])
+
+    Runs called with ``run_options`` are not sampled, since profiling could not be enabled for them without
+    changing options that might be used by other runs. :meth:`Session.run_async` is not sampled either.
+    """
+
+    def __init__(
+        self,
+        sample_every: int = 100,
+        sample_interval: float | None = None,
+        max_samples: int = 256,
+        profile_dir: str | os.PathLike | None = None,
+    ):
+        """
+        :param sample_every: profile one in ``sample_every`` runs.
+        :param sample_interval: profile one run every ``sample_interval`` seconds instead of counting runs.
+        :param max_samples: max number of sampled runs to keep. Older samples are dropped.
+        :param profile_dir: directory of temporary profile files of sampled runs. A temporary directory is
+            created by default.
+        """
+        if sample_every < 1:
+            raise ValueError(f"sample_every shall be positive, got {sample_every}.")
+        if sample_interval is not None and sample_interval <= 0:
+            raise ValueError(f"sample_interval shall be positive, got {sample_interval}.")
+        if max_samples < 1:
+            raise ValueError(f"max_samples shall be positive, got {max_samples}.")
+        self._sample_every = sample_every
+        self._sample_interval = sample_interval
+        self._next_sample_time = time.monotonic() + (sample_interval or 0)
+        self._run_counter = itertools.count(1)
+        self._sample_ids = itertools.count()
+        self._temp_dir = None
+        if profile_dir is None:
+            self._temp_dir = tempfile.TemporaryDirectory(prefix="ort_sampling_profiler_")
+            profile_dir = self._temp_dir.name
+        self._profile_dir = os.fspath(profile_dir)
+        self._samples: collections.deque[dict[str, Any]] = collections.deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self._sampled_runs = 0
+        self._failed_samples = 0
+        # One worker parses profile files in the order of sampled runs, so waiting for a task submitted last
+        # waits for all pending samples.
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="SamplingProfiler")
+
+    def _should_sample(self) -> bool:
+        # This is called for every run without run_options, so the common path shall be cheap.
+        if self._sample_interval is None:
+            return next(self._run_counter) % self._sample_every == 0
+        now = time.monotonic()
+        if now < self._next_sample_time:
+            return False
+        with self._lock:
+            if now < self._next_sample_time:
+                return False
+            self._next_sample_time = now + self._sample_interval
+            return True
+
+    def _run_sampled(self, run_func: Callable[..., Any], *args) -> Any:
+        prefix = os.path.join(self._profile_dir, f"sample_{next(self._sample_ids)}")
+        run_options = C.RunOptions()
+        run_options.enable_profiling = True
+        run_options.profile_file_prefix = prefix
+        start_time = time.time()
+        try:
+            return run_func(*args, run_options=run_options)
+        finally:
+            self._executor.submit(self._add_sample, prefix, start_time)
+
+    def _wait_for_samples(self) -> None:
+        self._executor.submit(lambda: None).result()
+
+    def _add_sample(self, prefix: str, start_time: float) -> None:
+        # The profiler appends the current time to the prefix.
+        try:
+            file_paths = [
+                os.path.join(self._profile_dir, name)
+                for name in os.listdir(self._profile_dir)
+                if name.startswith(os.path.basename(prefix) + "_") and name.endswith(".json")
+            ]
+        except OSError:
+            file_paths = []
+        sample = None
+        if len(file_paths) == 1:
+            try:
+                sample = self._parse_profile(file_paths[0])
+                sample["timestamp"] = start_time
+            except (OSError, KeyError, ValueError):
+                sample = None
+        for file_path in file_paths:
+            with contextlib.suppress(OSError):
+                os.remove(file_path)
+
+        with self._lock:
+            self._sampled_runs += 1
+            if sample is None:
+                self._failed_samples += 1
+            else:
+                self._samples.append(sample)
+
+    @staticmethod
+    def _parse_profile(file_path: str) -> dict[str, Any]:
+        with open(file_path, encoding="utf-8") as f:
+            events = json.load(f)
+        nodes = []
+        run_duration = 0
+        for event in events:
+            category = event.get("cat")
+            if category == "Node" and event["name"].endswith("_kernel_time"):
+                args = event.get("args", {})
+                nodes.append(
+                    {
+                        "name": event["name"][: -len("_kernel_time")],
+                        "op_type": args.get("op_name", ""),
+                        "provider": args.get("provider", ""),
+                        "duration_us": event["dur"],
+                    }
+                )
+            elif category == "Session" and event.get("name") == "model_run":
+                run_duration = event["dur"]
+        return {"run_duration_us": run_duration, "nodes": nodes}
+
+    def get_samples(self) -> list[dict[str, Any]]:
+        """
+        Return the kept samples from the oldest one. Each sample is a dictionary with the start ``timestamp`` of
+        the run in seconds since the epoch, ``run_duration_us``, and ``nodes``, which is a list of dictionaries
+        with ``name``, ``op_type``, ``provider`` and ``duration_us`` of each executed node.
+        Profile files of completed runs that are not parsed yet are waited for.
+        """
+        self._wait_for_samples()
+        with self._lock:
+            return list(self._samples)
+
+    def get_node_summary(self, group_by: str = "node", top_k: int | None = None) -> list[dict[str, Any]]:
+        """
+        Return the latency of nodes over the kept samples, from the one with the largest total latency.
+
+        :param group_by: ``node`` to summarize each node, or ``op_type`` to summarize each operator type.
+        :param top_k: only return the first ``top_k`` items.
+        :return: list of dictionaries with ``name`` and ``op_type`` (or ``op_type`` only), ``calls``,
+            ``total_us``, ``mean_us`` per sampled run, and ``percent`` of the latency of all nodes.
+        """
+        if group_by not in ("node", "op_type"):
+            raise ValueError(f"group_by shall be node or op_type, got {group_by}.")
+        samples = self.get_samples()
+        totals: dict[tuple[str, ...], list[int]] = {}
+        for sample in samples:
+            for node in sample["nodes"]:
+                key = (node["name"], node["op_type"]) if group_by == "node" else (node["op_type"],)
+                total = totals.setdefault(key, [0, 0])
+                total[0] += 1
+                total[1] += node["duration_us"]
+
+        all_nodes_us = sum(total_us for _, total_us in totals.values())
+        summary = []
+        for key, (calls, total_us) in sorted(totals.items(), key=lambda x: x[1][1], reverse=True)[:top_k]:
+            item = {"name": key[0], "op_type": key[1]} if group_by == "node" else {"op_type": key[0]}
+            item.update(
+                {
+                    "calls": calls,
+                    "total_us": total_us,
+                    "mean_us": total_us / len(samples),
+                    "percent": 100.0 * total_us / all_nodes_us if all_nodes_us else 0.0,
+                }
+            )
+            summary.append(item)
+        return summary
+
+    def get_stats(self) -> dict[str, int]:
+        """Return the numbers of sampled runs, kept samples, and sampled runs without valid profile results."""
+        self._wait_for_samples()
+        with self._lock:
+            return {
+                "sampled_runs": self._sampled_runs,
+                "samples": len(self._samples),
+                "failed_samples": self._failed_samples,
+            }
+
+    def clear(self) -> None:
+        """Remove the kept samples."""
+        self._wait_for_samples()
+        with self._lock:
+            self._samples.clear()
+
+
+class _LatencyHistogram:
+    """
+    Histogram of latencies in nanoseconds with buckets of about 3% relative width, like HdrHistogram.
+    Values below 64 have their own buckets, and each power of two range above has 32 buckets.
+    """
+
+    _SUB_BUCKET_BITS = 5
+
+    def __init__(self):
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    @classmethod
+    def _bucket_index(cls, value: int) -> int:
+        shift = value.bit_length() - cls._SUB_BUCKET_BITS - 1
+        if shift <= 0:
+            return value
+        return (shift << cls._SUB_BUCKET_BITS) + (value >> shift)
+
+    @classmethod
+    def _bucket_range(cls, index: int) -> tuple[int, int]:
+        shift = (index >> cls._SUB_BUCKET_BITS) - 1
+        if shift <= 0:
+            return index, index + 1
+        mantissa = index - (shift << cls._SUB_BUCKET_BITS)
+        return mantissa << shift, (mantissa + 1) << shift
+
+    def record(self, value: int) -> None:
+        # Same as _bucket_index, inlined since this is called for every phase of every run.
+        shift = value.bit_length() - self._SUB_BUCKET_BITS - 1
+        index = value if shift <= 0 else (shift << self._SUB_BUCKET_BITS) + (value >> shift)
+        counts = self.counts
+        counts[index] = counts.get(index, 0) + 1
+        if value > self.max:
+            self.max = value
+        if value < self.min or self.count == 0:
+            self.min = value
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> float:
+        """Return the middle of the bucket of the q-quantile, within the min and max of recorded values."""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, high = self._bucket_range(index)
+                return min(max((low + high - 1) / 2, self.min), self.max)
+        return float(self.max)
+
+    def cumulative_counts(self, bounds: Sequence[int]) -> list[int]:
+        """Return the number of values less than each of the ascending bounds, which are powers of two."""
+        result = [0] * len(bounds)
+        for index, count in self.counts.items():
+            # A bucket never crosses a power of two, so the counts are exact.
+            high = self._bucket_range(index)[1]
+            for i in range(bisect.bisect_left(bounds, high), len(bounds)):
+                result[i] += count
+        return result
+
+
+class RunLatencyHistograms:
+    """
+    Latency histograms of the phases of session runs, recorded in the Python binding layer.
+
+    Each histogram is keyed by the run method (``run``, ``run_with_ort_values`` or ``run_with_iobinding``), the
+    names of the requested outputs, and the phase:
+
+    - ``validate``: checking the input feed and resolving output names.
+    - ``convert_inputs``: getting the C++ values of the input OrtValues (``run_with_ort_values`` only).
+    - ``run``: the C++ call. For ``run`` this includes converting numpy inputs to OrtValues and outputs to numpy
+      arrays, which happens in C++.
+    - ``convert_outputs``: wrapping the outputs as :class:`OrtValue` (``run_with_ort_values`` only).
+    - ``total``: the whole method call.
+
+    Only successful runs are recorded.
+
+    ::
+
+        histograms = onnxruntime.RunLatencyHistograms()
+        sess.set_run_latency_histograms(histograms)
+        ...
+        print(histograms.to_dict()["run"]["y"]["total"]["p99_us"])
+        metrics_text = histograms.to_prometheus()
+    """
+
+    QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+    # Buckets of Prometheus histograms from about 1 microsecond to 68 seconds.
+    _PROMETHEUS_BOUNDS = tuple(1 << i for i in range(10, 37))
+
+    def __init__(self):
+        # (method, output names) -> phase -> histogram
+        self._histograms: dict[tuple[str, tuple[str, ...]], dict[str, _LatencyHistogram]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, method: str) -> _RunTimer:
+        return _RunTimer(self, method)
+
+    def _record(self, method: str, output_names: Sequence[str], phases: list[str], times: list[int]) -> None:
+        key = (method, tuple(output_names))
+        with self._lock:
+            histograms = self._histograms.get(key)
+            if histograms is None:
+                histograms = self._histograms[key] = {}
+            for i, phase in enumerate(phases):
+                histogram = histograms.get(phase)
+                if histogram is None:
+                    histogram = histograms[phase] = _LatencyHistogram()
+                histogram.record(times[i + 1] - times[i])
+            histogram = histograms.get("total")
+            if histogram is None:
+                histogram = histograms["total"] = _LatencyHistogram()
+            histogram.record(times[-1] - times[0])
+
+    def _items(self):
+        # Sorted (method, output names, phase, histogram) for export, called with the lock held.
+        for (method, output_names), histograms in sorted(self._histograms.items()):
+            for phase, histogram in histograms.items():
+                yield method, output_names, phase, histogram
+
+    def to_dict(self) -> dict[str, dict[str, dict[str, dict[str, float]]]]:
+        """
+        Return the statistics as ``{method: {outputs: {phase: stats}}}``, where outputs are the comma separated
+        names of the requested outputs, and stats has ``count``, ``mean_us``, ``min_us``, ``max_us``, and
+        quantiles like ``p50_us`` and ``p99_us``.
+        """
+        result: dict[str, dict[str, dict[str, dict[str, float]]]] = {}
+        with self._lock:
+            for method, output_names, phase, histogram in self._items():
+                stats = {
+                    "count": histogram.count,
+                    "mean_us": histogram.total / histogram.count / 1000,
+                    "min_us": histogram.min / 1000,
+                    "max_us": histogram.max / 1000,
+                }
+                for q in self.QUANTILES:
+                    stats[f"p{q * 100:g}".replace(".", "") + "_us"] = histogram.quantile(q) / 1000
+                result.setdefault(method, {}).setdefault(",".join(output_names), {})[phase] = stats
+        return result
+
+    def to_prometheus(
+        self, metric_name: str = "onnxruntime_run_phase_latency_seconds", labels: dict[str, str] | None = None
+    ) -> str:
+        """
+        Return the histograms in Prometheus text exposition format, with ``method``, ``outputs`` and ``phase``
+        labels in addition to the given labels.
+        """
+        lines = [
+            f"# HELP {metric_name} Latency of phases of onnxruntime session runs in the Python binding.",
+            f"# TYPE {metric_name} histogram",
+        ]
+        bounds = self._PROMETHEUS_BOUNDS
+        with self._lock:
+            for method, output_names, phase, histogram in self._items():
+                items = [*(labels or {}).items(), ("method", method), ("outputs", ",".join(output_names))]
+                label_text = ",".join(f'{key}="{_escape_prometheus_label(str(value))}"' for key, value in items)
+                label_text += f',phase="{phase}"'
+                for bound, count in zip(bounds, histogram.cumulative_counts(bounds), strict=True):
+                    lines.append(f'{metric_name}_bucket{{{label_text},le="{bound / 1e9:g}"}} {count}')
+                lines.append(f'{metric_name}_bucket{{{label_text},le="+Inf"}} {histogram.count}')
+                lines.append(f"{metric_name}_sum{{{label_text}}} {histogram.total / 1e9:g}")
+                lines.append(f"{metric_name}_count{{{label_text}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Remove all recorded latencies."""
+        with self._lock:
+            self._histograms.clear()
+
+
+def _escape_prometheus_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _RunTimer:
+    """Timer of the phases of a single run for :class:`RunLatencyHistograms`."""
+
+    __slots__ = ("_histograms", "_method", "_phases", "_times")
+
+    def __init__(self, histograms: RunLatencyHistograms, method: str):
+        self._histograms = histograms
+        self._method = method
+        self._phases: list[str] = []
+        self._times = [time.perf_counter_ns()]
+
+    def phase(self, name: str) -> None:
+        """End a phase that started at the end of the previous phase."""
+        self._times.append(time.perf_counter_ns())
+        self._phases.append(name)
+
+    def finish(self, output_names: Sequence[str]) -> None:
+        self._histograms._record(self._method, output_names, self._phases, self._times)
+
+
 def check_and_normalize_provider_args(
     providers: Sequence[str | tuple[str, dict[Any, Any]]] | None,
     provider_options: Sequence[dict[Any, Any]] | None,
@@ -208,6 +833,8 @@ class Session:
         # self._sess is managed by the derived class and relies on bindings from C.InferenceSession
         self._sess = None
         self._enable_fallback = enable_fallback
+        self._sampling_profiler = None
+        self._run_latency_histograms = None
 
     def get_session_options(self) -> C.SessionOptions:
         "Return the session options. See :class:`onnxruntime.SessionOptions`."
@@ -319,11 +946,18 @@ class Session:
 
             sess.run([output_name], {input_name: x})
         """
+        profiler = self._sampling_profiler
+        if profiler is not None and run_options is None and profiler._should_sample():
+            return profiler._run_sampled(self.run, output_names, input_feed)
+        histograms = self._run_latency_histograms
+        timer = histograms._start("run") if histograms is not None else None
         self._validate_input(list(input_feed.keys()))
         if not output_names:
             output_names = [output.name for output in self._outputs_meta]
+        if timer is not None:
+            timer.phase("validate")
         try:
-            return self._sess.run(output_names, input_feed, run_options)
+            outputs = self._sess.run(output_names, input_feed, run_options)
         except C.EPFail as err:
             if self._enable_fallback:
                 print(f"EP Error: {err!s} using {self._providers}")
@@ -333,6 +967,10 @@ class Session:
                 self.disable_fallback()
                 return self._sess.run(output_names, input_feed, run_options)
             raise
+        if timer is not None:
+            timer.phase("run")
+            timer.finish(output_names)
+        return outputs
 
     def run_async(self, output_names, input_feed, callback, user_data, run_options=None):
         """
@@ -380,21 +1018,35 @@ class Session:
             sess.run([output_name], {input_name: x})
         """
 
-        def invoke(sess, output_names, input_dict_ort_values, run_options):
+        def invoke(sess, output_names, input_dict_ort_values, run_options, timer=None):
             input_dict = {}
             for n, v in input_dict_ort_values.items():
                 input_dict[n] = v._get_c_value()
+            if timer is not None:
+                timer.phase("convert_inputs")
             result = sess.run_with_ort_values(input_dict, output_names, run_options)
+            if timer is not None:
+                timer.phase("run")
             if not isinstance(result, C.OrtValueVector):
                 raise TypeError("run_with_ort_values() must return a instance of type 'OrtValueVector'.")
             ort_values = [OrtValue(v) for v in result]
+            if timer is not None:
+                timer.phase("convert_outputs")
+                timer.finish(output_names)
             return ort_values
 
+        profiler = self._sampling_profiler
+        if profiler is not None and run_options is None and profiler._should_sample():
+            return profiler._run_sampled(self.run_with_ort_values, output_names, input_dict_ort_values)
+        histograms = self._run_latency_histograms
+        timer = histograms._start("run_with_ort_values") if histograms is not None else None
         self._validate_input(list(input_dict_ort_values.keys()))
         if not output_names:
             output_names = [output.name for output in self._outputs_meta]
+        if timer is not None:
+            timer.phase("validate")
         try:
-            return invoke(self._sess, output_names, input_dict_ort_values, run_options)
+            return invoke(self._sess, output_names, input_dict_ort_values, run_options, timer)
         except C.EPFail as err:
             if self._enable_fallback:
                 print(f"EP Error: {err!s} using {self._providers}")
@@ -423,6 +1075,32 @@ class Session:
         """
         return self._sess.get_profiling_start_time_ns
 
+    def set_sampling_profiler(self, profiler: SamplingProfiler | None) -> None:
+        """
+        Set a :class:`onnxruntime.SamplingProfiler` to profile a fraction of the runs, or None to stop sampling.
+        A profiler can be shared by sessions. It is not supported when session-level profiling is enabled with
+        :attr:`onnxruntime.SessionOptions.enable_profiling`.
+        """
+        if profiler is not None and self._sess_options is not None and self._sess_options.enable_profiling:
+            raise ValueError("Sampling profiler cannot be used when session-level profiling is enabled.")
+        self._sampling_profiler = profiler
+
+    def get_sampling_profiler(self) -> SamplingProfiler | None:
+        "Return the sampling profiler set by :meth:`set_sampling_profiler`."
+        return self._sampling_profiler
+
+    def set_run_latency_histograms(self, histograms: RunLatencyHistograms | None) -> None:
+        """
+        Set :class:`onnxruntime.RunLatencyHistograms` to record latency of phases of runs, or None to stop
+        recording. Histograms can be shared by sessions. Runs retried after falling back to other providers
+        are not recorded.
+        """
+        self._run_latency_histograms = histograms
+
+    def get_run_latency_histograms(self) -> RunLatencyHistograms | None:
+        "Return the histograms set by :meth:`set_run_latency_histograms`."
+        return self._run_latency_histograms
+
     def io_binding(self) -> IOBinding:
         "Return an onnxruntime.IOBinding object`."
         return IOBinding(self)
@@ -434,7 +1112,15 @@ class Session:
         :param iobinding: the iobinding object that has graph inputs/outputs bind.
         :param run_options: See :class:`onnxruntime.RunOptions`.
         """
+        profiler = self._sampling_profiler
+        if profiler is not None and run_options is None and profiler._should_sample():
+            return profiler._run_sampled(self.run_with_iobinding, iobinding)
+        histograms = self._run_latency_histograms
+        timer = histograms._start("run_with_iobinding") if histograms is not None else None
         self._sess.run_with_iobinding(iobinding._iobinding, run_options)
+        if timer is not None:
+            timer.phase("run")
+            timer.finish(list(iobinding._output_names))
 
     def set_ep_dynamic_options(self, options: dict[str, str]):
         """
@@ -501,6 +1187,17 @@ class InferenceSession(Session):
         A file extension of '.ort' will be inferred as an ORT format model.
         All other filenames are assumed to be ONNX format models.
 
+        Graph optimization of an ONNX model can be cached across processes by passing
+        `session_cache_dir=<directory>`, or by setting the ORT_SESSION_CACHE_DIR environment
+        variable. The optimized model is saved to the directory in ORT format on first load,
+        under a key built from the model, providers, provider options and session options,
+        and is loaded without re-running graph optimization afterwards. Above ORT_ENABLE_EXTENDED
+        the key also identifies the CPU, since such optimizations are hardware specific. External data
+        files of a model path are identified by their sizes and modification times, which requires the onnx
+        package to find them. Sessions with initializers added to the session options are not cached. Use
+        :meth:`get_session_cache_info` and :func:`get_session_cache_stats` to check whether
+        the cache was hit.
+
         'providers' can contain either names or names and options. When any options
         are given in 'providers', 'provider_options' should not be used.
 
@@ -527,6 +1224,9 @@ class InferenceSession(Session):
         else:
             self._read_config_from_model = os.environ.get("ORT_LOAD_CONFIG_FROM_MODEL") == "1"
 
+        self._session_cache_dir = kwargs.get("session_cache_dir", os.environ.get("ORT_SESSION_CACHE_DIR"))
+        self._session_cache_info = None
+
         # internal parameters that we don't expect to be used in general so aren't documented
         disabled_optimizers = kwargs.get("disabled_optimizers")
 
@@ -625,19 +1325,24 @@ class InferenceSession(Session):
 
         self._register_ep_custom_ops(session_options, providers, provider_options, available_providers)
 
-        if self._model_path:
-            sess = C.InferenceSession(session_options, self._model_path, True, self._read_config_from_model)
-        else:
-            sess = C.InferenceSession(session_options, self._model_bytes, False, self._read_config_from_model)
-
         if disabled_optimizers is None:
             disabled_optimizers = set()
         elif not isinstance(disabled_optimizers, set):
             # convert to set. assumes iterable
             disabled_optimizers = set(disabled_optimizers)
 
-        # initialize the C++ InferenceSession
-        sess.initialize_session(providers, provider_options, disabled_optimizers)
+        cache_key = None
+        if self._session_cache_dir:
+            cache_key = self._get_session_cache_key(session_options, providers, provider_options, disabled_optimizers)
+
+        if cache_key is None:
+            sess = self._load_session(
+                session_options, self._model_path, self._model_bytes, providers, provider_options, disabled_optimizers
+            )
+        else:
+            sess = self._load_cached_session(
+                cache_key, session_options, providers, provider_options, disabled_optimizers
+            )
 
         self._sess = sess
         self._sess_options = self._sess.session_options
@@ -652,6 +1357,162 @@ class InferenceSession(Session):
         self._provider_options = self._sess.get_provider_options()
         self._profiling_start_time_ns = self._sess.get_profiling_start_time_ns
 
+    def _load_session(self, session_options, model_path, model_bytes, providers, provider_options, disabled_optimizers):
+        if model_path:
+            sess = C.InferenceSession(session_options, model_path, True, self._read_config_from_model)
+        else:
+            sess = C.InferenceSession(session_options, model_bytes, False, self._read_config_from_model)
+
+        # initialize the C++ InferenceSession
+        sess.initialize_session(providers, provider_options, disabled_optimizers)
+        return sess
+
+    def _get_session_cache_key(self, session_options, providers, provider_options, disabled_optimizers):
+        """
+        Return the key of the optimized model in the session cache, or None when the session cannot be cached:
+        the model is in ORT format, the session options save the optimized model or hold the providers, or an
+        EP context model is generated, or initializers are added to the session options, or the external data of
+        the model cannot be found.
+        """
+        if (
+            session_options.optimized_model_filepath
+            or session_options.has_providers()
+            or session_options.has_initializers()
+        ):
+            return None
+
+        config = {}
+        for key in _SESSION_CACHE_CONFIG_KEYS:
+            with contextlib.suppress(RuntimeError):
+                config[key] = session_options.get_session_config_entry(key)
+        if "session.load_model_format" in config or config.get("ep.context_enable") == "1":
+            return None
+
+        if self._model_path:
+            if self._model_path.endswith(".ort"):
+                return None
+            with open(self._model_path, "rb") as f:
+                model_bytes = f.read()
+        else:
+            model_bytes = self._model_bytes
+        # ORT format models have the file identifier 'ORTM' after the root table offset.
+        if model_bytes[4:8] == b"ORTM":
+            return None
+        files = self._get_external_data_files(model_bytes) if self._model_path else []
+        if files is None:
+            return None
+
+        key = {
+            "version": C.get_version_string(),
+            "model": hashlib.sha256(model_bytes).hexdigest(),
+            "files": files,
+            "providers": providers,
+            "provider_options": [sorted((str(k), str(v)) for k, v in options.items()) for options in provider_options],
+            "disabled_optimizers": sorted(disabled_optimizers),
+            "graph_optimization_level": str(session_options.graph_optimization_level),
+            "free_dimension_overrides": sorted(session_options.get_free_dimension_overrides()),
+            "config": config,
+        }
+        # Optimizations above ORT_ENABLE_EXTENDED, e.g. NCHWc layout, are specific to the hardware.
+        if int(session_options.graph_optimization_level) > int(C.GraphOptimizationLevel.ORT_ENABLE_EXTENDED):
+            key["cpu"] = _get_cpu_fingerprint()
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+    def _get_external_data_files(self, model_bytes):
+        """
+        Return the external data files referenced by initializers of the model with their sizes and modification
+        times, so that changes of the data are not missed without reading all of it. Return None when the model
+        cannot be parsed, or the onnx package is not installed to parse it.
+        """
+        try:
+            import onnx  # noqa: PLC0415
+            from onnx import external_data_helper  # noqa: PLC0415
+
+            model = onnx.ModelProto()
+            model.ParseFromString(model_bytes)
+        except Exception as e:
+            warnings.warn(f"Unable to find external data of {self._model_path}, the session is not cached: {e}")
+            return None
+
+        model_dir = os.path.dirname(os.path.abspath(self._model_path))
+        cache_dir = os.path.realpath(self._session_cache_dir)
+        files = set()
+        for tensor in _get_model_initializers(model):
+            if not external_data_helper.uses_external_data(tensor):
+                continue
+            location = external_data_helper.ExternalDataInfo(tensor).location
+            path = os.path.realpath(os.path.join(model_dir, location))
+            # Files of the cache are never model data, e.g. when the cache is in the model directory.
+            if path.startswith(os.path.join(cache_dir, "")):
+                continue
+            try:
+                stat = os.stat(path)
+                files.add((location, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                # The session fails to load the missing data anyway.
+                files.add((location, None, None))
+        return sorted(files, key=str)
+
+    def _load_cached_session(self, cache_key, session_options, providers, provider_options, disabled_optimizers):
+        cache_path = os.path.join(self._session_cache_dir, cache_key + ".ort")
+        unsupported_path = os.path.join(self._session_cache_dir, cache_key + ".unsupported")
+        if os.path.exists(cache_path):
+            try:
+                sess = self._load_session(
+                    session_options, cache_path, None, providers, provider_options, disabled_optimizers
+                )
+                self._record_session_cache(cache_key, cache_path, "hit")
+                return sess
+            except Exception as e:
+                # The cached model is corrupted or cannot be loaded, so it is replaced below.
+                warnings.warn(f"Unable to load cached session {cache_path}: {e}")
+        elif os.path.exists(unsupported_path):
+            self._record_session_cache(cache_key, None, "unsupported")
+            return self._load_session(
+                session_options, self._model_path, self._model_bytes, providers, provider_options, disabled_optimizers
+            )
+
+        os.makedirs(self._session_cache_dir, exist_ok=True)
+        # Save to a temporary file, and rename it after the session is created so that concurrent loads never see
+        # a partial model. The options of the caller may be shared by other threads, so a copy saves the model.
+        cache_options = copy.copy(session_options)
+        temp_path = os.path.join(self._session_cache_dir, f"{cache_key}.{os.getpid()}_{threading.get_ident()}.ort")
+        cache_options.optimized_model_filepath = temp_path
+        try:
+            sess = self._load_session(
+                cache_options, self._model_path, self._model_bytes, providers, provider_options, disabled_optimizers
+            )
+            os.replace(temp_path, cache_path)
+            self._record_session_cache(cache_key, cache_path, "miss")
+            return sess
+        except Exception as e:
+            warnings.warn(f"Unable to cache session in {self._session_cache_dir}: {e}")
+            # Sessions with nodes compiled by an execution provider cannot be saved in ORT format. Remember it so
+            # that later loads do not optimize the model twice. Other errors may be transient, e.g. I/O errors.
+            if "Unable to serialize model" in str(e):
+                with open(unsupported_path, "w") as f:
+                    f.write(str(e))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        self._record_session_cache(cache_key, None, "unsupported")
+        return self._load_session(
+            session_options, self._model_path, self._model_bytes, providers, provider_options, disabled_optimizers
+        )
+
+    def _record_session_cache(self, key, path, status):
+        self._session_cache_info = {"key": key, "path": path, "status": status}
+        with _session_cache_lock:
+            _session_cache_stats[status] += 1
+
+    def get_session_cache_info(self) -> dict[str, str | None] | None:
+        """
+        Return the key, path and status ('hit', 'miss' or 'unsupported') of the session in the session cache,
+        or None when the session is not cached.
+        """
+        return self._session_cache_info
+
     def _reset_session(self, providers, provider_options) -> None:
         "release underlying session object."
         # meta data references session internal structures
@@ -694,6 +1555,470 @@ class InferenceSession(Session):
                 C.register_nv_tensorrt_rtx_plugins_as_custom_ops(session_options, providers[i][1])
 
 
+# Session configuration entries that change the optimized model, and thus are part of the session cache key.
+_SESSION_CACHE_CONFIG_KEYS = (
+    "ep.context_enable",
+    "optimization.disable_specified_optimizers",
+    "optimization.enable_cast_chain_elimination",
+    "optimization.enable_gelu_approximation",
+    "optimization.minimal_build_optimizations",
+    "session.disable_aot_function_inlining",
+    "session.disable_double_qdq_remover",
+    "session.disable_quant_qdq",
+    "session.disable_qdq_constant_folding",
+    "session.enable_quant_qdq_cleanup",
+    "session.graph_optimizations_loop_level",
+    "session.load_model_format",
+    "session.qdq_matmulnbits_accuracy_level",
+    "session.qdq_matmulnbits_block_size",
+    "session.qdqisint8allowed",
+)
+
+_session_cache_lock = threading.Lock()
+_session_cache_stats: collections.Counter = collections.Counter()
+
+
+@functools.cache
+def _get_cpu_fingerprint() -> str:
+    """Return a string that identifies the CPU model and its instruction set extensions."""
+    fingerprint = [platform.machine(), platform.processor()]
+    with contextlib.suppress(OSError), open("/proc/cpuinfo") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            name = name.strip()
+            if name in ("model name", "flags", "Features", "CPU implementer", "CPU part"):
+                fingerprint.append(f"{name}:{value.strip()}")
+            elif not line.strip() and len(fingerprint) > 2:
+                # Only the first processor is read.
+                break
+    return hashlib.sha256("|".join(fingerprint).encode()).hexdigest()
+
+
+def get_session_cache_stats() -> dict[str, int]:
+    """
+    Return the numbers of session cache hits, misses and sessions that cannot be cached in this process.
+    See the `session_cache_dir` argument of :class:`InferenceSession`.
+    """
+    with _session_cache_lock:
+        return {status: _session_cache_stats[status] for status in ("hit", "miss", "unsupported")}
+
+
+class _BatchRequest:
+    """A request of DynamicBatcher: the input feed, its size along the first axis and the future of its outputs."""
+
+    __slots__ = ("arrival", "feed", "future", "key", "rows")
+
+    def __init__(self, feed: dict[str, np.ndarray], rows: int):
+        self.feed = feed
+        self.rows = rows
+        # Requests can be concatenated when their inputs have same data types and same shapes except the first axis.
+        self.key = tuple((name, value.dtype.str, value.shape[1:]) for name, value in sorted(feed.items()))
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        self.arrival = time.monotonic()
+
+
+class DynamicBatcher:
+    """
+    Combine concurrent requests along the batch axis, i.e. the first axis of every input, and run the batches
+    with :meth:`Session.run_async`. The outputs of a batch are split along the first axis back to the requests.
+
+    A batch is dispatched once it has ``max_batch_size`` rows, or ``max_wait_ms`` milliseconds after its first
+    request arrived. While ``max_pending_batches`` batches are running, new requests wait and join later batches.
+    Only requests with inputs of the same data types and the same shapes except the first axis are batched together,
+    and every output of the model shall have the batch axis as its first axis.
+
+    :meth:`Session.run_async` runs batches in the intra-op thread pool of the session, which needs at least one
+    thread besides the caller's, e.g. ``SessionOptions.intra_op_num_threads`` of 2 or more.
+
+    ::
+
+        with onnxruntime.DynamicBatcher(sess, max_batch_size=32, max_wait_ms=2) as batcher:
+            outputs = batcher.run({input_name: x})
+            # or from a coroutine
+            outputs = await asyncio.wrap_future(batcher.submit({input_name: x}))
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 1.0,
+        output_names: Sequence[str] | None = None,
+        run_options: C.RunOptions | None = None,
+        max_pending_batches: int = 2,
+    ):
+        """
+        :param session: the session to run batches.
+        :param max_batch_size: max number of rows of a batch. A request larger than it runs as a batch alone.
+        :param max_wait_ms: max time that the first request of a batch waits for other requests.
+        :param output_names: name of the outputs, all outputs by default.
+        :param run_options: See :class:`onnxruntime.RunOptions`.
+        :param max_pending_batches: max number of batches that are running at the same time.
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size shall be positive, got {max_batch_size}.")
+        if max_pending_batches < 1:
+            raise ValueError(f"max_pending_batches shall be positive, got {max_pending_batches}.")
+
+        self._session = session
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000
+        self._output_names = list(output_names) if output_names else [output.name for output in session.get_outputs()]
+        self._run_options = run_options
+        self._max_pending_batches = max_pending_batches
+        self._pending_batches = threading.Semaphore(max_pending_batches)
+
+        self._requests: collections.deque[_BatchRequest] = collections.deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._dispatch, name="DynamicBatcher", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> typing.Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def submit(self, input_feed: dict[str, Any]) -> concurrent.futures.Future:
+        """
+        Add a request to the next batch.
+
+        :param input_feed: dictionary ``{ input_name: input_value }``. All inputs shall have the same size
+            along the first axis.
+        :return: a future of the list of output arrays of the request.
+        """
+        feed = {name: np.asarray(value) for name, value in input_feed.items()}
+        self._session._validate_input(list(feed.keys()))
+        rows = {value.shape[0] if value.ndim > 0 else None for value in feed.values()}
+        if len(rows) != 1 or None in rows:
+            raise ValueError(
+                f"Inputs shall have the same size along the first axis, got shapes {[v.shape for v in feed.values()]}."
+            )
+
+        request = _BatchRequest(feed, rows.pop())
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("DynamicBatcher is closed.")
+            self._requests.append(request)
+            self._condition.notify()
+        return request.future
+
+    def run(self, input_feed: dict[str, Any], timeout: float | None = None) -> list[np.ndarray]:
+        """
+        Add a request to the next batch, and wait for its outputs.
+
+        :param input_feed: dictionary ``{ input_name: input_value }``
+        :param timeout: max seconds to wait, no limit by default.
+        :return: list of output arrays of the request.
+        """
+        return self.submit(input_feed).result(timeout)
+
+    def close(self) -> None:
+        """
+        Stop accepting requests, and wait until all requests are completed.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        for _ in range(self._max_pending_batches):
+            self._pending_batches.acquire()
+        for _ in range(self._max_pending_batches):
+            self._pending_batches.release()
+
+    def _dispatch(self) -> None:
+        while True:
+            # Wait for a running batch to finish first, so that requests arriving meanwhile join the next batch.
+            self._pending_batches.acquire()
+            with self._condition:
+                while not self._requests and not self._closed:
+                    self._condition.wait()
+                if not self._requests:
+                    self._pending_batches.release()
+                    return
+                batch = self._next_batch()
+
+            # Requests cancelled by the caller are dropped.
+            batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            if batch:
+                self._run_batch(batch)
+            else:
+                self._pending_batches.release()
+
+    def _next_batch(self) -> list[_BatchRequest]:
+        """
+        Wait until requests compatible with the oldest request fill a batch, or the oldest request times out.
+        Then remove the batch from the waiting requests. It is called with the condition held.
+        """
+        deadline = self._requests[0].arrival + self._max_wait
+        while True:
+            first = self._requests[0]
+            batch = [first]
+            rows = first.rows
+            full = rows >= self._max_batch_size
+            for request in itertools.islice(self._requests, 1, None):
+                if full:
+                    break
+                if request.key == first.key:
+                    # Compatible requests are batched in order, so the batch is full once the next one does not fit.
+                    full = rows + request.rows >= self._max_batch_size
+                    if rows + request.rows <= self._max_batch_size:
+                        batch.append(request)
+                        rows += request.rows
+
+            remaining = deadline - time.monotonic()
+            if full or remaining <= 0 or self._closed:
+                break
+            self._condition.wait(remaining)
+
+        if len(batch) == len(self._requests):
+            self._requests.clear()
+        else:
+            selected = {id(request) for request in batch}
+            self._requests = collections.deque(request for request in self._requests if id(request) not in selected)
+        return batch
+
+    def _run_batch(self, batch: list[_BatchRequest]) -> None:
+        if len(batch) == 1:
+            feed = batch[0].feed
+        else:
+            feed = {name: np.concatenate([request.feed[name] for request in batch]) for name in batch[0].feed}
+        try:
+            self._session.run_async(self._output_names, feed, self._on_batch_done, batch, self._run_options)
+        except Exception as err:
+            self._pending_batches.release()
+            for request in batch:
+                request.future.set_exception(err)
+
+    def _on_batch_done(self, results: list[np.ndarray], batch: list[_BatchRequest], err: str) -> None:
+        # It is invoked by a thread of the intra-op thread pool.
+        self._pending_batches.release()
+        if err:
+            for request in batch:
+                request.future.set_exception(RuntimeError(err))
+            return
+
+        if len(batch) == 1:
+            batch[0].future.set_result(list(results))
+            return
+
+        offsets = np.cumsum([request.rows for request in batch])
+        for name, result in zip(self._output_names, results, strict=True):
+            if not isinstance(result, np.ndarray) or result.ndim == 0 or result.shape[0] != offsets[-1]:
+                error = ValueError(
+                    f"Output {name} does not have the batch axis of {offsets[-1]} rows as the first axis."
+                )
+                for request in batch:
+                    request.future.set_exception(error)
+                return
+
+        splits = [np.split(result, offsets[:-1]) for result in results]
+        for i, request in enumerate(batch):
+            request.future.set_result([split[i] for split in splits])
+
+
+class SessionPool:
+    """
+    Create sessions of variants of a model, e.g. with different adapters or output heads, that share initializers.
+
+    Shared initializers are held once by the pool as :class:`OrtValue`, and are added to the session options of
+    every session with :meth:`SessionOptions.add_initializer`, so sessions use them instead of loading their own
+    copies. An initializer of a model is shared when the pool has an initializer of the same name, data type,
+    shape and data. The data is compared by a hash, which is computed once for each shared initializer, and when a
+    session is created for the initializers of its model that match by name, data type and shape. So a fine-tuned
+    variant with the same initializer names keeps its own weights.
+
+    Kernels that pre-pack weights still hold their pre-packed copies per session. Set the session configuration
+    entry ``session.disable_prepacking`` to ``1`` to share all the weight memory at the cost of speed.
+
+    ::
+
+        pool = onnxruntime.SessionPool(providers=["CPUExecutionProvider"])
+        pool.add_shared_initializers_from_model("base.onnx")
+        sessions = [pool.create_session(path) for path in ["variant_a.onnx", "variant_b.onnx"]]
+        print(pool.get_memory_stats()["saved_bytes"])
+
+    Finding the initializers of a model requires the onnx package.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[str | tuple[str, dict[Any, Any]]] | None = None,
+        provider_options: Sequence[dict[Any, Any]] | None = None,
+        device_type: str = "cpu",
+        device_id: int = 0,
+    ):
+        """
+        :param providers: providers of the sessions. See :class:`InferenceSession`.
+        :param provider_options: provider options of the sessions. See :class:`InferenceSession`.
+        :param device_type: device of the shared initializers, e.g. 'cpu' or 'cuda'.
+        :param device_id: device id of the shared initializers.
+        """
+        self._providers = providers
+        self._provider_options = provider_options
+        self._device_type = device_type
+        self._device_id = device_id
+        self._initializers: dict[str, OrtValue] = {}
+        # Hash of the data of each shared initializer.
+        self._initializer_hashes: dict[str, str] = {}
+        self._lock = threading.Lock()
+        # Bytes of shared initializers used by every session that was created.
+        self._session_shared_bytes: list[int] = []
+
+    def add_shared_initializer(self, name: str, value: np.ndarray | OrtValue) -> None:
+        """
+        Add an initializer shared by the sessions created afterwards. A numpy array is copied to the device of
+        the pool, and shall not be modified afterwards if the device is CPU, since its memory is used directly.
+        An OrtValue shall be on CPU, so that its data can be compared with the initializers of models.
+        """
+        if isinstance(value, OrtValue):
+            if value.device_name().lower() != "cpu":
+                raise ValueError(f"Shared initializer {name} shall be a numpy array or an OrtValue on CPU.")
+            content_hash = _hash_array(value.numpy())
+        else:
+            content_hash = _hash_array(value)
+            value = OrtValue.ortvalue_from_numpy(value, self._device_type, self._device_id)
+        with self._lock:
+            if name in self._initializers:
+                raise ValueError(f"Shared initializer {name} was already added.")
+            self._initializers[name] = value
+            self._initializer_hashes[name] = content_hash
+
+    def add_shared_initializers_from_model(self, model: str | os.PathLike | Any) -> int:
+        """
+        Add all initializers of a model, e.g. the base model of the variants, as shared initializers.
+
+        External data of a model path is memory-mapped instead of being read, so the shared initializers on CPU
+        are backed by the page cache of the data files.
+
+        :param model: path of the model, or an onnx ModelProto with data loaded.
+        :return: bytes of the initializers that were added.
+        """
+        import onnx  # noqa: PLC0415
+
+        base_dir = ""
+        if isinstance(model, (str, os.PathLike)):
+            base_dir = os.path.dirname(os.fspath(model))
+            model = onnx.load(os.fspath(model), load_external_data=False)
+        total_bytes = 0
+        for tensor in _get_model_initializers(model):
+            if tensor.name in self._initializers:
+                continue
+            array = _get_initializer_array(tensor, base_dir)
+            total_bytes += array.nbytes
+            self.add_shared_initializer(tensor.name, array)
+        return total_bytes
+
+    def create_session(
+        self,
+        path_or_bytes: str | bytes | os.PathLike,
+        sess_options: C.SessionOptions | None = None,
+        **kwargs,
+    ) -> InferenceSession:
+        """
+        Create a session that uses the shared initializers matching the initializers of the model.
+
+        :param path_or_bytes: Filename or serialized ONNX model in a byte string.
+        :param sess_options: Session options. The shared initializers are added to it, so the same options shall
+            not be used for other sessions.
+        :param kwargs: other arguments of :class:`InferenceSession`.
+        """
+        import onnx  # noqa: PLC0415
+
+        base_dir = ""
+        if isinstance(path_or_bytes, bytes):
+            model = onnx.load_from_string(path_or_bytes)
+        else:
+            base_dir = os.path.dirname(os.fspath(path_or_bytes))
+            model = onnx.load(os.fspath(path_or_bytes), load_external_data=False)
+
+        # An initializer of different data type or shape would be read out of bounds, and one of different data,
+        # e.g. a fine-tuned weight, would change the results, so they are not shared.
+        shared = {}
+        for tensor in _get_model_initializers(model):
+            value = self._initializers.get(tensor.name)
+            if (
+                value is not None
+                and value.element_type() == tensor.data_type
+                and list(value.shape()) == list(tensor.dims)
+                and _hash_array(_get_initializer_array(tensor, base_dir)) == self._initializer_hashes[tensor.name]
+            ):
+                shared[tensor.name] = value
+        del model
+
+        if sess_options is None:
+            sess_options = C.SessionOptions()
+        for name, value in shared.items():
+            sess_options.add_initializer(name, value)
+
+        session = InferenceSession(
+            path_or_bytes, sess_options, providers=self._providers, provider_options=self._provider_options, **kwargs
+        )
+        # The session options of the session refers to the initializers, which are kept alive by the pool.
+        with self._lock:
+            self._session_shared_bytes.append(sum(value.tensor_size_in_bytes() for value in shared.values()))
+        return session
+
+    def get_memory_stats(self) -> dict[str, int]:
+        """
+        Return the memory of shared initializers.
+
+        ``shared_bytes`` is the memory held by the pool, ``referenced_bytes`` is the memory of shared initializers
+        summed over the sessions, i.e. what the sessions would have loaded themselves, and ``saved_bytes`` is the
+        difference between them.
+        """
+        with self._lock:
+            shared_bytes = sum(value.tensor_size_in_bytes() for value in self._initializers.values())
+            referenced_bytes = sum(self._session_shared_bytes)
+            return {
+                "sessions": len(self._session_shared_bytes),
+                "shared_bytes": shared_bytes,
+                "referenced_bytes": referenced_bytes,
+                "saved_bytes": max(referenced_bytes - shared_bytes, 0),
+            }
+
+
+def _get_initializer_array(tensor, base_dir: str) -> np.ndarray:
+    # External data of numeric tensors is memory-mapped instead of being read.
+    from onnx import external_data_helper, helper, numpy_helper  # noqa: PLC0415
+
+    if external_data_helper.uses_external_data(tensor):
+        info = external_data_helper.ExternalDataInfo(tensor)
+        dtype = np.dtype(helper.tensor_dtype_to_np_dtype(tensor.data_type))
+        if dtype.kind in "biufc" and all(dim > 0 for dim in tensor.dims):
+            return np.memmap(
+                os.path.join(base_dir, info.location),
+                dtype=dtype,
+                mode="r",
+                offset=info.offset or 0,
+                shape=tuple(tensor.dims),
+            )
+        external_data_helper.load_external_data_for_tensor(tensor, base_dir)
+    return numpy_helper.to_array(tensor)
+
+
+def _hash_array(array: np.ndarray) -> str:
+    array = np.ascontiguousarray(array)
+    if array.dtype.kind not in "biufc":
+        # e.g. strings
+        return hashlib.sha256("\0".join(map(str, array.flat)).encode()).hexdigest()
+    return hashlib.sha256(array.reshape(-1).view(np.uint8)).hexdigest()
+
+
+def _get_model_initializers(model):
+    # Initializers of the main graph and subgraphs, e.g. the bodies of If and Loop nodes.
+    graphs = [model.graph]
+    while graphs:
+        graph = graphs.pop()
+        yield from graph.initializer
+        for node in graph.node:
+            for attr in node.attribute:
+                if attr.HasField("g"):
+                    graphs.append(attr.g)
+                graphs.extend(attr.graphs)
+
+
 def make_get_initializer_location_func_wrapper(
     get_initializer_location_func: GetInitializerLocationFunc,
 ) -> GetInitializerLocationWrapperFunc:
@@ -893,6 +2218,8 @@ class IOBinding:
     def __init__(self, session: Session):
         self._iobinding = C.SessionIOBinding(session._sess)
         self._numpy_obj_references = {}
+        # Names of bound outputs in the order of binding, for RunLatencyHistograms.
+        self._output_names = {}
 
     def bind_cpu_input(self, name, arr_on_cpu):
         """
@@ -961,6 +2288,7 @@ class IOBinding:
         # (1) They may not want to use a custom allocator specific to the device they want to bind the output to,
         # in which case ORT will allocate the memory for the user
         # (2) The output has a dynamic shape and hence the size of the buffer may not be fixed across runs
+        self._output_names[name] = None
         if buffer_ptr is None:
             self._iobinding.bind_output(
                 name,
@@ -990,6 +2318,7 @@ class IOBinding:
         :param name: output name
         :param ortvalue: OrtValue instance to bind
         """
+        self._output_names[name] = None
         self._iobinding.bind_ortvalue_output(name, ortvalue._ortvalue)
 
     def synchronize_outputs(self):
@@ -1016,6 +2345,7 @@ class IOBinding:
         self._iobinding.clear_binding_inputs()
 
     def clear_binding_outputs(self):
+        self._output_names.clear()
         self._iobinding.clear_binding_outputs()
 
 
@@ -2282,6 +2282,14 @@ execution provider)pbdoc");
       sess(m, "SessionOptions", R"pbdoc(Configuration information for a session.)pbdoc");
   sess
       .def(py::init())
+      .def(
+          "__copy__",
+          [](const PySessionOptions& options) -> PySessionOptions { return options; },
+          R"pbdoc(Returns a copy of the SessionOptions, which can be changed without affecting this one.)pbdoc")
+      .def(
+          "__deepcopy__",
+          [](const PySessionOptions& options, py::dict /*memo*/) -> PySessionOptions { return options; },
+          R"pbdoc(Returns a copy of the SessionOptions, which can be changed without affecting this one.)pbdoc")
       .def(
           // Equivalent to the C API's SessionOptionsAppendExecutionProvider.
           "add_provider",
@@ -2557,6 +2565,33 @@ Applies to session load, initialization, etc. Default is 0.)pbdoc")
                                 onnxruntime::FreeDimensionOverrideType::Name,
                                 dim_value}); },
           R"pbdoc(Specify values of named dimensions within model inputs.)pbdoc")
+      .def(
+          "get_free_dimension_overrides",
+          [](const PySessionOptions* options) -> std::vector<std::tuple<std::string, std::string, int64_t>> {
+            std::vector<std::tuple<std::string, std::string, int64_t>> overrides;
+            overrides.reserve(options->value.free_dimension_overrides.size());
+            for (const auto& dim_override : options->value.free_dimension_overrides) {
+              overrides.emplace_back(dim_override.dim_identifier,
+                                     dim_override.dim_identifier_type == onnxruntime::FreeDimensionOverrideType::Name
+                                         ? "name"
+                                         : "denotation",
+                                     dim_override.dim_value);
+            }
+            return overrides;
+          },
+          R"pbdoc(Returns the free dimension overrides as a list of (identifier, 'name' or 'denotation', value).)pbdoc")
+      .def(
+          "has_initializers",
+          [](const PySessionOptions* options) -> bool {
+#if !defined(ORT_MINIMAL_BUILD) && !defined(DISABLE_EXTERNAL_INITIALIZERS)
+            if (!options->value.external_initializers.empty() ||
+                !options->value.external_initializer_files_mmap.empty()) {
+              return true;
+            }
+#endif
+            return !options->value.initializers_to_share_map.empty();
+          },
+          R"pbdoc(Returns true if initializers or external initializer files were added to the SessionOptions.)pbdoc")
       .def(
           "add_session_config_entry",
           [](PySessionOptions* options, const char* config_key, const char* config_value) -> void {
@@ -2680,6 +2715,12 @@ RunOptions instance. The individual calls will exit gracefully and return an err
 #endif
       .def_readwrite("only_execute_path_to_fetches", &RunOptions::only_execute_path_to_fetches,
                      R"pbdoc(Only execute the nodes needed by fetch list)pbdoc")
+      .def_readwrite("enable_profiling", &RunOptions::enable_profiling,
+                     R"pbdoc(Enable profiling for a particular Run() invocation. It is ignored when session-level
+profiling is enabled. Default is false.)pbdoc")
+      .def_readwrite("profile_file_prefix", &RunOptions::profile_file_prefix,
+                     R"pbdoc(The prefix of the profile file of a particular Run() invocation. The current time will be
+appended to the file name.)pbdoc")
       .def(
           "add_run_config_entry",
           [](RunOptions* options, const char* config_key, const char* config_value) -> void {
@@ -1,11 +1,13 @@
 #!/usr/bin/python
 
 import argparse
+import array
 import fnmatch
 import json
+import re
 import subprocess as sp
-from collections import defaultdict
 
+import numpy as np
 import pandas as pd
 
 
@@ -20,7 +22,11 @@ def _demangle(name, demangler="c++filt"):
 
 def _get_args():
     parser = argparse.ArgumentParser(description="onnxruntime bench tool")
-    parser.add_argument("input", type=str, help="Trace input file, formatted as JSON")
+    parser.add_argument(
+        "input",
+        type=str,
+        help="Trace input file, formatted as JSON, or a summary saved by --summary with .npz or .parquet extension",
+    )
     parser.add_argument(
         "--demangler",
         required=False,
@@ -48,6 +54,12 @@ def _get_args():
         help="Restrict analysis to the specified identifiers, i.e., specify a filter list. Also supports UNIX-style wildcards.",
     )
     parser.add_argument("--csv", help="Save data to csv")
+    parser.add_argument(
+        "--summary",
+        type=str,
+        help="Save the kernel events of all runs to a compact .npz or .parquet (requires pyarrow) file, "
+        "which can be analyzed again in place of the trace.",
+    )
     parser.add_argument("-c", "--count", type=int, default=40, help="List top N items")
 
     parser.add_argument(
@@ -90,80 +102,268 @@ def _shape_to_string(shape):
     return res
 
 
-def _json_to_df(data, filter_matcher):
-    cpu_entries = []
-    gpu_entries = []
-
-    most_recent_kernel_launch_event = None
-    num_missing_kernel_launch_events = 0
-    total_kernel_events = 0
-
-    for item in data:
-        cat = item.get("cat")
-        if cat is None:
-            continue
-        dur = item.get("dur")
-        if dur is None:
-            continue
-        arg = item.get("args")
-        if arg is None:
-            continue
-        op_name = arg.get("op_name")
-
-        name = item["name"]
-
-        if not filter_matcher(name) and op_name is not None and not filter_matcher(op_name):
-            continue
-
-        if cat != "Kernel" and not name.endswith("kernel_time"):
-            continue
-        if name.endswith("kernel_time"):
-            most_recent_kernel_launch_event = item
-
-        block_x = arg.get("block_x", -1)
-        block_y = arg.get("block_y", -1)
-        block_z = arg.get("block_z", -1)
-        grid_x = arg.get("grid_x", -1)
-        grid_y = arg.get("grid_y", -1)
-        grid_z = arg.get("grid_z", -1)
-
-        if cat == "Kernel":
-            gpu_entries.append(
-                {
-                    "name": name,
-                    "duration": dur,
-                    "dimensions": f"b{block_x}x{block_y}x{block_z},g{grid_x}x{grid_y}x{grid_z}",
-                    "op_name": op_name,
-                    "input_type_shape": (
-                        _shape_to_string(most_recent_kernel_launch_event["args"]["input_type_shape"])
-                        if most_recent_kernel_launch_event is not None
-                        else "unknown"
-                    ),
-                }
+# Separators between events in the array of events.
+_SEPARATORS = re.compile(r"[\s,]*")
+# Start of the array of events, when the trace is an array or an object with the "traceEvents" key first.
+_EVENTS_START = re.compile(r'\s*(\{\s*"traceEvents"\s*:\s*)?\[')
+
+
+def _iter_trace_events(profile_path, chunk_size=1 << 22):
+    """
+    Yields the events of a trace one by one, reading the file in chunks so that a multi-GB trace is never loaded
+    into memory as a whole. A trace that is cut off, e.g. when the process was killed, yields the complete events.
+    """
+    decoder = json.JSONDecoder()
+    with open(profile_path, encoding="utf-8") as file_obj:
+        buf = file_obj.read(chunk_size)
+        match = _EVENTS_START.match(buf)
+        if match is None:
+            # Other layouts, e.g. "traceEvents" after other keys, are not streamed.
+            file_obj.seek(0)
+            data = json.load(file_obj)
+            yield from data["traceEvents"] if isinstance(data, dict) else data
+            return
+
+        pos = match.end()
+        while True:
+            pos = _SEPARATORS.match(buf, pos).end()
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            try:
+                if pos == len(buf):
+                    raise json.JSONDecodeError("Incomplete event", buf, pos)
+                event, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # The event is split across chunks.
+                more = file_obj.read(chunk_size)
+                if not more:
+                    if pos < len(buf):
+                        print("WARNING: The trace is truncated. Using the complete events.")
+                    return
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+            yield event
+
+
+class _TraceColumns:
+    """
+    Columnar arrays of the CPU and GPU kernel events of a trace. Strings are interned in a table and stored as
+    codes, so that millions of events take a few bytes each. Every event records the model run it belongs to,
+    which is the number of "model_run" events before it, so that runs are selected after the trace is parsed.
+    """
+
+    CPU_COLUMNS = ("run", "name", "input_type_shape", "output_type_shape", "duration")
+    GPU_COLUMNS = ("run", "name", "dimensions", "op_name", "input_type_shape", "duration")
+    STRING_COLUMNS = ("name", "input_type_shape", "output_type_shape", "dimensions", "op_name")
+
+    def __init__(self):
+        self.strings = []
+        self._string_codes = {}
+        self.cpu = {column: array.array("d" if column == "duration" else "q") for column in self.CPU_COLUMNS}
+        self.gpu = {column: array.array("d" if column == "duration" else "q") for column in self.GPU_COLUMNS}
+        self.num_model_runs = 0
+
+    def _code(self, string):
+        if string is None:
+            return -1
+        code = self._string_codes.get(string)
+        if code is None:
+            code = len(self.strings)
+            self._string_codes[string] = code
+            self.strings.append(string)
+        return code
+
+    def add_events(self, events, filter_matcher):
+        most_recent_kernel_launch_event = None
+        num_missing_kernel_launch_events = 0
+        total_kernel_events = 0
+        cpu = self.cpu
+        gpu = self.gpu
+
+        for item in events:
+            if item.get("name") == "model_run":
+                self.num_model_runs += 1
+            cat = item.get("cat")
+            if cat is None:
+                continue
+            dur = item.get("dur")
+            if dur is None:
+                continue
+            arg = item.get("args")
+            if arg is None:
+                continue
+            op_name = arg.get("op_name")
+
+            name = item["name"]
+
+            if not filter_matcher(name) and op_name is not None and not filter_matcher(op_name):
+                continue
+
+            if cat != "Kernel" and not name.endswith("kernel_time"):
+                continue
+            if name.endswith("kernel_time"):
+                most_recent_kernel_launch_event = item
+
+            if cat == "Kernel":
+                block = f"b{arg.get('block_x', -1)}x{arg.get('block_y', -1)}x{arg.get('block_z', -1)}"
+                grid = f"g{arg.get('grid_x', -1)}x{arg.get('grid_y', -1)}x{arg.get('grid_z', -1)}"
+                input_type_shape = (
+                    _shape_to_string(most_recent_kernel_launch_event["args"]["input_type_shape"])
+                    if most_recent_kernel_launch_event is not None
+                    else "unknown"
+                )
+                gpu["run"].append(self.num_model_runs)
+                gpu["name"].append(self._code(name))
+                gpu["dimensions"].append(self._code(f"{block},{grid}"))
+                gpu["op_name"].append(self._code(op_name))
+                gpu["input_type_shape"].append(self._code(input_type_shape))
+                gpu["duration"].append(dur)
+                total_kernel_events += 1
+                if input_type_shape == "unknown" and "hipMem" not in name:
+                    num_missing_kernel_launch_events += 1
+            else:
+                cpu["run"].append(self.num_model_runs)
+                cpu["name"].append(self._code(arg["op_name"]))
+                cpu["input_type_shape"].append(self._code(_shape_to_string(arg["input_type_shape"])))
+                cpu["output_type_shape"].append(self._code(_shape_to_string(arg["output_type_shape"])))
+                cpu["duration"].append(dur)
+
+        if num_missing_kernel_launch_events > 0:
+            print(
+                f"WARNING: Could not resolve shapes for {num_missing_kernel_launch_events} of {total_kernel_events} kernels."
             )
-            total_kernel_events += 1
-            if gpu_entries[-1]["input_type_shape"] == "unknown" and "hipMem" not in gpu_entries[-1]["name"]:
-                num_missing_kernel_launch_events += 1
+
+    def _select_runs(self, start=1, end=None):
+        """
+        Returns the range of model runs to analyze.
+        By default, we skip the first model run (run 0) and consider all subsequent runs.
+        """
+        total_num_runs = self.num_model_runs
+        if total_num_runs == 0:
+            print('WARNING: Could not find "model_run" event in trace. Using entire traces.')
+            return 0, 1
+        print(f"Found {total_num_runs} model_run events in trace.")
+
+        assert -total_num_runs <= start < total_num_runs, f"Invalid start index {start}."
+        if start < 0:
+            start += total_num_runs
+        if end is None:
+            end = total_num_runs
         else:
-            cpu_entries.append(
-                {
-                    "name": item["args"]["op_name"],
-                    "duration": dur,
-                    "input_type_shape": _shape_to_string(item["args"]["input_type_shape"]),
-                    "output_type_shape": _shape_to_string(item["args"]["output_type_shape"]),
-                }
+            assert -total_num_runs <= end < total_num_runs, f"Invalid end index {end}."
+            if end < 0:
+                end += total_num_runs
+        num_runs = end - start
+        assert num_runs > 0, "No valid model runs are included in the split."
+        print(f"Analyzing {num_runs} model run(s): {start}-{end - 1}.")
+        return start, end
+
+    def _to_df(self, columns, selected, categories, ranks):
+        df = pd.DataFrame(
+            {
+                column: (
+                    pd.Categorical.from_codes(ranks[np.asarray(values)[selected]], categories)
+                    if column in self.STRING_COLUMNS
+                    else np.asarray(values)[selected]
+                )
+                for column, values in columns.items()
+                if column != "run"
+            }
+        )
+        if len(df) and np.array_equal(df["duration"], np.round(df["duration"])):
+            df["duration"] = df["duration"].astype(np.int64)
+        df["count"] = 1
+        return df
+
+    def to_df(self, start=1, end=None):
+        """Returns the CPU and GPU frames of the selected model runs, and the number of selected runs."""
+        start, end = self._select_runs(start, end)
+        # Sorted categories group in the same order as strings, which breaks ties of top hitters the same way.
+        order = np.argsort(np.array(self.strings, dtype=object), kind="stable")
+        categories = pd.Index(self.strings, dtype=object)[order]
+        # Code -1 of a missing string indexes the last rank.
+        ranks = np.empty(len(order) + 1, dtype=np.int64)
+        ranks[order] = np.arange(len(order))
+        ranks[-1] = -1
+        frames = []
+        for columns in [self.cpu, self.gpu]:
+            runs = np.asarray(columns["run"])
+            # Events after the last "model_run" event do not belong to a complete run.
+            selected = (runs >= start) & (runs < end)
+            frames.append(self._to_df(columns, selected, categories, ranks))
+        return frames[0], frames[1], end - start
+
+    def save(self, path):
+        """Saves the columns as a compact summary to a .npz or .parquet file."""
+        if path.endswith(".parquet"):
+            # One table with the event kind, where CPU and GPU events have their own columns set to null.
+            frames = []
+            for kind, columns in [("cpu", self.cpu), ("gpu", self.gpu)]:
+                df = pd.DataFrame({column: np.asarray(values) for column, values in columns.items()})
+                df.insert(0, "kind", kind)
+                frames.append(df)
+            df = pd.concat(frames, ignore_index=True)
+            for column in self.STRING_COLUMNS:
+                codes = df[column].fillna(-1).astype(np.int64)
+                df[column] = pd.Categorical.from_codes(codes, pd.Index(self.strings, dtype=object))
+            df.attrs["num_model_runs"] = self.num_model_runs
+            df.to_parquet(path, index=False)
+        else:
+            arrays = {f"cpu_{column}": np.asarray(values) for column, values in self.cpu.items()}
+            arrays.update({f"gpu_{column}": np.asarray(values) for column, values in self.gpu.items()})
+            np.savez_compressed(
+                path, strings=np.array(self.strings, dtype=str), num_model_runs=self.num_model_runs, **arrays
             )
 
-    if num_missing_kernel_launch_events > 0:
-        print(
-            f"WARNING: Could not resolve shapes for {num_missing_kernel_launch_events} of {total_kernel_events} kernels."
-        )
+    @classmethod
+    def load(cls, path, filter_matcher):
+        """
+        Loads a summary saved by :meth:`save`. The filter is applied to the op names and kernel names in the
+        summary, since the names of events are not kept.
+        """
+        columns = cls()
+        if path.endswith(".parquet"):
+            df = pd.read_parquet(path)
+            columns.num_model_runs = int(df.attrs.get("num_model_runs", 0))
+            strings = pd.Index(
+                sorted({value for column in cls.STRING_COLUMNS for value in df[column].dropna().unique()})
+            )
+            loaded = {}
+            for kind, names in [("cpu", cls.CPU_COLUMNS), ("gpu", cls.GPU_COLUMNS)]:
+                part = df[df["kind"] == kind]
+                loaded[kind] = {
+                    column: (
+                        strings.get_indexer(part[column].astype(object))
+                        if column in cls.STRING_COLUMNS
+                        else part[column]
+                    )
+                    for column in names
+                }
+            strings = list(strings)
+        else:
+            with np.load(path) as npz:
+                columns.num_model_runs = int(npz["num_model_runs"])
+                strings = npz["strings"].tolist()
+                loaded = {
+                    kind: {column: npz[f"{kind}_{column}"] for column in names}
+                    for kind, names in [("cpu", cls.CPU_COLUMNS), ("gpu", cls.GPU_COLUMNS)]
+                }
 
-    cpu_df = pd.DataFrame(cpu_entries)
-    gpu_df = pd.DataFrame(gpu_entries)
-    cpu_df["count"] = 1
-    gpu_df["count"] = 1
-    return cpu_df, gpu_df
+        columns.strings = strings
+        columns._string_codes = {string: code for code, string in enumerate(strings)}
+        matches = np.array([filter_matcher(string) for string in strings] + [False], dtype=bool)
+        for kind in ["cpu", "gpu"]:
+            values = loaded[kind]
+            # Code -1 of a missing op name indexes the last element, i.e. no match.
+            selected = matches[np.asarray(values["name"])]
+            if kind == "gpu":
+                op_names = np.asarray(values["op_name"])
+                selected |= (op_names == -1) | matches[op_names]
+            setattr(
+                columns, kind, {column: np.asarray(array_values)[selected] for column, array_values in values.items()}
+            )
+        return columns
 
 
 def _print_top_hitters(frame, args, target="cpu"):
@@ -182,7 +382,7 @@ def _print_top_hitters(frame, args, target="cpu"):
     frame2 = frame[["duration", "count"]].sum()
     frame["pct"] = 100 * (frame["duration"] / frame2["duration"])
     fields = [*group_key, "duration", "pct", "count"]
-    frame1 = frame[fields].groupby(group_key).sum().reset_index()
+    frame1 = frame[fields].groupby(group_key, observed=True).sum().reset_index()
     frame1 = frame1.sort_values(by="duration", ascending=False)[:top]
     frame1["cumulative_pct"] = frame1["pct"].cumsum()
     frame1["cumulative_dur"] = frame1["duration"].cumsum()
@@ -198,45 +398,35 @@ def _print_top_hitters(frame, args, target="cpu"):
 
 def _print_op_kernel_mapping_info(cpu_df, gpu_df, num_runs, csv=None):
     # Count op occurrences in the selected runs
-    op_counts = defaultdict(int)
-    for op in cpu_df.T.to_dict().values():
-        identifiers = (op["name"], op["input_type_shape"])
-        op_counts[identifiers] += 1
-
-    # Collect kernel stats: count/duration
-    stat_dict = defaultdict(lambda: defaultdict(float))
-    for kernel in gpu_df.T.to_dict().values():
-        op_name = kernel["op_name"]
-        if op_name is None:  # Only interested in op related kernels
-            continue
-        input_type_shape = kernel["input_type_shape"]
-        kernel_name = kernel["name"]
-        dimensions = kernel["dimensions"]
-        identifiers = (op_name, input_type_shape, kernel_name, dimensions)
-        stat_dict[identifiers]["count"] += 1
-        stat_dict[identifiers]["duration"] += kernel["duration"]
+    op_counts = cpu_df.groupby(["name", "input_type_shape"], observed=True).size().rename("op_count")
+    op_counts.index.names = ["op_name", "input_type_shape"]
+
+    # Collect kernel stats: count/duration. Only interested in op related kernels.
+    kernels = gpu_df[gpu_df["op_name"].notna()]
+    stats = (
+        kernels.groupby(["op_name", "input_type_shape", "name", "dimensions"], observed=True, sort=False)["duration"]
+        .agg(["count", "sum"])
+        .reset_index()
+    )
 
     # Create the DataFrame for kernel entries with op correlation info
-    kernel_list = []
-    for identifiers, stat in stat_dict.items():
-        op_name, input_type_shape, kernel_name, dimensions = identifiers
-        op_count = op_counts.get((op_name, input_type_shape))
-        if op_count is None:
-            continue
-        kernel_list.append(
-            {
-                "op_name": op_name,
-                "input_type_shape": input_type_shape,
-                "op_count": op_count / num_runs,  # Average op count per run
-                "kernel_name": kernel_name,
-                "kernel_dimensions": dimensions,
-                "kernel_count": stat["count"] / num_runs,  # Average kernel count per run
-                "kernel_avg_dur (us)": stat["duration"] / stat["count"],
-                "kernel_total_dur (us)": stat["duration"] / num_runs,
-            }
-        )
+    for column in ["op_name", "input_type_shape"]:
+        stats[column] = stats[column].astype(object)
+    op_counts = op_counts.reset_index().astype({"op_name": object, "input_type_shape": object})
+    stats = stats.merge(op_counts, on=["op_name", "input_type_shape"], how="inner", sort=False)
+    df = pd.DataFrame(
+        {
+            "op_name": stats["op_name"],
+            "input_type_shape": stats["input_type_shape"],
+            "op_count": stats["op_count"] / num_runs,  # Average op count per run
+            "kernel_name": stats["name"].astype(object),
+            "kernel_dimensions": stats["dimensions"].astype(object),
+            "kernel_count": stats["count"] / num_runs,  # Average kernel count per run
+            "kernel_avg_dur (us)": stats["sum"] / stats["count"],
+            "kernel_total_dur (us)": stats["sum"] / num_runs,
+        }
+    )
 
-    df = pd.DataFrame(kernel_list)
     df["op_dur (us)"] = df.groupby(["op_name", "input_type_shape"])["kernel_total_dur (us)"].transform("sum")
     df["op_avg_dur (us)"] = df["op_dur (us)"] / df["op_count"]
     df = df.sort_values(
@@ -271,52 +461,18 @@ def _construct_filter_matcher(args):
     return _match_item
 
 
-def _split_data_across_runs(data, start=1, end=None):
-    """
-    Splits the traces according to model runs they belong to.
-    By default, we skip the first model run (run 0) and consider all subsequent runs.
-    """
-    # Here we assume that the traces are properly ordered, so we can simplify the splitting logic.
-    model_run_splits = [i for i, item in enumerate(data) if item.get("name") == "model_run"]
-    if not model_run_splits:
-        print('WARNING: Could not find "model_run" event in trace. Using entire traces.')
-        return data
-    total_num_runs = len(model_run_splits)
-    print(f"Found {total_num_runs} model_run events in trace.")
-
-    assert -total_num_runs <= start < total_num_runs, f"Invalid start index {start}."
-    if start < 0:
-        start += total_num_runs
-    if end is None:
-        end = total_num_runs
-    else:
-        assert -total_num_runs <= end < total_num_runs, f"Invalid end index {end}."
-        if end < 0:
-            end += total_num_runs
-    num_runs = end - start
-    assert num_runs > 0, "No valid model runs are included in the split."
-    print(f"Analyzing {num_runs} model run(s): {start}-{end - 1}.")
-
-    # Add index 0 in case user wants to include the first model run.
-    model_run_splits = [0, *model_run_splits]
-    return data[model_run_splits[start] : model_run_splits[end]], num_runs
-
-
-def _load_json(profile_path):
-    with open(profile_path, encoding="utf-8") as file_obj:
-        data = json.load(file_obj)
-    if isinstance(data, dict):
-        data = data["traceEvents"]
-    return data
-
-
 def main():
     args = _get_args()
     filter_matcher = _construct_filter_matcher(args)
 
-    data = _load_json(args.input)
-    data, num_runs = _split_data_across_runs(data, args.start, args.end)
-    cpu_df, gpu_df = _json_to_df(data, filter_matcher)
+    if args.input.endswith((".npz", ".parquet")):
+        columns = _TraceColumns.load(args.input, filter_matcher)
+    else:
+        columns = _TraceColumns()
+        columns.add_events(_iter_trace_events(args.input), filter_matcher)
+    if args.summary:
+        columns.save(args.summary)
+    cpu_df, gpu_df, num_runs = columns.to_df(args.start, args.end)
 
     pd.set_option("display.max_colwidth", 120)
     _print_top_hitters(cpu_df, args, target="cpu")
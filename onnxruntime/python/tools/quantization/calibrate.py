@@ -13,6 +13,7 @@ import os
 import tempfile
 import uuid
 from collections.abc import Sequence
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from enum import Enum
 from pathlib import Path
 
@@ -68,8 +69,8 @@ def entropy(
 
 
 class TensorData:
-    _allowed = frozenset(["avg", "std", "lowest", "highest", "hist", "hist_edges", "bins"])
-    _floats = frozenset(["avg", "std", "lowest", "highest", "hist_edges"])
+    _allowed = frozenset(["avg", "std", "lowest", "highest", "hist", "hist_edges", "bins", "threshold"])
+    _floats = frozenset(["avg", "std", "lowest", "highest", "hist_edges", "threshold"])
 
     def __init__(self, **kwargs):
         self._attrs = list(kwargs.keys())
@@ -392,6 +393,7 @@ class MinMaxCalibrater(CalibraterBase):
         averaging_constant=0.01,
         max_intermediate_outputs=None,
         per_channel=False,
+        num_workers=1,
     ):
         """
         :param model_path: ONNX model to calibrate. It is a model path
@@ -403,6 +405,9 @@ class MinMaxCalibrater(CalibraterBase):
         :param averaging_constant: constant smoothing factor to use when computing the moving average.
         :param max_intermediate_outputs: maximum number of intermediate outputs before an intermediate range is computed.
         :param per_channel: whether to compute ranges per each channel.
+        :param num_workers: number of calibration batches run concurrently. If greater than 1, the batches are
+            dispatched to a thread pool sharing the inference session and the min/max values are reduced as soon
+            as each run finishes, so memory usage does not grow with the number of batches.
         """
         super().__init__(
             model_path,
@@ -421,6 +426,9 @@ class MinMaxCalibrater(CalibraterBase):
             raise ValueError("Invalid averaging constant, which should not be < 0 or > 1.")
         self.averaging_constant = averaging_constant
         self.max_intermediate_outputs = max_intermediate_outputs
+        if num_workers < 1:
+            raise ValueError(f"Invalid num_workers={num_workers}, which should be >= 1.")
+        self.num_workers = num_workers
 
     def augment_graph(self):
         """
@@ -507,6 +515,10 @@ class MinMaxCalibrater(CalibraterBase):
         self.intermediate_outputs = []
 
     def collect_data(self, data_reader: CalibrationDataReader):
+        if self.num_workers > 1:
+            self.collect_data_parallel(data_reader)
+            return
+
         while True:
             inputs = data_reader.get_next()
             if not inputs:
@@ -594,7 +606,7 @@ class MinMaxCalibrater(CalibraterBase):
             i: merged_output_dict[i] for i in merged_output_dict if i not in self.model_original_outputs
         }
 
-        pairs = []
+        min_max_arrays = []
         for i in range(0, len(added_output_names), 2):
             if self.moving_average:
                 min_value_array = np.nanmean(merged_added_output_dict[added_output_names[i]], axis=0)
@@ -602,7 +614,16 @@ class MinMaxCalibrater(CalibraterBase):
             else:
                 min_value_array = np.nanmin(merged_added_output_dict[added_output_names[i]], axis=0)
                 max_value_array = np.nanmax(merged_added_output_dict[added_output_names[i + 1]], axis=0)
+            min_max_arrays.append((min_value_array, max_value_array))
 
+        return self._update_tensors_range(calibrate_tensor_names, min_max_arrays)
+
+    def _update_tensors_range(self, calibrate_tensor_names, min_max_arrays):
+        """
+        Merge the min-max arrays computed over a set of batches into the calibrated tensor ranges.
+        """
+        pairs = []
+        for min_value_array, max_value_array in min_max_arrays:
             if self.symmetric:
                 max_absolute_value = np.nanmax([np.abs(min_value_array), np.abs(max_value_array)], axis=0)
                 pairs.append((-max_absolute_value, max_absolute_value))
@@ -619,6 +640,68 @@ class MinMaxCalibrater(CalibraterBase):
 
         return self.calibrate_tensors_range
 
+    def collect_data_parallel(self, data_reader: CalibrationDataReader):
+        """
+        Run the calibration batches on a pool of `num_workers` threads and reduce the ReduceMin/ReduceMax
+        outputs incrementally. InferenceSession.run is thread-safe and releases the GIL, so all the threads
+        share `self.infer_session` and the model weights are loaded only once. At most 2 * num_workers batches
+        are in flight at any time and only the running reductions are kept, so memory usage is constant
+        with respect to the number of batches. The result is the same as the one of the serial collect_data.
+        """
+        added_output_names = [output.name for output in self.infer_session.get_outputs()[self.num_model_outputs :]]
+        calibrate_tensor_names = [
+            added_output_names[i].rpartition("_")[0] for i in range(0, len(added_output_names), 2)
+        ]
+
+        # For the moving average, reduced holds the sums of the non-NaN values and counts the number of them,
+        # otherwise reduced holds the running minimum and maximum (NaN values are ignored like np.nanmin/nanmax).
+        reduced = None
+        counts = None
+
+        def reduce_outputs(outputs):
+            nonlocal reduced, counts
+            if self.moving_average:
+                if reduced is None:
+                    reduced = [np.zeros_like(value) for value in outputs]
+                    counts = [np.zeros(value.shape, dtype=np.int64) for value in outputs]
+                for i, value in enumerate(outputs):
+                    is_valid = ~np.isnan(value)
+                    reduced[i] += np.where(is_valid, value, 0)
+                    counts[i] += is_valid
+            elif reduced is None:
+                reduced = list(outputs)
+            else:
+                for i in range(0, len(outputs), 2):
+                    reduced[i] = np.fmin(reduced[i], outputs[i])
+                    reduced[i + 1] = np.fmax(reduced[i + 1], outputs[i + 1])
+
+        max_pending = 2 * self.num_workers
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            pending = set()
+            while True:
+                inputs = data_reader.get_next()
+                if not inputs:
+                    break
+                pending.add(executor.submit(self.infer_session.run, added_output_names, inputs))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        reduce_outputs(future.result())
+            for future in pending:
+                reduce_outputs(future.result())
+
+        if reduced is None:
+            if self.calibrate_tensors_range is None:
+                raise ValueError("No data is collected.")
+            return
+
+        if self.moving_average:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                reduced = [(value / count).astype(value.dtype) for value, count in zip(reduced, counts, strict=True)]
+
+        min_max_arrays = [(reduced[i], reduced[i + 1]) for i in range(0, len(reduced), 2)]
+        self._update_tensors_range(calibrate_tensor_names, min_max_arrays)
+
 
 class HistogramCalibrater(CalibraterBase):
     def __init__(
@@ -633,6 +716,8 @@ class HistogramCalibrater(CalibraterBase):
         num_quantized_bins=2048,
         percentile=99.999,
         scenario="same",
+        max_intermediate_outputs=None,
+        num_workers=1,
     ):
         """
         :param model_path: ONNX model to calibrate. It is a model path.
@@ -645,6 +730,9 @@ class HistogramCalibrater(CalibraterBase):
         :param num_quantized_bins: number of quantized bins. Default 128.
         :param percentile: A float number between [0, 100]. Default 99.99.
         :param scenario: see :class:`DistributionCalibrater`
+        :param max_intermediate_outputs: maximum number of intermediate outputs kept in memory before they are
+            added to the histograms. By default, all the outputs of a collect_data call are kept in memory.
+        :param num_workers: number of tensors whose entropy threshold is searched concurrently.
         """
         super().__init__(
             model_path,
@@ -664,6 +752,8 @@ class HistogramCalibrater(CalibraterBase):
         self.percentile = percentile
         self.tensors_to_calibrate = None
         self.scenario = scenario
+        self.max_intermediate_outputs = max_intermediate_outputs
+        self.num_workers = num_workers
 
     def augment_graph(self):
         """
@@ -690,52 +780,106 @@ class HistogramCalibrater(CalibraterBase):
         """
         input_names_set = {node_arg.name for node_arg in self.infer_session.get_inputs()}
         output_names = [node_arg.name for node_arg in self.infer_session.get_outputs()]
+        calibrated_outputs = [
+            (output_index, output_name)
+            for output_index, output_name in enumerate(output_names)
+            if output_name in self.tensors_to_calibrate
+        ]
 
+        has_data = False
         while True:
             inputs = data_reader.get_next()
             if not inputs:
                 break
             outputs = self.infer_session.run(None, inputs)
+            has_data = True
 
             # Copy np.ndarray only for graph outputs that are also graph inputs to workaround bug:
             # https://github.com/microsoft/onnxruntime/issues/21922
-            fixed_outputs = []
-            for output_index, output in enumerate(outputs):
-                if output_names[output_index] in input_names_set:
-                    fixed_outputs.append(copy.copy(output))
-                else:
-                    fixed_outputs.append(output)
-
-            self.intermediate_outputs.append(fixed_outputs)
+            self.intermediate_outputs.append(
+                {
+                    output_name: copy.copy(outputs[output_index])
+                    if output_name in input_names_set
+                    else outputs[output_index]
+                    for output_index, output_name in calibrated_outputs
+                }
+            )
+            if (
+                self.max_intermediate_outputs is not None
+                and len(self.intermediate_outputs) >= self.max_intermediate_outputs
+            ):
+                self._collect_intermediate_outputs()
 
-        if len(self.intermediate_outputs) == 0:
+        if not has_data:
             raise ValueError("No data is collected.")
 
-        output_dicts_list = [
-            dict(zip(output_names, intermediate_output, strict=False))
-            for intermediate_output in self.intermediate_outputs
-        ]
+        self._collect_intermediate_outputs()
+
+    def _collect_intermediate_outputs(self):
+        """
+        Add the intermediate outputs kept in memory to the histograms and release them.
+        """
+        if len(self.intermediate_outputs) == 0:
+            return
 
         merged_dict = {}
-        for d in output_dicts_list:
+        for d in self.intermediate_outputs:
             for k, v in d.items():
                 merged_dict.setdefault(k, []).append(v)
 
-        clean_merged_dict = {i: merged_dict[i] for i in merged_dict if i in self.tensors_to_calibrate}
-
         if not self.collector:
-            self.collector = HistogramCollector(
-                method=self.method,
-                symmetric=self.symmetric,
-                num_bins=self.num_bins,
-                num_quantized_bins=self.num_quantized_bins,
-                percentile=self.percentile,
-                scenario=self.scenario,
-            )
-        self.collector.collect(clean_merged_dict)
+            self.collector = self._create_collector()
+        self.collector.collect(merged_dict)
 
         self.clear_collected_data()
 
+    def _create_collector(self):
+        return HistogramCollector(
+            method=self.method,
+            symmetric=self.symmetric,
+            num_bins=self.num_bins,
+            num_quantized_bins=self.num_quantized_bins,
+            percentile=self.percentile,
+            scenario=self.scenario,
+            num_workers=self.num_workers,
+        )
+
+    def _get_calibration_method(self):
+        if isinstance(self, EntropyCalibrater):
+            return CalibrationMethod.Entropy
+        if isinstance(self, PercentileCalibrater):
+            return CalibrationMethod.Percentile
+        if isinstance(self, DistributionCalibrater):
+            return CalibrationMethod.Distribution
+        raise TypeError(f"Unknown calibrater {type(self)}. This method must be overwritten.")
+
+    def save_collected_data(self, path: str | Path):
+        """
+        Save the histograms collected so far with save_tensors_data so that a long calibration
+        can be resumed later with load_collected_data.
+        """
+        if not self.collector:
+            raise ValueError("No collector created and can't save the collected data.")
+        save_tensors_data(self.collector.get_tensors_data(self._get_calibration_method()), path)
+
+    def load_collected_data(self, path: str | Path):
+        """
+        Merge the histograms saved by save_collected_data into the histograms of this calibrater.
+        Histograms collected on different shards of the calibration data can be combined this way.
+        """
+        tensors_data = load_tensors_data(path)
+        if tensors_data.calibration_method != self._get_calibration_method():
+            raise ValueError(
+                f"The histograms in {path} were collected for {tensors_data.calibration_method}, "
+                f"not {self._get_calibration_method()}."
+            )
+        collector = self._create_collector()
+        collector.set_tensors_data(tensors_data)
+        if self.collector:
+            self.collector.merge(collector)
+        else:
+            self.collector = collector
+
     def compute_data(self) -> TensorsData:
         """
         Compute the min-max range of tensor
@@ -744,15 +888,7 @@ class HistogramCalibrater(CalibraterBase):
         if not self.collector:
             raise ValueError("No collector created and can't generate calibration data.")
 
-        if isinstance(self, EntropyCalibrater):
-            cal = CalibrationMethod.Entropy
-        elif isinstance(self, PercentileCalibrater):
-            cal = CalibrationMethod.Percentile
-        elif isinstance(self, DistributionCalibrater):
-            cal = CalibrationMethod.Distribution
-        else:
-            raise TypeError(f"Unknown calibrater {type(self)}. This method must be overwritten.")
-        return TensorsData(cal, self.collector.compute_collection_result())
+        return TensorsData(self._get_calibration_method(), self.collector.compute_collection_result())
 
 
 class EntropyCalibrater(HistogramCalibrater):
@@ -766,6 +902,8 @@ class EntropyCalibrater(HistogramCalibrater):
         symmetric=False,
         num_bins=128,
         num_quantized_bins=128,
+        max_intermediate_outputs=None,
+        num_workers=1,
     ):
         """
         :param model_path: ONNX model to calibrate. It is a model path
@@ -776,6 +914,8 @@ class EntropyCalibrater(HistogramCalibrater):
         :param symmetric: make range of tensor symmetric (central point is 0).
         :param num_bins: number of bins to create a new histogram for collecting tensor values.
         :param num_quantized_bins: number of quantized bins. Default 128.
+        :param max_intermediate_outputs: maximum number of intermediate outputs before they are added to the histograms.
+        :param num_workers: number of tensors whose entropy threshold is searched concurrently.
         """
         super().__init__(
             model_path,
@@ -786,6 +926,8 @@ class EntropyCalibrater(HistogramCalibrater):
             symmetric=symmetric,
             num_bins=num_bins,
             num_quantized_bins=num_quantized_bins,
+            max_intermediate_outputs=max_intermediate_outputs,
+            num_workers=num_workers,
         )
 
 
@@ -800,6 +942,7 @@ class PercentileCalibrater(HistogramCalibrater):
         symmetric=False,
         num_bins=2048,
         percentile=99.999,
+        max_intermediate_outputs=None,
     ):
         """
         :param model_path: ONNX model to calibrate. It is a model path
@@ -810,6 +953,7 @@ class PercentileCalibrater(HistogramCalibrater):
         :param symmetric: make range of tensor symmetric (central point is 0).
         :param num_quantized_bins: number of quantized bins. Default 128.
         :param percentile: A float number between [0, 100]. Default 99.99.
+        :param max_intermediate_outputs: maximum number of intermediate outputs before they are added to the histograms.
         """
         super().__init__(
             model_path,
@@ -820,6 +964,7 @@ class PercentileCalibrater(HistogramCalibrater):
             symmetric=symmetric,
             num_bins=num_bins,
             percentile=percentile,
+            max_intermediate_outputs=max_intermediate_outputs,
         )
 
 
@@ -833,6 +978,7 @@ class DistributionCalibrater(HistogramCalibrater):
         method="distribution",
         num_bins=128,
         scenario="same",
+        max_intermediate_outputs=None,
     ):
         """
         :param model_path: ONNX model to calibrate. It is a model path
@@ -846,6 +992,7 @@ class DistributionCalibrater(HistogramCalibrater):
             the algorithm weights and float 8 follow the same distribution,
             if `scenario="p3"`, it assumes the weights follow
             a gaussian law and float 8 ~ X^3 where X is a gaussian law
+        :param max_intermediate_outputs: maximum number of intermediate outputs before they are added to the histograms.
         """
         super().__init__(
             model_path,
@@ -855,6 +1002,7 @@ class DistributionCalibrater(HistogramCalibrater):
             method=method,
             num_bins=num_bins,
             scenario=scenario,
+            max_intermediate_outputs=max_intermediate_outputs,
         )
 
 
@@ -889,7 +1037,7 @@ class HistogramCollector(CalibrationDataCollector):
                  pytorch_quantization/calib/histogram.html
     """
 
-    def __init__(self, method, symmetric, num_bins, num_quantized_bins, percentile, scenario):
+    def __init__(self, method, symmetric, num_bins, num_quantized_bins, percentile, scenario, num_workers=1):
         self.histogram_dict = {}
         self.method = method
         self.symmetric = symmetric
@@ -897,6 +1045,8 @@ class HistogramCollector(CalibrationDataCollector):
         self.num_quantized_bins = num_quantized_bins
         self.percentile = percentile
         self.scenario = scenario
+        # number of tensors whose entropy threshold is searched concurrently
+        self.num_workers = num_workers
 
     def get_histogram_dict(self):
         return self.histogram_dict
@@ -966,8 +1116,8 @@ class HistogramCollector(CalibrationDataCollector):
                     # NOTE: np.arange may create an extra bin after the one containing temp_amax
                     new_bin_edges = np.arange(old_hist_edges[-1] + width, temp_amax + width, width)
                     old_hist_edges = np.hstack((old_hist_edges, new_bin_edges))
-                hist, hist_edges = np.histogram(data_arr_np, bins=old_hist_edges)
-                hist_edges = hist_edges.astype(data_arr_np.dtype)
+                hist = self._histogram_with_edges(data_arr_np, old_hist_edges)
+                hist_edges = old_hist_edges.astype(data_arr_np.dtype)
                 hist[: len(old_hist)] += old_hist
                 assert data_arr_np.dtype != np.float64, (
                     "only float32 or float16 is supported, every constant must be explicitly typed"
@@ -1038,6 +1188,87 @@ class HistogramCollector(CalibrationDataCollector):
                 new_threshold,
             )
 
+    @staticmethod
+    def _histogram_with_edges(data_arr, hist_edges):
+        """
+        Same result as np.histogram(data_arr, bins=hist_edges)[0] for increasing edges.
+        np.histogram sorts the data when the edges are given explicitly, the bins are looked up
+        with a binary search on the edges instead, which is linear in the number of values.
+        """
+        num_bins = hist_edges.size - 1
+        data_arr = data_arr[(data_arr >= hist_edges[0]) & (data_arr <= hist_edges[-1])]
+        indices = np.searchsorted(hist_edges, data_arr, side="right") - 1
+        # The last bin includes its right edge.
+        np.minimum(indices, num_bins - 1, out=indices)
+        return np.bincount(indices, minlength=num_bins)
+
+    @staticmethod
+    def _rebin(hist, hist_edges, new_edges):
+        """
+        Redistribute the counts of a histogram on new edges, every bin is moved to the new bin containing its center.
+        Bins outside of the new edges are moved to the first or the last bin.
+        """
+        if hist_edges.shape == new_edges.shape and np.array_equal(hist_edges, new_edges):
+            return hist
+        centers = np.clip((hist_edges[:-1] + hist_edges[1:]) * 0.5, new_edges[0], new_edges[-1])
+        new_hist, _ = np.histogram(centers, bins=new_edges, weights=hist)
+        return new_hist.astype(hist.dtype)
+
+    @classmethod
+    def merge_histograms(cls, histogram, other_histogram):
+        """
+        Merge two histograms collected for the same tensor on different data.
+        The counts of the histogram with the smaller range are redistributed over the bins of the other one.
+        """
+        if other_histogram[1][-1] > histogram[1][-1]:
+            histogram, other_histogram = other_histogram, histogram
+        hist, hist_edges, min_value, max_value = histogram[:4]
+        other_hist, other_hist_edges, other_min, other_max = other_histogram[:4]
+        merged = (
+            hist + cls._rebin(other_hist, other_hist_edges, hist_edges),
+            hist_edges,
+            min(min_value, other_min),
+            max(max_value, other_max),
+        )
+        if len(histogram) == 5:
+            # collect_value: the edges are symmetric and the threshold is the one of the wider histogram.
+            return (*merged, histogram[4])
+        return merged
+
+    def merge(self, other):
+        """
+        Merge the histograms collected by another HistogramCollector, for example the
+        partial histograms collected by other workers on other shards of the calibration data.
+        """
+        for tensor, histogram in other.histogram_dict.items():
+            if tensor in self.histogram_dict:
+                self.histogram_dict[tensor] = self.merge_histograms(self.histogram_dict[tensor], histogram)
+            else:
+                self.histogram_dict[tensor] = histogram
+
+    def get_tensors_data(self, calibration_method) -> TensorsData:
+        """
+        Return the partial histograms as TensorsData so that they can be saved with save_tensors_data.
+        """
+        data = {}
+        for tensor, histogram in self.histogram_dict.items():
+            kwargs = {"hist": histogram[0], "hist_edges": histogram[1], "lowest": histogram[2], "highest": histogram[3]}
+            if len(histogram) == 5:
+                kwargs["threshold"] = histogram[4]
+            data[tensor] = TensorData(**kwargs)
+        return TensorsData(calibration_method, data)
+
+    def set_tensors_data(self, tensors_data: TensorsData):
+        """
+        Restore the partial histograms returned by get_tensors_data.
+        """
+        self.histogram_dict = {}
+        for tensor, data in tensors_data.items():
+            histogram = (np.asarray(data.hist), data.hist_edges, data.lowest, data.highest)
+            if hasattr(data, "threshold"):
+                histogram = (*histogram, data.threshold)
+            self.histogram_dict[tensor] = histogram
+
     def compute_collection_result(self):
         if not self.histogram_dict or len(self.histogram_dict) == 0:
             raise ValueError("Histogram has not been collected. Please run collect() first.")
@@ -1108,9 +1339,21 @@ class HistogramCollector(CalibrationDataCollector):
         print(f"Number of histogram bins : {self.num_bins} (The number may increase depends on the data it collects)")
         print(f"Number of quantized bins : {self.num_quantized_bins}")
 
-        for tensor, histogram in histogram_dict.items():
-            optimal_threshold = self.get_entropy_threshold(histogram, num_quantized_bins)
-            thresholds_dict[tensor] = optimal_threshold
+        if self.num_workers > 1:
+            # The threshold search is made of large array operations releasing the GIL.
+            with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+                optimal_thresholds = list(
+                    executor.map(
+                        lambda histogram: self.get_entropy_threshold(histogram, num_quantized_bins),
+                        histogram_dict.values(),
+                    )
+                )
+        else:
+            optimal_thresholds = [
+                self.get_entropy_threshold(histogram, num_quantized_bins) for histogram in histogram_dict.values()
+            ]
+
+        for (tensor, histogram), optimal_threshold in zip(histogram_dict.items(), optimal_thresholds, strict=True):
             thresholds_dict[tensor] = (*optimal_threshold, *histogram[:2])
 
             # Plot histogram for debug only
@@ -1186,6 +1429,10 @@ class HistogramCollector(CalibrationDataCollector):
         The reference distribution is `q`, and the candidate distribution is `p`.
         `q` is a truncated version of the original distribution.
         Ref: http://on-demand.gputechconf.com/gtc/2017/presentation/s7310-8-bit-inference-with-tensorrt.pdf
+
+        The KL divergences of all the candidate thresholds are first computed together with array operations.
+        Their rounding differs from the one of the candidate by candidate computation, so the candidates
+        close to the minimum are evaluated again one by one to select the same threshold.
         """
         hist = histogram[0]
         hist_edges = histogram[1]
@@ -1194,8 +1441,6 @@ class HistogramCollector(CalibrationDataCollector):
         num_half_quantized_bin = num_quantized_bins // 2
 
         dtype = histogram[1].dtype
-        kl_divergence = np.zeros(zero_bin_index - num_half_quantized_bin + 1)
-        thresholds = [(np.array(0, dtype=dtype), np.array(0, dtype=dtype)) for i in range(kl_divergence.size)]
 
         # <------------ num bins ---------------->
         #        <--- quantized bins ---->
@@ -1211,56 +1456,40 @@ class HistogramCollector(CalibrationDataCollector):
         # |                                      |
         # start index                    end index       (end of iteration)
 
-        for i in range(num_half_quantized_bin, zero_bin_index + 1, 1):
-            start_index = zero_bin_index - i
-            end_index = min(zero_bin_index + i + 1, num_bins)
-
-            thresholds[i - num_half_quantized_bin] = (hist_edges[start_index], hist_edges[end_index])
-
-            sliced_distribution = copy.deepcopy(hist[start_index:end_index])
-
-            # reference distribution p
-            p = sliced_distribution.copy()  # a copy of np array
-            left_outliers_count = sum(hist[:start_index])
-            right_outliers_count = sum(hist[end_index:])
-            p[0] += left_outliers_count
-            p[-1] += right_outliers_count
-
-            # nonzeros[i] incidates whether p[i] is non-zero
-            nonzeros = (p != 0).astype(np.int64)
-
-            # quantize p.size bins into quantized bins (default 128 bins)
-            quantized_bins = np.zeros(num_quantized_bins, dtype=np.int64)
-            num_merged_bins = sliced_distribution.size // num_quantized_bins
-
-            # merge bins into quantized bins
-            for index in range(num_quantized_bins):
-                start = index * num_merged_bins
-                end = start + num_merged_bins
-                quantized_bins[index] = sum(sliced_distribution[start:end])
-            quantized_bins[-1] += sum(sliced_distribution[num_quantized_bins * num_merged_bins :])
-
-            # in order to compare p and q, we need to make length of q equals to length of p
-            # expand quantized bins into p.size bins
-            q = np.zeros(p.size, dtype=np.int64)
-            for index in range(num_quantized_bins):
-                start = index * num_merged_bins
-                end = start + num_merged_bins
-
-                norm = sum(nonzeros[start:end])
-                if norm != 0:
-                    q[start:end] = quantized_bins[index] / norm
-
-            p = smooth_distribution(p)
-            q = smooth_distribution(q)
-            if p is None or q is None:
-                div = np.array(np.inf, dtype=dtype)
+        candidates = np.arange(num_half_quantized_bin, zero_bin_index + 1)
+        start_indices = zero_bin_index - candidates
+        end_indices = np.minimum(zero_bin_index + candidates + 1, num_bins)
+
+        batched = self._get_entropy_divergences(hist, num_quantized_bins, start_indices, end_indices)
+        if batched is None:
+            # A candidate does not satisfy the assumptions of smooth_distribution, the candidate by candidate
+            # computation reports it.
+            kl_divergence = np.array(
+                [
+                    self._get_entropy_divergence(hist, num_quantized_bins, start_index, end_index, dtype)
+                    for start_index, end_index in zip(start_indices, end_indices, strict=True)
+                ]
+            )
+            min_kl_divergence_idx = np.argmin(kl_divergence)
+        else:
+            # The candidate by candidate divergences, rounded to dtype, are within max_errors of the batched ones.
+            # Only the candidates which can be the minimum given these bounds are evaluated again.
+            kl_divergence, max_errors = batched
+            max_errors = max_errors + np.finfo(dtype).eps * np.abs(kl_divergence)
+            close_indices = np.flatnonzero(kl_divergence - max_errors <= np.min(kl_divergence + max_errors))
+            if close_indices.size <= 1 or not np.isfinite(np.min(kl_divergence)):
+                min_kl_divergence_idx = np.argmin(kl_divergence)
             else:
-                div = np.array(entropy(p, q), dtype=dtype)
-            kl_divergence[i - num_half_quantized_bin] = div
+                exact_kl_divergence = [
+                    self._get_entropy_divergence(hist, num_quantized_bins, start_indices[idx], end_indices[idx], dtype)
+                    for idx in close_indices
+                ]
+                min_kl_divergence_idx = close_indices[np.argmin(exact_kl_divergence)]
 
-        min_kl_divergence_idx = np.argmin(kl_divergence)
-        optimal_threshold = thresholds[min_kl_divergence_idx]
+        optimal_threshold = (
+            hist_edges[start_indices[min_kl_divergence_idx]],
+            hist_edges[end_indices[min_kl_divergence_idx]],
+        )
         min_value = histogram[2]
         max_value = histogram[3]
         if optimal_threshold[0] < min_value:
@@ -1271,6 +1500,136 @@ class HistogramCollector(CalibrationDataCollector):
         assert hasattr(optimal_threshold[1], "dtype")
         return optimal_threshold
 
+    @staticmethod
+    def _get_entropy_divergence(hist, num_quantized_bins, start_index, end_index, dtype):
+        """
+        Compute the KL divergence between the reference distribution `p` and the quantized
+        distribution `q` when the histogram is clipped to the bins [start_index, end_index).
+        """
+        sliced_distribution = copy.deepcopy(hist[start_index:end_index])
+
+        # reference distribution p
+        p = sliced_distribution.copy()  # a copy of np array
+        left_outliers_count = sum(hist[:start_index])
+        right_outliers_count = sum(hist[end_index:])
+        p[0] += left_outliers_count
+        p[-1] += right_outliers_count
+
+        # nonzeros[i] incidates whether p[i] is non-zero
+        nonzeros = (p != 0).astype(np.int64)
+
+        # quantize p.size bins into quantized bins (default 128 bins)
+        quantized_bins = np.zeros(num_quantized_bins, dtype=np.int64)
+        num_merged_bins = sliced_distribution.size // num_quantized_bins
+
+        # merge bins into quantized bins
+        for index in range(num_quantized_bins):
+            start = index * num_merged_bins
+            end = start + num_merged_bins
+            quantized_bins[index] = sum(sliced_distribution[start:end])
+        quantized_bins[-1] += sum(sliced_distribution[num_quantized_bins * num_merged_bins :])
+
+        # in order to compare p and q, we need to make length of q equals to length of p
+        # expand quantized bins into p.size bins
+        q = np.zeros(p.size, dtype=np.int64)
+        for index in range(num_quantized_bins):
+            start = index * num_merged_bins
+            end = start + num_merged_bins
+
+            norm = sum(nonzeros[start:end])
+            if norm != 0:
+                q[start:end] = quantized_bins[index] / norm
+
+        p = smooth_distribution(p)
+        q = smooth_distribution(q)
+        if p is None or q is None:
+            return np.array(np.inf, dtype=dtype)
+        return np.array(entropy(p, q), dtype=dtype)
+
+    @staticmethod
+    def _get_entropy_divergences(hist, num_quantized_bins, start_indices, end_indices, max_chunk_size=1 << 22):
+        """
+        Batched version of _get_entropy_divergence for all the candidates [start_indices[i], end_indices[i]).
+        Every candidate is a row of a 2D array. The candidates are processed by chunks of consecutive candidates
+        of at most max_chunk_size elements, each chunk being padded to its longest candidate. The float32 sums are not done in the same order as in
+        _get_entropy_divergence, this returns the divergences with a bound of the difference for every candidate.
+        Returns None if a candidate does not satisfy the assumptions of smooth_distribution.
+        """
+        eps = 0.0001  # see smooth_distribution
+        error_factor = 256 * np.finfo(np.float32).eps
+        hist = hist.astype(np.int64)
+        cumsum = np.concatenate([[0], np.cumsum(hist)])
+        lengths = end_indices - start_indices
+        # The lengths of consecutive candidates differ by 2 bins, small chunks limit the padding.
+        chunk_size = max(1, min(64, max_chunk_size // int(lengths.max())))
+
+        kl_divergence = np.empty(lengths.size, dtype=np.float64)
+        max_errors = np.empty(lengths.size, dtype=np.float64)
+        for chunk_start in range(0, lengths.size, chunk_size):
+            chunk = slice(chunk_start, chunk_start + chunk_size)
+            starts = start_indices[chunk][:, np.newaxis]
+            ends = end_indices[chunk][:, np.newaxis]
+            chunk_lengths = lengths[chunk][:, np.newaxis]
+            positions = np.arange(chunk_lengths.max())
+            valid = positions < chunk_lengths
+            rows = np.arange(starts.shape[0])
+
+            # reference distribution p, the outliers are added to the first and last bins
+            p = np.where(valid, hist[np.minimum(starts + positions, hist.size - 1)], 0)
+            p[:, 0] += cumsum[starts[:, 0]]
+            p[rows, chunk_lengths[:, 0] - 1] += cumsum[-1] - cumsum[ends[:, 0]]
+            nonzeros = valid & (p != 0)
+
+            # quantized distribution q, every merged bin is spread over its nonzero bins
+            num_merged_bins = chunk_lengths // num_quantized_bins
+            bin_starts = starts + np.arange(num_quantized_bins) * num_merged_bins
+            quantized_bins = cumsum[bin_starts + num_merged_bins] - cumsum[bin_starts]
+            quantized_bins[:, -1] += cumsum[ends[:, 0]] - cumsum[bin_starts[:, -1] + num_merged_bins[:, 0]]
+            nonzeros_cumsum = np.concatenate(
+                [np.zeros((rows.size, 1), dtype=np.int64), np.cumsum(nonzeros, axis=1)], axis=1
+            )
+            bin_positions = np.arange(num_quantized_bins) * num_merged_bins
+            norms = nonzeros_cumsum[rows[:, np.newaxis], bin_positions + num_merged_bins]
+            norms -= nonzeros_cumsum[rows[:, np.newaxis], bin_positions]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                expanded = np.where(norms != 0, quantized_bins / norms, 0).astype(np.int64)
+            bin_of_position = np.minimum(positions // np.maximum(num_merged_bins, 1), num_quantized_bins - 1)
+            q = np.take_along_axis(expanded, bin_of_position, axis=1)
+            q[(positions >= num_quantized_bins * num_merged_bins) | ~valid] = 0
+
+            # smooth_distribution on every row
+            smoothed = []
+            for distribution in (p, q):
+                is_zeros = (valid & (distribution == 0)).astype(np.float32)
+                is_nonzeros = (valid & (distribution != 0)).astype(np.float32)
+                n_zeros = is_zeros.sum(axis=1, dtype=np.float64)
+                n_nonzeros = chunk_lengths[:, 0] - n_zeros
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    eps1 = np.where(n_nonzeros > 0, eps * n_zeros / n_nonzeros, 0)
+                if np.any(eps1 >= 1.0):
+                    return None
+                smoothed_distribution = distribution.astype(np.float32)
+                smoothed_distribution += np.float32(eps) * is_zeros + (-eps1.astype(np.float32))[:, np.newaxis] * (
+                    is_nonzeros
+                )
+                if np.any(valid & (smoothed_distribution <= 0)):
+                    return None
+                smoothed.append((smoothed_distribution, n_nonzeros > 0))
+            (pk, p_is_valid), (qk, q_is_valid) = smoothed
+
+            # entropy on every row
+            pk = pk / pk.sum(axis=1, keepdims=True)
+            qk = qk / qk.sum(axis=1, keepdims=True)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                terms = np.where(valid, pk * np.log(pk / qk), 0)
+            divergences = terms.sum(axis=1).astype(np.float64)
+            divergences[~(p_is_valid & q_is_valid)] = np.inf
+            kl_divergence[chunk] = divergences
+            # The normalizations and the sum differ by a few ulps relative to the sum of the absolute terms.
+            max_errors[chunk] = error_factor * (np.abs(terms).sum(axis=1) + 1)
+
+        return kl_divergence, max_errors
+
 
 def create_calibrator(
     model: str | Path,
@@ -1289,6 +1648,7 @@ def create_calibrator(
         averaging_constant = extra_options.get("averaging_constant", 0.01)
         max_intermediate_outputs = extra_options.get("max_intermediate_outputs", None)
         per_channel = extra_options.get("per_channel", False)
+        num_workers = extra_options.get("num_workers", 1)
         calibrator = MinMaxCalibrater(
             model,
             op_types_to_calibrate,
@@ -1299,12 +1659,15 @@ def create_calibrator(
             averaging_constant=averaging_constant,
             max_intermediate_outputs=max_intermediate_outputs,
             per_channel=per_channel,
+            num_workers=num_workers,
         )
     elif calibrate_method == CalibrationMethod.Entropy:
         # default settings for entropy algorithm
         num_bins = extra_options.get("num_bins", 128)
         num_quantized_bins = extra_options.get("num_quantized_bins", 128)
         symmetric = extra_options.get("symmetric", False)
+        max_intermediate_outputs = extra_options.get("max_intermediate_outputs", None)
+        num_workers = extra_options.get("num_workers", 1)
         calibrator = EntropyCalibrater(
             model,
             op_types_to_calibrate,
@@ -1313,12 +1676,15 @@ def create_calibrator(
             symmetric=symmetric,
             num_bins=num_bins,
             num_quantized_bins=num_quantized_bins,
+            max_intermediate_outputs=max_intermediate_outputs,
+            num_workers=num_workers,
         )
     elif calibrate_method == CalibrationMethod.Percentile:
         # default settings for percentile algorithm
         num_bins = extra_options.get("num_bins", 2048)
         percentile = extra_options.get("percentile", 99.999)
         symmetric = extra_options.get("symmetric", True)
+        max_intermediate_outputs = extra_options.get("max_intermediate_outputs", None)
         calibrator = PercentileCalibrater(
             model,
             op_types_to_calibrate,
@@ -1327,12 +1693,14 @@ def create_calibrator(
             symmetric=symmetric,
             num_bins=num_bins,
             percentile=percentile,
+            max_intermediate_outputs=max_intermediate_outputs,
         )
 
     elif calibrate_method == CalibrationMethod.Distribution:
         # default settings for percentile algorithm
         num_bins = extra_options.get("num_bins", 2048)
         scenario = extra_options.get("scenario", "same")
+        max_intermediate_outputs = extra_options.get("max_intermediate_outputs", None)
 
         calibrator = DistributionCalibrater(
             model,
@@ -1341,6 +1709,7 @@ def create_calibrator(
             use_external_data_format=use_external_data_format,
             num_bins=num_bins,
             scenario=scenario,
+            max_intermediate_outputs=max_intermediate_outputs,
         )
 
     if calibrator:
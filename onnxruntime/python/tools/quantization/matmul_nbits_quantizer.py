@@ -10,6 +10,8 @@ import argparse
 import copy
 import logging
 import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 
 import ml_dtypes
 import numpy as np
@@ -198,6 +200,7 @@ class HQQWeightOnlyQuantConfig(WeightOnlyQuantConfig):
         quant_format=QuantFormat.QOperator,
         op_types_to_quantize: tuple[str, ...] | None = None,
         quant_axes: tuple[tuple[str, int], ...] | None = None,
+        batch_size: int = 1,
     ):
         """
         This is a class for HQQ algorithm Weight Only Quant Configuration.
@@ -218,6 +221,9 @@ class HQQWeightOnlyQuantConfig(WeightOnlyQuantConfig):
                 set of operator types to quantize.
             quant_axes (dict[str, int], optional):
                 op:axis, which axis to quantize for an op. Default {MatMul: 0, Gather: 1}
+            batch_size (int, optional):
+                max number of MatMul weights of the same shape that are optimized together.
+                Default is 1, which optimizes weights one by one.
         """
         assert quant_format == QuantFormat.QOperator, "HQQ only supports QOperator format"
 
@@ -230,6 +236,7 @@ class HQQWeightOnlyQuantConfig(WeightOnlyQuantConfig):
         self.block_size = block_size
         self.bits = bits
         self.axis = axis
+        self.batch_size = batch_size
 
 
 class DefaultWeightOnlyQuantConfig(WeightOnlyQuantConfig):
@@ -528,6 +535,19 @@ class NVAWQWeightOnlyQuantConfig(WeightOnlyQuantConfig):
         return batched_inputs_list
 
 
+# Max number of weight elements that HQQWeightOnlyQuantizer optimizes together with numpy.
+_HQQ_NUMPY_BATCH_ELEMENTS = 1 << 18
+
+
+def _array_module(tensor):
+    """Return numpy for a numpy array, or torch for a torch tensor."""
+    if isinstance(tensor, np.ndarray):
+        return np
+    import torch  # noqa: PLC0415
+
+    return torch
+
+
 def is_divisible(val1, val2):
     return int(val2 * np.ceil(val1 / val2)) == val1
 
@@ -536,22 +556,31 @@ class HQQWeightOnlyQuantizer:
     def __init__(
         self,
         config: HQQWeightOnlyQuantConfig,
+        base_dir: str | None = None,
     ):
         self.config = config
+        # Directory of external data of the model, when the external data is not loaded.
+        self.base_dir = base_dir
+        # Batch of same-shaped weights that each weight belongs to, see prepare_batches.
+        self._batches: dict[str, list[TensorProto]] = {}
+        # Packed weights, scales and zero points of weights quantized ahead in a batch.
+        self._quantized: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
 
     # Proximal solver || weight - dequantize(quantize(weight))||_p^p
     @staticmethod
-    def optimize_weights(
+    def _optimize_weights_batch(
         tensor,
         scale,
         zero,
         min_max: list[int],
-        axis: int = 0,
         opt_params: dict | None = None,
         verbose=False,
     ):
-        import torch  # noqa: PLC0415
-
+        """
+        Optimize scale and zero of grouped weights. tensor is a torch tensor or a numpy array of shape
+        [batch, groups, group_size], where batch is the number of weights optimized together. Each weight stops
+        at the iteration where its own error stops decreasing.
+        """
         opt_params = {"lp_norm": 0.7, "beta": 1e1, "kappa": 1.01, "iters": 20} if opt_params is None else opt_params
         lp_norm, beta, kappa, iters = (
             opt_params["lp_norm"],
@@ -560,78 +589,95 @@ class HQQWeightOnlyQuantizer:
             opt_params["iters"],
         )
 
-        dtype = torch.float16 if tensor.is_cuda else torch.float32
-        w_f = tensor.to(dtype)
-        scale = scale.to(dtype)
-        zero = zero.to(dtype)
+        if isinstance(tensor, np.ndarray):
+            xp = np
+            w_f = tensor.astype(np.float32, copy=False)
+            scale = scale.astype(np.float32, copy=False)
+            zero = zero.astype(np.float32, copy=False)
+        else:
+            import torch  # noqa: PLC0415
+
+            xp = torch
+            dtype = torch.float16 if tensor.is_cuda else torch.float32
+            w_f = tensor.to(dtype)
+            scale = scale.to(dtype)
+            zero = zero.to(dtype)
 
+        # sign(x) * relu(abs(x) - threshold), computed as x - clip(x, -threshold, threshold)
         def shrink_op(x, beta, p=lp_norm):
             if p == 1:
-                return torch.sign(x) * torch.nn.functional.relu(torch.abs(x) - 1.0 / beta)
+                return x - xp.clip(x, -1.0 / beta, 1.0 / beta)
             else:
-                return torch.sign(x) * torch.nn.functional.relu(
-                    torch.abs(x) - (1.0 / beta) * torch.pow(torch.abs(x) + 1e-8, p - 1)
-                )
-
-        best_error = 1e4
+                threshold = (1.0 / beta) * (xp.abs(x) + 1e-8) ** (p - 1)
+                return x - xp.clip(x, -threshold, threshold)
+
+        batch = w_f.shape[0]
+        best_error = [1e4] * batch
+        best_zero = None
+        # Weights that are still optimized. A weight is removed from w_f, w_s and zero once its error stops decreasing.
+        active = list(range(batch))
+        w_s = scale
         for i in range(iters):
-            w_q = torch.round(w_f * scale + zero).clamp(min_max[0], min_max[1])
-            w_r = (w_q - zero) / scale
+            w_q = xp.clip(xp.round(w_f * w_s + zero), min_max[0], min_max[1])
+            w_r = (w_q - zero) / w_s
             w_e = shrink_op(w_f - w_r, beta)
-            zero = torch.mean(w_q - (w_f - w_e) * scale, axis=axis, keepdim=True)
+            zero = xp.mean(w_q - (w_f - w_e) * w_s, -1)[..., None]
             beta *= kappa
 
-            current_error = float(torch.abs(w_f - w_r).mean())
+            current_error = xp.abs(w_f - w_r).reshape(len(active), -1).mean(1).tolist()
             if verbose:
                 print(i, np.round(current_error, 6))
-            if current_error < best_error:
-                best_error = current_error
+            keep = []
+            for j, b in enumerate(active):
+                if current_error[j] < best_error[b]:
+                    best_error[b] = current_error[j]
+                    keep.append(j)
+            if len(keep) == len(active):
+                continue
+
+            # Weights that stop here keep the zero of this iteration.
+            if best_zero is None:
+                best_zero = zero
             else:
+                best_zero[active] = zero
+            active = [active[j] for j in keep]
+            if not active:
                 break
+            w_f, w_s, zero = w_f[keep], w_s[keep], zero[keep]
 
-        del w_f, w_q, w_r, w_e
+        if active:
+            if best_zero is None:
+                best_zero = zero
+            else:
+                best_zero[active] = zero
 
-        return scale, zero
+        del w_f, w_s
 
-    @staticmethod
-    def pack_on_row_fast_248bit(pack_tensor, ori_int_tensor, bits):
-        if pack_tensor.shape[0] == ori_int_tensor.shape[0]:
-            ori_int_tensor = ori_int_tensor.T
-            pack_tensor = pack_tensor.T
-        if bits in [2, 4, 8]:
-            compress_ratio = pack_tensor.element_size() * 8 // bits
-            for j in range(compress_ratio):
-                pack_tensor[0:] |= ori_int_tensor[j::compress_ratio] << (bits * (j))
-        else:
-            raise NotImplementedError("Only 2,4,8 bits are supported.")
+        return scale, best_zero
 
     # from Official implementation of Half-Quadratic Quantization (HQQ)
-    def quantize_internal(
-        self, tensor, bits=4, channel_wise=True, group_size=64, optimize=True, round_zero=True, axis=1
-    ):
-        import torch  # noqa: PLC0415
-
-        weight = tensor.float()
-        ori_shape = weight.shape
-
-        pad_len = (group_size - ori_shape[axis] % group_size) % group_size
-        if axis == 1:
-            weight = torch.nn.functional.pad(weight, (0, pad_len), "constant", 0)
+    def _quantize_internal_batch(self, tensor, bits=4, group_size=64, optimize=True, round_zero=True):
+        """
+        Quantize weights of shape [batch, rows, cols] in groups of group_size along cols. tensor is a torch tensor
+        or a numpy array, and cols shall be a multiple of group_size.
+        Returns quantized weights in float, scale and zero of shape [batch, rows, cols // group_size].
+        """
+        if isinstance(tensor, np.ndarray):
+            xp = np
+            weight = tensor.astype(np.float32)
         else:
-            weight = torch.nn.functional.pad(weight, (0, 0, 0, pad_len), "constant", 0)
+            import torch  # noqa: PLC0415
+
+            xp = torch
+            weight = tensor.float()
         shape = weight.shape
 
         # Reshape for grouping
-        if (group_size is not None) and channel_wise:
-            weight = weight.reshape([-1, group_size]) if (axis == 1) else weight.reshape([group_size, -1])
+        weight = weight.reshape(shape[0], -1, group_size)
 
         # Get min/max values
-        if channel_wise is False:
-            _min, _max = weight.min(), weight.max()
-            optimize = False
-        else:
-            _min = weight.min(axis=axis, keepdim=True)[0]
-            _max = weight.max(axis=axis, keepdim=True)[0]
+        _min = xp.amin(weight, -1)[..., None]
+        _max = xp.amax(weight, -1)[..., None]
 
         max_v = 2**bits - 1
         min_v = 0
@@ -639,37 +685,192 @@ class HQQWeightOnlyQuantizer:
 
         # Note: here we work with the inverse of the scale to avoid division and quantize instead via weight*scale + zero, the scale is inverted later on.
         # clamp to avoid half-precision problems
-        scale = (max_v / (_max - _min)).clamp(max=2e4)
-        #!!!!!!!!!!!!!!!
         min_max_axis = _max - _min
-        if (min_max_axis == 0).sum().item() > 0:
-            min_max_axis[min_max_axis == 0] = max_v
-            scale = (max_v / min_max_axis).clamp(max=2e4)
+        min_max_axis[min_max_axis == 0] = max_v
+        scale = xp.clip(max_v / min_max_axis, None, 2e4)
         zero = -_min * scale
 
         if round_zero:
-            zero = torch.round(zero)
+            zero = xp.round(zero)
 
         # Fine-tune weights
         if optimize:
-            scale, zero = self.optimize_weights(tensor=weight, scale=scale, zero=zero, min_max=min_max, axis=axis)
+            scale, zero = self._optimize_weights_batch(tensor=weight, scale=scale, zero=zero, min_max=min_max)
 
         # Quantize
-        # Necessary for fake quantization backprop
-        w_q = torch.round(weight * scale + zero).clamp(min_max[0], min_max[1])
-        w_q = w_q.reshape(shape).int()
+        w_q = xp.clip(xp.round(weight * scale + zero), min_max[0], min_max[1])
+        w_q = w_q.reshape(shape)
 
         scale = 1.0 / scale
-        if axis == 1:
-            scale = scale.reshape(shape[0], -1)
-            zero = zero.reshape(shape[0], -1)
-        else:
-            scale = scale.reshape(-1, shape[-1])
-            zero = zero.reshape(-1, shape[-1])
+        scale = scale.reshape(shape[0], shape[1], -1)
+        zero = zero.reshape(shape[0], shape[1], -1)
         # cleanup
         del weight, _min, _max
 
-        return w_q, scale.to(tensor.dtype), zero.to(tensor.dtype)
+        return w_q, scale, zero
+
+    @staticmethod
+    def optimize_weights(
+        tensor,
+        scale,
+        zero,
+        min_max: list[int],
+        axis: int = 0,
+        opt_params: dict | None = None,
+        verbose=False,
+    ):
+        """
+        Optimize scale and zero of a weight grouped along axis. tensor is a torch tensor or a numpy array.
+        """
+        xp = _array_module(tensor)
+        scale, zero = HQQWeightOnlyQuantizer._optimize_weights_batch(
+            xp.moveaxis(tensor, axis, -1)[None],
+            xp.moveaxis(scale, axis, -1)[None],
+            xp.moveaxis(zero, axis, -1)[None],
+            min_max,
+            opt_params,
+            verbose,
+        )
+        return xp.moveaxis(scale[0], -1, axis), xp.moveaxis(zero[0], -1, axis)
+
+    @staticmethod
+    def pack_on_row_fast_248bit(pack_tensor, ori_int_tensor, bits):
+        if pack_tensor.shape[0] == ori_int_tensor.shape[0]:
+            ori_int_tensor = ori_int_tensor.T
+            pack_tensor = pack_tensor.T
+        if bits in [2, 4, 8]:
+            compress_ratio = pack_tensor.element_size() * 8 // bits
+            for j in range(compress_ratio):
+                pack_tensor[0:] |= ori_int_tensor[j::compress_ratio] << (bits * (j))
+        else:
+            raise NotImplementedError("Only 2,4,8 bits are supported.")
+
+    def quantize_internal(
+        self, tensor, bits=4, channel_wise=True, group_size=64, optimize=True, round_zero=True, axis=1
+    ):
+        """
+        Quantize a 2D weight in groups of group_size along axis, which is padded to a multiple of group_size.
+        tensor is a torch tensor or a numpy array. Returns quantized weights in int32, and scale and zero in the
+        data type of tensor.
+        """
+        xp = _array_module(tensor)
+        if xp is np:
+            weight = tensor.astype(np.float32)
+            pad_width = [(0, 0), (0, 0)]
+            pad_width[axis] = (0, (group_size - weight.shape[axis] % group_size) % group_size)
+            weight = np.pad(weight, pad_width)
+        else:
+            weight = tensor.float()
+            pad_len = (group_size - weight.shape[axis] % group_size) % group_size
+            pad = (0, pad_len) if axis == 1 else (0, 0, 0, pad_len)
+            weight = xp.nn.functional.pad(weight, pad, "constant", 0)
+        shape = weight.shape
+
+        if not channel_wise:
+            # A single group of all weights, which is not optimized.
+            w_q, scale, zero = self._quantize_internal_batch(
+                weight.reshape(1, 1, -1), bits, weight.reshape(-1).shape[0], False, round_zero
+            )
+            scale, zero = scale.reshape(1, 1), zero.reshape(1, 1)
+        elif axis == 1:
+            w_q, scale, zero = self._quantize_internal_batch(weight[None], bits, group_size, optimize, round_zero)
+            scale, zero = scale[0], zero[0]
+        else:
+            # Groups are the columns of the weight reshaped to [group_size, -1].
+            grouped = weight.reshape(group_size, -1).T[None]
+            w_q, scale, zero = self._quantize_internal_batch(grouped, bits, group_size, optimize, round_zero)
+            w_q = w_q[0].T
+            scale, zero = scale.reshape(-1, shape[-1]), zero.reshape(-1, shape[-1])
+        w_q = w_q.reshape(shape)
+
+        if xp is np:
+            return w_q.astype(np.int32), scale.astype(tensor.dtype), zero.astype(tensor.dtype)
+        return w_q.int(), scale.to(tensor.dtype), zero.to(tensor.dtype)
+
+    def quantize_weights(self, weights: list[np.ndarray]) -> list[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Quantize 2D weights [K, N] of the same shape and data type together. The optimization runs with torch
+        when it is installed, otherwise with numpy.
+        Returns packed weights, scales and zero points in the layout of MatMulNBits for each weight.
+        """
+        bits = self.config.bits
+        block_size = self.config.block_size
+        rows, cols = weights[0].shape
+        pad_len = (block_size - rows % block_size) % block_size
+        # [batch, N, K] with K padded to a multiple of block_size
+        weight = np.pad(np.stack(weights).transpose(0, 2, 1), ((0, 0), (0, 0), (0, pad_len)))
+
+        try:
+            import torch  # noqa: PLC0415
+        except ImportError:
+            torch = None
+
+        if torch is None:
+            # Each iteration of the optimization is memory bound on CPU, so numpy only optimizes together as many
+            # weights as fit in the cache.
+            step = max(1, _HQQ_NUMPY_BATCH_ELEMENTS // weight[0].size)
+            results = [
+                self._quantize_internal_batch(weight[i : i + step], bits=bits, group_size=block_size)
+                for i in range(0, len(weights), step)
+            ]
+            quant_weight, scales, zero_points = (np.concatenate(arrays) for arrays in zip(*results, strict=True))
+        else:
+            weight = torch.from_numpy(weight)
+            if torch.cuda.is_available():
+                weight = weight.cuda()
+            quant_weight, scales, zero_points = (
+                t.cpu().numpy() for t in self._quantize_internal_batch(weight, bits=bits, group_size=block_size)
+            )
+
+        # pack along K, the j-th of every packed_size elements goes to the j-th bits of a byte
+        quant_weight = quant_weight.astype(np.uint8)
+        packed_size = 8 // bits  # number of elements packed into one byte
+        packed = np.zeros_like(quant_weight[..., ::packed_size])
+        for j in range(packed_size):
+            packed |= quant_weight[..., j::packed_size] << (bits * j)
+
+        # reshape to the predefined shape in MatmulNbits
+        k_blocks = (rows + block_size - 1) // block_size
+        blob_size = block_size // packed_size
+        packed = packed.reshape(len(weights), cols, k_blocks, blob_size)
+        scales = scales.astype(weights[0].dtype).reshape(len(weights), -1)
+        zero_points = zero_points.astype(weights[0].dtype).reshape(len(weights), -1)
+        return list(zip(packed, scales, zero_points, strict=True))
+
+    def prepare_batches(self, weights: list[TensorProto]):
+        """
+        Group weights of the same shape and data type into batches of at most config.batch_size weights, in the
+        order of the given weights. All weights of a batch are quantized together when the first one is quantized.
+        """
+        self._batches = {}
+        self._quantized = {}
+        open_batches: dict[tuple[int, int, int], list[TensorProto]] = {}
+        for weight in weights:
+            key = (weight.dims[-2], weight.dims[-1], weight.data_type)
+            batch = open_batches.setdefault(key, [])
+            batch.append(weight)
+            self._batches[weight.name] = batch
+            if len(batch) == self.config.batch_size:
+                del open_batches[key]
+
+    def _quantize_matmul_weight(self, name: str, b_array: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        quantized = self._quantized.pop(name, None)
+        if quantized is not None:
+            return quantized
+
+        others = [weight for weight in self._batches.pop(name, []) if weight.name != name]
+        other_arrays = []
+        for weight in others:
+            del self._batches[weight.name]
+            array = onnx.numpy_helper.to_array(weight, self.base_dir or "")
+            other_arrays.append(array.reshape(array.shape[-2], array.shape[-1]))
+        if others:
+            logger.info(f"quantize {name} together with {len(others)} weights of the same shape ...")
+
+        results = self.quantize_weights([b_array, *other_arrays])
+        for weight, result in zip(others, results[1:], strict=True):
+            self._quantized[weight.name] = result
+        return results[0]
 
     def quantize(self, node: NodeProto, graph_stack: list[GraphProto]) -> list[NodeProto]:
         """
@@ -687,8 +888,6 @@ class HQQWeightOnlyQuantizer:
         if node.op_type == "Gather":
             raise NotImplementedError("Gather quantization is not supported yet in HQQ")
 
-        import torch  # noqa: PLC0415
-
         logger.info(f"start to quantize {node.name} ...")
         input_b = node.input[1]
         b_pb, bs_graph = get_initializer(input_b, graph_stack)
@@ -696,7 +895,7 @@ class HQQWeightOnlyQuantizer:
             logger.info("MatMul doesn't have const weight. Skip to quantize")
             return [node]  # only care about constant weight
 
-        b_array = onnx.numpy_helper.to_array(b_pb)
+        b_array = onnx.numpy_helper.to_array(b_pb, self.base_dir or "")
         b_original_shape = b_array.shape
         if len(b_original_shape) != 2:
             if len(b_original_shape) < 2:
@@ -714,38 +913,11 @@ class HQQWeightOnlyQuantizer:
             b_array = b_array.reshape(b_original_shape[-2], b_original_shape[-1])
         else:
             b_original_shape = None  # already 2-D, no reshape needed
-        b_array_torch = torch.from_numpy(b_array)
-        if torch.cuda.is_available():
-            b_array_torch = b_array_torch.cuda()
 
         bits = self.config.bits
-        quant_weight_torch, scales_torch, zero_points_torch = self.quantize_internal(
-            b_array_torch.T, bits=bits, group_size=self.config.block_size
-        )
-        quant_weight_torch = quant_weight_torch.contiguous()
-        scales_torch = scales_torch.contiguous()
-        zero_points_torch = zero_points_torch.contiguous()
-
-        packed_size = 8 // bits  # number of elements packed into one byte
-
-        packed_torch = torch.zeros(
-            (quant_weight_torch.shape[0], quant_weight_torch.shape[1] // packed_size),
-            dtype=torch.uint8,
-            device=quant_weight_torch.device,
-        )
-        self.pack_on_row_fast_248bit(packed_torch, quant_weight_torch, bits)
-        scales = scales_torch.cpu().numpy()
-        zero_points = zero_points_torch.cpu().numpy()
-        # reshape to the predefined shape in MatmulNbits
-        scales = scales.reshape(-1)
-        zero_points = zero_points.reshape(-1)
-        rows, cols = b_array_torch.shape
-        block_size = self.config.block_size
-        blob_size = block_size // packed_size
-        k_blocks = (rows + block_size - 1) // block_size
-        packed_torch = packed_torch.reshape(cols, k_blocks, blob_size)
+        packed, scales, zero_points = self._quantize_matmul_weight(b_pb.name, b_array)
 
-        b_quant = onnx.numpy_helper.from_array(packed_torch.cpu().numpy())
+        b_quant = onnx.numpy_helper.from_array(packed)
         b_quant.name = b_pb.name + "_Q" + str(bits)
         for input in bs_graph.input:
             if input.name == input_b:
@@ -816,6 +988,94 @@ def get_initializer(name, graph_path: list[GraphProto]) -> tuple[TensorProto, Gr
     return None, None
 
 
+def _tensor_to_array(tensor: TensorProto, base_dir: str | None) -> np.ndarray:
+    """Get data of a tensor. Data in an external file is memory mapped instead of being read into memory."""
+    if base_dir is not None and onnx.external_data_helper.uses_external_data(tensor):
+        return ir.serde.deserialize_tensor(tensor, base_dir).numpy()
+    return ir.from_proto(tensor).numpy()
+
+
+def _get_all_tensors(graph: GraphProto):
+    """Yield initializers and tensor attributes of a graph and its sub-graphs."""
+    yield from graph.initializer
+    for node in graph.node:
+        for attr in node.attribute:
+            if attr.type == onnx.AttributeProto.TENSOR:
+                yield attr.t
+            elif attr.type == onnx.AttributeProto.TENSORS:
+                yield from attr.tensors
+            elif attr.type == onnx.AttributeProto.GRAPH:
+                yield from _get_all_tensors(attr.g)
+            elif attr.type == onnx.AttributeProto.GRAPHS:
+                for subgraph in attr.graphs:
+                    yield from _get_all_tensors(subgraph)
+
+
+class _ExternalDataWriter:
+    """
+    Write tensors to the external data file of an output model, and replace their data by references to the file.
+    Like ONNXModel.save_model_to_file, only tensors with raw data of at least size_threshold bytes are moved.
+
+    Data is written to a temporary file, which replaces the external data file in close(commit=True). An existing
+    data file is thus overwritten, and it can be the external data of the input model that is still read.
+    """
+
+    def __init__(self, output_model_path: str, size_threshold: int = 1024):
+        self.location = os.path.basename(output_model_path) + ".data"
+        self.size_threshold = size_threshold
+        self.data_path = os.path.join(os.path.dirname(os.path.abspath(output_model_path)), self.location)
+        self.temp_path = f"{self.data_path}.{os.getpid()}.tmp"
+        self.file = open(self.temp_path, "wb")  # noqa: SIM115
+        # Name, offset and length of tensors written, to skip them (or copies of them in sub-graphs) when they
+        # are visited again.
+        self.written: set[tuple[str, int, int]] = set()
+
+    def write(self, tensor: TensorProto, base_dir: str | None = None):
+        offset = self.file.tell()
+        if onnx.external_data_helper.uses_external_data(tensor):
+            if base_dir is None:
+                raise ValueError(
+                    f"Tensor {tensor.name} refers to external data, but the directory of the input model is unknown. "
+                    "Pass the model by path, or load its external data."
+                )
+            info = onnx.external_data_helper.ExternalDataInfo(tensor)
+            if info.location == self.location and (tensor.name, info.offset, info.length) in self.written:
+                return
+
+            # Copy data of the input model in chunks, so that it is never fully loaded into memory.
+            with open(os.path.join(base_dir, info.location), "rb") as data_file:
+                data_file.seek(info.offset or 0)
+                remaining = info.length if info.length else os.fstat(data_file.fileno()).st_size - (info.offset or 0)
+                while remaining > 0:
+                    chunk = data_file.read(min(remaining, 1 << 26))
+                    if not chunk:
+                        break
+                    self.file.write(chunk)
+                    remaining -= len(chunk)
+        elif tensor.HasField("raw_data") and len(tensor.raw_data) >= self.size_threshold:
+            self.file.write(tensor.raw_data)
+        else:
+            return
+
+        length = self.file.tell() - offset
+        self.written.add((tensor.name, offset, length))
+        del tensor.external_data[:]
+        tensor.data_location = TensorProto.EXTERNAL
+        for key, value in (("location", self.location), ("offset", offset), ("length", length)):
+            entry = tensor.external_data.add()
+            entry.key = key
+            entry.value = str(value)
+        tensor.ClearField("raw_data")
+
+    def close(self, commit: bool = False):
+        """Close the file, and move it to the external data file if commit is True, or remove it otherwise."""
+        self.file.close()
+        if commit:
+            os.replace(self.temp_path, self.data_path)
+        elif os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
 def _get_static_rank(tensor_name: str, graph_path: list[GraphProto]) -> int | None:
     """Return the static rank of a tensor if its shape is known, else None.
 
@@ -986,8 +1246,12 @@ def transpose_packed_int4_matrix(packed, rows, cols):
 
 
 class DefaultWeightOnlyQuantizer:
-    def __init__(self, config: DefaultWeightOnlyQuantConfig):
+    def __init__(self, config: DefaultWeightOnlyQuantConfig, base_dir: str | None = None):
         self.config = config
+        # Directory of external data of the model, when the external data is not loaded.
+        self.base_dir = base_dir
+        # Pool that quantizes MatMul weights ahead of quantize_matmul, see MatMulNBitsQuantizer.
+        self.weight_pool: _WeightQuantizationPool | None = None
 
     def qbits_block_quant(self, fp32weight: npt.ArrayLike) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
         """4b/8b quantize fp32 weight to int4 using C++ kernels."""
@@ -1039,6 +1303,17 @@ class DefaultWeightOnlyQuantizer:
 
         return (packed, scales, zero_point)
 
+    def quantize_weight(self, b_ndarray: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Quantize a 2D float, float16 or bfloat16 weight of MatMul."""
+        bfloat16 = b_ndarray.dtype == "bfloat16"
+        if bfloat16:
+            b_ndarray = b_ndarray.astype(np.float32)
+
+        packed, scales, zero_points = self.qbits_block_quant(b_ndarray)
+        if bfloat16:
+            scales = scales.astype(ml_dtypes.bfloat16)
+        return packed, scales, zero_points
+
     def quantize_matmul(self, node: NodeProto, graph_stack: list[GraphProto]) -> list[NodeProto]:
         """
         Quantize weight B of MatMul node to int4 or int8.
@@ -1056,7 +1331,7 @@ class DefaultWeightOnlyQuantizer:
             logger.info("MatMul doesn't have const weight. Skip to quantize")
             return [node]  # only care about constant weight
 
-        b_ndarray = ir.from_proto(b_tensor).numpy()
+        b_ndarray = _tensor_to_array(b_tensor, self.base_dir)
         b_original_shape = b_ndarray.shape
         if len(b_original_shape) != 2:
             if len(b_original_shape) < 2:
@@ -1075,13 +1350,8 @@ class DefaultWeightOnlyQuantizer:
         else:
             b_original_shape = None  # already 2-D, no reshape needed
 
-        bfloat16 = b_ndarray.dtype == "bfloat16"
-        if bfloat16:
-            b_ndarray = b_ndarray.astype(np.float32)
-
-        packed, scales, zero_points = self.qbits_block_quant(b_ndarray)
-        if bfloat16:
-            scales = scales.astype(ml_dtypes.bfloat16)
+        quantized = self.weight_pool.get(b_tensor.name) if self.weight_pool is not None else None
+        packed, scales, zero_points = quantized if quantized is not None else self.quantize_weight(b_ndarray)
 
         if self.config.quant_format == QuantFormat.QOperator:
             b_quant = ir.serde.serialize_tensor(ir.Tensor(packed, name=b_tensor.name + f"_Q{bits}"))
@@ -1323,7 +1593,7 @@ class DefaultWeightOnlyQuantizer:
             logger.info("Gather doesn't have const weight. Skip quantization.")
             return [node]  # only care about constant weight
 
-        data_ndarray = onnx.numpy_helper.to_array(data_tensorproto)
+        data_ndarray = onnx.numpy_helper.to_array(data_tensorproto, self.base_dir or "")
         data_rank = len(data_ndarray.shape)
         quantize_axis = self.config.quant_axes.get("Gather", 1)
         block_size = self.config.block_size
@@ -1410,6 +1680,55 @@ class DefaultWeightOnlyQuantizer:
         return results
 
 
+def _quantize_weight_in_worker(
+    config: DefaultWeightOnlyQuantConfig, tensor: TensorProto, base_dir: str | None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    b_ndarray = _tensor_to_array(tensor, base_dir)
+    b_ndarray = b_ndarray.reshape(b_ndarray.shape[-2], b_ndarray.shape[-1])
+    return DefaultWeightOnlyQuantizer(config).quantize_weight(b_ndarray)
+
+
+class _WeightQuantizationPool:
+    """
+    Quantize MatMul weights in a process pool ahead of DefaultWeightOnlyQuantizer.quantize_matmul.
+
+    Weights in external data are memory mapped by the workers, so only quantized weights are sent between processes.
+    Weights are scheduled in the order they will be requested, and at most two weights per worker are in flight to
+    bound the memory usage.
+    """
+
+    def __init__(
+        self, config: DefaultWeightOnlyQuantConfig, weights: list[TensorProto], base_dir: str | None, num_workers: int
+    ):
+        self.config = config
+        self.base_dir = base_dir
+        self.max_in_flight = 2 * num_workers
+        self.weights = deque(weights)
+        self.futures: dict[str, Future] = {}
+        self.executor = ProcessPoolExecutor(max_workers=num_workers)
+        self._submit()
+
+    def _submit(self):
+        while self.weights and len(self.futures) < self.max_in_flight:
+            tensor = self.weights.popleft()
+            self.futures[tensor.name] = self.executor.submit(
+                _quantize_weight_in_worker, self.config, tensor, self.base_dir
+            )
+
+    def get(self, name: str) -> tuple[np.ndarray, np.ndarray, np.ndarray] | None:
+        """Get the quantized weight, or None when it is not scheduled and the caller shall quantize it."""
+        future = self.futures.pop(name, None)
+        if future is None:
+            self.weights = deque(tensor for tensor in self.weights if tensor.name != name)
+            return None
+        result = future.result()
+        self._submit()
+        return result
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
 class NVAWQWeightOnlyQuantizer:
     def __init__(
         self,
@@ -1472,6 +1791,10 @@ class MatMulNBitsQuantizer:
       - for quantized gather, the memory usage of "DequantizeLinear + Gather" is the same as the original Gather
         during runtime. Therefor it is not recommended.
       - when a node is in nodes_to_exclude, and the node configuration in algo_config.customized_weight_config will be ignored.
+      - when model is a path, external data is not loaded at once. Weights are memory mapped when they are quantized.
+      - with num_workers > 1, weights of MatMul are quantized in parallel by a process pool (DEFAULT algorithm only).
+      - process_and_save writes quantized weights to the output external data file as soon as they are generated,
+        so that a model larger than the memory can be quantized.
     """
 
     def __init__(
@@ -1488,11 +1811,18 @@ class MatMulNBitsQuantizer:
         quant_axes: tuple[tuple[str, int], ...] | None = None,
         channel_wised_quantize: bool = False,
         algo_config: WeightOnlyQuantConfig | None = None,
+        num_workers: int = 1,
     ):
         if nodes_to_exclude is None:
             nodes_to_exclude = []
-        self.model = ONNXModel(onnx.load(model)) if isinstance(model, str) else ONNXModel(model)
+        self.model = (
+            ONNXModel(onnx.load(model, load_external_data=False)) if isinstance(model, str) else ONNXModel(model)
+        )
         self.model_path = model if isinstance(model, str) else None
+        # Directory of external data, which is loaded lazily when the model is given by path.
+        self.base_dir = os.path.dirname(os.path.abspath(model)) if isinstance(model, str) else None
+        self.num_workers = num_workers
+        self._external_data_writer: _ExternalDataWriter | None = None
         self.bits = bits
         self.block_size = block_size
         self.is_symmetric = is_symmetric
@@ -1518,9 +1848,9 @@ class MatMulNBitsQuantizer:
             assert self.algo_config.bits in [2, 4, 8], "Only support 2, 4 or 8 bits quantization"
 
         if algo_config.algorithm == "HQQ":
-            self.node_quantizer = HQQWeightOnlyQuantizer(self.algo_config)
+            self.node_quantizer = HQQWeightOnlyQuantizer(self.algo_config, self.base_dir)
         elif algo_config.algorithm == "DEFAULT":
-            self.node_quantizer = DefaultWeightOnlyQuantizer(self.algo_config)
+            self.node_quantizer = DefaultWeightOnlyQuantizer(self.algo_config, self.base_dir)
         elif algo_config.algorithm == "nvidia_awq":
             self.node_quantizer = NVAWQWeightOnlyQuantizer(self.algo_config)
 
@@ -1561,7 +1891,13 @@ class MatMulNBitsQuantizer:
             elif (self.nodes_to_include and node.name in self.nodes_to_include) or (
                 node.op_type in self.algo_config.op_types_to_quantize
             ):
+                num_initializers = [len(g.initializer) for g in graph_stack]
                 out_nodes = self.node_quantizer.quantize(node, graph_stack)
+                if self._external_data_writer is not None:
+                    # Move new quantized weights to the output file, so that they do not accumulate in memory.
+                    for g, count in zip(graph_stack, num_initializers, strict=True):
+                        for tensor in g.initializer[count:]:
+                            self._external_data_writer.write(tensor)
             else:
                 logger.info(f"skip to quantize {node.name} ...")
                 out_nodes = [node]
@@ -1572,6 +1908,31 @@ class MatMulNBitsQuantizer:
         graph_stack.pop()
         return graph
 
+    def _collect_matmul_weights(self, graph_stack: list[GraphProto], weights: dict[str, TensorProto]):
+        """Collect 2D weights (or N-D weights with unit leading dims) of MatMul nodes in the order of processing."""
+        for node in graph_stack[-1].node:
+            for attr in node.attribute:
+                subgraphs = [attr.g] if attr.type == onnx.AttributeProto.GRAPH else []
+                if attr.type == onnx.AttributeProto.GRAPHS:
+                    subgraphs = attr.graphs
+                for subgraph in subgraphs:
+                    graph_stack.append(subgraph)
+                    self._collect_matmul_weights(graph_stack, weights)
+                    graph_stack.pop()
+
+            if node.op_type != "MatMul" or node.name in self.nodes_to_exclude:
+                continue
+            if not (self.nodes_to_include and node.name in self.nodes_to_include) and (
+                node.op_type not in self.algo_config.op_types_to_quantize
+            ):
+                continue
+            tensor, _ = get_initializer(node.input[1], graph_stack)
+            if tensor is None or tensor.name in weights:
+                continue
+            if len(tensor.dims) < 2 or any(d != 1 for d in tensor.dims[:-2]):
+                continue
+            weights[tensor.name] = tensor
+
     def _generate_q4_node_config(self):
         """Generate weight only quant configuration for nodes."""
         q4_node_config = {}
@@ -1662,8 +2023,38 @@ class MatMulNBitsQuantizer:
                         )
                         self.model.set_opset_import(opset.domain, 21)
 
-            self._process_subgraph(graph_stack)
+            weight_pool = None
+            if (
+                self.num_workers > 1
+                and isinstance(self.node_quantizer, DefaultWeightOnlyQuantizer)
+                and not (self.algo_config.bits == 8 and self.algo_config.quant_format == QuantFormat.QDQ)
+            ):
+                weights = {}
+                self._collect_matmul_weights([self.model.graph()], weights)
+                weight_pool = _WeightQuantizationPool(
+                    self.algo_config, list(weights.values()), self.base_dir, self.num_workers
+                )
+                self.node_quantizer.weight_pool = weight_pool
+
+            batch_hqq = isinstance(self.node_quantizer, HQQWeightOnlyQuantizer) and self.algo_config.batch_size > 1
+            if batch_hqq:
+                weights = {}
+                self._collect_matmul_weights([self.model.graph()], weights)
+                self.node_quantizer.prepare_batches(list(weights.values()))
+
+            try:
+                self._process_subgraph(graph_stack)
+            finally:
+                if weight_pool is not None:
+                    weight_pool.close()
+                    self.node_quantizer.weight_pool = None
+                if batch_hqq:
+                    self.node_quantizer.prepare_batches([])
             self.model.clean_initializers()
+
+            if self.base_dir is not None and self._external_data_writer is None:
+                # Load external data of tensors that are not quantized, so that the model can be saved anywhere.
+                onnx.external_data_helper.load_external_data_for_model(self.model.model, self.base_dir)
         elif self.algo_config.algorithm == "nvidia_awq":
             # Handle nvidia_awq quantization
             logger.info("Processing nvidia_awq quantization...")
@@ -1677,6 +2068,32 @@ class MatMulNBitsQuantizer:
             # RTN or GPTQ weight-only quantize algorithm
             self.int4_quant_algo()
 
+    def process_and_save(self, output_model_path: str):
+        """
+        Quantize the model and save it with external data to output_model_path.
+
+        For HQQ and DEFAULT algorithms, quantized weights are written to the external data file as soon as they are
+        generated, and the other tensors are copied in chunks from the external data of the input model. The float
+        weights are never fully loaded into memory when the model is given by path.
+        """
+        if self.algo_config.algorithm not in ["HQQ", "DEFAULT"]:
+            self.process()
+            self.model.save_model_to_file(output_model_path, True)
+            return
+
+        self._external_data_writer = _ExternalDataWriter(output_model_path)
+        try:
+            self.process()
+            self.model.topological_sort()
+            for tensor in _get_all_tensors(self.model.graph()):
+                self._external_data_writer.write(tensor, self.base_dir)
+            self._external_data_writer.close(commit=True)
+        finally:
+            self._external_data_writer.close()
+            self._external_data_writer = None
+
+        onnx.save_model(self.model.model, output_model_path)
+
 
 def ort_convert_str_to_bool(value):
     return value.lower() in ("true", "1")
@@ -1709,6 +2126,18 @@ set of 4b integers with a scaling factor and an optional offset.
         help="the algorithm used to quantize weight, \nrtn and gptq leverage Intel® Neural Compressor",
     )
     parser.add_argument("--bits", default=4, type=int, help="the target bits to represent weight")
+    parser.add_argument(
+        "--num_workers",
+        default=1,
+        type=int,
+        help="number of processes to quantize weights of MatMul in parallel (default quant_method only)",
+    )
+    parser.add_argument(
+        "--hqq_batch_size",
+        default=1,
+        type=int,
+        help="max number of MatMul weights of the same shape that are optimized together (hqq quant_method only)",
+    )
     parser.add_argument(
         "--symmetric",
         required=False,
@@ -1818,10 +2247,15 @@ if __name__ == "__main__":
         logger.warning("symmetric is not supportted by hqq, will force to symmetric=False")
         args.symmetric = False
 
-    model = onnx.load(input_model_path)
+    # External data of the model is loaded lazily by the quantizer.
+    model = input_model_path
     if args.quant_method == "hqq":
         quant_config = HQQWeightOnlyQuantConfig(
-            block_size=args.block_size, bits=args.bits, op_types_to_quantize=op_types_to_quantize, quant_axes=quant_axes
+            block_size=args.block_size,
+            bits=args.bits,
+            op_types_to_quantize=op_types_to_quantize,
+            quant_axes=quant_axes,
+            batch_size=args.hqq_batch_size,
         )
     elif args.quant_method == "default":
         quant_config = DefaultWeightOnlyQuantConfig(
@@ -1844,7 +2278,6 @@ if __name__ == "__main__":
             logger.warning("QOperator is not applicable to nvidia_awq. overriding the value to QDQ")
             quant_format = QuantFormat.QDQ
 
-        model = input_model_path
         if args.calibration_method is not None:
             if args.calibration_method == "awq":
                 calibration_method = "awq_lite"
@@ -1869,6 +2302,6 @@ if __name__ == "__main__":
         nodes_to_exclude=args.nodes_to_exclude,
         nodes_to_include=args.nodes_to_include,
         algo_config=quant_config,
+        num_workers=args.num_workers,
     )
-    quant.process()
-    quant.model.save_model_to_file(output_model_path, True)
+    quant.process_and_save(output_model_path)
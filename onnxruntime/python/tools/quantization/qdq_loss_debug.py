@@ -32,6 +32,16 @@ Example Usage:
 `tensor_dict` points to a dictionary where the keys are tensor names and each value
 is a list of tensors, one from each model run
 
+To compare a QDQ model with its float model without keeping the tensors of all runs
+in memory, errors can be accumulated one batch at a time:
+
+```python
+    modify_model_output_intermediate_tensors (path_to_float_model, augmented_float_model_path)
+    modify_model_output_intermediate_tensors (path_to_qdq_model, augmented_qdq_model_path)
+
+    error_dict = collect_activation_error(augmented_qdq_model_path, input_data_reader, augmented_float_model_path)
+```
+
 """
 
 import logging
@@ -39,6 +49,7 @@ import math
 import time
 from collections.abc import Callable, Sequence
 from pathlib import Path
+from typing import Any
 
 import numpy
 import onnx
@@ -133,33 +144,47 @@ def collect_activations(
         A dictionary where the key is tensor name and values are list of tensors from each batch
     """
 
+    inference_session = _create_augmented_session(augmented_model, session_options, execution_providers)
+
+    num_batches = 0
+    output_dict = {}
+    for input_d in input_reader:
+        num_batches += 1
+        for output_name, output_data in _run_augmented_session(inference_session, input_d).items():
+            output_dict.setdefault(output_name, []).append(output_data)
+    if num_batches == 0:
+        raise RuntimeError("No data is collected while running augmented model!")
+
+    return output_dict
+
+
+def _create_augmented_session(
+    augmented_model: str,
+    session_options=None,
+    execution_providers: Sequence[str] | None = None,
+) -> onnxruntime.InferenceSession:
     if session_options is None:
         session_options = onnxruntime.SessionOptions()
         session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
     if execution_providers is None:
         execution_providers = ["CPUExecutionProvider"]
 
-    inference_session = onnxruntime.InferenceSession(
+    return onnxruntime.InferenceSession(
         augmented_model,
         sess_options=session_options,
         providers=execution_providers,
     )
 
-    intermediate_outputs = []
-    for input_d in input_reader:
-        intermediate_outputs.append(inference_session.run(None, input_d))
-    if not intermediate_outputs:
-        raise RuntimeError("No data is collected while running augmented model!")
-
-    output_dict = {}
-    output_info = inference_session.get_outputs()
-    for batch in intermediate_outputs:
-        for output, output_data in zip(output_info, batch, strict=False):
-            if output.name.endswith(_TENSOR_SAVE_POSTFIX):
-                output_name = output.name[:-_TENSOR_SAVE_POSTFIX_LEN]
-                output_dict.setdefault(output_name, []).append(output_data)
 
-    return output_dict
+def _run_augmented_session(
+    inference_session: onnxruntime.InferenceSession, input_d: dict[str, numpy.ndarray]
+) -> dict[str, numpy.ndarray]:
+    """Run augmented model once, and return the saved tensors by their names."""
+    outputs = {}
+    for output, output_data in zip(inference_session.get_outputs(), inference_session.run(None, input_d), strict=False):
+        if output.name.endswith(_TENSOR_SAVE_POSTFIX):
+            outputs[output.name[:-_TENSOR_SAVE_POSTFIX_LEN]] = output_data
+    return outputs
 
 
 _POST_QDQ_POSTFIX1 = DEQUANT_OUTPUT_SUFFIX + "_1"
@@ -362,6 +387,36 @@ def compute_signal_to_quantization_noice_ratio(
     return 20 * math.log10(res)
 
 
+class SignalToQuantizationNoiseRatio:
+    """Accumulate the signal to quantization noise ratio of tensor pairs one batch at a time.
+
+    The result is the same as `compute_signal_to_quantization_noice_ratio` of all the pairs,
+    while only two sums are kept in memory.
+    """
+
+    def __init__(self):
+        self.tensor_square_sum = 0.0
+        self.diff_square_sum = 0.0
+
+    def update(self, x: numpy.ndarray, y: numpy.ndarray) -> None:
+        left = x.reshape(-1)
+        right = y.reshape(-1)
+        if left.shape != right.shape:
+            raise RuntimeError(f"Unequal size of tensors to compare: {left.size} != {right.size}!")
+
+        diff = (left - right).astype(numpy.float64)
+        left = left.astype(numpy.float64)
+        self.tensor_square_sum += float(numpy.dot(left, left))
+        self.diff_square_sum += float(numpy.dot(diff, diff))
+
+    def result(self) -> float:
+        epsilon = numpy.finfo("float").eps
+        tensor_norm = max(math.sqrt(self.tensor_square_sum), epsilon)
+        diff_norm = max(math.sqrt(self.diff_square_sum), epsilon)
+        res = tensor_norm / diff_norm
+        return 20 * math.log10(res)
+
+
 def compute_weight_error(
     weights_match: dict[str, dict[str, numpy.ndarray]],
     err_func: Callable[[numpy.ndarray, numpy.ndarray], float] = compute_signal_to_quantization_noice_ratio,
@@ -387,3 +442,64 @@ def compute_activation_error(
             err_result["xmodel_err"] = err_func(float_activation, match["post_qdq"])
         result[name] = err_result
     return result
+
+
+def collect_activation_error(
+    qdq_augmented_model: str,
+    input_reader: CalibrationDataReader,
+    float_augmented_model: str | None = None,
+    session_options=None,
+    execution_providers: Sequence[str] | None = None,
+    err_accumulator: Callable[[], Any] = SignalToQuantizationNoiseRatio,
+) -> dict[str, dict[str, float]]:
+    """Run augmented QDQ model, and optionally augmented float model, and compute activation errors
+    one batch at a time.
+
+    The result is the same as `compute_activation_error` of `create_activation_matching` of the
+    outputs of `collect_activations` with the models, but tensors of each batch are released once
+    the errors are updated. So the memory only depends on the number of tensors, not on the number
+    of batches.
+
+    Args:
+        qdq_augmented_model: Path to augmented QDQ model created by modify_model_output_intermediate_tensors ()
+        input_reader: Logic for reading input for the models, both models are run with each input.
+        float_augmented_model: Path to augmented float model created by modify_model_output_intermediate_tensors ()
+        session_options: Optional OnnxRuntime session options for controlling model run.
+            By default graph optimization is turned off
+        execution_providers: Collection of execution providers for running the models.
+            Only CPU EP is used by default.
+        err_accumulator: Factory of error accumulators, which have `update(x, y)` to add a pair of tensors
+            and `result()` to return the error. By default, signal to quantization noise ratio.
+
+    Returns:
+        Dict of activation name to errors, "qdq_err" between tensors before and after QDQ, and
+        "xmodel_err" between the float model and the QDQ model when the float model is given.
+    """
+    qdq_session = _create_augmented_session(qdq_augmented_model, session_options, execution_providers)
+    float_session = None
+    if float_augmented_model is not None:
+        float_session = _create_augmented_session(float_augmented_model, session_options, execution_providers)
+
+    num_batches = 0
+    accumulators: dict[str, dict[str, Any]] = {}
+    for input_d in input_reader:
+        num_batches += 1
+        qdq_activations = {name: [data] for name, data in _run_augmented_session(qdq_session, input_d).items()}
+        float_activations = None
+        if float_session is not None:
+            float_activations = {name: [data] for name, data in _run_augmented_session(float_session, input_d).items()}
+
+        for name, match in create_activation_matching(qdq_activations, float_activations).items():
+            # Accumulators are created on the first batch only.
+            errors = accumulators.get(name)
+            if errors is None:
+                errors = accumulators[name] = {"qdq_err": err_accumulator()}
+            errors["qdq_err"].update(match["pre_qdq"][0], match["post_qdq"][0])
+            if "float" in match:
+                if "xmodel_err" not in errors:
+                    errors["xmodel_err"] = err_accumulator()
+                errors["xmodel_err"].update(match["float"][0], match["post_qdq"][0])
+    if num_batches == 0:
+        raise RuntimeError("No data is collected while running augmented model!")
+
+    return {name: {key: acc.result() for key, acc in errors.items()} for name, errors in accumulators.items()}
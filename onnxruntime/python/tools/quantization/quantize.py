@@ -171,6 +171,11 @@ class StaticQuantConfig(QuantConfig):
                         Default is 0.01. Constant smoothing factor to use when computing the moving average of the
                         minimum and maximum values. Effective only when the calibration method selected is MinMax and
                         when CalibMovingAverage is set to True.
+                    CalibNumWorkers = int :
+                        Default is 1. Number of calibration batches run concurrently when the calibration method
+                        selected is MinMax. The min-max values are reduced as soon as each batch finishes.
+                        With the Entropy calibration method, number of tensors whose threshold is searched
+                        concurrently.
                     QuantizeBias = True/False :
                         Default is True which quantizes floating-point biases and it solely inserts
                         a DeQuantizeLinear node. If False, it remains floating-point bias and does not insert
@@ -379,6 +384,7 @@ def get_qdq_config(
             ("moving_average", "CalibMovingAverage"),
             ("averaging_constant", "CalibMovingAverageConstant"),
             ("max_intermediate_outputs", "CalibMaxIntermediateOutputs"),
+            ("num_workers", "CalibNumWorkers"),
             ("percentile", "CalibPercentile"),
         ]
         calib_extra_options = {
@@ -659,6 +665,13 @@ def quantize_static(
                     Default is None. If set to an integer, during calculation of the min-max range of the tensors
                     it will load at max value number of outputs before computing and merging the range. This will
                     produce the same result as all computing with None, but is more memory efficient.
+                    For the histogram-based calibration methods, the outputs are added to the histograms every
+                    max value number of outputs, the bins growing when needed.
+                CalibNumWorkers = int :
+                    Default is 1. If set to an integer greater than 1, the calibration batches are run concurrently
+                    on that many threads sharing the inference session, and the min-max values are reduced as soon
+                    as each batch finishes when the calibration method selected is MinMax. With the Entropy
+                    calibration method, it is the number of tensors whose threshold is searched concurrently.
                 SmoothQuant = True/False :
                     Default is False. If enabled, SmoothQuant algorithm will be applied before quantization to do
                     fake input channel quantization.
@@ -740,6 +753,7 @@ def quantize_static(
         ("CalibMovingAverage", "moving_average"),
         ("CalibMovingAverageConstant", "averaging_constant"),
         ("CalibMaxIntermediateOutputs", "max_intermediate_outputs"),
+        ("CalibNumWorkers", "num_workers"),
         ("CalibPercentile", "percentile"),
     ]
     calib_extra_options = {
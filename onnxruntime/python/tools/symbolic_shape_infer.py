@@ -4,6 +4,7 @@
 # -*- coding: UTF-8 -*-
 import argparse
 import logging
+import time
 
 import numpy as np
 import onnx
@@ -268,6 +269,12 @@ class SymbolicShapeInference:
         self.int_max_ = int_max
         self.subgraph_id_ = 0
         self.prefix_ = prefix
+        self.inferred_ = False
+        self.incremental_runs_ = 0
+        # output types of onnx single node inference, keyed by node and input signatures
+        self.onnx_infer_cache_ = {}
+        # per op type counters of onnx single node inference cache hits/misses and inference time
+        self.op_type_stats_ = {}
 
     def _add_suggested_merge(self, symbols, apply=False):
         assert all((type(s) is str and s in self.symbolic_dims_) or is_literal(s) for s in symbols)
@@ -329,6 +336,7 @@ class SymbolicShapeInference:
     def _preprocess(self, in_mp):
         self.out_mp_ = onnx.ModelProto()
         self.out_mp_.CopyFrom(in_mp)
+        self.input_signatures_ = {i.name: i.SerializeToString() for i in in_mp.graph.input}
         self.graph_inputs_ = {i.name: i for i in list(self.out_mp_.graph.input)}
         self.initializers_ = {i.name: i for i in self.out_mp_.graph.initializer}
         self.known_vi_ = {i.name: i for i in list(self.out_mp_.graph.input)}
@@ -537,29 +545,73 @@ class SymbolicShapeInference:
                         if len(in_dims) > 1:
                             self._check_merged_dims(in_dims, allow_broadcast=True)
 
-            # run single node inference with self.known_vi_ shapes
-            tmp_graph = helper.make_graph(
-                [node],
-                "tmp",
-                [self.known_vi_[i] for i in node.input if i],
-                [make_named_value_info(i) for i in node.output],
-                initializers,
-            )
+            # structurally identical nodes with identical input types get identical output types
+            stats = self._get_op_type_stats(node.op_type)
+            cache_key = self._get_onnx_infer_cache_key(node, initializers)
+            output_types = self.onnx_infer_cache_.get(cache_key)
+            if output_types is None:
+                stats["misses"] += 1
+                start_time = time.perf_counter()
+
+                # run single node inference with self.known_vi_ shapes
+                tmp_graph = helper.make_graph(
+                    [node],
+                    "tmp",
+                    [self.known_vi_[i] for i in node.input if i],
+                    [make_named_value_info(i) for i in node.output],
+                    initializers,
+                )
 
-            self.tmp_mp_.graph.CopyFrom(tmp_graph)
+                self.tmp_mp_.graph.CopyFrom(tmp_graph)
 
-            self.tmp_mp_ = shape_inference.infer_shapes(self.tmp_mp_)
+                self.tmp_mp_ = shape_inference.infer_shapes(self.tmp_mp_)
+                output_types = []
+                for o in self.tmp_mp_.graph.output:
+                    output_types.append(onnx.TypeProto())
+                    output_types[-1].CopyFrom(o.type)
+                self.onnx_infer_cache_[cache_key] = output_types
+                stats["onnx_infer_time"] += time.perf_counter() - start_time
+            else:
+                stats["hits"] += 1
 
         for i_o in range(len(node.output)):
             o = node.output[i_o]
             if o:  # skip optional output
                 vi = self.out_mp_.graph.value_info.add()
+                vi.name = o
                 if not skip_infer:
-                    vi.CopyFrom(self.tmp_mp_.graph.output[i_o])
-                else:
-                    vi.name = o
+                    vi.type.CopyFrom(output_types[i_o])
                 self.known_vi_[o] = vi
 
+    def _get_onnx_infer_cache_key(self, node, initializers):
+        initializer_values = {
+            i.name: (i.data_type, tuple(i.dims), numpy_helper.to_array(i).tobytes()) for i in initializers
+        }
+        return (
+            node.domain,
+            node.op_type,
+            tuple(attr.SerializeToString(deterministic=True) for attr in node.attribute),
+            tuple(
+                initializer_values.get(i)
+                or (self.known_vi_[i].type.SerializeToString(deterministic=True) if i else None)
+                for i in node.input
+            ),
+            tuple(bool(o) for o in node.output),
+        )
+
+    def _get_op_type_stats(self, op_type):
+        if op_type not in self.op_type_stats_:
+            self.op_type_stats_[op_type] = {"nodes": 0, "hits": 0, "misses": 0, "onnx_infer_time": 0.0, "time": 0.0}
+        return self.op_type_stats_[op_type]
+
+    def get_op_type_stats(self):
+        """Get per op type counters of shape inference.
+
+        :return: a dictionary from op type to the number of inferred nodes, the number of onnx single node inference
+            cache hits and misses, the time spent in onnx single node inference and the total inference time in seconds.
+        """
+        return {op_type: dict(stats) for op_type, stats in self.op_type_stats_.items()}
+
     def _onnx_infer_subgraph(self, node, subgraph, use_node_input=True, inc_subgraph_id=True):
         if self.verbose_ > 2:
             logger.debug(f"Inferencing subgraph of node {node.name} with output({node.output[0]}...): {node.op_type}")
@@ -588,6 +640,8 @@ class SymbolicShapeInference:
         )
         if inc_subgraph_id:
             self.subgraph_id_ += 1
+        symbolic_shape_inference.onnx_infer_cache_ = self.onnx_infer_cache_
+        symbolic_shape_inference.op_type_stats_ = self.op_type_stats_
 
         symbolic_shape_inference._preprocess(self.tmp_mp_)
         symbolic_shape_inference.suggested_merge_ = self.suggested_merge_.copy()
@@ -2680,7 +2734,7 @@ class SymbolicShapeInference:
                 return out
         return None
 
-    def _infer_impl(self, start_sympy_data=None):
+    def _prepare_inference(self, start_sympy_data=None):
         self.sympy_data_ = start_sympy_data or {}
         self.out_mp_.graph.ClearField("value_info")
         self._apply_suggested_merge(graph_input_only=True)
@@ -2713,10 +2767,13 @@ class SymbolicShapeInference:
         # create a temporary ModelProto for single node inference
         # note that we remove initializer to have faster inference
         # for tensor ops like Reshape/Tile/Expand that read initializer, we need to do sympy computation based inference anyways
+        # only the model level fields are needed since the graph is replaced before each inference
         self.tmp_mp_ = onnx.ModelProto()
-        self.tmp_mp_.CopyFrom(self.out_mp_)
-        self.tmp_mp_.graph.ClearField("initializer")
+        self.tmp_mp_.ir_version = self.out_mp_.ir_version
+        self.tmp_mp_.opset_import.extend(self.out_mp_.opset_import)
+        self.tmp_mp_.functions.extend(self.out_mp_.functions)
 
+    def _get_sorted_nodes(self):
         # compute prerequesite for node for topological sort
         # node with subgraphs may have dependency on implicit inputs, which will affect topological sort
         prereq_for_node = {}  # map from node to all its inputs, including implicit ones in subgraph
@@ -2744,7 +2801,7 @@ class SymbolicShapeInference:
                     names.discard(i.name)
             return names
 
-        for n in self.tmp_mp_.graph.node:
+        for n in self.out_mp_.graph.node:
             prereq_for_node[n.output[0]] = get_prereq(n)
 
         # topological sort nodes, note there might be dead nodes so we check if all graph outputs are reached to terminate
@@ -2766,231 +2823,321 @@ class SymbolicShapeInference:
                     o.name in sorted_known_vi for o in self.out_mp_.graph.output
                 ):
                     raise Exception("Invalid model with cyclic graph")
+        return sorted_nodes
+
+    def _infer_node(self, node):
+        stats = self._get_op_type_stats(node.op_type)
+        stats["nodes"] += 1
+        start_time = time.perf_counter()
+        try:
+            return self._infer_node_impl(node)
+        finally:
+            stats["time"] += time.perf_counter() - start_time
+
+    def _infer_node_impl(self, node):
+        assert all(i in self.known_vi_ for i in node.input if i)
+        self._onnx_infer_single_node(node)
+        known_aten_op = False
+        if node.op_type in self.dispatcher_:
+            self.dispatcher_[node.op_type](node)
+        elif node.op_type in ["ConvTranspose"]:
+            # onnx shape inference ops like ConvTranspose may have empty shape for symbolic input
+            # before adding symbolic compute for them
+            # mark the output type as UNDEFINED to allow guessing of rank
+            vi = self.known_vi_[node.output[0]]
+            if len(vi.type.tensor_type.shape.dim) == 0:
+                vi.type.tensor_type.elem_type = onnx.TensorProto.UNDEFINED
+        elif node.op_type == "ATen" and node.domain == "org.pytorch.aten":
+            for attr in node.attribute:
+                # TODO: Is overload_name needed?
+                if attr.name == "operator":
+                    aten_op_name = attr.s.decode("utf-8") if isinstance(attr.s, bytes) else attr.s
+                    if aten_op_name in self.aten_op_dispatcher_:
+                        known_aten_op = True
+                        self.aten_op_dispatcher_[aten_op_name](node)
+                    break
 
-        for node in sorted_nodes:
-            assert all(i in self.known_vi_ for i in node.input if i)
-            self._onnx_infer_single_node(node)
-            known_aten_op = False
-            if node.op_type in self.dispatcher_:
-                self.dispatcher_[node.op_type](node)
-            elif node.op_type in ["ConvTranspose"]:
-                # onnx shape inference ops like ConvTranspose may have empty shape for symbolic input
-                # before adding symbolic compute for them
-                # mark the output type as UNDEFINED to allow guessing of rank
-                vi = self.known_vi_[node.output[0]]
-                if len(vi.type.tensor_type.shape.dim) == 0:
-                    vi.type.tensor_type.elem_type = onnx.TensorProto.UNDEFINED
-            elif node.op_type == "ATen" and node.domain == "org.pytorch.aten":
-                for attr in node.attribute:
-                    # TODO: Is overload_name needed?
-                    if attr.name == "operator":
-                        aten_op_name = attr.s.decode("utf-8") if isinstance(attr.s, bytes) else attr.s
-                        if aten_op_name in self.aten_op_dispatcher_:
-                            known_aten_op = True
-                            self.aten_op_dispatcher_[aten_op_name](node)
-                        break
-
-            if self.verbose_ > 2:
-                logger.debug(node.op_type + ": " + node.name)  # noqa: G003
-                for i, name in enumerate(node.input):
-                    logger.debug("  Input %s: %s %s", i, name, "initializer" if name in self.initializers_ else "")
+        if self.verbose_ > 2:
+            logger.debug(node.op_type + ": " + node.name)  # noqa: G003
+            for i, name in enumerate(node.input):
+                logger.debug("  Input %s: %s %s", i, name, "initializer" if name in self.initializers_ else "")
+
+        # onnx automatically merge dims with value, i.e. Mul(['aaa', 'bbb'], [1000, 1]) -> [1000, 'bbb']
+        # symbolic shape inference needs to apply merge of 'aaa' -> 1000 in this case
+        if node.op_type in [
+            "Add",
+            "Sub",
+            "Mul",
+            "Div",
+            "MatMul",
+            "MatMulInteger",
+            "MatMulInteger16",
+            "Where",
+            "Sum",
+        ]:
+            vi = self.known_vi_[node.output[0]]
+            out_rank = len(get_shape_from_type_proto(vi.type))
+            in_shapes = [self._get_shape(node, i) for i in range(len(node.input))]
+            for d in range(out_rank - (2 if node.op_type in ["MatMul", "MatMulInteger", "MatMulInteger16"] else 0)):
+                in_dims = [s[len(s) - out_rank + d] for s in in_shapes if len(s) + d >= out_rank]
+                if len(in_dims) > 1:
+                    self._check_merged_dims(in_dims, allow_broadcast=True)
 
-            # onnx automatically merge dims with value, i.e. Mul(['aaa', 'bbb'], [1000, 1]) -> [1000, 'bbb']
-            # symbolic shape inference needs to apply merge of 'aaa' -> 1000 in this case
-            if node.op_type in [
-                "Add",
-                "Sub",
-                "Mul",
-                "Div",
-                "MatMul",
-                "MatMulInteger",
-                "MatMulInteger16",
-                "Where",
-                "Sum",
-            ]:
-                vi = self.known_vi_[node.output[0]]
-                out_rank = len(get_shape_from_type_proto(vi.type))
-                in_shapes = [self._get_shape(node, i) for i in range(len(node.input))]
-                for d in range(out_rank - (2 if node.op_type in ["MatMul", "MatMulInteger", "MatMulInteger16"] else 0)):
-                    in_dims = [s[len(s) - out_rank + d] for s in in_shapes if len(s) + d >= out_rank]
-                    if len(in_dims) > 1:
-                        self._check_merged_dims(in_dims, allow_broadcast=True)
-
-            for i_o in range(len(node.output)):
-                # Special cases:
-                # 1) We do not care about the training related outputs of SkipLayerNormalization
-                # 2) We do not care about the extraneous constant outputs in RotaryEmbedding because
-                # the RotaryEmbedding op created during export can be replaced by the RotaryEmbedding
-                # contrib op
-                if (
-                    node.op_type == "SkipLayerNormalization" or node.op_type == "SkipSimplifiedLayerNormalization"
-                ) and i_o in [1, 2]:
-                    continue
-                if node.op_type == "RotaryEmbedding" and len(node.output) > 1:
-                    # Skip symbolic shape inference for RotaryEmbedding functions that have extraneous outputs
-                    # generated by `export_modules_as_functions`
-                    continue
+        for i_o in range(len(node.output)):
+            # Special cases:
+            # 1) We do not care about the training related outputs of SkipLayerNormalization
+            # 2) We do not care about the extraneous constant outputs in RotaryEmbedding because
+            # the RotaryEmbedding op created during export can be replaced by the RotaryEmbedding
+            # contrib op
+            if (
+                node.op_type == "SkipLayerNormalization" or node.op_type == "SkipSimplifiedLayerNormalization"
+            ) and i_o in [1, 2]:
+                continue
+            if node.op_type == "RotaryEmbedding" and len(node.output) > 1:
+                # Skip symbolic shape inference for RotaryEmbedding functions that have extraneous outputs
+                # generated by `export_modules_as_functions`
+                continue
 
-                vi = self.known_vi_[node.output[i_o]]
-                out_type = vi.type
-                out_type_kind = out_type.WhichOneof("value")
+            vi = self.known_vi_[node.output[i_o]]
+            out_type = vi.type
+            out_type_kind = out_type.WhichOneof("value")
 
-                # do not process shape for non-tensors
-                if out_type_kind not in ["tensor_type", "sparse_tensor_type", None]:
-                    if self.verbose_ > 2:
-                        if out_type_kind == "sequence_type":
-                            seq_cls_type = out_type.sequence_type.elem_type.WhichOneof("value")
-                            if seq_cls_type == "tensor_type":
-                                logger.debug(
-                                    "  {}: sequence of {} {}".format(  # noqa: G001
-                                        node.output[i_o],
-                                        str(get_shape_from_value_info(vi)),
-                                        onnx.TensorProto.DataType.Name(
-                                            vi.type.sequence_type.elem_type.tensor_type.elem_type
-                                        ),
-                                    )
+            # do not process shape for non-tensors
+            if out_type_kind not in ["tensor_type", "sparse_tensor_type", None]:
+                if self.verbose_ > 2:
+                    if out_type_kind == "sequence_type":
+                        seq_cls_type = out_type.sequence_type.elem_type.WhichOneof("value")
+                        if seq_cls_type == "tensor_type":
+                            logger.debug(
+                                "  {}: sequence of {} {}".format(  # noqa: G001
+                                    node.output[i_o],
+                                    str(get_shape_from_value_info(vi)),
+                                    onnx.TensorProto.DataType.Name(
+                                        vi.type.sequence_type.elem_type.tensor_type.elem_type
+                                    ),
                                 )
-                            else:
-                                logger.debug(f"  {node.output[i_o]}: sequence of {seq_cls_type}")
+                            )
                         else:
-                            logger.debug(f"  {node.output[i_o]}: {out_type_kind}")
-                    continue
-
-                out_shape = get_shape_from_value_info(vi)
-                out_type_undefined = out_type.tensor_type.elem_type == onnx.TensorProto.UNDEFINED
-                if self.verbose_ > 2:
-                    logger.debug(
-                        f"  {node.output[i_o]}: {out_shape!s} {onnx.TensorProto.DataType.Name(vi.type.tensor_type.elem_type)}"
-                    )
-                    if node.output[i_o] in self.sympy_data_:
-                        logger.debug("  Sympy Data: " + str(self.sympy_data_[node.output[i_o]]))  # noqa: G003
+                            logger.debug(f"  {node.output[i_o]}: sequence of {seq_cls_type}")
+                    else:
+                        logger.debug(f"  {node.output[i_o]}: {out_type_kind}")
+                continue
 
-                # onnx >= 1.11.0, use unk__#index instead of None when the shape dim is uncertain
-                if (
-                    out_shape is not None and (None in out_shape or self._is_shape_contains_none_dim(out_shape))
-                ) or out_type_undefined:
-                    if self.auto_merge_:
+            out_shape = get_shape_from_value_info(vi)
+            out_type_undefined = out_type.tensor_type.elem_type == onnx.TensorProto.UNDEFINED
+            if self.verbose_ > 2:
+                logger.debug(
+                    f"  {node.output[i_o]}: {out_shape!s} {onnx.TensorProto.DataType.Name(vi.type.tensor_type.elem_type)}"
+                )
+                if node.output[i_o] in self.sympy_data_:
+                    logger.debug("  Sympy Data: " + str(self.sympy_data_[node.output[i_o]]))  # noqa: G003
+
+            # onnx >= 1.11.0, use unk__#index instead of None when the shape dim is uncertain
+            if (
+                out_shape is not None and (None in out_shape or self._is_shape_contains_none_dim(out_shape))
+            ) or out_type_undefined:
+                if self.auto_merge_:
+                    if node.op_type in [
+                        "Add",
+                        "Sub",
+                        "Mul",
+                        "Div",
+                        "MatMul",
+                        "MatMulInteger",
+                        "MatMulInteger16",
+                        "Concat",
+                        "Where",
+                        "Sum",
+                        "Equal",
+                        "Less",
+                        "Greater",
+                        "LessOrEqual",
+                        "GreaterOrEqual",
+                        "Min",
+                        "Max",
+                    ]:
+                        shapes = [self._get_shape(node, i) for i in range(len(node.input))]
                         if node.op_type in [
-                            "Add",
-                            "Sub",
-                            "Mul",
-                            "Div",
                             "MatMul",
                             "MatMulInteger",
                             "MatMulInteger16",
-                            "Concat",
-                            "Where",
-                            "Sum",
-                            "Equal",
-                            "Less",
-                            "Greater",
-                            "LessOrEqual",
-                            "GreaterOrEqual",
-                            "Min",
-                            "Max",
                         ]:
-                            shapes = [self._get_shape(node, i) for i in range(len(node.input))]
-                            if node.op_type in [
-                                "MatMul",
-                                "MatMulInteger",
-                                "MatMulInteger16",
-                            ]:
-                                if None in out_shape or self._is_shape_contains_none_dim(out_shape):
-                                    if None in out_shape:
-                                        idx = out_shape.index(None)
-                                    else:
-                                        idx = out_shape.index(self._is_shape_contains_none_dim(out_shape))
-                                    dim_idx = [len(s) - len(out_shape) + idx for s in shapes]
-                                    # only support auto merge for MatMul for dim < rank-2 when rank > 2
-                                    assert len(shapes[0]) > 2 and dim_idx[0] < len(shapes[0]) - 2
-                                    assert len(shapes[1]) > 2 and dim_idx[1] < len(shapes[1]) - 2
-                        elif node.op_type == "Expand":
-                            # auto merge for cases like Expand([min(batch, 1), min(seq, 512)], [batch, seq])
-                            shapes = [
-                                self._get_shape(node, 0),
-                                self._get_value(node, 1),
-                            ]
-                        else:
-                            shapes = []
-
-                        if shapes:
-                            for idx in range(len(out_shape)):
-                                if out_shape[idx] is not None and not self._is_none_dim(out_shape[idx]):
-                                    continue
-                                # note that the broadcasting rule aligns from right to left
-                                # if a tensor has a lower rank (dim_idx[idx] < 0), it would automatically broadcast and need no merge
+                            if None in out_shape or self._is_shape_contains_none_dim(out_shape):
+                                if None in out_shape:
+                                    idx = out_shape.index(None)
+                                else:
+                                    idx = out_shape.index(self._is_shape_contains_none_dim(out_shape))
                                 dim_idx = [len(s) - len(out_shape) + idx for s in shapes]
-                                if len(dim_idx) > 0:
-                                    self._add_suggested_merge(
-                                        [
-                                            s[i] if is_literal(s[i]) else str(s[i])
-                                            for s, i in zip(shapes, dim_idx, strict=False)
-                                            if i >= 0
-                                        ]
-                                    )
-                            self.run_ = True
-                        else:
-                            self.run_ = False
+                                # only support auto merge for MatMul for dim < rank-2 when rank > 2
+                                assert len(shapes[0]) > 2 and dim_idx[0] < len(shapes[0]) - 2
+                                assert len(shapes[1]) > 2 and dim_idx[1] < len(shapes[1]) - 2
+                    elif node.op_type == "Expand":
+                        # auto merge for cases like Expand([min(batch, 1), min(seq, 512)], [batch, seq])
+                        shapes = [
+                            self._get_shape(node, 0),
+                            self._get_value(node, 1),
+                        ]
+                    else:
+                        shapes = []
+
+                    if shapes:
+                        for idx in range(len(out_shape)):
+                            if out_shape[idx] is not None and not self._is_none_dim(out_shape[idx]):
+                                continue
+                            # note that the broadcasting rule aligns from right to left
+                            # if a tensor has a lower rank (dim_idx[idx] < 0), it would automatically broadcast and need no merge
+                            dim_idx = [len(s) - len(out_shape) + idx for s in shapes]
+                            if len(dim_idx) > 0:
+                                self._add_suggested_merge(
+                                    [
+                                        s[i] if is_literal(s[i]) else str(s[i])
+                                        for s, i in zip(shapes, dim_idx, strict=False)
+                                        if i >= 0
+                                    ]
+                                )
+                        self.run_ = True
                     else:
                         self.run_ = False
-
-                    # create new dynamic dims for ops not handled by symbolic shape inference
-                    if self.run_ is False and node.op_type not in self.dispatcher_ and not known_aten_op:
-                        is_unknown_op = out_type_undefined and (out_shape is None or len(out_shape) == 0)
-                        if is_unknown_op:
-                            # unknown op to ONNX, maybe from higher opset or other domain
-                            # only guess the output rank from input 0 when using guess_output_rank option
-                            out_rank = self._get_shape_rank(node, 0) if self.guess_output_rank_ else -1
+                else:
+                    self.run_ = False
+
+                # create new dynamic dims for ops not handled by symbolic shape inference
+                if self.run_ is False and node.op_type not in self.dispatcher_ and not known_aten_op:
+                    is_unknown_op = out_type_undefined and (out_shape is None or len(out_shape) == 0)
+                    if is_unknown_op:
+                        # unknown op to ONNX, maybe from higher opset or other domain
+                        # only guess the output rank from input 0 when using guess_output_rank option
+                        out_rank = self._get_shape_rank(node, 0) if self.guess_output_rank_ else -1
+                    else:
+                        # valid ONNX op, but not handled by symbolic shape inference, just assign dynamic shape
+                        out_rank = len(out_shape)
+
+                    if out_rank >= 0:
+                        new_shape = self._new_symbolic_shape(out_rank, node, i_o)
+                        if out_type_undefined:
+                            # guess output data type from input vi if not defined
+                            out_dtype = self.known_vi_[node.input[0]].type.tensor_type.elem_type
                         else:
-                            # valid ONNX op, but not handled by symbolic shape inference, just assign dynamic shape
-                            out_rank = len(out_shape)
-
-                        if out_rank >= 0:
-                            new_shape = self._new_symbolic_shape(out_rank, node, i_o)
-                            if out_type_undefined:
-                                # guess output data type from input vi if not defined
-                                out_dtype = self.known_vi_[node.input[0]].type.tensor_type.elem_type
-                            else:
-                                # otherwise, use original data type
-                                out_dtype = vi.type.tensor_type.elem_type
-                            vi.CopyFrom(
-                                helper.make_tensor_value_info(
-                                    vi.name,
-                                    out_dtype,
-                                    get_shape_from_sympy_shape(new_shape),
-                                )
+                            # otherwise, use original data type
+                            out_dtype = vi.type.tensor_type.elem_type
+                        vi.CopyFrom(
+                            helper.make_tensor_value_info(
+                                vi.name,
+                                out_dtype,
+                                get_shape_from_sympy_shape(new_shape),
                             )
+                        )
 
-                            if self.verbose_ > 0:
-                                if is_unknown_op:
-                                    logger.debug(
-                                        f"Possible unknown op: {node.op_type} node: {node.name}, guessing {vi.name} shape"
-                                    )
-                                if self.verbose_ > 2:
-                                    logger.debug(f"  {node.output[i_o]}: {new_shape!s} {vi.type.tensor_type.elem_type}")
-
-                            self.run_ = True
-                            continue  # continue the inference after guess, no need to stop as no merge is needed
-
-                    if self.verbose_ > 0 or not self.auto_merge_ or out_type_undefined:
-                        logger.debug("Stopping at incomplete shape inference at %s: %s", node.op_type, node.name)
-                        logger.debug("node inputs:")
-                        for i in node.input:
-                            if i in self.known_vi_:
-                                logger.debug(self.known_vi_[i])
-                            else:
-                                logger.debug(f"not in known_vi_ for {i}")
-                        logger.debug("node outputs:")
-                        for o in node.output:
-                            if o in self.known_vi_:
-                                logger.debug(self.known_vi_[o])
-                            else:
-                                logger.debug(f"not in known_vi_ for {o}")
-                        if self.auto_merge_ and not out_type_undefined:
-                            logger.debug("Merging: " + str(self.suggested_merge_))  # noqa: G003
-                    return False
+                        if self.verbose_ > 0:
+                            if is_unknown_op:
+                                logger.debug(
+                                    f"Possible unknown op: {node.op_type} node: {node.name}, guessing {vi.name} shape"
+                                )
+                            if self.verbose_ > 2:
+                                logger.debug(f"  {node.output[i_o]}: {new_shape!s} {vi.type.tensor_type.elem_type}")
+
+                        self.run_ = True
+                        continue  # continue the inference after guess, no need to stop as no merge is needed
+
+                if self.verbose_ > 0 or not self.auto_merge_ or out_type_undefined:
+                    logger.debug("Stopping at incomplete shape inference at %s: %s", node.op_type, node.name)
+                    logger.debug("node inputs:")
+                    for i in node.input:
+                        if i in self.known_vi_:
+                            logger.debug(self.known_vi_[i])
+                        else:
+                            logger.debug(f"not in known_vi_ for {i}")
+                    logger.debug("node outputs:")
+                    for o in node.output:
+                        if o in self.known_vi_:
+                            logger.debug(self.known_vi_[o])
+                        else:
+                            logger.debug(f"not in known_vi_ for {o}")
+                    if self.auto_merge_ and not out_type_undefined:
+                        logger.debug("Merging: " + str(self.suggested_merge_))  # noqa: G003
+                return False
+        return True
+
+    def _infer_impl(self, start_sympy_data=None):
+        self.inferred_ = False
+        self._prepare_inference(start_sympy_data)
+        for node in self._get_sorted_nodes():
+            if not self._infer_node(node):
+                return False
 
         self.run_ = False
+        self.inferred_ = True
+        return True
+
+    @staticmethod
+    def _get_node_signature(node):
+        # nodes with subgraphs are always re-inferred since subgraph inference updates the subgraph in place
+        if any(attr.type in [onnx.AttributeProto.GRAPH, onnx.AttributeProto.GRAPHS] for attr in node.attribute):
+            return None
+        return node.SerializeToString(deterministic=True)
+
+    @staticmethod
+    def _get_initializer_signature(initializer):
+        # integer and small initializers may be read as shape data by ops like Reshape or Slice
+        if initializer.data_type in [onnx.TensorProto.INT32, onnx.TensorProto.INT64] or np.prod(initializer.dims) <= 64:
+            return initializer.SerializeToString()
+        return (initializer.data_type, tuple(initializer.dims))
+
+    def _infer_incremental_impl(self, in_mp):
+        """Re-run inference on an updated version of the last inferred model.
+
+        Nodes that are unchanged and only consume unchanged tensors keep the shapes and sympy data of the last
+        inference, so only the nodes downstream of new or modified nodes, graph inputs and initializers are
+        re-inferred. Falls back to a full inference when the last inference did not complete.
+        """
+        if not self.inferred_:
+            self._preprocess(in_mp)
+            return self._infer_impl()
+
+        last_known_vi = self.known_vi_
+        last_sympy_data = self.sympy_data_
+        last_input_signatures = self.input_signatures_
+        last_nodes = {self._get_node_signature(n) for n in self.out_mp_.graph.node}
+        last_nodes.discard(None)
+        last_initializers = {i.name: self._get_initializer_signature(i) for i in self.out_mp_.graph.initializer}
+
+        self._preprocess(in_mp)
+        changed = {name for name, s in self.input_signatures_.items() if last_input_signatures.get(name) != s}
+        changed.update(
+            i.name
+            for i in self.out_mp_.graph.initializer
+            if last_initializers.get(i.name) != self._get_initializer_signature(i)
+        )
+
+        self.inferred_ = False
+        self.incremental_runs_ += 1
+        prefix = self.prefix_
+        # new symbolic dims must not collide with the ones kept from the last inference
+        self.prefix_ = f"{prefix}_u{self.incremental_runs_}"
+        try:
+            self._prepare_inference()
+            for node in self._get_sorted_nodes():
+                if (
+                    self._get_node_signature(node) in last_nodes
+                    and not any(i in changed for i in node.input)
+                    and all(o in last_known_vi for o in node.output if o)
+                ):
+                    for o in node.output:
+                        if o:
+                            vi = self.out_mp_.graph.value_info.add()
+                            vi.CopyFrom(last_known_vi[o])
+                            self.known_vi_[o] = vi
+                            if o in last_sympy_data:
+                                self.sympy_data_[o] = last_sympy_data[o]
+                else:
+                    changed.update(node.output)
+                    if not self._infer_node(node):
+                        return False
+        finally:
+            self.prefix_ = prefix
+
+        self.run_ = False
+        self.inferred_ = True
         return True
 
     def _update_output_from_vi(self):
@@ -3010,6 +3157,19 @@ class SymbolicShapeInference:
         while symbolic_shape_inference.run_:
             all_shapes_inferred = symbolic_shape_inference._infer_impl()
         symbolic_shape_inference._update_output_from_vi()
+        if verbose > 0:
+            for op_type, stats in sorted(
+                symbolic_shape_inference.get_op_type_stats().items(), key=lambda item: item[1]["time"], reverse=True
+            ):
+                logger.info(
+                    "%s: %d nodes, %d cache hits, %d cache misses, %.3f s in onnx inference, %.3f s total",
+                    op_type,
+                    stats["nodes"],
+                    stats["hits"],
+                    stats["misses"],
+                    stats["onnx_infer_time"],
+                    stats["time"],
+                )
         if not all_shapes_inferred:
             onnx.save_model(symbolic_shape_inference.out_mp_, "sym_shape_infer_temp.onnx", save_as_external_data=True)
             raise Exception("Incomplete symbolic shape inference")
@@ -14,12 +14,14 @@
 
 import itertools
 import logging
+import mmap
 import os
 import tempfile
 
 import numpy as np
 import onnx
-from onnx import AttributeProto, GraphProto, ModelProto, NodeProto, TensorProto, helper, numpy_helper
+from onnx import AttributeProto, GraphProto, ModelProto, NodeProto, TensorProto, helper
+from onnx.external_data_helper import uses_external_data
 from onnx.shape_inference import infer_shapes, infer_shapes_path
 from packaging import version
 
@@ -33,7 +35,7 @@ def _npfloat16_to_int(np_list):
     :param np_list: numpy float16 list
     :return int_list: python int list
     """
-    return [int(bin(_.view("H"))[2:].zfill(16), 2) for _ in np_list]
+    return np.asarray(np_list, dtype=np.float16).view(np.uint16).tolist()
 
 
 def convert_np_to_float16(np_array, min_positive_val=5.96e-08, max_finite_val=65504.0):
@@ -44,31 +46,42 @@ def convert_np_to_float16(np_array, min_positive_val=5.96e-08, max_finite_val=65
     Similar for negative values. NaN, 0, inf, and -inf are unchanged.
     """
 
-    def between(a, b, c):
-        return np.logical_and(a < b, b < c)
-
-    if np_array[np.where(np_array > 0)].shape[0] > 0:
-        positive_max = np_array[np.where(np_array > 0)].max()
-        positive_min = np_array[np.where(np_array > 0)].min()
+    np_array = np.asarray(np_array)
+    if logger.isEnabledFor(logging.DEBUG):
+        _log_float16_truncation(np_array, min_positive_val, max_finite_val)
+
+    # Only zeros, infinities and values to truncate are out of range, so they are fixed after a single scan.
+    abs_array = np.abs(np_array)
+    out_of_range = np.flatnonzero((abs_array < min_positive_val) | (abs_array > max_finite_val))
+    if out_of_range.size > 0:
+        np_array = np_array.flatten()
+        values = np_array[out_of_range]
+        abs_values = abs_array.reshape(-1)[out_of_range]
+        truncated = np.copysign(np.clip(abs_values, min_positive_val, max_finite_val), values)
+        np_array[out_of_range] = np.where((abs_values == 0) | np.isinf(abs_values), values, truncated)
+        np_array = np_array.reshape(abs_array.shape)
+    return np_array.astype(np.float16)
+
+
+def _log_float16_truncation(np_array, min_positive_val, max_finite_val):
+    positive = np_array[np_array > 0]
+    if positive.size > 0:
+        positive_max = positive.max()
+        positive_min = positive.min()
         if positive_max >= max_finite_val:
             logger.debug(f"the float32 number {positive_max} will be truncated to {max_finite_val}")
         if positive_min <= min_positive_val:
             logger.debug(f"the float32 number {positive_min} will be truncated to {min_positive_val}")
 
-    if np_array[np.where(np_array < 0)].shape[0] > 0:
-        negative_max = np_array[np.where(np_array < 0)].max()
-        negative_min = np_array[np.where(np_array < 0)].min()
+    negative = np_array[np_array < 0]
+    if negative.size > 0:
+        negative_max = negative.max()
+        negative_min = negative.min()
         if negative_min <= -max_finite_val:
             logger.debug(f"the float32 number {negative_min} will be truncated to {-max_finite_val}")
         if negative_max >= -min_positive_val:
             logger.debug(f"the float32 number {negative_max} will be truncated to {-min_positive_val}")
 
-    np_array = np.where(between(0, np_array, min_positive_val), min_positive_val, np_array)
-    np_array = np.where(between(-min_positive_val, np_array, 0), -min_positive_val, np_array)
-    np_array = np.where(between(max_finite_val, np_array, float("inf")), max_finite_val, np_array)
-    np_array = np.where(between(float("-inf"), np_array, -max_finite_val), -max_finite_val, np_array)
-    return np.float16(np_array)
-
 
 def convert_tensor_float_to_float16(tensor, min_positive_val=5.96e-08, max_finite_val=65504.0):
     """Convert tensor float to float16.
@@ -107,9 +120,45 @@ def convert_tensor_float_to_float16(tensor, min_positive_val=5.96e-08, max_finit
     return tensor
 
 
+def _restore_initializer_data(graph: GraphProto, detached: dict):
+    for tensor in graph.initializer:
+        if tensor.name in detached:
+            del tensor.external_data[:]
+            tensor.data_location = TensorProto.DEFAULT
+            tensor.raw_data = detached[tensor.name]
+
+
+def _infer_shapes_without_initializer_data(model: ModelProto, size_threshold: int = 1024) -> ModelProto:
+    """
+    Run shape inference without serializing data of large initializers.
+
+    Shape inference only needs the data of small initializers (like shapes), so initializers of the main graph
+    larger than size_threshold bytes are temporarily marked as external data. It also avoids the 2GB protobuf limit.
+
+    :param model: ONNX model. It is restored after shape inference.
+    :param size_threshold: initializers with more bytes are not passed to shape inference
+    :return: the model with inferred value_info
+    """
+    detached = {}
+    for tensor in model.graph.initializer:
+        if tensor.HasField("raw_data") and len(tensor.raw_data) > size_threshold:
+            detached[tensor.name] = tensor.raw_data
+            tensor.ClearField("raw_data")
+            tensor.data_location = TensorProto.EXTERNAL
+            entry = tensor.external_data.add()
+            entry.key = "location"
+            entry.value = "__detached__"
+
+    try:
+        inferred_model = infer_shapes(model)
+    finally:
+        _restore_initializer_data(model.graph, detached)
+    _restore_initializer_data(inferred_model.graph, detached)
+    return inferred_model
+
+
 def make_value_info_from_tensor(tensor):
-    shape = numpy_helper.to_array(tensor).shape
-    return helper.make_tensor_value_info(tensor.name, tensor.data_type, shape)
+    return helper.make_tensor_value_info(tensor.name, tensor.data_type, tensor.dims)
 
 
 DEFAULT_OP_BLOCK_LIST = [
@@ -144,6 +193,18 @@ DEFAULT_OP_BLOCK_LIST = [
 ]
 
 
+# Operators with an optional dtype attribute, which shall be changed from float to float16.
+DTYPE_OP_LIST = {
+    "EyeLike",
+    "Multinomial",
+    "RandomNormal",
+    "RandomNormalLike",
+    "RandomUniform",
+    "RandomUniformLike",
+    "SequenceEmpty",
+    "Bernoulli",
+}
+
 # Some operators has data type fixed as float for some inputs. Key is op_type, value is list of input indices
 # Note that DirectML allows float16 gamma and beta in GroupNorm. Use force_fp16_inputs parameter could overwrite this.
 ALWAYS_FLOAT_INPUTS = {"Resize": [2], "GroupNorm": [1, 2], "SkipGroupNorm": [1, 2]}
@@ -226,7 +287,7 @@ def convert_float_to_float16(
     func_infer_shape = None
     if not disable_shape_infer and version.parse(onnx.__version__) >= version.parse("1.2.0"):
         try:
-            func_infer_shape = infer_shapes
+            func_infer_shape = _infer_shapes_without_initializer_data
         finally:
             pass
 
@@ -268,14 +329,15 @@ def convert_float_to_float16(
     graph_io_to_skip = set()
     io_casts = set()
 
-    fp32_inputs = [n.name for n in model.graph.input if n.type.tensor_type.elem_type == TensorProto.FLOAT]
-    fp32_outputs = [n.name for n in model.graph.output if n.type.tensor_type.elem_type == TensorProto.FLOAT]
+    fp32_inputs = {n.name for n in model.graph.input if n.type.tensor_type.elem_type == TensorProto.FLOAT}
+    fp32_outputs = {n.name for n in model.graph.output if n.type.tensor_type.elem_type == TensorProto.FLOAT}
     if isinstance(keep_io_types, list):
-        fp32_inputs = [n for n in fp32_inputs if n in keep_io_types]
-        fp32_outputs = [n for n in fp32_outputs if n in keep_io_types]
+        keep_io_names = set(keep_io_types)
+        fp32_inputs = {n for n in fp32_inputs if n in keep_io_names}
+        fp32_outputs = {n for n in fp32_outputs if n in keep_io_names}
     elif not keep_io_types:
-        fp32_inputs = []
-        fp32_outputs = []
+        fp32_inputs = set()
+        fp32_outputs = set()
 
     for i, n in enumerate(model.graph.input):
         if n.name in fp32_inputs:
@@ -356,16 +418,7 @@ def convert_float_to_float16(
                                     attr.i = TensorProto.FLOAT16
                                     break
 
-                        if n.op_type in [
-                            "EyeLike",
-                            "Multinomial",
-                            "RandomNormal",
-                            "RandomNormalLike",
-                            "RandomUniform",
-                            "RandomUniformLike",
-                            "SequenceEmpty",
-                            "Bernoulli",
-                        ]:
+                        if n.op_type in DTYPE_OP_LIST:
                             has_dtype = False
                             for attr in n.attribute:
                                 if attr.name == "dtype":
@@ -422,26 +475,30 @@ def convert_float_to_float16(
                     f"initializer is used by both fp32 and fp16 nodes. Consider add these nodes to block list:{value.fp16_nodes}"
                 )
 
+    # Tensors converted to float16. When a name appears more than once, the first value_info is used.
+    value_info_dict = {}
+    for value_info in value_info_list:
+        value_info_dict.setdefault(value_info.name, value_info)
+
     # Some operators have data type fixed as float for some input. Add a float16 to float cast for those inputs.
     for node in mixed_float_type_node_list:
         for i, input_name in enumerate(node.input):
             if i not in always_float_inputs[node.op_type] or i in force_fp16_inputs_dict.get(node.op_type, []):
                 continue
-            for value_info in value_info_list:
-                if input_name == value_info.name:
-                    # create new value_info for current node's new input name
-                    new_value_info = model.graph.value_info.add()
-                    new_value_info.CopyFrom(value_info)
-                    output_name = input_name + "_cast_to_fp32"
-                    new_value_info.name = output_name
-                    new_value_info.type.tensor_type.elem_type = TensorProto.FLOAT
-                    # add Cast node (from tensor(float16) to tensor(float) before current node
-                    node_name = input_name + "_cast_to_fp32_node"
-                    new_node = [helper.make_node("Cast", [input_name], [output_name], to=1, name=node_name)]
-                    model.graph.node.extend(new_node)
-                    # change current node's input name
-                    node.input[i] = output_name
-                    break
+            value_info = value_info_dict.get(input_name)
+            if value_info is not None:
+                # create new value_info for current node's new input name
+                new_value_info = model.graph.value_info.add()
+                new_value_info.CopyFrom(value_info)
+                output_name = input_name + "_cast_to_fp32"
+                new_value_info.name = output_name
+                new_value_info.type.tensor_type.elem_type = TensorProto.FLOAT
+                # add Cast node (from tensor(float16) to tensor(float) before current node
+                node_name = input_name + "_cast_to_fp32_node"
+                new_node = [helper.make_node("Cast", [input_name], [output_name], to=1, name=node_name)]
+                model.graph.node.extend(new_node)
+                # change current node's input name
+                node.input[i] = output_name
 
     accuracy_type = TensorProto.BFLOAT16 if use_bfloat16_as_blocked_nodes_dtype else TensorProto.FLOAT
     # process the nodes in block list that doesn't support tensor(float16)
@@ -451,40 +508,158 @@ def convert_float_to_float16(
         # change current node's input name and create new value_info for the new name
         for i in range(len(node.input)):
             input_name = node.input[i]
-            for value_info in value_info_list:
-                if input_name == value_info.name:
-                    # create new value_info for current node's new input name
-                    new_value_info = model.graph.value_info.add()
-                    new_value_info.CopyFrom(value_info)
-                    output_name = input_name + "_cast_to_fp32"
-                    new_value_info.name = output_name
-                    new_value_info.type.tensor_type.elem_type = accuracy_type
-                    # add Cast node (from tensor(float16) to tensor(float) before current node
-                    node_name = input_name + "_cast_to_fp32_node"
-                    new_node = [helper.make_node("Cast", [input_name], [output_name], to=accuracy_type, name=node_name)]
-                    model.graph.node.extend(new_node)
-                    # change current node's input name
-                    node.input[i] = output_name
-                    break
+            value_info = value_info_dict.get(input_name)
+            if value_info is not None:
+                # create new value_info for current node's new input name
+                new_value_info = model.graph.value_info.add()
+                new_value_info.CopyFrom(value_info)
+                output_name = input_name + "_cast_to_fp32"
+                new_value_info.name = output_name
+                new_value_info.type.tensor_type.elem_type = accuracy_type
+                # add Cast node (from tensor(float16) to tensor(float) before current node
+                node_name = input_name + "_cast_to_fp32_node"
+                new_node = [helper.make_node("Cast", [input_name], [output_name], to=accuracy_type, name=node_name)]
+                model.graph.node.extend(new_node)
+                # change current node's input name
+                node.input[i] = output_name
         # if output's name is in the value_info_list meaning output is tensor(float16) type, insert a float to
         # float16 Cast node after the node, change current node's output name and create new value_info for the new name
         for i in range(len(node.output)):
             output = node.output[i]
-            for value_info in value_info_list:
-                if output == value_info.name:
-                    # create new value_info for current node's new output
-                    new_value_info = model.graph.value_info.add()
-                    new_value_info.CopyFrom(value_info)
-                    output_cast_name = output + "_cast_to_fp16"
-                    new_value_info.name = output_cast_name
-                    new_value_info.type.tensor_type.elem_type = accuracy_type
-                    # add Cast node (from tensor(float) to tensor(float16) after current node
-                    node_name = output + "_cast_to_fp16_node"
-                    new_node = [helper.make_node("Cast", [output_cast_name], [output], to=10, name=node_name)]
-                    model.graph.node.extend(new_node)
-                    # change current node's output name
-                    node.output[i] = output_cast_name
-                    break
+            value_info = value_info_dict.get(output)
+            if value_info is not None:
+                # create new value_info for current node's new output
+                new_value_info = model.graph.value_info.add()
+                new_value_info.CopyFrom(value_info)
+                output_cast_name = output + "_cast_to_fp16"
+                new_value_info.name = output_cast_name
+                new_value_info.type.tensor_type.elem_type = accuracy_type
+                # add Cast node (from tensor(float) to tensor(float16) after current node
+                node_name = output + "_cast_to_fp16_node"
+                new_node = [helper.make_node("Cast", [output_cast_name], [output], to=10, name=node_name)]
+                model.graph.node.extend(new_node)
+                # change current node's output name
+                node.output[i] = output_cast_name
+    return model
+
+
+def _get_tensors_with_external_data(graph: GraphProto):
+    """Yield tensors with external data in initializers and attributes of the graph and its subgraphs."""
+    for tensor in graph.initializer:
+        if uses_external_data(tensor):
+            yield tensor
+    for node in graph.node:
+        for attr in node.attribute:
+            if attr.HasField("t") and uses_external_data(attr.t):
+                yield attr.t
+            for tensor in attr.tensors:
+                if uses_external_data(tensor):
+                    yield tensor
+            if attr.HasField("g"):
+                yield from _get_tensors_with_external_data(attr.g)
+            for subgraph in attr.graphs:
+                yield from _get_tensors_with_external_data(subgraph)
+
+
+def _get_external_data_info(tensor: TensorProto):
+    info = {entry.key: entry.value for entry in tensor.external_data}
+    return info["location"], int(info.get("offset", 0)), int(info["length"]) if "length" in info else None
+
+
+def _read_external_data_chunks(path: str, offset: int, length: int | None, chunk_size: int):
+    """Yield the external data of a tensor in chunks, and only a chunk is mapped into memory at a time."""
+    with open(path, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+        end = file_size if length is None else offset + length
+        if end > file_size:
+            raise ValueError(f"External data in {path} ends at {end} beyond the file size {file_size}")
+        while offset < end:
+            map_offset = offset - offset % mmap.ALLOCATIONGRANULARITY
+            map_length = min(offset + chunk_size, end) - map_offset
+            with mmap.mmap(f.fileno(), map_length, offset=map_offset, access=mmap.ACCESS_READ) as mapped:
+                yield mapped[offset - map_offset :]
+            offset = map_offset + map_length
+
+
+def convert_float_to_float16_with_external_data(
+    model_path: str,
+    output_path: str,
+    external_data_name: str | None = None,
+    alignment: int = 4096,
+    chunk_size: int = 1 << 24,
+    **kwargs,
+) -> ModelProto:
+    """Convert a model with external data to float16 without loading external data into memory.
+
+    The graph is converted by convert_float_to_float16. Then initializers with external data are read chunk by chunk
+    through memory maps, converted to float16 if needed, and written to a new external data file. Peak memory is
+    bounded by the size of the graph, inline initializers and chunk_size instead of the size of the model.
+
+    Args:
+        model_path (str): path of the ONNX model with external data.
+        output_path (str): path of the converted ONNX model.
+        external_data_name (str, optional): file name of the external data of the converted model, in the directory of
+                                            output_path. Defaults to None, which will use <output file name>.data.
+        alignment (int, optional): offset of every tensor in the external data file is a multiple of it.
+                                   Defaults to 4096.
+        chunk_size (int, optional): maximal number of bytes to read at a time. Defaults to 16MB.
+        kwargs: other arguments of convert_float_to_float16 like keep_io_types and op_block_list.
+
+    Returns:
+        ModelProto: converted model, which does not have the data of external initializers.
+    """
+    if alignment < 1:
+        raise ValueError(f"alignment shall be positive but got {alignment}")
+    # Chunk boundaries shall not split a float32 element.
+    chunk_size = max(chunk_size - chunk_size % 4, 4)
+
+    model = onnx.load(model_path, load_external_data=False)
+    base_dir = os.path.dirname(os.path.abspath(model_path))
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    if external_data_name is None:
+        external_data_name = os.path.basename(output_path) + ".data"
+    external_data_path = os.path.join(output_dir, external_data_name)
+
+    # Conversion only changes data type of external tensors, so keep original data types to tell the converted ones.
+    data_types = {}
+    for tensor in _get_tensors_with_external_data(model.graph):
+        location, offset, length = _get_external_data_info(tensor)
+        source_path = os.path.join(base_dir, location)
+        if os.path.abspath(source_path) == external_data_path:
+            raise ValueError(f"External data file {external_data_path} cannot be both input and output")
+        data_types[(location, offset, length)] = tensor.data_type
+
+    min_positive_val = kwargs.get("min_positive_val", 5.96e-08)
+    max_finite_val = kwargs.get("max_finite_val", 65504.0)
+    model = convert_float_to_float16(model, **kwargs)
+
+    with open(external_data_path, "wb") as output_file:
+        for tensor in _get_tensors_with_external_data(model.graph):
+            location, offset, length = _get_external_data_info(tensor)
+            to_float16 = data_types[(location, offset, length)] == TensorProto.FLOAT
+            to_float16 = to_float16 and tensor.data_type == TensorProto.FLOAT16
+
+            output_offset = output_file.tell()
+            if output_offset % alignment:
+                output_offset += alignment - output_offset % alignment
+                output_file.seek(output_offset)
+            for chunk in _read_external_data_chunks(os.path.join(base_dir, location), offset, length, chunk_size):
+                if to_float16:
+                    float32_data = np.frombuffer(chunk, dtype=np.float32)
+                    chunk = convert_np_to_float16(float32_data, min_positive_val, max_finite_val).tobytes()  # noqa: PLW2901
+                output_file.write(chunk)
+
+            del tensor.external_data[:]
+            for key, value in [
+                ("location", external_data_name),
+                ("offset", str(output_offset)),
+                ("length", str(output_file.tell() - output_offset)),
+            ]:
+                entry = tensor.external_data.add()
+                entry.key = key
+                entry.value = value
+
+    onnx.save(model, output_path)
     return model
 
 
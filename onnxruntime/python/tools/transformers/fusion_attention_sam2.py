@@ -407,8 +407,8 @@ class FusionMultiHeadAttentionSam2(Fusion):
 
         # Reuse the transpose_q node to transpose K from BSNH to BNSH. Here we update the input and output of the node.
         transpose_k_bnsh = transpose_q
-        transpose_k_bnsh.input[0] = transpose_k.input[0]
-        transpose_k_bnsh.output[0] = transpose_k.input[0] + "_BNSH"
+        self.model.set_node_input(transpose_k_bnsh, 0, transpose_k.input[0])
+        self.model.set_node_output(transpose_k_bnsh, 0, transpose_k.input[0] + "_BNSH")
 
         logger.debug(f"Found MHA: {q_num_heads=} {q_hidden_size=}")
 
@@ -424,7 +424,7 @@ class FusionMultiHeadAttentionSam2(Fusion):
 
         # Update the input of the next node that consumes the output of the MHA.
         assert len(self.model.get_children(transpose_out, input_name_to_nodes)) == 1
-        reshape_out.input[0] = new_node.output[0]
+        self.model.set_node_input(reshape_out, 0, new_node.output[0])
 
         self.nodes_to_add.append(new_node)
         self.node_name_to_graph_name[new_node.name] = self.this_graph_name
@@ -2,6 +2,7 @@
 # Copyright (c) Microsoft Corporation.  All rights reserved.
 # Licensed under the MIT License.
 # --------------------------------------------------------------------------
+import time
 from collections import defaultdict
 from collections.abc import Sequence
 from logging import getLogger
@@ -59,18 +60,34 @@ class Fusion:
         It searched nodes of given operators, and start fusion on each of those nodes.
         """
         logger.debug(f"start {self.description} fusion...")
-        input_name_to_nodes = self.model.input_name_to_nodes()
-        output_name_to_node = self.model.output_name_to_node()
-
-        # This assumes that two search ops will not be fused at same time!
-        for search_op_type in self.search_op_types:
-            for node in self.model.get_nodes_by_op_type(search_op_type):
-                graph = self.model.get_graph_by_node(node)
-                if graph is None:
-                    raise Exception("Can not find node in any graph")
-                self.this_graph_name = graph.name
-                self.fuse(node, input_name_to_nodes, output_name_to_node)
+        start_time = time.perf_counter()
+        # Lookups without the dictionaries below use an index instead of scanning the graph during matching.
+        with self.model.graph_index():
+            input_name_to_nodes = self.model.input_name_to_nodes()
+            output_name_to_node = self.model.output_name_to_node()
 
+            # This assumes that two search ops will not be fused at same time!
+            for search_op_type in self.search_op_types:
+                for node in self.model.get_nodes_by_op_type(search_op_type):
+                    graph = self.model.get_graph_by_node(node)
+                    if graph is None:
+                        raise Exception("Can not find node in any graph")
+                    self.this_graph_name = graph.name
+                    self.fuse(node, input_name_to_nodes, output_name_to_node)
+
+        self.log_fused_count()
+
+        self.model.remove_nodes(self.nodes_to_remove)
+        self.model.add_nodes(self.nodes_to_add, self.node_name_to_graph_name)
+
+        if self.prune_graph:
+            self.model.prune_graph()
+        elif self.nodes_to_remove or self.nodes_to_add:
+            self.model.update_graph()
+
+        self.add_latency(time.perf_counter() - start_time)
+
+    def log_fused_count(self):
         op_list = [node.op_type for node in self.nodes_to_add]
         if self.fused_count:
             for key, value in self.fused_count.items():
@@ -81,13 +98,11 @@ class Fusion:
             if count > 0:
                 logger.info(f"Fused {self.description}: {count}")
 
-        self.model.remove_nodes(self.nodes_to_remove)
-        self.model.add_nodes(self.nodes_to_add, self.node_name_to_graph_name)
-
-        if self.prune_graph:
-            self.model.prune_graph()
-        elif self.nodes_to_remove or self.nodes_to_add:
-            self.model.update_graph()
+    def add_latency(self, latency: float):
+        """
+        Add time (in seconds) spent in this fusion to the statistics of the model.
+        """
+        self.model.fusion_latency[self.description] = self.model.fusion_latency.get(self.description, 0.0) + latency
 
     def add_initializer(self, name: str, data_type: int, dims: Sequence[int], vals: Any, raw: bool = True):
         if raw:
@@ -139,3 +154,138 @@ class Fusion:
         for node in nodes:
             if node not in self.nodes_to_remove and node not in nodes_to_keep:
                 self.nodes_to_remove.append(node)
+
+
+class _FusionMatch:
+    """Changes recorded by one fuse call of a fusion in FusionGroup"""
+
+    def __init__(self, fusion: Fusion, priority: int, nodes_to_remove: list, nodes_to_add: list, fused_count: dict):
+        self.fusion = fusion
+        self.priority = priority
+        self.nodes_to_remove = nodes_to_remove
+        self.nodes_to_add = nodes_to_add
+        self.fused_count = fused_count
+
+
+class FusionGroup:
+    """
+    Apply several fusions with a single traversal of the model graphs.
+
+    The fusions are given in order of priority. Each node is offered to the fusions that search its operator in
+    that order. When the subgraphs matched by two fusions overlap, the match of the fusion with higher priority is
+    kept, and the other one is rolled back. Rewrites are applied in order of priority after the traversal.
+
+    This is only valid for fusions of alternative patterns, like Gelu and FastGelu: a fusion in the group shall not
+    match nodes created by another fusion of the group, and its fuse shall only record changes in nodes_to_remove,
+    nodes_to_add, fused_count and node_name_to_graph_name (adding initializers is fine since unused ones are
+    removed later). Unlike Fusion.apply, a fusion with multiple search operators visits nodes in graph order
+    instead of operator by operator.
+    """
+
+    def __init__(self, model: OnnxModel, fusions: list[Fusion]):
+        self.model: OnnxModel = model
+        self.fusions: list[Fusion] = fusions
+
+    def apply(self):
+        logger.debug(f"start fusion group of {[fusion.description for fusion in self.fusions]}...")
+        start_time = time.perf_counter()
+        latency = [0.0] * len(self.fusions)
+
+        fusions_by_op_type = defaultdict(list)
+        for priority, fusion in enumerate(self.fusions):
+            for search_op_type in fusion.search_op_types:
+                fusions_by_op_type[search_op_type].append(priority)
+
+        # Matches that claim each node (keyed by id of node) to be removed.
+        claims: dict[int, list[_FusionMatch]] = defaultdict(list)
+
+        with self.model.graph_index():
+            input_name_to_nodes = self.model.input_name_to_nodes()
+            output_name_to_node = self.model.output_name_to_node()
+
+            for graph in self.model.graphs():
+                for node in list(graph.node):
+                    for priority in fusions_by_op_type.get(node.op_type, []):
+                        # Skip the node when it is removed by a fusion with higher priority.
+                        if any(match.priority < priority for match in claims.get(id(node), [])):
+                            continue
+
+                        fusion = self.fusions[priority]
+                        fusion.this_graph_name = graph.name
+                        num_nodes_to_remove = len(fusion.nodes_to_remove)
+                        num_nodes_to_add = len(fusion.nodes_to_add)
+                        fused_count = dict(fusion.fused_count)
+
+                        fuse_start_time = time.perf_counter()
+                        fusion.fuse(node, input_name_to_nodes, output_name_to_node)
+                        latency[priority] += time.perf_counter() - fuse_start_time
+
+                        if len(fusion.nodes_to_remove) == num_nodes_to_remove and (
+                            len(fusion.nodes_to_add) == num_nodes_to_add
+                        ):
+                            continue
+
+                        match = _FusionMatch(
+                            fusion,
+                            priority,
+                            fusion.nodes_to_remove[num_nodes_to_remove:],
+                            fusion.nodes_to_add[num_nodes_to_add:],
+                            {
+                                key: value - fused_count.get(key, 0)
+                                for key, value in fusion.fused_count.items()
+                                if value != fused_count.get(key, 0)
+                            },
+                        )
+                        self._claim(match, claims)
+
+        for fusion in self.fusions:
+            fusion.log_fused_count()
+            self.model.remove_nodes(fusion.nodes_to_remove)
+            self.model.add_nodes(fusion.nodes_to_add, fusion.node_name_to_graph_name)
+
+        if any(fusion.prune_graph for fusion in self.fusions):
+            self.model.prune_graph()
+        elif any(fusion.nodes_to_remove or fusion.nodes_to_add for fusion in self.fusions):
+            self.model.update_graph()
+
+        # Time spent out of fuse calls is shared by fusions in proportion to their fused nodes.
+        shared_latency = time.perf_counter() - start_time - sum(latency)
+        total_nodes = sum(len(fusion.nodes_to_remove) for fusion in self.fusions)
+        for priority, fusion in enumerate(self.fusions):
+            share = len(fusion.nodes_to_remove) / total_nodes if total_nodes else 1.0 / len(self.fusions)
+            fusion.add_latency(latency[priority] + shared_latency * share)
+
+    def _claim(self, match: _FusionMatch, claims: dict[int, list[_FusionMatch]]):
+        # Overlapping matches of the same fusion are resolved by the fusion itself like in Fusion.apply.
+        conflicts = []
+        for node in match.nodes_to_remove:
+            for other in claims.get(id(node), []):
+                if other.fusion is not match.fusion and other not in conflicts:
+                    conflicts.append(other)
+
+        if any(other.priority < match.priority for other in conflicts):
+            self._rollback(match, claims)
+            return
+
+        for other in conflicts:
+            self._rollback(other, claims)
+
+        for node in match.nodes_to_remove:
+            claims[id(node)].append(match)
+
+    @staticmethod
+    def _rollback(match: _FusionMatch, claims: dict[int, list[_FusionMatch]]):
+        fusion = match.fusion
+        for node in match.nodes_to_remove:
+            node_claims = claims.get(id(node), [])
+            if match in node_claims:
+                node_claims.remove(match)
+            # The node might be shared with another match of the same fusion.
+            if not any(other.fusion is fusion for other in node_claims):
+                fusion.nodes_to_remove[:] = [n for n in fusion.nodes_to_remove if n is not node]
+
+        fusion.nodes_to_add[:] = [n for n in fusion.nodes_to_add if all(n is not m for m in match.nodes_to_add)]
+        for node in match.nodes_to_add:
+            fusion.node_name_to_graph_name.pop(node.name, None)
+        for key, value in match.fused_count.items():
+            fusion.fused_count[key] -= value
@@ -88,7 +88,7 @@ class FusionConstantFold(Fusion):
         for child_node in input_name_to_nodes[node.output[0]]:
             for i in range(len(child_node.input)):
                 if child_node.input[i] == node.output[0]:
-                    child_node.input[i] = node.input[0]
+                    self.model.set_node_input(child_node, i, node.input[0])
 
                     if child_node.op_type == "Gemm" and (i == 0 or i == 1):
                         # Ensure that transA/transB is set to 0 in Gemm
@@ -136,7 +136,7 @@ class FusionConstantFold(Fusion):
         for output_node in output_nodes:
             for i, input_ in enumerate(output_node.input):
                 if input_ == node.output[0]:
-                    output_node.input[i] = root_input
+                    self.model.set_node_input(output_node, i, root_input)
 
         # Add node to list of nodes to remove
         self.nodes_to_remove.append(node)
@@ -172,9 +172,9 @@ class FusionMultiHeadAttentionMMDit(Fusion):
             return None
 
         # Update the graph
-        sln_a.input[0] = transpose_a.input[0]
+        self.model.set_node_input(sln_a, 0, transpose_a.input[0])
         sln_output = sln_a.output[0]
-        sln_a.output[0] = sln_output + "_BSNH"
+        self.model.set_node_output(sln_a, 0, sln_output + "_BSNH")
 
         return self.reshape_to_3d(sln_a.output[0], sln_output + "_BSD")
 
@@ -242,8 +242,8 @@ class FusionMultiHeadAttentionMMDit(Fusion):
             return None
 
         # Update the graph
-        sln_a.input[0] = transpose_a.input[0]
-        sln_b.input[0] = transpose_b.input[0]
+        self.model.set_node_input(sln_a, 0, transpose_a.input[0])
+        self.model.set_node_input(sln_b, 0, transpose_b.input[0])
 
         new_concat_node = helper.make_node(
             "Concat",
@@ -342,8 +342,8 @@ class FusionMultiHeadAttentionMMDit(Fusion):
         if axes_0 is None or axes_0 != [0]:
             return False
 
-        nodes_a[0].input[1] = self.update_unsqueeze_axes_1_to_2(nodes_a[1])
-        nodes_b[0].input[1] = self.update_unsqueeze_axes_1_to_2(nodes_b[1])
+        self.model.set_node_input(nodes_a[0], 1, self.update_unsqueeze_axes_1_to_2(nodes_a[1]))
+        self.model.set_node_input(nodes_b[0], 1, self.update_unsqueeze_axes_1_to_2(nodes_b[1]))
         return True
 
     def adjust_flux_query_from_bnsh_to_bsd(self, mul_q: NodeProto, output_name_to_node) -> str | None:
@@ -414,8 +414,8 @@ class FusionMultiHeadAttentionMMDit(Fusion):
             return None
 
         # Update the graph
-        sln_a.input[0] = transpose_a.input[0]
-        sln_b.input[0] = transpose_b.input[0]
+        self.model.set_node_input(sln_a, 0, transpose_a.input[0])
+        self.model.set_node_input(sln_b, 0, transpose_b.input[0])
 
         new_concat_node = helper.make_node(
             "Concat",
@@ -476,8 +476,8 @@ class FusionMultiHeadAttentionMMDit(Fusion):
             return None
 
         # Update the graph
-        sln_a.input[0] = transpose_a.input[0]
-        add.output[0] = add.output[0] + "_BSNH"
+        self.model.set_node_input(sln_a, 0, transpose_a.input[0])
+        self.model.set_node_output(add, 0, add.output[0] + "_BSNH")
 
         return self.reshape_to_3d(add.output[0], add.output[0] + "_BSD")
 
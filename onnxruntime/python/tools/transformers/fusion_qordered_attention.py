@@ -390,8 +390,8 @@ class FusionQOrderedAttention(Fusion):
                 name=attention_node_name,
             )
 
-            self.model.replace_node_input(dequantize_qkv, dequantize_qkv.input[0], attention_node.output[0])
-            self.model.replace_node_input(projection_matmul, projection_matmul.input[0], dequantize_qkv.output[0])
+            self.model.replace_input_of_node(dequantize_qkv, dequantize_qkv.input[0], attention_node.output[0])
+            self.model.replace_input_of_node(projection_matmul, projection_matmul.input[0], dequantize_qkv.output[0])
 
             attention_node.attribute.extend([helper.make_attribute("num_heads", num_heads)])
             attention_node.attribute.extend([helper.make_attribute("order_input", 1)])
@@ -106,7 +106,7 @@ class FusionQOrderedLayerNormalization(Fusion):
         # downstream QuantizeLinear node, so that fusion will
         # be deemed safe
         if downstream_shape_node is not None:
-            self.model.replace_node_input(
+            self.model.replace_input_of_node(
                 downstream_shape_node, downstream_shape_node.input[0], downstream_quantize_node.output[0]
             )
 
@@ -921,12 +921,12 @@ class FusionRotaryAttention(FusionAttention):
             # Rename inputs of rotary_q/k so it connects with output of matmul_q/k
             # Before: MatMul --> Reshape --> Transpose --> RotaryEmbedding
             # After: MatMul --> RotaryEmbedding
-            rotary_q.input[0] = slice_q.output[0] if slice_q else matmul_q.output[0]
-            rotary_k.input[0] = slice_k.output[0] if slice_k else matmul_k.output[0]
+            self.model.set_node_input(rotary_q, 0, slice_q.output[0] if slice_q else matmul_q.output[0])
+            self.model.set_node_input(rotary_k, 0, slice_k.output[0] if slice_k else matmul_k.output[0])
 
             # Rename current output of rotary_k (present_key) so it doesn't match output of MHA (present_key)
             if concat_q_half is None:
-                rotary_k.output[0] = rotary_k.name + "_output_0"
+                self.model.set_node_output(rotary_k, 0, rotary_k.name + "_output_0")
 
             if qkv_nodes == qkv_nodes_3:
                 qkv_nodes = qkv_nodes[1:]
@@ -1134,7 +1134,7 @@ class FusionRotaryEmbeddings(Fusion):
         for extra_output, extra_initializer in zip(extra_outputs, extra_initializers, strict=False):
             nodes_to_update = list(filter(lambda entry: extra_output in entry.input, self.model.model.graph.node))
             for node_to_update in nodes_to_update:
-                OnnxModel.replace_node_input(node_to_update, extra_output, extra_initializer)
+                self.model.replace_input_of_node(node_to_update, extra_output, extra_initializer)
 
         return extra_outputs
 
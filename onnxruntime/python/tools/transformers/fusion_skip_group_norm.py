@@ -139,7 +139,7 @@ class FusionSkipGroupNorm(Fusion):
         if not self.is_bias_1d(bias):
             return None
 
-        reshape.input[0] = matmul.output[0]
+        self.model.set_node_input(reshape, 0, matmul.output[0])
         self.remove_if_safe(add_bias, input_name_to_nodes)
 
         return bias
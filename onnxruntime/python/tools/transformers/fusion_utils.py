@@ -88,13 +88,16 @@ class FusionUtils:
                     self.model.replace_input_of_all_nodes(output_name, input_name)
 
     @staticmethod
-    def update_node_input(node, i, new_input_name, input_name_to_nodes):
+    def update_node_input(node, i, new_input_name, input_name_to_nodes, model: OnnxModel | None = None):
         old_input_reference = 0
         if (node.input[i] in input_name_to_nodes) and node in input_name_to_nodes[node.input[i]]:
             input_name_to_nodes[node.input[i]].remove(node)
             old_input_reference = len(input_name_to_nodes[node.input[i]])
 
-        node.input[i] = new_input_name
+        if model is not None:
+            model.set_node_input(node, i, new_input_name)
+        else:
+            node.input[i] = new_input_name
 
         if new_input_name in input_name_to_nodes:
             input_name_to_nodes[new_input_name].append(node)
@@ -118,7 +121,9 @@ class FusionUtils:
 
         old_input_name = node.input[node_input_index]
         new_input_name = parent_node.input[parent_input_index]
-        old_input_reference = FusionUtils.update_node_input(node, node_input_index, new_input_name, input_name_to_nodes)
+        old_input_reference = FusionUtils.update_node_input(
+            node, node_input_index, new_input_name, input_name_to_nodes, model
+        )
 
         # We can remove the first Transpose if its output is not used (linked to graph output or other nodes) anymore.
         parent_can_be_removed = (old_input_reference == 0) and not model.find_graph_output(old_input_name)
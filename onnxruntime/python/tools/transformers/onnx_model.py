@@ -4,11 +4,14 @@
 # --------------------------------------------------------------------------
 from __future__ import annotations
 
+import hashlib
+import heapq
 import itertools
 import logging
 import os
 import sys
 from collections import deque
+from contextlib import contextmanager
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -27,7 +30,7 @@ from onnx import (
     numpy_helper,
     save_model,
 )
-from onnx.external_data_helper import load_external_data_for_tensor, uses_external_data
+from onnx.external_data_helper import ExternalDataInfo, load_external_data_for_tensor, uses_external_data
 
 logger = logging.getLogger(__name__)
 
@@ -49,18 +52,30 @@ class OnnxModel:
         self._dtype_dict: dict[str, int] | None = None
         self._shape_dict: dict[str, list] | None = None
 
+        # Index of node consumers and producers of all graphs, which is only used inside graph_index().
+        self._graph_index_depth: int = 0
+        self._input_name_to_nodes_index: dict[str, list[NodeProto]] | None = None
+        self._output_name_to_node_index: dict[str, NodeProto] | None = None
+        # Graph of each node keyed by id of node (the node is kept alive so that its id is not reused).
+        self._node_to_graph_index: dict[int, tuple[NodeProto, GraphProto]] | None = None
+        self._initializer_index: dict[str, TensorProto] | None = None
+
+        # Accumulated time in seconds spent in each fusion, keyed by fusion description.
+        self.fusion_latency: dict[str, float] = {}
+
     def disable_shape_inference(self):
         self.enable_shape_infer = False
 
     def infer_runtime_shape(self, dynamic_axis_mapping={}, update=False):  # noqa: B006
         if self.enable_shape_infer:
-            if self.shape_infer_helper is None or update:
+            if self.shape_infer_helper is None or self.shape_infer_helper.model_ is not self.model:
                 from shape_infer_helper import SymbolicShapeInferenceHelper  # noqa: PLC0415
 
                 self.shape_infer_helper = SymbolicShapeInferenceHelper(self.model)
 
             try:
-                if self.shape_infer_helper.infer(dynamic_axis_mapping):
+                # when updating, only the nodes affected by changes since last inference are inferred again
+                if self.shape_infer_helper.infer(dynamic_axis_mapping, incremental=update):
                     return self.shape_infer_helper
             except Exception:
                 self.enable_shape_infer = False  # disable shape inference to suppress same error message.
@@ -89,6 +104,129 @@ class OnnxModel:
                     output_name_to_node[output_name] = node
         return output_name_to_node
 
+    @contextmanager
+    def graph_index(self):
+        """
+        Context in which methods like get_parent, get_children and match_parent_path that are called without
+        input_name_to_nodes or output_name_to_node use an index of the graph instead of scanning all nodes.
+
+        The index is built on first use, and add_node(s), remove_node(s), replace_input_of_node,
+        replace_input_of_all_nodes, replace_output_of_all_nodes, set_node_input and set_node_output keep it up to
+        date. Inputs or outputs of nodes in the graph shall be changed by those methods inside the context, since
+        direct changes to node protos are not tracked. Methods input_name_to_nodes and output_name_to_node always
+        scan the graph. Contexts can be nested, and the index is dropped when the outermost context exits.
+
+        The context also indexes the graph of each node for get_graph_by_node and remove_nodes, and initializers by
+        name for get_initializer. Initializers shall be added or removed by add_initializer and remove_initializer
+        inside the context.
+        """
+        self._graph_index_depth += 1
+        try:
+            yield self
+        finally:
+            self._graph_index_depth -= 1
+            if self._graph_index_depth == 0:
+                self._invalidate_graph_index()
+
+    def _invalidate_graph_index(self):
+        self._input_name_to_nodes_index = None
+        self._output_name_to_node_index = None
+        self._node_to_graph_index = None
+        self._initializer_index = None
+
+    def _get_node_to_graph_index(self):
+        if self._node_to_graph_index is None:
+            self._node_to_graph_index = {}
+            for graph in self.graphs():
+                for node in graph.node:
+                    self._node_to_graph_index[id(node)] = (node, graph)
+        return self._node_to_graph_index
+
+    def _get_initializer_index(self):
+        if self._initializer_index is None:
+            self._initializer_index = {}
+            for graph in self.graphs():
+                for tensor in graph.initializer:
+                    self._initializer_index.setdefault(tensor.name, tensor)
+        return self._initializer_index
+
+    def _get_input_name_to_nodes_index(self):
+        if self._input_name_to_nodes_index is None:
+            self._input_name_to_nodes_index = {}
+            for node in self.nodes():
+                self._add_node_inputs_to_index(node)
+        return self._input_name_to_nodes_index
+
+    def _get_output_name_to_node_index(self):
+        if self._output_name_to_node_index is None:
+            self._output_name_to_node_index = {}
+            for node in self.nodes():
+                self._add_node_outputs_to_index(node)
+        return self._output_name_to_node_index
+
+    def _add_node_inputs_to_index(self, node):
+        for input_name in node.input:
+            if input_name:
+                self._input_name_to_nodes_index.setdefault(input_name, []).append(node)
+
+    def _add_node_outputs_to_index(self, node):
+        for output_name in node.output:
+            if output_name:
+                self._output_name_to_node_index[output_name] = node
+
+    def _remove_node_inputs_from_index(self, node, input_names=None):
+        for input_name in set(node.input) if input_names is None else input_names:
+            nodes = self._input_name_to_nodes_index.get(input_name)
+            if nodes is None:
+                continue
+            # The node might be a copy of the node in graph, so fall back to comparing the content.
+            i = next((i for i, n in enumerate(nodes) if n is node), None)
+            if i is None:
+                i = next((i for i, n in enumerate(nodes) if n == node), None)
+            if i is not None:
+                del nodes[i]
+                if not nodes:
+                    del self._input_name_to_nodes_index[input_name]
+
+    def _remove_node_outputs_from_index(self, node):
+        for output_name in node.output:
+            n = self._output_name_to_node_index.get(output_name) if output_name else None
+            if n is not None and (n is node or n == node):
+                del self._output_name_to_node_index[output_name]
+
+    def _is_indexed(self, node):
+        # Nodes that are not added to graph yet, like those in nodes_to_add of a fusion, are not indexed.
+        indexed = self._get_node_to_graph_index().get(id(node))
+        return indexed is not None and indexed[0] is node
+
+    def _add_node_to_index(self, node, graph):
+        if self._input_name_to_nodes_index is not None:
+            self._add_node_inputs_to_index(node)
+        if self._output_name_to_node_index is not None:
+            self._add_node_outputs_to_index(node)
+        if self._node_to_graph_index is not None:
+            self._node_to_graph_index[id(node)] = (node, graph)
+
+    def _remove_node_from_index(self, node):
+        if self._input_name_to_nodes_index is not None:
+            self._remove_node_inputs_from_index(node)
+        if self._output_name_to_node_index is not None:
+            self._remove_node_outputs_from_index(node)
+        if self._node_to_graph_index is not None:
+            self._node_to_graph_index.pop(id(node), None)
+
+    def _lookup_input_name_to_nodes(self):
+        """Get a dictionary of node consumers for read only lookups, which is the index inside graph_index()."""
+        if self._graph_index_depth > 0:
+            return self._get_input_name_to_nodes_index()
+        return self.input_name_to_nodes()
+
+    def _lookup_output_name_to_node(self):
+        """Get a dictionary of node producers for read only lookups, which is the index inside graph_index()."""
+        if self._graph_index_depth > 0:
+            return self._get_output_name_to_node_index()
+        return self.output_name_to_node()
+
     def functions(self):
         all_functions = [list(self.model.functions)]
         return all_functions
@@ -137,6 +275,10 @@ class OnnxModel:
         return output_names
 
     def get_graph_by_node(self, node):
+        if self._graph_index_depth > 0:
+            entry = self._get_node_to_graph_index().get(id(node))
+            if entry is not None:
+                return entry[1]
         for graph in self.graphs():
             if node in graph.node:
                 return graph
@@ -159,24 +301,46 @@ class OnnxModel:
         for graph in self.graphs():
             if node in graph.node:
                 graph.node.remove(node)
+                self._remove_node_from_index(node)
                 return
         logger.warning("Failed to remove node %s", node)  # It might be a bug to hit this line.
 
     def remove_nodes(self, nodes_to_remove):
+        if len(nodes_to_remove) <= 1:
+            for node in nodes_to_remove:
+                self.remove_node(node)
+            return
+
+        # Find nodes in graphs by identity with a single scan, and fall back to remove_node for copies of nodes.
+        ids_to_remove = {id(node) for node in nodes_to_remove}
+        removed = set()
+        for graph in self.graphs():
+            indices = [i for i, node in enumerate(graph.node) if id(node) in ids_to_remove]
+            for i in reversed(indices):
+                node = graph.node[i]
+                removed.add(id(node))
+                self._remove_node_from_index(node)
+                del graph.node[i]
         for node in nodes_to_remove:
-            self.remove_node(node)
+            if id(node) not in removed:
+                self.remove_node(node)
 
     def add_node(self, node, graph_name=None):
+        # Nodes are copied when added to graph, so the index shall refer to the copy in graph.
         if graph_name is None or graph_name == self.model.graph.name:
             self.model.graph.node.extend([node])
+            self._add_node_to_index(self.model.graph.node[-1], self.model.graph)
         else:
             graph = self.get_graph_by_name(graph_name)
             insert_idx = self.get_topological_insert_id(graph, node.output)
             graph.node.insert(insert_idx, node)
+            self._add_node_to_index(graph.node[insert_idx], graph)
 
     def add_nodes(self, nodes_to_add, node_name_to_graph_name=None):
         if node_name_to_graph_name is None:
             self.model.graph.node.extend(nodes_to_add)
+            for i in range(len(self.model.graph.node) - len(nodes_to_add), len(self.model.graph.node)):
+                self._add_node_to_index(self.model.graph.node[i], self.model.graph)
         else:
             for node in nodes_to_add:
                 graph_name = node_name_to_graph_name[node.name]
@@ -184,10 +348,15 @@ class OnnxModel:
 
     def add_initializer(self, tensor, graph_name=None):
         if graph_name is None or graph_name == self.model.graph.name:
-            self.model.graph.initializer.extend([tensor])
+            graph = self.model.graph
         else:
             graph = self.get_graph_by_name(graph_name)
-            graph.initializer.extend([tensor])
+        graph.initializer.extend([tensor])
+        if self._initializer_index is not None:
+            if tensor.name in self._initializer_index:
+                self._initializer_index = None
+            else:
+                self._initializer_index[tensor.name] = graph.initializer[-1]
 
     def add_input(self, input, graph_name=None):
         if graph_name is None or graph_name == self.model.graph.name:
@@ -198,14 +367,52 @@ class OnnxModel:
 
     @staticmethod
     def replace_node_input(node, old_input_name, new_input_name):
+        # It does not update the graph index. Use replace_input_of_node inside graph_index().
         assert isinstance(old_input_name, str) and isinstance(new_input_name, str)
         for j in range(len(node.input)):
             if node.input[j] == old_input_name:
                 node.input[j] = new_input_name
 
+    def replace_input_of_node(self, node, old_input_name, new_input_name):
+        """Replace an input of a node, and keep the index of node consumers up to date inside graph_index()."""
+        if self._input_name_to_nodes_index is not None and old_input_name in node.input:
+            self._remove_node_inputs_from_index(node, [old_input_name])
+            OnnxModel.replace_node_input(node, old_input_name, new_input_name)
+            if new_input_name:
+                nodes = self._input_name_to_nodes_index.setdefault(new_input_name, [])
+                if all(n is not node for n in nodes):
+                    nodes.append(node)
+        else:
+            OnnxModel.replace_node_input(node, old_input_name, new_input_name)
+
     def replace_input_of_all_nodes(self, old_input_name, new_input_name):
         for node in self.nodes():
-            OnnxModel.replace_node_input(node, old_input_name, new_input_name)
+            self.replace_input_of_node(node, old_input_name, new_input_name)
+
+    def set_node_input(self, node, index, new_input_name):
+        """Set the input of a node at index, and keep the index of node consumers up to date inside graph_index()."""
+        old_input_name = node.input[index]
+        node.input[index] = new_input_name
+        if self._input_name_to_nodes_index is None or old_input_name == new_input_name or not self._is_indexed(node):
+            return
+        # The old input might still be used by the node at another index.
+        if old_input_name and old_input_name not in node.input:
+            self._remove_node_inputs_from_index(node, [old_input_name])
+        if new_input_name:
+            nodes = self._input_name_to_nodes_index.setdefault(new_input_name, [])
+            if all(n is not node for n in nodes):
+                nodes.append(node)
+
+    def set_node_output(self, node, index, new_output_name):
+        """Set the output of a node at index, and keep the index of node producers up to date inside graph_index()."""
+        old_output_name = node.output[index]
+        node.output[index] = new_output_name
+        if self._output_name_to_node_index is None or old_output_name == new_output_name or not self._is_indexed(node):
+            return
+        if old_output_name and self._output_name_to_node_index.get(old_output_name) is node:
+            del self._output_name_to_node_index[old_output_name]
+        if new_output_name:
+            self._output_name_to_node_index[new_output_name] = node
 
     @staticmethod
     def replace_node_output(node, old_output_name, new_output_name):
@@ -222,9 +429,16 @@ class OnnxModel:
         # If we want to remove the Cast node: replace output of Add to new_name is not enough;
         # The input of Transpose shall also be updated to new_name.
         for node in self.model.graph.node:
-            OnnxModel.replace_node_output(node, old_output_name, new_output_name)
+            if self._output_name_to_node_index is not None and old_output_name in node.output:
+                self._remove_node_outputs_from_index(node)
+                OnnxModel.replace_node_output(node, old_output_name, new_output_name)
+                self._add_node_outputs_to_index(node)
+            else:
+                OnnxModel.replace_node_output(node, old_output_name, new_output_name)
 
     def get_initializer(self, name):
+        if self._graph_index_depth > 0:
+            return self._get_initializer_index().get(name)
         for graph in self.graphs():
             for tensor in graph.initializer:
                 if tensor.name == name:
@@ -240,7 +454,7 @@ class OnnxModel:
 
     def get_children(self, node, input_name_to_nodes=None, output_index=None):
         if input_name_to_nodes is None:
-            input_name_to_nodes = self.input_name_to_nodes()
+            input_name_to_nodes = self._lookup_input_name_to_nodes()
 
         children = []
         if output_index is not None:
@@ -257,7 +471,7 @@ class OnnxModel:
 
     def get_parents(self, node, output_name_to_node=None):
         if output_name_to_node is None:
-            output_name_to_node = self.output_name_to_node()
+            output_name_to_node = self._lookup_output_name_to_node()
 
         parents = []
         for input in node.input:
@@ -267,7 +481,7 @@ class OnnxModel:
 
     def get_parent(self, node, i, output_name_to_node=None):
         if output_name_to_node is None:
-            output_name_to_node = self.output_name_to_node()
+            output_name_to_node = self._lookup_output_name_to_node()
 
         if len(node.input) <= i:
             return None
@@ -330,7 +544,7 @@ class OnnxModel:
         assert input_index is None or input_index >= 0
 
         if output_name_to_node is None:
-            output_name_to_node = self.output_name_to_node()
+            output_name_to_node = self._lookup_output_name_to_node()
 
         if input_index is None:
             parent, index = self.match_first_parent(node, parent_op_type, output_name_to_node, exclude)
@@ -400,7 +614,7 @@ class OnnxModel:
             assert len(parent_input_index) == len(parent_op_types)
 
         if output_name_to_node is None:
-            output_name_to_node = self.output_name_to_node()
+            output_name_to_node = self._lookup_output_name_to_node()
 
         current_node = node
         matched_parents = []
@@ -473,7 +687,7 @@ class OnnxModel:
                 )
 
         if input_name_to_nodes is None:
-            input_name_to_nodes = self.input_name_to_nodes()
+            input_name_to_nodes = self._lookup_input_name_to_nodes()
 
         current_node = node
         matched_children = []
@@ -508,7 +722,7 @@ class OnnxModel:
 
     def find_first_parent_by_type(self, node, parent_type, output_name_to_node=None, recursive=True):
         if output_name_to_node is None:
-            output_name_to_node = self.output_name_to_node()
+            output_name_to_node = self._lookup_output_name_to_node()
 
         parents = self.get_parents(node, output_name_to_node)
         dq = deque(parents)
@@ -525,7 +739,12 @@ class OnnxModel:
         return None
 
     def get_constant_value(self, output_name):
-        for node in self.get_nodes_by_op_type("Constant"):
+        if self._graph_index_depth > 0:
+            node = self._get_output_name_to_node_index().get(output_name)
+            constant_nodes = [node] if node is not None and node.op_type == "Constant" else []
+        else:
+            constant_nodes = self.get_nodes_by_op_type("Constant")
+        for node in constant_nodes:
             if node.output[0] == output_name:
                 for att in node.attribute:
                     if att.name == "value":
@@ -570,7 +789,7 @@ class OnnxModel:
 
     def get_children_subgraph_nodes(self, root_node, stop_nodes, input_name_to_nodes=None):
         if input_name_to_nodes is None:
-            input_name_to_nodes = self.input_name_to_nodes()
+            input_name_to_nodes = self._lookup_input_name_to_nodes()
 
         children = input_name_to_nodes[root_node.output[0]]
 
@@ -877,7 +1096,7 @@ class OnnxModel:
 
     def get_parent_subgraph_nodes(self, node, stop_nodes, output_name_to_node=None):
         if output_name_to_node is None:
-            output_name_to_node = self.output_name_to_node()
+            output_name_to_node = self._lookup_output_name_to_node()
 
         unique_nodes = []
 
@@ -1042,6 +1261,7 @@ class OnnxModel:
         )
         self.model.graph.ClearField("node")
         self.model.graph.node.extend(nodes_to_keep)
+        self._invalidate_graph_index()
 
         # Remove graph outputs not in list
         output_to_remove = []
@@ -1109,6 +1329,8 @@ class OnnxModel:
                 weights_to_keep.append(initializer.name)
         for initializer in weights_to_remove:
             graph.initializer.remove(initializer)
+        if weights_to_remove:
+            self._initializer_index = None
 
         names_to_remove = [initializer.name for initializer in weights_to_remove]
         logger.debug(f"remove {len(weights_to_remove)} unused initializers: {names_to_remove}")
@@ -1136,56 +1358,59 @@ class OnnxModel:
 
     @staticmethod
     def graph_topological_sort(graph, is_deterministic=False):
-        deps_set = set()  # dependency set of all node
-        sorted_node_set = set()  # sorted node set
-        sorted_nodes = []  # initialize sorted_nodes
-
-        initializer_names = [init.name for init in graph.initializer]
-        graph_input_names = [input.name for input in graph.input]
-        input_names = initializer_names + graph_input_names
-
-        if is_deterministic:
-            input_names.sort()
-
-        for input_name in input_names:
-            deps_set.add(input_name)
-
-        sorted_node_set_len = -1
-        graph_nodes = graph.node if not is_deterministic else sorted(graph.node, key=lambda x: x.name)
-
-        last_node_name = None
-        while len(sorted_node_set) != len(graph_nodes):
-            if len(sorted_node_set) == sorted_node_set_len:
-                break
-            sorted_node_set_len = len(sorted_node_set)
-            for node_idx, node in enumerate(graph_nodes):
-                if node_idx in sorted_node_set:
-                    continue
-                input_count = sum(1 for _ in node.input if _)
-                if input_count == 0:
-                    sorted_nodes.append(node)
-                    sorted_node_set.add(node_idx)
-                    for output in node.output:
-                        if output:
-                            deps_set.add(output)
-                    continue
-                failed = False
-                for input_name in node.input:
-                    if input_name and input_name not in deps_set:
-                        failed = True
-                        last_node_name = node.name
-                if not failed:
-                    sorted_nodes.append(node)
-                    sorted_node_set.add(node_idx)
-                    for output in node.output:
-                        if output:
-                            deps_set.add(output)
-                else:
-                    continue
+        """Sort nodes of a graph in topological order.
 
-        if len(sorted_node_set) != len(graph.node):
+        The order is the same as scanning nodes repeatedly and appending every node whose inputs are ready until all
+        nodes are sorted. Instead of scanning, nodes have integer ids, tensor names are interned to integer ids and
+        consumers of tensors are kept in adjacency lists: a node that gets ready is sorted in the current scan when its
+        id is larger than the id of the node producing its last missing input, and in the next scan otherwise.
+        """
+        graph_nodes = list(graph.node) if not is_deterministic else sorted(graph.node, key=lambda x: x.name)
+
+        tensor_ids: dict[str, int] = {}
+        ready: list[bool] = []
+
+        def intern(name):
+            tensor_id = tensor_ids.get(name)
+            if tensor_id is None:
+                tensor_id = tensor_ids[name] = len(ready)
+                ready.append(False)
+            return tensor_id
+
+        for name in itertools.chain((init.name for init in graph.initializer), (input.name for input in graph.input)):
+            ready[intern(name)] = True
+
+        node_inputs = [{intern(input_name) for input_name in node.input if input_name} for node in graph_nodes]
+        node_outputs = [[intern(output) for output in node.output if output] for node in graph_nodes]
+        consumers: list[list[int]] = [[] for _ in ready]
+        missing_count = [0] * len(graph_nodes)
+        heap = []  # (scan, node id) of nodes that are ready
+        for node_id, input_ids in enumerate(node_inputs):
+            for tensor_id in input_ids:
+                if not ready[tensor_id]:
+                    consumers[tensor_id].append(node_id)
+                    missing_count[node_id] += 1
+            if missing_count[node_id] == 0:
+                heap.append((0, node_id))
+        heapq.heapify(heap)
+
+        sorted_nodes = []
+        while heap:
+            scan, node_id = heapq.heappop(heap)
+            sorted_nodes.append(graph_nodes[node_id])
+            for tensor_id in node_outputs[node_id]:
+                if ready[tensor_id]:
+                    continue
+                ready[tensor_id] = True
+                for consumer in consumers[tensor_id]:
+                    missing_count[consumer] -= 1
+                    if missing_count[consumer] == 0:
+                        heapq.heappush(heap, (scan if consumer > node_id else scan + 1, consumer))
+
+        if len(sorted_nodes) != len(graph.node):
+            last_node_name = next(graph_nodes[i].name for i in reversed(range(len(graph_nodes))) if missing_count[i])
             raise RuntimeError(
-                f"Graph is not a DAG: len(sorted_node_set)={len(sorted_node_set)}, len(graph.node)={len(graph.node)}, failed at node {last_node_name}"
+                f"Graph is not a DAG: len(sorted_node_set)={len(sorted_nodes)}, len(graph.node)={len(graph.node)}, failed at node {last_node_name}"
             )
 
         graph.ClearField("node")
@@ -1195,6 +1420,7 @@ class OnnxModel:
         # TODO: support graph_topological_sort() in subgraphs
         # for graph in self.graphs():
         #    self.graph_topological_sort(graph)
+        self._invalidate_graph_index()
         try:
             OnnxModel.graph_topological_sort(self.model.graph, is_deterministic)
         except RuntimeError as e:
@@ -1402,48 +1628,99 @@ class OnnxModel:
         return False
 
     def remove_initializer(self, tensor):
+        self._initializer_index = None
         for graph in self.graphs():
             if tensor in graph.initializer:
                 graph.initializer.remove(tensor)
                 return
         logger.warning("Failed to remove initializer %s", tensor)  # It might be a bug to hit this line.
 
-    def remove_duplicated_initializer(self, cache: dict | None):
+    @staticmethod
+    def _iter_tensor_data(tensor: TensorProto, base_dir: str = "", chunk_size: int = 1 << 24):
+        """Yields data of a tensor as bytes in chunks of chunk_size. External data is read from file in chunks and is
+        not loaded into the tensor. Tensors with same data yield same chunks no matter how the data is stored.
+        """
+        if tensor.data_type == TensorProto.STRING:
+            for s in tensor.string_data:
+                yield len(s).to_bytes(8, "little") + s
+        elif uses_external_data(tensor):
+            info = ExternalDataInfo(tensor)
+            with open(os.path.join(base_dir, info.location), "rb") as f:
+                f.seek(info.offset or 0)
+                remaining = info.length if info.length else None
+                while remaining is None or remaining > 0:
+                    chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                    if not chunk:
+                        break
+                    if remaining is not None:
+                        remaining -= len(chunk)
+                    yield chunk
+        else:
+            data = memoryview(
+                tensor.raw_data if tensor.HasField("raw_data") else numpy_helper.to_array(tensor).tobytes()
+            )
+            for start in range(0, len(data), chunk_size):
+                yield data[start : start + chunk_size]
+
+    @staticmethod
+    def _hash_tensor_data(tensor: TensorProto, base_dir: str = "") -> tuple[str, int]:
+        """Returns a digest of tensor data and the number of bytes of the data."""
+        digest = hashlib.blake2b(digest_size=16)
+        size = 0
+        for chunk in OnnxModel._iter_tensor_data(tensor, base_dir):
+            digest.update(chunk)
+            size += len(chunk)
+        return digest.hexdigest(), size
+
+    @staticmethod
+    def _has_same_data(tensor1: TensorProto, tensor2: TensorProto, base_dir: str = "") -> bool:
+        chunks1 = OnnxModel._iter_tensor_data(tensor1, base_dir)
+        chunks2 = OnnxModel._iter_tensor_data(tensor2, base_dir)
+        return all(chunk1 == chunk2 for chunk1, chunk2 in itertools.zip_longest(chunks1, chunks2))
+
+    def remove_duplicated_initializer(self, cache: dict | None, base_dir: str = "") -> int:
         """Remove initializers with duplicated values, and only keep the first one.
         It could help reduce size of models (like ALBert) with shared weights.
-        If require_raw_data passed, method will only compare raw_data initializers to speed runtime
+        Initializers are bucketed by data type, shape and a digest of data, and data is fully compared only within a
+        bucket. External data is read from files under base_dir in chunks.
         Note: this function does not process subgraph.
+
+        Args:
+            cache (dict): Optional dictionary to store data signatures of initializers, which could be used by
+                          has_same_value later.
+            base_dir (str): directory of external data files.
+        Returns:
+            int: number of bytes of the removed initializers.
         """
         if len(self.graphs()) > 1:
             logger.warning("remove_duplicated_initializer does not process subgraphs.")
 
-        initializer_count = len(self.model.graph.initializer)
-
-        same = [-1] * initializer_count
-        for i in range(initializer_count - 1):
-            if same[i] >= 0:
-                continue
-            for j in range(i + 1, initializer_count):
-                if OnnxModel.has_same_value(
-                    self.model.graph.initializer[i],
-                    self.model.graph.initializer[j],
-                    cache,
-                    cache,
-                ):
-                    same[j] = i
-
-        count = 0
-        for i in range(initializer_count):
-            if same[i] >= 0:
-                count += 1
-                self.replace_input_of_all_nodes(
-                    self.model.graph.initializer[i].name,
-                    self.model.graph.initializer[same[i]].name,
-                )
+        buckets: dict[tuple, list[TensorProto]] = {}
+        replacements: dict[str, str] = {}
+        saved_bytes = 0
+        for initializer in self.model.graph.initializer:
+            digest, size = OnnxModel._hash_tensor_data(initializer, base_dir)
+            if cache is not None:
+                cache[initializer.name] = digest
+
+            bucket = buckets.setdefault((initializer.data_type, tuple(initializer.dims), digest), [])
+            first = next((t for t in bucket if OnnxModel._has_same_data(t, initializer, base_dir)), None)
+            if first is None:
+                bucket.append(initializer)
+            else:
+                replacements[initializer.name] = first.name
+                saved_bytes += size
 
-        if count > 0:
+        if replacements:
+            for node in self.nodes():
+                for i, input_name in enumerate(node.input):
+                    if input_name in replacements:
+                        node.input[i] = replacements[input_name]
+            self._invalidate_graph_index()
             self.update_graph()
-            print(f"Removed {count} initializers with duplicated value")
+            print(f"Removed {len(replacements)} initializers with duplicated value ({saved_bytes} bytes)")
+
+        return saved_bytes
 
     def add_prefix_to_names(self, prefix: str):
         """Add prefix to initializer or intermediate outputs in graph. Main graph inputs and outputs are excluded.
@@ -9,6 +9,7 @@ import numpy as np
 from convert_to_packing_mode import PackingMode
 from fusion_attention import AttentionMask, FusionAttention
 from fusion_bart_attention import FusionBartAttention
+from fusion_base import FusionGroup
 from fusion_biasgelu import FusionBiasGelu
 from fusion_constant_fold import FusionConstantFold
 from fusion_embedlayer import FusionEmbedLayerNormalization
@@ -67,11 +68,8 @@ class BertOnnxModel(OnnxModel):
         self.qordered_attention_fusion.apply()
 
     def fuse_gelu(self):
-        fusion = FusionGelu(self)
-        fusion.apply()
-        fusion = FusionFastGelu(self)
-        fusion.apply()
-        fusion = FusionQuickGelu(self)
+        # Patterns of Gelu, FastGelu and QuickGelu do not depend on each other, so they are matched in one pass.
+        fusion = FusionGroup(self, [FusionGelu(self), FusionFastGelu(self), FusionQuickGelu(self)])
         fusion.apply()
         # Only relevant in models with Q-DQ nodes
         fusion = FusionQOrderedGelu(self)
@@ -106,10 +104,7 @@ class BertOnnxModel(OnnxModel):
         fusion.apply()
 
     def fuse_layer_norm(self):
-        fusion = FusionLayerNormalization(self)
-        fusion.apply()
-
-        fusion = FusionLayerNormalizationTF(self)
+        fusion = FusionGroup(self, [FusionLayerNormalization(self), FusionLayerNormalizationTF(self)])
         fusion.apply()
 
         # Only relevant in models with Q-DQ nodes
@@ -219,40 +214,41 @@ class BertOnnxModel(OnnxModel):
 
     def adjust_reshape_and_expand(self):
         nodes_to_remove = []
-        for node in self.nodes():
-            if node.op_type == "Reshape":
-                # Clean up unnecessary reshape nodes.
-                # Find reshape nodes with no actually data in "shape" attribute and remove.
-                reshape_shape = self.get_constant_value(node.input[1])
-                if reshape_shape is not None and reshape_shape.size == 0:
-                    nodes_to_remove.extend([node])
-                    self.replace_input_of_all_nodes(node.output[0], node.input[0])
-                    continue
-
-                # Find path "Slice" -> "Reshape" -> "Expand" -> "Expand" -> current "Reshape", simplify the graph by
-                # changing current reshape's input to output of slice.
-                reshape_path = self.match_parent_path(
-                    node,
-                    ["Expand", "Expand", "Reshape", "Slice"],
-                    [0, 0, 0, 0],
-                    self.output_name_to_node(),
-                )
-                if reshape_path is not None:
-                    expand_node = reshape_path[-3]
-                    expand_shape_value = self.get_constant_value(expand_node.input[1])
-
-                    reshape_before_expand = reshape_path[-2]
-                    shape_value = self.get_constant_value(reshape_before_expand.input[1])
-
-                    slice_node = reshape_path[-1]
-                    if (
-                        expand_shape_value is not None
-                        and shape_value is not None
-                        and len(expand_shape_value) == 2
-                        and len(shape_value) == 1
-                        and expand_shape_value[1] == shape_value[0]
-                    ):
-                        node.input[0] = slice_node.output[0]
+        # Only node inputs are changed in the loop, so node producers can be looked up from index.
+        with self.graph_index():
+            for node in self.nodes():
+                if node.op_type == "Reshape":
+                    # Clean up unnecessary reshape nodes.
+                    # Find reshape nodes with no actually data in "shape" attribute and remove.
+                    reshape_shape = self.get_constant_value(node.input[1])
+                    if reshape_shape is not None and reshape_shape.size == 0:
+                        nodes_to_remove.extend([node])
+                        self.replace_input_of_all_nodes(node.output[0], node.input[0])
+                        continue
+
+                    # Find path "Slice" -> "Reshape" -> "Expand" -> "Expand" -> current "Reshape", simplify the graph by
+                    # changing current reshape's input to output of slice.
+                    reshape_path = self.match_parent_path(
+                        node,
+                        ["Expand", "Expand", "Reshape", "Slice"],
+                        [0, 0, 0, 0],
+                    )
+                    if reshape_path is not None:
+                        expand_node = reshape_path[-3]
+                        expand_shape_value = self.get_constant_value(expand_node.input[1])
+
+                        reshape_before_expand = reshape_path[-2]
+                        shape_value = self.get_constant_value(reshape_before_expand.input[1])
+
+                        slice_node = reshape_path[-1]
+                        if (
+                            expand_shape_value is not None
+                            and shape_value is not None
+                            and len(expand_shape_value) == 2
+                            and len(shape_value) == 1
+                            and expand_shape_value[1] == shape_value[0]
+                        ):
+                            self.set_node_input(node, 0, slice_node.output[0])
 
         if nodes_to_remove:
             self.remove_nodes(nodes_to_remove)
@@ -204,7 +204,7 @@ class BertOnnxModelKeras(BertOnnxModelTF):
                 nodes_to_remove.extend(mask_nodes)
                 nodes_to_remove.extend(reshape_nodes)
                 nodes_to_remove.append(extra_reshape_0)
-                self.replace_node_input(add, extra_reshape_0.output[0], matmul.output[0])
+                self.replace_input_of_node(add, extra_reshape_0.output[0], matmul.output[0])
             else:
                 logger.debug("Root node not matched.")
                 continue
@@ -357,7 +357,7 @@ class BertOnnxModelKeras(BertOnnxModelTF):
                     outputs=["mask_fuse_cast_output"],
                 )
                 cast_node_2.attribute.extend([onnx.helper.make_attribute("to", 1)])
-                self.replace_node_input(sub_node, sub_node.input[1], "mask_fuse_cast_output")
+                self.replace_input_of_node(sub_node, sub_node.input[1], "mask_fuse_cast_output")
 
                 nodes_to_remove.extend([slice_node, unsqueeze_node, cast_node])
                 self.add_node(unsqueeze_added_1)
@@ -412,18 +412,26 @@ def optimize_model(
     return optimizer
 
 
-def get_fusion_statistics(optimized_model_path: str) -> dict[str, int]:
+def get_fusion_statistics(optimized_model_path: str | OnnxModel) -> dict[str, int]:
     """
     Get counter of fused operators in optimized model.
 
     Args:
-        optimized_model_path (str): the path of onnx model.
+        optimized_model_path (str | OnnxModel): the path of onnx model, or the optimizer returned by optimize_model.
+            For an optimizer, time spent in each fusion is also logged.
 
     Returns:
         A dictionary with operator type as key, and count as value
     """
-    model = load_model(optimized_model_path, format=None, load_external_data=True)
-    optimizer = BertOnnxModel(model)
+    if isinstance(optimized_model_path, OnnxModel):
+        fusion_latency = sorted(optimized_model_path.fusion_latency.items(), key=lambda x: -x[1])
+        if fusion_latency:
+            latency = ", ".join(f"{key}={value:.3f}" for key, value in fusion_latency)
+            logger.info(f"Fusion latency (seconds): {latency}")
+        optimizer = BertOnnxModel(optimized_model_path.model)
+    else:
+        model = load_model(optimized_model_path, format=None, load_external_data=True)
+        optimizer = BertOnnxModel(model)
     return optimizer.get_fused_operator_statistics()
 
 
@@ -6,10 +6,18 @@
 """This profiler result processor print out the kernel time spent on each Node of the model.
 Example of importing profile result file from onnxruntime_perf_test:
     python profile_result_processor.py --input profile_2021-10-25_12-02-41.json
+
+Example of comparing profiles of the same model, e.g. before and after upgrading onnxruntime, where the first profile
+is the baseline, and exiting with an error when any node or operator regressed by more than 5%:
+    python profile_result_processor.py --compare baseline.json candidate.json --regression_threshold 0.05 \
+        --output_json comparison.json --fail_on_regression
 """
 
 import argparse
 import json
+import math
+import statistics
+import sys
 
 _NODES_TYPE_CONTAINING_SUBGRAPH = frozenset(("Scan", "Loop", "If"))
 
@@ -50,6 +58,62 @@ def parse_arguments(argv=None):
 
     parser.set_defaults(kernel_time_only=False)
 
+    parser.add_argument(
+        "--compare",
+        required=False,
+        nargs="+",
+        type=str,
+        help="Compare profiles of the same model, where the first profile is the baseline and others are candidates",
+    )
+
+    parser.add_argument(
+        "--warmup_runs",
+        required=False,
+        type=int,
+        default=1,
+        help="Number of model runs at the beginning of each profile to exclude from the comparison",
+    )
+
+    parser.add_argument(
+        "--confidence",
+        required=False,
+        type=float,
+        default=0.95,
+        help="Confidence level of the intervals of latency deltas in comparison",
+    )
+
+    parser.add_argument(
+        "--regression_threshold",
+        required=False,
+        type=float,
+        default=0.05,
+        help="Minimum relative increase of latency of a node or an operator to report as regression in comparison. "
+        "The increase shall also be statistically significant.",
+    )
+
+    parser.add_argument(
+        "--min_regression_us",
+        required=False,
+        type=float,
+        default=1.0,
+        help="Minimum increase of average latency per run in microseconds to report as regression in comparison",
+    )
+
+    parser.add_argument(
+        "--output_json",
+        required=False,
+        type=str,
+        help="Save the comparison including regressions to a JSON file",
+    )
+
+    parser.add_argument(
+        "--fail_on_regression",
+        required=False,
+        action="store_true",
+        help="Exit with code 1 when comparison finds any regression",
+    )
+    parser.set_defaults(fail_on_regression=False)
+
     parser.add_argument("-v", "--verbose", required=False, action="store_true")
     parser.set_defaults(verbose=False)
 
@@ -330,6 +394,263 @@ def group_node_results(sess_time):
     return lines
 
 
+def get_node_latency_per_run(sess_time, kernel_time_only=False, warmup_runs=1):
+    """Get latency of every node in each model run. Runs are separated by "model_run" events, which are recorded at
+    the end of each run. A profile without "model_run" events is regarded as a single run.
+
+    Args:
+        sess_time (List[Dict]): profile data
+        kernel_time_only (bool, optional): Only include items for kernel time. Defaults to False.
+        warmup_runs (int, optional): Number of runs to skip at the beginning. Defaults to 1.
+
+    Returns:
+        Dict[Tuple[str, str], List[float]]: latency in μs per run of each (node name, operator) pair.
+        int: number of runs.
+    """
+    runs = []
+    run = {}
+    for item in sess_time:
+        if item.get("cat") == "Session" and item.get("name") == "model_run":
+            runs.append(run)
+            run = {}
+        elif item.get("cat") == "Node" and "dur" in item and "op_name" in item.get("args", {}):
+            op_name = item["args"]["op_name"]
+            if op_name in _NODES_TYPE_CONTAINING_SUBGRAPH:
+                continue
+            if kernel_time_only and "provider" not in item["args"]:
+                continue
+            node_name = (
+                item["name"].replace("_kernel_time", "").replace("_fence_before", "").replace("_fence_after", "")
+            )
+            key = (node_name, op_name)
+            run[key] = run.get(key, 0) + item["dur"]
+    if not runs:
+        runs.append(run)
+    elif warmup_runs > 0:
+        if warmup_runs >= len(runs):
+            raise ValueError(f"Profile has {len(runs)} runs, which is not more than {warmup_runs} warmup runs.")
+        runs = runs[warmup_runs:]
+
+    # A node that does not run in some runs, e.g. in a branch of If, has zero latency in those runs.
+    keys = {}
+    for run in runs:
+        keys.update(dict.fromkeys(run))
+    return {key: [run.get(key, 0) for run in runs] for key in keys}, len(runs)
+
+
+def _t_probability(t, df):
+    """Probability that the absolute value of Student's t variable is less than t.
+
+    With x = sqrt(df) * tan(theta), the density becomes proportional to cos(theta) ** (df - 1), which is smooth
+    and bounded for df >= 1, so Simpson's rule is accurate with a few hundred steps.
+    """
+    steps = 200
+    end = math.atan(t / math.sqrt(df))
+    h = end / steps
+    log_scale = math.lgamma((df + 1) / 2) - math.lgamma(df / 2) - 0.5 * math.log(math.pi)
+
+    def density(theta):
+        return math.cos(theta) ** (df - 1)
+
+    total = density(0) + density(end) + sum((4 if i % 2 else 2) * density(i * h) for i in range(1, steps))
+    return 2 * math.exp(log_scale) * total * h / 3
+
+
+def _t_critical(confidence, df):
+    """Two-sided critical value of Student's t distribution.
+
+    For 30 or more degrees of freedom, the Cornish-Fisher expansion from the normal distribution is accurate to
+    about 0.001. Otherwise, the value is found by bisection of the probability from numerical integration.
+    """
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    if df == math.inf:
+        return z
+    if df >= 30:
+        return (
+            z
+            + (z**3 + z) / (4 * df)
+            + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * df**2)
+            + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * df**3)
+            + (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / (92160 * df**4)
+        )
+
+    low, high = z, 2 * z
+    while _t_probability(high, df) < confidence:
+        low, high = high, 2 * high
+    while high - low > 1e-6 * high:
+        middle = (low + high) / 2
+        if _t_probability(middle, df) < confidence:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def compare_latency(baseline, candidate, confidence=0.95):
+    """Compare latency samples of runs with Welch's t interval of the difference of means.
+
+    Args:
+        baseline (List[float]): latency per run in baseline.
+        candidate (List[float]): latency per run in candidate.
+        confidence (float, optional): confidence level of the interval. Defaults to 0.95.
+
+    Returns:
+        Dict: means, delta of means, relative delta (None when baseline is zero), and lower and upper bound of the
+              confidence interval of delta (None when either side has less than 2 runs).
+    """
+    baseline_mean = statistics.fmean(baseline) if baseline else 0.0
+    candidate_mean = statistics.fmean(candidate) if candidate else 0.0
+    delta = candidate_mean - baseline_mean
+    result = {
+        "baseline_us": baseline_mean,
+        "candidate_us": candidate_mean,
+        "delta_us": delta,
+        "relative_delta": delta / baseline_mean if baseline_mean > 0 else None,
+        "ci_low_us": None,
+        "ci_high_us": None,
+    }
+    # Variance cannot be estimated from a single run.
+    if len(baseline) < 2 or len(candidate) < 2:
+        return result
+
+    baseline_var = statistics.variance(baseline) / len(baseline)
+    candidate_var = statistics.variance(candidate) / len(candidate)
+    stderr = math.sqrt(baseline_var + candidate_var)
+    if stderr > 0:
+        # Welch-Satterthwaite degrees of freedom
+        df = stderr**4 / (
+            (baseline_var**2 / (len(baseline) - 1) if baseline_var else 0.0)
+            + (candidate_var**2 / (len(candidate) - 1) if candidate_var else 0.0)
+        )
+        margin = _t_critical(confidence, df) * stderr
+    else:
+        margin = 0.0
+    result["ci_low_us"] = delta - margin
+    result["ci_high_us"] = delta + margin
+    return result
+
+
+def _is_regression(result, threshold, min_delta_us):
+    # The increase shall be above both thresholds, and the confidence interval shall exclude zero.
+    relative_delta = result["relative_delta"]
+    return (
+        (relative_delta is None or relative_delta > threshold)
+        and result["delta_us"] >= min_delta_us
+        and result["ci_low_us"] is not None
+        and result["ci_low_us"] > 0
+    )
+
+
+def _format_relative_delta(result):
+    return "N/A" if result["relative_delta"] is None else f"{result['relative_delta'] * 100:+.2f}"
+
+
+def compare_profiles(profile_files, args):
+    """Compare latency of nodes and operators in candidate profiles with the baseline profile.
+
+    Nodes are aligned by node name and operator. Nodes that only exist in one profile, e.g. due to different fusion,
+    are listed as added or removed, and are included in the operator and total latency.
+
+    Args:
+        profile_files (List[str]): profile files, where the first one is the baseline.
+        args: arguments with kernel_time_only, warmup_runs, confidence, regression_threshold and min_regression_us.
+
+    Returns:
+        List[str]: lines of string for output.
+        Dict: comparison in a JSON serializable dictionary.
+    """
+    if len(profile_files) < 2:
+        raise ValueError("Comparison requires at least two profiles.")
+
+    profiles = []
+    for profile_file in profile_files:
+        node_latency, num_runs = get_node_latency_per_run(
+            load_profile_json(profile_file), args.kernel_time_only, args.warmup_runs
+        )
+        op_latency = {}
+        for (_, op_name), latency in node_latency.items():
+            op_latency[op_name] = [a + b for a, b in zip(op_latency.get(op_name, [0] * num_runs), latency, strict=True)]
+        total_latency = [sum(latency) for latency in zip(*node_latency.values(), strict=True)] or [0] * num_runs
+        profiles.append((node_latency, op_latency, total_latency, num_runs))
+
+    threshold = args.regression_threshold
+    min_delta_us = args.min_regression_us
+    report = {
+        "baseline": profile_files[0],
+        "confidence": args.confidence,
+        "regression_threshold": threshold,
+        "min_regression_us": min_delta_us,
+        "candidates": [],
+    }
+    lines = []
+    base_nodes, base_ops, base_total, base_runs = profiles[0]
+    for profile_file, (nodes, ops, total, num_runs) in zip(profile_files[1:], profiles[1:], strict=True):
+        total_result = compare_latency(base_total, total, args.confidence)
+        op_results = []
+        for op_name in dict.fromkeys([*base_ops, *ops]):
+            result = compare_latency(
+                base_ops.get(op_name, [0] * base_runs), ops.get(op_name, [0] * num_runs), args.confidence
+            )
+            op_results.append({"op_type": op_name, **result})
+        node_results = []
+        for key in base_nodes.keys() & nodes.keys():
+            result = compare_latency(base_nodes[key], nodes[key], args.confidence)
+            node_results.append({"node": key[0], "op_type": key[1], **result})
+
+        for results in [op_results, node_results]:
+            results.sort(key=lambda x: x["delta_us"], reverse=True)
+            for result in results:
+                result["regression"] = _is_regression(result, threshold, min_delta_us)
+        total_result["regression"] = _is_regression(total_result, threshold, min_delta_us)
+
+        regressions = [{"scope": "total", **total_result}] if total_result["regression"] else []
+        regressions += [{"scope": "op", **result} for result in op_results if result["regression"]]
+        regressions += [{"scope": "node", **result} for result in node_results if result["regression"]]
+        report["candidates"].append(
+            {
+                "profile": profile_file,
+                "baseline_runs": base_runs,
+                "candidate_runs": num_runs,
+                "total": total_result,
+                "op_types": op_results,
+                "nodes": node_results,
+                "added_nodes": [{"node": n, "op_type": o} for n, o in nodes if (n, o) not in base_nodes],
+                "removed_nodes": [{"node": n, "op_type": o} for n, o in base_nodes if (n, o) not in nodes],
+                "regressions": regressions,
+            }
+        )
+
+        ci_header = f"CI{args.confidence * 100:.0f}%(μs)"
+        lines.append(f"\nComparison of {profile_file} ({num_runs} runs) with {profile_files[0]} ({base_runs} runs):")
+        lines.append("-" * 64)
+        lines.append(
+            f"Total: {total_result['baseline_us']:.1f} -> {total_result['candidate_us']:.1f} μs per run, "
+            f"{_format_relative_delta(total_result)}%"
+        )
+        header = f"Base(μs)\tNew(μs)\tDelta(μs)\tDelta%\t{ci_header:>20s}\tRegress"
+        for title, results, name_key in [("Operator", op_results, "op_type"), ("Node", node_results, "node")]:
+            lines.append(f"\nLatency delta by {title.lower()}:")
+            lines.append("-" * 64)
+            lines.append(f"{header}\t{title}")
+            for result in results:
+                ci = (
+                    "N/A" if result["ci_low_us"] is None else f"[{result['ci_low_us']:.1f}, {result['ci_high_us']:.1f}]"
+                )
+                lines.append(
+                    f"{result['baseline_us']:8.1f}\t{result['candidate_us']:8.1f}\t{result['delta_us']:+9.1f}\t"
+                    f"{_format_relative_delta(result):>6s}\t{ci:>20s}\t{'*' if result['regression'] else '':7s}\t"
+                    f"{result[name_key]}"
+                )
+        candidate = report["candidates"][-1]
+        for title, key in [("Added", "added_nodes"), ("Removed", "removed_nodes")]:
+            if candidate[key]:
+                lines.append(f"\n{title} nodes: " + ", ".join(f"{x['node']}({x['op_type']})" for x in candidate[key]))
+        lines.append(f"\nRegressions: {len(regressions)}")
+
+    report["has_regression"] = any(candidate["regressions"] for candidate in report["candidates"])
+    return lines, report
+
+
 def process_results(profile_file, args):
     profile_records = load_profile_json(profile_file)
 
@@ -350,9 +671,19 @@ if __name__ == "__main__":
 
     setup_logger(arguments.verbose)
 
-    profile_file = arguments.input
-
-    results = process_results(profile_file, arguments)
-
-    for line in results:
-        print(line)
+    if arguments.compare:
+        results, comparison = compare_profiles(arguments.compare, arguments)
+        for line in results:
+            print(line)
+        if arguments.output_json:
+            with open(arguments.output_json, "w") as output_file:
+                json.dump(comparison, output_file, indent=2)
+        if arguments.fail_on_regression and comparison["has_regression"]:
+            sys.exit(1)
+    else:
+        profile_file = arguments.input
+
+        results = process_results(profile_file, arguments)
+
+        for line in results:
+            print(line)
@@ -45,32 +45,36 @@ class SymbolicShapeInferenceHelper(SymbolicShapeInference):
         self.is_inferred_: bool = False
         self.dynamic_axis_mapping_: dict[str, int] = {}
 
-    def infer(self, dynamic_axis_mapping: dict[str, int], max_runs: int = 200):
+    def infer(self, dynamic_axis_mapping: dict[str, int], max_runs: int = 200, incremental: bool = False):
         """Run shape inference, and try replace dynamic axis from string to integer when mapping is provided.
 
         Args:
             dynamic_axis_mapping (_type_): a dictionary with name of dynamic axis as key, like {"batch_size" : 4}
             max_runs (int, optional): limit maximum number of runs to avoid infinite loop. Defaults to 200.
+            incremental (bool, optional): the model has been updated since last inference. Only nodes affected by
+                the update are inferred again when the dynamic axis mapping is unchanged. Defaults to False.
 
         Returns:
             bool: whether all shapes has been inferred or not.
         """
         assert dynamic_axis_mapping is not None
 
+        count = 0
         if self.is_inferred_ and self.dynamic_axis_mapping_ == dynamic_axis_mapping:
-            return self.all_shapes_inferred_
-
-        self.dynamic_axis_mapping_ = dynamic_axis_mapping
-
-        self._preprocess(self.model_)
+            if not incremental:
+                return self.all_shapes_inferred_
+            logger.debug("incremental shape infer run")
+            self.all_shapes_inferred_ = self._infer_incremental_impl(self.model_)
+            count += 1
+        else:
+            self.dynamic_axis_mapping_ = dynamic_axis_mapping
+            self._preprocess(self.model_)
+            self.run_ = True
 
-        count = 0
-        while self.run_:
+        while self.run_ and not (max_runs > 0 and count >= max_runs):
             logger.debug(f"shape infer run {count}")
             self.all_shapes_inferred_ = self._infer_impl()
             count += 1
-            if max_runs > 0 and count >= max_runs:
-                break
 
         self.is_inferred_ = True
         return self.all_shapes_inferred_
@@ -0,0 +1,106 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation.  All rights reserved.
+# Licensed under the MIT License.
+# --------------------------------------------------------------------------
+
+"""
+Benchmark DynamicBatcher with concurrent clients that send single-sample requests.
+
+Every client thread sends requests one after another, either with InferenceSession.run directly or through
+DynamicBatcher. The script reports throughput and latency percentiles of both.
+"""
+
+import argparse
+import threading
+import time
+
+import numpy as np
+from onnx import TensorProto, helper, numpy_helper
+
+import onnxruntime as onnxrt
+
+
+def create_mlp_model(num_layers: int, hidden_size: int):
+    rng = np.random.default_rng(0)
+    nodes = []
+    initializers = []
+    x = "input"
+    for i in range(num_layers):
+        initializers.append(
+            numpy_helper.from_array(
+                (rng.standard_normal((hidden_size, hidden_size)) / np.sqrt(hidden_size)).astype(np.float32),
+                f"weight_{i}",
+            )
+        )
+        nodes.append(helper.make_node("MatMul", [x, f"weight_{i}"], [f"matmul_{i}"]))
+        nodes.append(helper.make_node("Relu", [f"matmul_{i}"], [f"relu_{i}"]))
+        x = f"relu_{i}"
+    graph = helper.make_graph(
+        nodes,
+        "mlp",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["batch", hidden_size])],
+        [helper.make_tensor_value_info(x, TensorProto.FLOAT, ["batch", hidden_size])],
+        initializers,
+    )
+    return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+
+
+def run_clients(infer, num_clients: int, num_requests: int, hidden_size: int):
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        x = np.random.rand(1, hidden_size).astype(np.float32)
+        client_latencies = []
+        for _ in range(num_requests):
+            start = time.perf_counter()
+            infer({"input": x})
+            client_latencies.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(client_latencies)
+
+    threads = [threading.Thread(target=client) for _ in range(num_clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, np.array(latencies) * 1000
+
+
+def report(name: str, total_time: float, latencies_ms):
+    print(
+        f"{name}: {len(latencies_ms) / total_time:.0f} requests/s, "
+        f"latency p50 {np.percentile(latencies_ms, 50):.2f} ms, p99 {np.percentile(latencies_ms, 99):.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num_layers", type=int, default=4)
+    parser.add_argument("--hidden_size", type=int, default=512)
+    parser.add_argument("--num_clients", type=int, default=32)
+    parser.add_argument("--num_requests", type=int, default=200, help="number of requests per client")
+    parser.add_argument("--max_batch_size", type=int, default=32)
+    parser.add_argument("--max_wait_ms", type=float, default=2.0)
+    parser.add_argument("--intra_op_num_threads", type=int, default=2)
+    args = parser.parse_args()
+
+    model = create_mlp_model(args.num_layers, args.hidden_size)
+    so = onnxrt.SessionOptions()
+    so.intra_op_num_threads = args.intra_op_num_threads
+    session = onnxrt.InferenceSession(model.SerializeToString(), so, providers=["CPUExecutionProvider"])
+
+    print(f"clients={args.num_clients} requests per client={args.num_requests}")
+    total_time, latencies = run_clients(
+        lambda feed: session.run(None, feed), args.num_clients, args.num_requests, args.hidden_size
+    )
+    report("InferenceSession.run", total_time, latencies)
+
+    with onnxrt.DynamicBatcher(session, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms) as batcher:
+        total_time, latencies = run_clients(batcher.run, args.num_clients, args.num_requests, args.hidden_size)
+    report(f"DynamicBatcher (max_batch_size={args.max_batch_size})", total_time, latencies)
+
+
+if __name__ == "__main__":
+    main()
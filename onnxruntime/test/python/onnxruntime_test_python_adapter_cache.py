@@ -0,0 +1,132 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+# pylint: disable=C0115,W0212,C0103,C0114
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from onnx import TensorProto, helper, numpy_helper
+
+import onnxruntime as onnxrt
+from onnxruntime.capi.onnxruntime_inference_collection import _map_adapter_parameters
+
+
+class TestAdapterCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.rng = np.random.default_rng(0)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def create_session(self):
+        # y = x * base + (x * lora_a) * lora_b, where lora_a and lora_b are the adapter parameters.
+        graph = helper.make_graph(
+            [
+                helper.make_node("MatMul", ["x", "base"], ["h"]),
+                helper.make_node("MatMul", ["x", "lora_a"], ["a"]),
+                helper.make_node("MatMul", ["a", "lora_b"], ["b"]),
+                helper.make_node("Add", ["h", "b"], ["y"]),
+            ],
+            "adapter_cache_test",
+            [
+                helper.make_tensor_value_info("x", TensorProto.FLOAT, ["N", 4]),
+                helper.make_tensor_value_info("lora_a", TensorProto.FLOAT, [4, "r"]),
+                helper.make_tensor_value_info("lora_b", TensorProto.FLOAT, ["r", 4]),
+            ],
+            [helper.make_tensor_value_info("y", TensorProto.FLOAT, ["N", 4])],
+            [numpy_helper.from_array(np.eye(4, dtype=np.float32), "base")],
+        )
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+        return onnxrt.InferenceSession(model.SerializeToString(), providers=["CPUExecutionProvider"])
+
+    def create_adapter(self, name, params):
+        adapter = onnxrt.AdapterFormat()
+        adapter.set_parameters({key: onnxrt.OrtValue.ortvalue_from_numpy(value) for key, value in params.items()})
+        file_path = os.path.join(self.tmp_dir.name, name + ".onnx_adapter")
+        adapter.export_adapter(file_path)
+        return file_path
+
+    def create_lora_adapter(self, name, rank):
+        params = {
+            "lora_a": self.rng.standard_normal((4, rank), dtype=np.float32),
+            "lora_b": self.rng.standard_normal((rank, 4), dtype=np.float32),
+        }
+        return self.create_adapter(name, params), params
+
+    def test_map_adapter_parameters(self):
+        params = {
+            "float": self.rng.standard_normal((3, 2), dtype=np.float32),
+            "float16": np.arange(6, dtype=np.float16).reshape(2, 3),
+            "int64": np.arange(5, dtype=np.int64),
+            "scalar": np.array(1.5, dtype=np.float64),
+        }
+        mapped = _map_adapter_parameters(self.create_adapter("types", params))
+        self.assertEqual(set(mapped), set(params))
+        for name, value in params.items():
+            data, data_type = mapped[name]
+            self.assertEqual(data.dtype, value.dtype)
+            self.assertFalse(data.flags.writeable)
+            np.testing.assert_array_equal(data, value)
+        self.assertEqual(mapped["float16"][1], TensorProto.FLOAT16)
+
+        with self.assertRaises(ValueError):
+            _map_adapter_parameters(__file__)
+
+    def test_unsupported_format_version(self):
+        from flatbuffers import table  # noqa: PLC0415
+
+        file_path = self.create_adapter("version", {"float": np.ones(2, dtype=np.float32)})
+        with open(file_path, "rb") as f:
+            buf = bytearray(f.read())
+        # format_version is the first field of the root table Adapter in adapter_schema.fbs.
+        adapter = table.Table(buf, int.from_bytes(buf[0:4], "little"))
+        pos = adapter.Pos + adapter.Offset(4)
+        self.assertEqual(int.from_bytes(buf[pos : pos + 4], "little"), 1)
+        buf[pos : pos + 4] = (2).to_bytes(4, "little")
+        with open(file_path, "wb") as f:
+            f.write(buf)
+
+        with self.assertRaisesRegex(ValueError, "format version 2"):
+            _map_adapter_parameters(file_path)
+
+    def test_run_with_adapters(self):
+        session = self.create_session()
+        adapters = [self.create_lora_adapter(f"adapter_{i}", rank=i + 1) for i in range(3)]
+        x = self.rng.standard_normal((2, 4), dtype=np.float32)
+        cache = onnxrt.AdapterCache(max_adapters=2)
+
+        for path, params in [*adapters, adapters[2], adapters[0]]:
+            expected = x + x @ params["lora_a"] @ params["lora_b"]
+            np.testing.assert_allclose(cache.run(session, None, {"x": x}, path)[0], expected, rtol=1e-5)
+
+        # adapter_0 is evicted when adapter_2 is loaded, and loaded again by the last run.
+        stats = cache.get_stats()
+        self.assertEqual(
+            {key: stats[key] for key in ["adapters", "hits", "misses", "evictions"]},
+            {"adapters": 2, "hits": 1, "misses": 4, "evictions": 2},
+        )
+        self.assertAlmostEqual(stats["hit_rate"], 0.2)
+        self.assertEqual(stats["resident_bytes"], (3 + 1) * 8 * 4)
+
+        # Parameters are cached, and are views of the mapped file.
+        params = cache.get(adapters[0][0])
+        self.assertIs(cache.get(adapters[0][0]), params)
+        self.assertEqual(params["lora_a"].shape(), [4, 1])
+
+    def test_max_bytes(self):
+        adapters = [self.create_lora_adapter(f"adapter_{i}", rank=2) for i in range(3)]
+        cache = onnxrt.AdapterCache(max_adapters=10, max_bytes=2 * 16 * 4)
+        cache.preload([path for path, _ in adapters])
+        self.assertEqual(cache.get_stats()["adapters"], 2)
+        self.assertEqual(cache.get_stats()["resident_bytes"], 2 * 16 * 4)
+
+        # The most recently used adapter is kept even if it is larger than the limit.
+        cache = onnxrt.AdapterCache(max_bytes=1)
+        cache.preload([path for path, _ in adapters])
+        self.assertEqual(cache.get_stats()["adapters"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
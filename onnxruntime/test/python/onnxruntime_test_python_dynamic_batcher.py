@@ -0,0 +1,107 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+# pylint: disable=C0115,W0212,C0103,C0114
+import asyncio
+import unittest
+
+import numpy as np
+from onnx import TensorProto, helper, numpy_helper
+
+import onnxruntime as onnxrt
+
+
+class TestDynamicBatcher(unittest.TestCase):
+    def create_session(self, reduce_all=False):
+        # x --> MatMul --> Relu --> y, or x --> ReduceSum (all axes) --> y when reduce_all
+        weight = np.arange(12, dtype=np.float32).reshape(4, 3) - 6
+        if reduce_all:
+            nodes = [helper.make_node("ReduceSum", ["x"], ["y"], keepdims=0)]
+            output = helper.make_tensor_value_info("y", TensorProto.FLOAT, [])
+        else:
+            nodes = [helper.make_node("MatMul", ["x", "w"], ["m"]), helper.make_node("Relu", ["m"], ["y"])]
+            output = helper.make_tensor_value_info("y", TensorProto.FLOAT, ["N", 3])
+        graph = helper.make_graph(
+            nodes,
+            "dynamic_batcher_test",
+            [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["N", 4])],
+            [output],
+            [numpy_helper.from_array(weight, "w")],
+        )
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+
+        # RunAsync needs an intra-op thread pool.
+        so = onnxrt.SessionOptions()
+        so.intra_op_num_threads = 2
+        session = onnxrt.InferenceSession(model.SerializeToString(), so, providers=["CPUExecutionProvider"])
+
+        # Record the batch size of every run.
+        batch_sizes = []
+        run_async = session.run_async
+
+        def record_run_async(output_names, input_feed, *args):
+            batch_sizes.append(input_feed["x"].shape[0])
+            return run_async(output_names, input_feed, *args)
+
+        session.run_async = record_run_async
+        return session, batch_sizes
+
+    def test_concurrent_requests_are_batched(self):
+        session, batch_sizes = self.create_session()
+        inputs = [np.random.rand(rows, 4).astype(np.float32) - 0.5 for rows in [1, 2, 1, 3, 2]]
+        with onnxrt.DynamicBatcher(session, max_batch_size=4, max_wait_ms=10000) as batcher:
+            futures = [batcher.submit({"x": x}) for x in inputs]
+            results = [future.result(10) for future in futures[:4]]
+        results.append(futures[4].result(10))
+
+        # A batch is dispatched once it is full, or the next request does not fit in it. The last batch is not full,
+        # and is dispatched when the batcher is closed.
+        self.assertEqual(batch_sizes, [4, 3, 2])
+        for x, result in zip(inputs, results, strict=True):
+            np.testing.assert_allclose(result[0], session.run(None, {"x": x})[0], rtol=1e-6)
+
+    def test_different_shapes_are_not_batched(self):
+        session, batch_sizes = self.create_session()
+        with onnxrt.DynamicBatcher(session, max_batch_size=2, max_wait_ms=1) as batcher:
+            x = np.ones((1, 4), dtype=np.float32)
+            futures = [batcher.submit({"x": x}), batcher.submit({"x": x.astype(np.float64)})]
+            self.assertEqual(futures[0].result(10)[0].shape, (1, 3))
+            with self.assertRaises(Exception):  # noqa: B017
+                futures[1].result(10)
+        self.assertEqual(batch_sizes, [1, 1])
+
+    def test_output_without_batch_axis(self):
+        session, _ = self.create_session(reduce_all=True)
+        with onnxrt.DynamicBatcher(session, max_batch_size=2, max_wait_ms=10000) as batcher:
+            x = np.ones((1, 4), dtype=np.float32)
+            futures = [batcher.submit({"x": x}), batcher.submit({"x": x})]
+            for future in futures:
+                with self.assertRaises(ValueError):
+                    future.result(10)
+
+    def test_await_future(self):
+        session, _ = self.create_session()
+        x = np.random.rand(1, 4).astype(np.float32)
+
+        async def infer(batcher):
+            return await asyncio.gather(*[asyncio.wrap_future(batcher.submit({"x": x})) for _ in range(3)])
+
+        with onnxrt.DynamicBatcher(session, max_batch_size=3, max_wait_ms=10000) as batcher:
+            results = asyncio.run(infer(batcher))
+        expected = session.run(None, {"x": x})[0]
+        for result in results:
+            np.testing.assert_allclose(result[0], expected, rtol=1e-6)
+
+    def test_invalid_requests(self):
+        session, _ = self.create_session()
+        batcher = onnxrt.DynamicBatcher(session)
+        with self.assertRaises(ValueError):
+            batcher.submit({"x": np.float32(1)})
+        with self.assertRaises(ValueError):
+            batcher.submit({})
+        batcher.close()
+        with self.assertRaises(RuntimeError):
+            batcher.run({"x": np.ones((1, 4), dtype=np.float32)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+# pylint: disable=C0115,W0212,C0103,C0114
+import unittest
+
+import numpy as np
+from onnx import TensorProto, helper
+
+import onnxruntime as onnxrt
+from onnxruntime.capi.onnxruntime_inference_collection import _LatencyHistogram
+
+
+class TestRunLatencyHistograms(unittest.TestCase):
+    def create_session(self):
+        # x --> Relu --> y
+        #   --> Neg  --> z
+        graph = helper.make_graph(
+            [helper.make_node("Relu", ["x"], ["y"]), helper.make_node("Neg", ["x"], ["z"])],
+            "run_latency_test",
+            [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["N"])],
+            [
+                helper.make_tensor_value_info("y", TensorProto.FLOAT, ["N"]),
+                helper.make_tensor_value_info("z", TensorProto.FLOAT, ["N"]),
+            ],
+        )
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+        return onnxrt.InferenceSession(model.SerializeToString(), providers=["CPUExecutionProvider"])
+
+    def test_histogram(self):
+        histogram = _LatencyHistogram()
+        values = np.random.default_rng(0).lognormal(12, 1, 10000).astype(np.int64)
+        for value in values:
+            histogram.record(int(value))
+        self.assertEqual((histogram.count, histogram.min, histogram.max), (10000, values.min(), values.max()))
+        for q in [0.5, 0.9, 0.99]:
+            expected = np.quantile(values, q)
+            self.assertLess(abs(histogram.quantile(q) - expected) / expected, 0.04)
+
+        # Buckets are contiguous, and do not cross powers of two.
+        previous_high = 0
+        for index in range(1000):
+            low, high = _LatencyHistogram._bucket_range(index)
+            self.assertEqual(low, previous_high)
+            self.assertEqual(_LatencyHistogram._bucket_index(high - 1), index)
+            self.assertEqual(low.bit_length(), (high - 1).bit_length())
+            previous_high = high
+
+        bounds = [1 << 10, 1 << 15, 1 << 20]
+        self.assertEqual(histogram.cumulative_counts(bounds), [int(np.sum(values < bound)) for bound in bounds])
+
+    def test_run_phases(self):
+        session = self.create_session()
+        histograms = onnxrt.RunLatencyHistograms()
+        session.set_run_latency_histograms(histograms)
+        self.assertIs(session.get_run_latency_histograms(), histograms)
+
+        x = np.ones(4, dtype=np.float32)
+        for _ in range(3):
+            session.run(None, {"x": x})
+        session.run(["z"], {"x": x})
+        session.run_with_ort_values(["y"], {"x": onnxrt.OrtValue.ortvalue_from_numpy(x)})
+        io_binding = session.io_binding()
+        io_binding.bind_cpu_input("x", x)
+        io_binding.bind_output("z")
+        session.run_with_iobinding(io_binding)
+        session.set_run_latency_histograms(None)
+        session.run(None, {"x": x})
+
+        stats = histograms.to_dict()
+        self.assertEqual(set(stats["run"]), {"y,z", "z"})
+        self.assertEqual(set(stats["run"]["y,z"]), {"validate", "run", "total"})
+        self.assertEqual(stats["run"]["y,z"]["total"]["count"], 3)
+        self.assertEqual(
+            set(stats["run_with_ort_values"]["y"]), {"validate", "convert_inputs", "run", "convert_outputs", "total"}
+        )
+        self.assertEqual(set(stats["run_with_iobinding"]["z"]), {"run", "total"})
+        total = stats["run"]["y,z"]["total"]
+        self.assertLessEqual(total["min_us"], total["p50_us"])
+        self.assertLessEqual(total["p50_us"], total["p999_us"])
+        self.assertLessEqual(total["p999_us"], total["max_us"])
+
+        text = histograms.to_prometheus(labels={"model": 'a"b'})
+        self.assertIn("# TYPE onnxruntime_run_phase_latency_seconds histogram", text)
+        self.assertIn(
+            'onnxruntime_run_phase_latency_seconds_count{model="a\\"b",method="run",outputs="y,z",phase="total"} 3',
+            text,
+        )
+        self.assertIn('outputs="z",phase="run",le="+Inf"} 1', text)
+
+        histograms.reset()
+        self.assertEqual(histograms.to_dict(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
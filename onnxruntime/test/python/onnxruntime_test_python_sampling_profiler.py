@@ -0,0 +1,128 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+# pylint: disable=C0115,W0212,C0103,C0114
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+from onnx import TensorProto, helper, numpy_helper
+
+import onnxruntime as onnxrt
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def create_session(self, sess_options=None):
+        # x --> MatMul --> Relu --> y
+        graph = helper.make_graph(
+            [
+                helper.make_node("MatMul", ["x", "w"], ["m"], name="matmul"),
+                helper.make_node("Relu", ["m"], ["y"], name="relu"),
+            ],
+            "sampling_profiler_test",
+            [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["N", 4])],
+            [helper.make_tensor_value_info("y", TensorProto.FLOAT, ["N", 4])],
+            [numpy_helper.from_array(np.eye(4, dtype=np.float32), "w")],
+        )
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+        return onnxrt.InferenceSession(model.SerializeToString(), sess_options, providers=["CPUExecutionProvider"])
+
+    def test_sample_every(self):
+        session = self.create_session()
+        profiler = onnxrt.SamplingProfiler(sample_every=3, profile_dir=self.tmp_dir.name)
+        session.set_sampling_profiler(profiler)
+        self.assertIs(session.get_sampling_profiler(), profiler)
+
+        x = np.ones((2, 4), dtype=np.float32)
+        for _ in range(10):
+            np.testing.assert_array_equal(session.run(None, {"x": x})[0], x)
+        # Runs with run_options are not sampled.
+        session.run(None, {"x": x}, onnxrt.RunOptions())
+
+        self.assertEqual(profiler.get_stats(), {"sampled_runs": 3, "samples": 3, "failed_samples": 0})
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+        for sample in profiler.get_samples():
+            self.assertEqual([node["name"] for node in sample["nodes"]], ["matmul", "relu"])
+            self.assertEqual(sample["nodes"][0]["provider"], "CPUExecutionProvider")
+            self.assertGreaterEqual(sample["run_duration_us"], 0)
+
+        summary = profiler.get_node_summary(group_by="op_type")
+        self.assertEqual({item["op_type"] for item in summary}, {"MatMul", "Relu"})
+        self.assertEqual([item["calls"] for item in summary], [3, 3])
+        self.assertAlmostEqual(sum(item["percent"] for item in summary), 100.0)
+        self.assertEqual(len(profiler.get_node_summary(top_k=1)), 1)
+
+        session.set_sampling_profiler(None)
+        session.run(None, {"x": x})
+        self.assertEqual(profiler.get_stats()["sampled_runs"], 3)
+
+    def test_max_samples(self):
+        session = self.create_session()
+        profiler = onnxrt.SamplingProfiler(sample_every=1, max_samples=2)
+        session.set_sampling_profiler(profiler)
+        x = np.ones((1, 4), dtype=np.float32)
+        for _ in range(3):
+            session.run(None, {"x": x})
+        session.run_with_ort_values(None, {"x": onnxrt.OrtValue.ortvalue_from_numpy(x)})
+        io_binding = session.io_binding()
+        io_binding.bind_cpu_input("x", x)
+        io_binding.bind_output("y")
+        session.run_with_iobinding(io_binding)
+
+        self.assertEqual(profiler.get_stats(), {"sampled_runs": 5, "samples": 2, "failed_samples": 0})
+        profiler.clear()
+        self.assertEqual(profiler.get_samples(), [])
+        self.assertEqual(profiler.get_node_summary(), [])
+
+    def test_parse_in_background(self):
+        session = self.create_session()
+        profiler = onnxrt.SamplingProfiler(sample_every=1, profile_dir=self.tmp_dir.name)
+        session.set_sampling_profiler(profiler)
+        parse_profile = profiler._parse_profile
+        parsed = threading.Event()
+        parse_threads = []
+
+        def wait_and_parse(file_path):
+            parsed.wait()
+            parse_threads.append(threading.current_thread())
+            return parse_profile(file_path)
+
+        # Runs do not wait for profile files to be parsed.
+        with mock.patch.object(profiler, "_parse_profile", side_effect=wait_and_parse):
+            x = np.ones((1, 4), dtype=np.float32)
+            for _ in range(2):
+                session.run(None, {"x": x})
+            self.assertEqual(parse_threads, [])
+            parsed.set()
+            self.assertEqual(profiler.get_stats(), {"sampled_runs": 2, "samples": 2, "failed_samples": 0})
+        self.assertEqual(len(parse_threads), 2)
+        self.assertNotIn(threading.current_thread(), parse_threads)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            onnxrt.SamplingProfiler(sample_every=0)
+        with self.assertRaises(ValueError):
+            onnxrt.SamplingProfiler(sample_interval=0)
+        with self.assertRaises(ValueError):
+            onnxrt.SamplingProfiler().get_node_summary(group_by="provider")
+
+        so = onnxrt.SessionOptions()
+        so.enable_profiling = True
+        so.profile_file_prefix = os.path.join(self.tmp_dir.name, "session")
+        session = self.create_session(so)
+        with self.assertRaises(ValueError):
+            session.set_sampling_profiler(onnxrt.SamplingProfiler())
+        session.end_profiling()
+
+
+if __name__ == "__main__":
+    unittest.main()
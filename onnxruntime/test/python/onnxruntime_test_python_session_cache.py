@@ -0,0 +1,188 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+# pylint: disable=C0115,W0212,C0103,C0114
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+import onnxruntime as onnxrt
+
+
+class TestSessionCache(unittest.TestCase):
+    def create_model(self, bias=1.0):
+        # x --> MatMul --> Add --> Relu --> y
+        rng = np.random.default_rng(0)
+        graph = helper.make_graph(
+            [
+                helper.make_node("MatMul", ["x", "w"], ["m"]),
+                helper.make_node("Add", ["m", "b"], ["a"]),
+                helper.make_node("Relu", ["a"], ["y"]),
+            ],
+            "session_cache_test",
+            [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["N", 4])],
+            [helper.make_tensor_value_info("y", TensorProto.FLOAT, ["N", 3])],
+            [
+                numpy_helper.from_array(rng.standard_normal((4, 3), dtype=np.float32), "w"),
+                numpy_helper.from_array(np.full(3, bias, dtype=np.float32), "b"),
+            ],
+        )
+        return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+
+    def create_session(self, model, cache_dir, sess_options=None):
+        return onnxrt.InferenceSession(
+            model, sess_options, providers=["CPUExecutionProvider"], session_cache_dir=cache_dir
+        )
+
+    def test_cache_hit_and_miss(self):
+        model = self.create_model().SerializeToString()
+        x = np.random.rand(2, 4).astype(np.float32)
+        expected = onnxrt.InferenceSession(model, providers=["CPUExecutionProvider"]).run(None, {"x": x})[0]
+        stats = onnxrt.get_session_cache_stats()
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            first = self.create_session(model, cache_dir)
+            info = first.get_session_cache_info()
+            self.assertEqual(info["status"], "miss")
+            self.assertEqual(os.listdir(cache_dir), [info["key"] + ".ort"])
+
+            second = self.create_session(model, cache_dir)
+            self.assertEqual(second.get_session_cache_info(), {**info, "status": "hit"})
+            np.testing.assert_allclose(first.run(None, {"x": x})[0], expected, rtol=1e-6)
+            np.testing.assert_allclose(second.run(None, {"x": x})[0], expected, rtol=1e-6)
+
+            # Different session options and different models have different keys.
+            so = onnxrt.SessionOptions()
+            so.graph_optimization_level = onnxrt.GraphOptimizationLevel.ORT_ENABLE_BASIC
+            self.assertEqual(self.create_session(model, cache_dir, so).get_session_cache_info()["status"], "miss")
+            self.assertEqual(so.optimized_model_filepath, "")
+            other = self.create_session(self.create_model(bias=2.0).SerializeToString(), cache_dir)
+            self.assertEqual(other.get_session_cache_info()["status"], "miss")
+            self.assertEqual(len(os.listdir(cache_dir)), 3)
+
+        new_stats = onnxrt.get_session_cache_stats()
+        self.assertEqual(new_stats["hit"] - stats["hit"], 1)
+        self.assertEqual(new_stats["miss"] - stats["miss"], 3)
+
+    def test_model_path_with_external_data(self):
+        x = np.random.rand(2, 4).astype(np.float32)
+        with tempfile.TemporaryDirectory() as model_dir, tempfile.TemporaryDirectory() as cache_dir:
+            model_path = os.path.join(model_dir, "model.onnx")
+            onnx.save(self.create_model(), model_path, save_as_external_data=True, size_threshold=0)
+            expected = self.create_session(model_path, cache_dir).run(None, {"x": x})[0]
+            self.assertEqual(self.create_session(model_path, cache_dir).get_session_cache_info()["status"], "hit")
+
+            # Changing the external data invalidates the cached model.
+            onnx.save(self.create_model(bias=2.0), model_path, save_as_external_data=True, size_threshold=0)
+            session = self.create_session(model_path, cache_dir)
+            self.assertEqual(session.get_session_cache_info()["status"], "miss")
+            uncached = onnxrt.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+            np.testing.assert_allclose(session.run(None, {"x": x})[0], uncached.run(None, {"x": x})[0], rtol=1e-6)
+            self.assertFalse(np.allclose(session.run(None, {"x": x})[0], expected))
+
+    def test_cache_in_model_directory(self):
+        x = np.random.rand(2, 4).astype(np.float32)
+        with tempfile.TemporaryDirectory() as model_dir:
+            model_path = os.path.join(model_dir, "model.onnx")
+            onnx.save(self.create_model(), model_path, save_as_external_data=True, size_threshold=0)
+            first = self.create_session(model_path, model_dir)
+            self.assertEqual(first.get_session_cache_info()["status"], "miss")
+
+            # Cached models and files that the model does not reference do not change the key.
+            with open(os.path.join(model_dir, "notes.txt"), "w") as f:
+                f.write("unrelated")
+            second = self.create_session(model_path, model_dir)
+            self.assertEqual(second.get_session_cache_info(), {**first.get_session_cache_info(), "status": "hit"})
+            np.testing.assert_allclose(second.run(None, {"x": x})[0], first.run(None, {"x": x})[0], rtol=1e-6)
+            self.assertEqual(len([name for name in os.listdir(model_dir) if name.endswith(".ort")]), 1)
+
+    def test_session_options_not_changed(self):
+        model = self.create_model().SerializeToString()
+        load_session = onnxrt.InferenceSession._load_session
+        so = onnxrt.SessionOptions()
+        saved_paths = []
+
+        def check_options(session, session_options, *args):
+            # Other threads may create sessions with the same options meanwhile.
+            self.assertEqual(so.optimized_model_filepath, "")
+            saved_paths.append(session_options.optimized_model_filepath)
+            return load_session(session, session_options, *args)
+
+        with (
+            tempfile.TemporaryDirectory() as cache_dir,
+            mock.patch.object(onnxrt.InferenceSession, "_load_session", check_options),
+        ):
+            session = self.create_session(model, cache_dir, so)
+            self.assertEqual(session.get_session_cache_info()["status"], "miss")
+        self.assertEqual(len(saved_paths), 1)
+        self.assertTrue(saved_paths[0].endswith(".ort"))
+
+    def test_not_cached(self):
+        model = self.create_model().SerializeToString()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            so = onnxrt.SessionOptions()
+            so.optimized_model_filepath = os.path.join(cache_dir, "optimized.onnx")
+            self.assertIsNone(self.create_session(model, cache_dir, so).get_session_cache_info())
+            self.assertIsNone(
+                onnxrt.InferenceSession(model, providers=["CPUExecutionProvider"]).get_session_cache_info()
+            )
+
+    def test_free_dimension_overrides(self):
+        model = self.create_model().SerializeToString()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            so = onnxrt.SessionOptions()
+            so.add_free_dimension_override_by_name("N", 2)
+            self.assertEqual(self.create_session(model, cache_dir, so).get_session_cache_info()["status"], "miss")
+
+            # The cached model with the fixed batch size is not used without the override.
+            session = self.create_session(model, cache_dir)
+            self.assertEqual(session.get_session_cache_info()["status"], "miss")
+            self.assertEqual(session.run(None, {"x": np.random.rand(5, 4).astype(np.float32)})[0].shape, (5, 3))
+
+    def test_initializers_not_cached(self):
+        model = self.create_model().SerializeToString()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            so = onnxrt.SessionOptions()
+            bias = onnxrt.OrtValue.ortvalue_from_numpy(np.full(3, 2.0, dtype=np.float32))
+            so.add_initializer("b", bias)
+            session = self.create_session(model, cache_dir, so)
+            self.assertIsNone(session.get_session_cache_info())
+            self.assertEqual(os.listdir(cache_dir), [])
+
+    def test_transient_error_not_remembered(self):
+        model = self.create_model().SerializeToString()
+        load_session = onnxrt.InferenceSession._load_session
+
+        def fail_to_save(self, session_options, *args):
+            if session_options.optimized_model_filepath:
+                raise RuntimeError("Failed to save ORT format model to file")
+            return load_session(self, session_options, *args)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with (
+                mock.patch.object(onnxrt.InferenceSession, "_load_session", fail_to_save),
+                self.assertWarns(UserWarning),
+            ):
+                session = self.create_session(model, cache_dir)
+            self.assertEqual(session.get_session_cache_info()["status"], "unsupported")
+            self.assertEqual(os.listdir(cache_dir), [])
+            self.assertEqual(self.create_session(model, cache_dir).get_session_cache_info()["status"], "miss")
+
+    def test_corrupted_cache(self):
+        model = self.create_model().SerializeToString()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_path = self.create_session(model, cache_dir).get_session_cache_info()["path"]
+            with open(cache_path, "wb") as f:
+                f.write(b"corrupted")
+            with self.assertWarns(UserWarning):
+                session = self.create_session(model, cache_dir)
+            self.assertEqual(session.get_session_cache_info()["status"], "miss")
+            self.assertEqual(self.create_session(model, cache_dir).get_session_cache_info()["status"], "hit")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+# pylint: disable=C0115,W0212,C0103,C0114
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+import onnxruntime as onnxrt
+
+
+class TestSessionPool(unittest.TestCase):
+    def create_model(self, head, head_name="head", input_size=4):
+        # x --> MatMul(base) --> MatMul(head) --> y
+        base = np.arange(input_size * 8, dtype=np.float32).reshape(input_size, 8) / 32
+        graph = helper.make_graph(
+            [helper.make_node("MatMul", ["x", "base"], ["h"]), helper.make_node("MatMul", ["h", head_name], ["y"])],
+            "session_pool_test",
+            [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["N", input_size])],
+            [helper.make_tensor_value_info("y", TensorProto.FLOAT, ["N", head.shape[1]])],
+            [numpy_helper.from_array(base, "base"), numpy_helper.from_array(head, head_name)],
+        )
+        return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+
+    def test_shared_initializers(self):
+        rng = np.random.default_rng(0)
+        models = [self.create_model(rng.standard_normal((8, 2), dtype=np.float32), f"head_{i}") for i in range(3)]
+        # The base weight of this variant has another shape, so it does not use the shared one.
+        models.append(self.create_model(rng.standard_normal((8, 2), dtype=np.float32), "head_3", input_size=2))
+        # Saving with external data modifies the models.
+        model_bytes = [model.SerializeToString() for model in models]
+
+        pool = onnxrt.SessionPool(providers=["CPUExecutionProvider"])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = []
+            for i, model in enumerate(models):
+                paths.append(os.path.join(tmp_dir, f"variant_{i}.onnx"))
+                onnx.save(model, paths[-1], save_as_external_data=True, location=f"variant_{i}.data", size_threshold=0)
+
+            base_bytes = 4 * 8 * 4
+            head_bytes = 8 * 2 * 4
+            self.assertEqual(pool.add_shared_initializers_from_model(paths[0]), base_bytes + head_bytes)
+            sessions = [pool.create_session(path) for path in paths[:2]]
+            sessions.extend(pool.create_session(model) for model in model_bytes[2:])
+
+        for model, session in zip(model_bytes, sessions, strict=True):
+            x = rng.standard_normal((2, session.get_inputs()[0].shape[1]), dtype=np.float32)
+            expected = onnxrt.InferenceSession(model, providers=["CPUExecutionProvider"])
+            np.testing.assert_allclose(session.run(None, {"x": x})[0], expected.run(None, {"x": x})[0], rtol=1e-5)
+
+        self.assertEqual(
+            pool.get_memory_stats(),
+            {
+                "sessions": 4,
+                "shared_bytes": base_bytes + head_bytes,
+                "referenced_bytes": 3 * base_bytes + head_bytes,
+                "saved_bytes": 2 * base_bytes,
+            },
+        )
+
+    def test_shared_initializer_of_different_shape(self):
+        model = self.create_model(np.ones((8, 2), dtype=np.float32))
+        pool = onnxrt.SessionPool(providers=["CPUExecutionProvider"])
+        pool.add_shared_initializer("base", numpy_helper.to_array(model.graph.initializer[0]))
+        pool.add_shared_initializer("head", np.zeros((8, 3), dtype=np.float32))
+        with self.assertRaises(ValueError):
+            pool.add_shared_initializer("base", np.zeros((4, 8), dtype=np.float32))
+
+        # The base is shared, and the head is not shared since it has another shape.
+        session = pool.create_session(model.SerializeToString())
+        expected = onnxrt.InferenceSession(model.SerializeToString(), providers=["CPUExecutionProvider"])
+        x = np.ones((1, 4), dtype=np.float32)
+        np.testing.assert_array_equal(session.run(None, {"x": x})[0], expected.run(None, {"x": x})[0])
+        self.assertEqual(pool.get_memory_stats()["referenced_bytes"], 4 * 8 * 4)
+
+    def test_shared_initializer_of_different_data(self):
+        # A fine-tuned variant has the same initializer names, data types and shapes as the base model.
+        base_model = self.create_model(np.ones((8, 2), dtype=np.float32))
+        tuned_model = self.create_model(np.full((8, 2), 2, dtype=np.float32))
+        # Saving with external data modifies the model.
+        expected = onnxrt.InferenceSession(tuned_model.SerializeToString(), providers=["CPUExecutionProvider"])
+        pool = onnxrt.SessionPool(providers=["CPUExecutionProvider"])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "tuned.onnx")
+            onnx.save(tuned_model, path, save_as_external_data=True, size_threshold=0)
+            pool.add_shared_initializers_from_model(base_model)
+            session = pool.create_session(path)
+
+        x = np.ones((1, 4), dtype=np.float32)
+        np.testing.assert_array_equal(session.run(None, {"x": x})[0], expected.run(None, {"x": x})[0])
+        # Only the base is shared.
+        self.assertEqual(pool.get_memory_stats()["referenced_bytes"], 4 * 8 * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -106,6 +106,79 @@ class TestSymbolicShapeInference(unittest.TestCase):
         with self.assertRaisesRegex(ValueError, r"if_node.*FLOAT.*DOUBLE"):
             SymbolicShapeInference.infer_shapes(model, auto_merge=True)
 
+    def test_incremental_inference(self):
+        graph = helper.make_graph(
+            [
+                helper.make_node("Relu", ["x"], ["relu"], name="relu"),
+                helper.make_node("Reshape", ["relu", "shape"], ["reshaped"], name="reshape"),
+                helper.make_node("Shape", ["reshaped"], ["reshaped_shape"], name="shape"),
+                helper.make_node("Transpose", ["reshaped"], ["out"], name="transpose", perm=[0, 2, 1]),
+            ],
+            "graph",
+            [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["batch", 8])],
+            [helper.make_tensor_value_info("out", TensorProto.FLOAT, None)],
+            [helper.make_tensor("shape", TensorProto.INT64, [3], [-1, 2, 4])],
+        )
+        model = helper.make_model(graph, producer_name="test_incremental_inference")
+
+        symbolic_shape_inference = SymbolicShapeInference(2**31 - 1, True, False, 0)
+        symbolic_shape_inference._preprocess(model)
+        while symbolic_shape_inference.run_:
+            self.assertTrue(symbolic_shape_inference._infer_impl())
+
+        # change the target shape of Reshape, and add a node consuming the graph output
+        model.graph.initializer[0].CopyFrom(helper.make_tensor("shape", TensorProto.INT64, [3], [-1, 4, 2]))
+        model.graph.node.append(helper.make_node("Neg", ["out"], ["neg"], name="neg"))
+        model.graph.output.append(helper.make_tensor_value_info("neg", TensorProto.FLOAT, None))
+
+        inferred_nodes = []
+        infer_node = symbolic_shape_inference._infer_node
+        symbolic_shape_inference._infer_node = lambda node: inferred_nodes.append(node.name) or infer_node(node)
+        self.assertTrue(symbolic_shape_inference._infer_incremental_impl(model))
+        self.assertEqual(inferred_nodes, ["reshape", "shape", "transpose", "neg"])
+
+        expected = SymbolicShapeInference.infer_shapes(model, auto_merge=True)
+        expected_vis = {vi.name: vi for vi in expected.graph.value_info}
+        self.assertEqual(len(symbolic_shape_inference.out_mp_.graph.value_info), len(expected_vis))
+        for vi in symbolic_shape_inference.out_mp_.graph.value_info:
+            self.assertEqual(vi, expected_vis[vi.name])
+        self.assertEqual(
+            symbolic_shape_inference.sympy_data_["reshaped_shape"],
+            [symbolic_shape_inference.symbolic_dims_["batch"], 4, 2],
+        )
+
+    def test_onnx_infer_cache(self):
+        nodes = []
+        for i in range(4):
+            nodes.append(helper.make_node("Relu", [f"x{i}"], [f"relu{i}"]))
+            nodes.append(helper.make_node("Gelu", [f"relu{i}"], [f"x{i + 1}"], domain="com.microsoft"))
+        nodes.append(helper.make_node("Transpose", ["x4"], ["out"], perm=[1, 0]))
+        graph = helper.make_graph(
+            nodes,
+            "graph",
+            [helper.make_tensor_value_info("x0", TensorProto.FLOAT, ["batch", 8])],
+            [helper.make_tensor_value_info("out", TensorProto.FLOAT, None)],
+        )
+        model = helper.make_model(
+            graph, opset_imports=[helper.make_opsetid("", 17), helper.make_opsetid("com.microsoft", 1)]
+        )
+
+        symbolic_shape_inference = SymbolicShapeInference(2**31 - 1, True, False, 0)
+        symbolic_shape_inference._preprocess(model)
+        while symbolic_shape_inference.run_:
+            self.assertTrue(symbolic_shape_inference._infer_impl())
+
+        stats = symbolic_shape_inference.get_op_type_stats()
+        self.assertEqual(stats["Relu"]["nodes"], 4)
+        self.assertEqual((stats["Relu"]["hits"], stats["Relu"]["misses"]), (3, 1))
+        self.assertEqual((stats["Transpose"]["hits"], stats["Transpose"]["misses"]), (0, 1))
+        for i in range(5):
+            vi = symbolic_shape_inference.known_vi_[f"x{i}"]
+            self.assertEqual(vi.name, f"x{i}")
+            self.assertEqual([d.dim_param or d.dim_value for d in vi.type.tensor_type.shape.dim], ["batch", 8])
+        out = symbolic_shape_inference.known_vi_["out"]
+        self.assertEqual([d.dim_param or d.dim_value for d in out.type.tensor_type.shape.dim], [8, "batch"])
+
 
 class TestSymbolicShapeInferenceForOperators(unittest.TestCase):
     def _check_shapes(self, graph, inferred_graph, vis):  # type: (GraphProto, GraphProto, List[ValueInfoProto]) -> None
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+"""Tests of the streaming trace parser and the summaries of onnxruntime/python/tools/profile_explorer."""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+
+# Make the script importable regardless of CWD.
+_PROFILE_EXPLORER = os.path.normpath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "python", "tools", "profile_explorer")
+)
+if _PROFILE_EXPLORER not in sys.path:
+    sys.path.insert(0, _PROFILE_EXPLORER)
+
+import profile_explorer  # noqa: E402
+
+
+def _shape(*dims):
+    return [{"float": list(dims)}]
+
+
+def _create_trace(num_runs=3):
+    """Returns the events of a trace with CPU nodes, and GPU kernels with and without ops, in each model run."""
+    events = [{"cat": "Session", "name": "model_loading_uri", "dur": 100, "ts": 0, "args": {}}]
+    for run in range(num_runs):
+        for node, op_name, dims in [("MatMul_0", "MatMul", (2, 4)), ("Relu_1", "Relu", (2, 8 + run % 2))]:
+            events.append(
+                {
+                    "cat": "Node",
+                    "name": f"{node}_kernel_time",
+                    "dur": 10 + run,
+                    "args": {
+                        "op_name": op_name,
+                        "input_type_shape": _shape(*dims),
+                        "output_type_shape": _shape(dims[0], 8),
+                    },
+                }
+            )
+            events.append(
+                {
+                    "cat": "Kernel",
+                    "name": f"_Z6{op_name}Kernel",
+                    "dur": 3 + run,
+                    "args": {"op_name": op_name, "block_x": 128, "block_y": 1, "block_z": 1, "grid_x": run + 1},
+                }
+            )
+        events.append({"cat": "Kernel", "name": "hipMemcpy", "dur": 1.5, "args": {"grid_x": 1}})
+        events.append({"cat": "Session", "name": "model_run", "dur": 50, "args": {}})
+    # Events of a run that has not completed.
+    events.append({"cat": "Kernel", "name": "_Z6MatMulKernel", "dur": 7, "args": {"op_name": "MatMul"}})
+    return events
+
+
+def _reference_frames(data, filter_matcher, start=1, end=None):
+    """
+    Returns the CPU and GPU frames of the selected runs as the explorer did before streaming the trace: all events
+    are split across runs with the indices of "model_run" events, then converted to a list of dicts per event.
+    """
+    model_run_splits = [i for i, item in enumerate(data) if item.get("name") == "model_run"]
+    total_num_runs = len(model_run_splits)
+    start = start + total_num_runs if start < 0 else start
+    end = total_num_runs if end is None else end + total_num_runs if end < 0 else end
+    model_run_splits = [0, *model_run_splits]
+    data = data[model_run_splits[start] : model_run_splits[end]]
+
+    cpu_entries = []
+    gpu_entries = []
+    most_recent_kernel_launch_event = None
+    for item in data:
+        if item.get("cat") is None or item.get("dur") is None or item.get("args") is None:
+            continue
+        arg = item["args"]
+        op_name = arg.get("op_name")
+        name = item["name"]
+        if not filter_matcher(name) and op_name is not None and not filter_matcher(op_name):
+            continue
+        if item["cat"] != "Kernel" and not name.endswith("kernel_time"):
+            continue
+        if name.endswith("kernel_time"):
+            most_recent_kernel_launch_event = item
+        if item["cat"] == "Kernel":
+            block = f"b{arg.get('block_x', -1)}x{arg.get('block_y', -1)}x{arg.get('block_z', -1)}"
+            grid = f"g{arg.get('grid_x', -1)}x{arg.get('grid_y', -1)}x{arg.get('grid_z', -1)}"
+            gpu_entries.append(
+                {
+                    "name": name,
+                    "duration": item["dur"],
+                    "dimensions": f"{block},{grid}",
+                    "op_name": op_name,
+                    "input_type_shape": (
+                        profile_explorer._shape_to_string(most_recent_kernel_launch_event["args"]["input_type_shape"])
+                        if most_recent_kernel_launch_event is not None
+                        else "unknown"
+                    ),
+                }
+            )
+        else:
+            cpu_entries.append(
+                {
+                    "name": op_name,
+                    "duration": item["dur"],
+                    "input_type_shape": profile_explorer._shape_to_string(arg["input_type_shape"]),
+                    "output_type_shape": profile_explorer._shape_to_string(arg["output_type_shape"]),
+                }
+            )
+
+    cpu_df = pd.DataFrame(cpu_entries)
+    gpu_df = pd.DataFrame(gpu_entries)
+    cpu_df["count"] = 1
+    gpu_df["count"] = 1
+    return cpu_df, gpu_df, end - start
+
+
+def _as_objects(df, columns):
+    """Converts string columns, which are categorical or of the string dtype, to objects with None if missing."""
+    df = df[list(columns)].copy()
+    for column in profile_explorer._TraceColumns.STRING_COLUMNS:
+        if column in df:
+            df[column] = pd.Series([None if pd.isna(value) else value for value in df[column]], dtype=object)
+    return df
+
+
+class TestProfileExplorer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def save_trace(self, data, name="trace.json"):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        return path
+
+    def check_frames(self, columns, events, filter_matcher, start=1, end=None):
+        cpu_df, gpu_df, num_runs = columns.to_df(start, end)
+        ref_cpu_df, ref_gpu_df, ref_num_runs = _reference_frames(events, filter_matcher, start, end)
+        self.assertEqual(num_runs, ref_num_runs)
+        for df, ref_df in [(cpu_df, ref_cpu_df), (gpu_df, ref_gpu_df)]:
+            pd.testing.assert_frame_equal(
+                _as_objects(df, ref_df.columns), _as_objects(ref_df, ref_df.columns), check_dtype=False
+            )
+
+    def test_parse_trace(self):
+        events = _create_trace()
+        match_all = profile_explorer._construct_filter_matcher(type("Args", (), {"filter": None}))
+        match_relu = profile_explorer._construct_filter_matcher(type("Args", (), {"filter": ["Relu*", "hipMem*"]}))
+        # Chunks smaller than an event split events across chunks.
+        for layout, data in [("array", events), ("object", {"traceEvents": events, "displayTimeUnit": "ns"})]:
+            path = self.save_trace(data)
+            for chunk_size in [64, 1 << 22]:
+                with self.subTest(layout=layout, chunk_size=chunk_size):
+                    self.assertEqual(list(profile_explorer._iter_trace_events(path, chunk_size)), events)
+
+        path = self.save_trace(events)
+        for filter_matcher in [match_all, match_relu]:
+            columns = profile_explorer._TraceColumns()
+            columns.add_events(profile_explorer._iter_trace_events(path, chunk_size=64), filter_matcher)
+            for start, end in [(1, None), (0, None), (0, 1), (-2, -1)]:
+                with self.subTest(filter=filter_matcher is match_relu, start=start, end=end):
+                    self.check_frames(columns, events, filter_matcher, start, end)
+
+    def test_truncated_trace(self):
+        events = _create_trace()
+        path = self.save_trace(events)
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        # Cut the trace in the middle of the last event.
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text[: text.rindex('"name": "_Z6MatMulKernel"')])
+        self.assertEqual(list(profile_explorer._iter_trace_events(path, chunk_size=64)), events[:-1])
+
+    def check_summary(self, extension):
+        events = _create_trace()
+        match_all = profile_explorer._construct_filter_matcher(type("Args", (), {"filter": None}))
+        columns = profile_explorer._TraceColumns()
+        columns.add_events(profile_explorer._iter_trace_events(self.save_trace(events)), match_all)
+        summary_path = os.path.join(self.tmp_dir.name, "summary" + extension)
+        columns.save(summary_path)
+
+        loaded = profile_explorer._TraceColumns.load(summary_path, match_all)
+        self.assertEqual(loaded.num_model_runs, 3)
+        self.check_frames(loaded, events, match_all)
+        self.check_frames(loaded, events, match_all, 0, None)
+
+        # Filters of a summary apply to op names and kernel names.
+        match_relu = profile_explorer._construct_filter_matcher(type("Args", (), {"filter": ["Relu*", "hipMem*"]}))
+        loaded = profile_explorer._TraceColumns.load(summary_path, match_relu)
+        self.check_frames(loaded, events, match_relu)
+
+    def test_npz_summary(self):
+        self.check_summary(".npz")
+
+    @unittest.skipIf(importlib.util.find_spec("pyarrow") is None, "pyarrow is not installed")
+    def test_parquet_summary(self):
+        self.check_summary(".parquet")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation.  All rights reserved.
+# Licensed under the MIT License.
+# --------------------------------------------------------------------------
+
+"""
+Benchmark the entropy threshold search of HistogramCollector.
+
+It compares the batched search of get_entropy_threshold with the candidate by candidate
+computation of the KL divergences and checks that both select the same thresholds.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from onnxruntime.quantization.calibrate import HistogramCollector
+
+
+def candidate_by_candidate_threshold(histogram, num_quantized_bins):
+    hist, hist_edges = histogram[:2]
+    zero_bin_index = hist.size // 2
+    candidates = range(num_quantized_bins // 2, zero_bin_index + 1)
+    bounds = [(zero_bin_index - i, min(zero_bin_index + i + 1, hist.size)) for i in candidates]
+    kl_divergence = [
+        HistogramCollector._get_entropy_divergence(hist, num_quantized_bins, start, end, hist_edges.dtype)
+        for start, end in bounds
+    ]
+    start, end = bounds[np.argmin(kl_divergence)]
+    return max(hist_edges[start], histogram[2]), min(hist_edges[end], histogram[3])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num_tensors", type=int, default=16)
+    parser.add_argument("--num_bins", type=int, default=2048)
+    parser.add_argument("--num_quantized_bins", type=int, default=128)
+    parser.add_argument("--num_values", type=int, default=100000, help="number of values per tensor")
+    parser.add_argument("--num_workers", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    collector = HistogramCollector(
+        method="entropy",
+        symmetric=False,
+        num_bins=args.num_bins,
+        num_quantized_bins=args.num_quantized_bins,
+        percentile=99.999,
+        scenario="same",
+        num_workers=args.num_workers,
+    )
+    collector.collect(
+        {f"tensor_{i}": rng.standard_t(2 + i % 5, args.num_values).astype(np.float32) for i in range(args.num_tensors)}
+    )
+    histograms = collector.histogram_dict
+
+    start = time.perf_counter()
+    expected = {name: candidate_by_candidate_threshold(h, args.num_quantized_bins) for name, h in histograms.items()}
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    thresholds = collector.compute_entropy()
+    batched_time = time.perf_counter() - start
+
+    mismatches = [name for name in histograms if tuple(thresholds[name][:2]) != expected[name]]
+
+    print(f"tensors={args.num_tensors} bins={args.num_bins} quantized_bins={args.num_quantized_bins}")
+    print(f"candidate by candidate: {reference_time:.3f} s")
+    print(f"batched (num_workers={args.num_workers}): {batched_time:.3f} s")
+    print(f"speedup: {reference_time / batched_time:.1f}x")
+    print(f"mismatched thresholds: {len(mismatches)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,7 @@ from onnxruntime.quantization import quantize_static
 from onnxruntime.quantization.calibrate import (
     CalibrationDataReader,
     CalibrationMethod,
+    HistogramCollector,
     TensorData,
     TensorsData,
     create_calibrator,
@@ -444,8 +445,8 @@ class TestCalibrateMinMaxCalibrator(unittest.TestCase):
         graph.initializer.extend([conv1_w, conv2_w])
 
         model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
-        test_model_path = "./test_model_5.onnx"
-        onnx.save(model, test_model_path)
+        test_model_path = Path(self._tmp_model_dir.name).joinpath("./test_model_5.onnx")
+        onnx.save(model, test_model_path.as_posix())
 
         augmented_model_path = Path(self._tmp_model_dir.name).joinpath("./augmented_test_model_5.onnx")
         calibrater = create_calibrator(test_model_path, [], augmented_model_path.as_posix())
@@ -538,6 +539,215 @@ class TestCalibrateMinMaxCalibrator(unittest.TestCase):
         for output_name, min_max in output_min_max_dict.items():
             np.testing.assert_equal(min_max, tensors_range[output_name].range_value)
 
+    def test_compute_data_num_workers(self):
+        """
+        Checks that collecting data with several workers produces the same ranges as the serial collection.
+        """
+        test_model_path = Path(self._tmp_model_dir.name).joinpath("./test_model_7.onnx")
+        self.construct_test_compute_data_model(test_model_path.as_posix(), opset_version=18)
+
+        data_reader = TestDataReader()
+        for extra_options in [{}, {"per_channel": True}, {"moving_average": True}, {"symmetric": True}]:
+            with self.subTest(extra_options=extra_options):
+                tensors_ranges = []
+                for num_workers in [1, 3]:
+                    data_reader.rewind()
+                    augmented_model_path = Path(self._tmp_model_dir.name).joinpath(
+                        f"./augmented_test_model_7_{num_workers}.onnx"
+                    )
+                    calibrater = create_calibrator(
+                        test_model_path,
+                        augmented_model_path=augmented_model_path.as_posix(),
+                        extra_options={**extra_options, "num_workers": num_workers},
+                    )
+                    calibrater.collect_data(data_reader)
+                    tensors_ranges.append(calibrater.compute_data())
+
+                serial_range, parallel_range = tensors_ranges
+                self.assertEqual(set(serial_range.keys()), set(parallel_range.keys()))
+                for name in serial_range:
+                    np.testing.assert_allclose(
+                        serial_range[name].range_value, parallel_range[name].range_value, rtol=1e-6
+                    )
+
+    def test_num_workers_invalid(self):
+        test_model_path = Path(self._tmp_model_dir.name).joinpath("./test_model_8.onnx")
+        self.construct_test_compute_data_model(test_model_path.as_posix())
+
+        augmented_model_path = Path(self._tmp_model_dir.name).joinpath("./augmented_test_model_8.onnx")
+        with self.assertRaises(ValueError):
+            create_calibrator(
+                test_model_path, augmented_model_path=augmented_model_path.as_posix(), extra_options={"num_workers": 0}
+            )
+
+    def test_histogram_calibrators_resume(self):
+        """
+        Checks that saving the histograms after a first shard of the data and resuming the calibration
+        from the saved file gives the same ranges as an uninterrupted calibration.
+        """
+        test_model_path = Path(self._tmp_model_dir.name).joinpath("./test_model_9.onnx")
+        self.construct_test_compute_data_model(test_model_path.as_posix(), augmented=False)
+
+        data_reader = TestDataReader()
+        first_reader, second_reader = TestDataReader(), TestDataReader()
+        first_reader.input_data_list = data_reader.input_data_list[:2]
+        second_reader.input_data_list = data_reader.input_data_list[2:]
+
+        calibration_methods = [CalibrationMethod.Percentile, CalibrationMethod.Entropy, CalibrationMethod.Distribution]
+        for calibration_method in calibration_methods:
+            with self.subTest(calibration_method=calibration_method):
+                augmented_model_path = Path(self._tmp_model_dir.name).joinpath(f"augmented_{calibration_method}.onnx")
+                saved_path = Path(self._tmp_model_dir.name).joinpath(f"histograms_{calibration_method}.json")
+
+                first_reader.rewind()
+                second_reader.rewind()
+                calibrator = create_calibrator(
+                    test_model_path, calibrate_method=calibration_method, augmented_model_path=augmented_model_path
+                )
+                calibrator.collect_data(first_reader)
+                calibrator.collect_data(second_reader)
+                expected = calibrator.compute_data()
+
+                first_reader.rewind()
+                second_reader.rewind()
+                calibrator = create_calibrator(
+                    test_model_path, calibrate_method=calibration_method, augmented_model_path=augmented_model_path
+                )
+                calibrator.collect_data(first_reader)
+                calibrator.save_collected_data(saved_path)
+
+                calibrator = create_calibrator(
+                    test_model_path, calibrate_method=calibration_method, augmented_model_path=augmented_model_path
+                )
+                calibrator.load_collected_data(saved_path)
+                calibrator.collect_data(second_reader)
+                resumed = calibrator.compute_data()
+
+                self.assertEqual(set(expected.keys()), set(resumed.keys()))
+                for name in expected:
+                    np.testing.assert_array_equal(expected[name].range_value, resumed[name].range_value)
+                    np.testing.assert_array_equal(expected[name].hist, resumed[name].hist)
+
+    def test_histogram_calibrators_max_intermediate_outputs(self):
+        test_model_path = Path(self._tmp_model_dir.name).joinpath("./test_model_10.onnx")
+        self.construct_test_compute_data_model(test_model_path.as_posix(), augmented=False)
+
+        data_reader = TestDataReader()
+        augmented_model_path = Path(self._tmp_model_dir.name).joinpath("augmented_test_model_10.onnx")
+        tensors_ranges = []
+        for max_intermediate_outputs in [None, 1]:
+            data_reader.rewind()
+            calibrator = create_calibrator(
+                test_model_path,
+                calibrate_method=CalibrationMethod.Entropy,
+                augmented_model_path=augmented_model_path,
+                extra_options={"max_intermediate_outputs": max_intermediate_outputs},
+            )
+            calibrator.collect_data(data_reader)
+            self.assertEqual(len(calibrator.intermediate_outputs), 0)
+            tensors_ranges.append(calibrator.compute_data())
+
+        # Every batch went into the histograms.
+        for name in tensors_ranges[0]:
+            self.assertEqual(tensors_ranges[0][name].hist.sum(), tensors_ranges[1][name].hist.sum())
+
+
+class TestHistogramCollector(unittest.TestCase):
+    def _create_collector(self, method="entropy", symmetric=False):
+        return HistogramCollector(
+            method=method, symmetric=symmetric, num_bins=128, num_quantized_bins=128, percentile=99.999, scenario="same"
+        )
+
+    def test_histogram_with_edges(self):
+        rng = np.random.default_rng(0)
+        data = rng.normal(0, 1, 10000).astype(np.float32)
+        edges = np.linspace(-2, 2, 65, dtype=np.float32)
+        data[:3] = [edges[0], edges[-1], edges[10]]
+        data[3] = np.nan
+        expected, _ = np.histogram(data, bins=edges)
+        np.testing.assert_array_equal(HistogramCollector._histogram_with_edges(data, edges), expected)
+
+    def test_merge(self):
+        rng = np.random.default_rng(0)
+        for method, symmetric in [("entropy", False), ("percentile", True)]:
+            with self.subTest(method=method, symmetric=symmetric):
+                first_data = rng.normal(0, 1, [8, 64]).astype(np.float32)
+                second_data = rng.normal(0, 3, [8, 64]).astype(np.float32)
+                first = self._create_collector(method, symmetric)
+                first.collect({"x": first_data, "y": first_data})
+                second = self._create_collector(method, symmetric)
+                second.collect({"x": second_data})
+
+                first.merge(second)
+                hist, hist_edges, min_value, max_value = first.histogram_dict["x"][:4]
+                self.assertEqual(hist.sum(), first_data.size + second_data.size)
+                self.assertEqual(hist_edges[-1], second.histogram_dict["x"][1][-1])
+                self.assertEqual(min_value, min(first_data.min(), second_data.min()))
+                self.assertEqual(max_value, max(first_data.max(), second_data.max()))
+                self.assertEqual(first.histogram_dict["y"][0].sum(), first_data.size)
+
+    @staticmethod
+    def _reference_entropy_threshold(histogram, num_quantized_bins):
+        hist, hist_edges = histogram[:2]
+        zero_bin_index = hist.size // 2
+        candidates = range(num_quantized_bins // 2, zero_bin_index + 1)
+        bounds = [(zero_bin_index - i, min(zero_bin_index + i + 1, hist.size)) for i in candidates]
+        kl_divergence = [
+            HistogramCollector._get_entropy_divergence(hist, num_quantized_bins, start, end, hist_edges.dtype)
+            for start, end in bounds
+        ]
+        start, end = bounds[np.argmin(kl_divergence)]
+        return max(hist_edges[start], histogram[2]), min(hist_edges[end], histogram[3])
+
+    def test_entropy_threshold(self):
+        rng = np.random.default_rng(0)
+        datasets = {
+            "normal": rng.normal(0, 1, 20000),
+            "heavy_tail": rng.standard_t(2, 20000),
+            "sparse": np.concatenate([rng.normal(0, 1, 1000), np.zeros(5000)]),
+            "few_values": rng.laplace(0, 1, 300),
+        }
+        for dtype, num_bins in [(np.float32, 2048), (np.float32, 1001), (np.float16, 512)]:
+            for name, data in datasets.items():
+                with self.subTest(dtype=dtype, num_bins=num_bins, data=name):
+                    collector = HistogramCollector(
+                        method="entropy",
+                        symmetric=False,
+                        num_bins=num_bins,
+                        num_quantized_bins=128,
+                        percentile=99.999,
+                        scenario="same",
+                    )
+                    collector.collect({"x": data.astype(dtype)})
+                    histogram = collector.histogram_dict["x"]
+                    threshold = collector.get_entropy_threshold(histogram, 128)
+                    expected = self._reference_entropy_threshold(histogram, 128)
+                    self.assertEqual(threshold[0].dtype, dtype)
+                    self.assertEqual((threshold[0], threshold[1]), expected)
+
+    def test_compute_entropy_num_workers(self):
+        rng = np.random.default_rng(0)
+        name_to_arr = {f"x{i}": rng.normal(0, i + 1, 5000).astype(np.float32) for i in range(4)}
+        thresholds = []
+        for num_workers in [1, 2]:
+            collector = self._create_collector()
+            collector.num_workers = num_workers
+            collector.collect(name_to_arr)
+            thresholds.append(collector.compute_collection_result())
+        self.assertEqual(list(thresholds[0]), list(thresholds[1]))
+        for name in thresholds[0]:
+            for expected, value in zip(thresholds[0][name], thresholds[1][name], strict=True):
+                np.testing.assert_array_equal(expected, value)
+
+    def test_tensors_data_roundtrip(self):
+        rng = np.random.default_rng(0)
+        collector = self._create_collector()
+        collector.collect({"x": rng.normal(0, 1, [4, 16]).astype(np.float32)})
+        restored = self._create_collector()
+        restored.set_tensors_data(collector.get_tensors_data(CalibrationMethod.Entropy))
+        for expected, value in zip(collector.histogram_dict["x"], restored.histogram_dict["x"], strict=True):
+            np.testing.assert_array_equal(expected, value)
+
 
 class TestCalibrationCache(unittest.TestCase):
     @classmethod
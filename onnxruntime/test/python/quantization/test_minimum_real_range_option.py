@@ -5,6 +5,8 @@
 # license information.
 # --------------------------------------------------------------------------
 
+import os
+import tempfile
 import unittest
 
 import numpy as np
@@ -16,7 +18,9 @@ from onnxruntime import quantization
 
 class TestMinimumRealRangeOption(unittest.TestCase):
     def setUp(self):
-        self.qdq_model_name = "model_qdq_u8.onnx"
+        self._tmp_dir = tempfile.TemporaryDirectory(prefix="ort.minimum_real_range_")
+        self.model_name = os.path.join(self._tmp_dir.name, "model.onnx")
+        self.qdq_model_name = os.path.join(self._tmp_dir.name, "model_qdq_u8.onnx")
 
         # Set up activations/weights with zero value ranges (i.e., rmax - rmax == 0).
         self.zero_range_activations = [
@@ -25,6 +29,9 @@ class TestMinimumRealRangeOption(unittest.TestCase):
 
         self.zero_range_weights = np.zeros([1, 2, 2, 2], dtype="float32")
 
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
     def perform_quantization(self, activations, weight, min_real_range):
         # One-layer convolution model to be quantized with uint8 activations and uint8 weights.
         act = helper.make_tensor_value_info("ACT", TensorProto.FLOAT, activations[0].shape)
@@ -34,7 +41,7 @@ class TestMinimumRealRangeOption(unittest.TestCase):
         conv_node = onnx.helper.make_node("Conv", ["ACT", "WGT"], ["RES"])
         graph = helper.make_graph([conv_node], "test", [act], [res], initializer=[wgt_init])
         model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 11)])
-        onnx.save(model, "model.onnx")
+        onnx.save(model, self.model_name)
 
         # Quantize model
         class DummyDataReader(quantization.CalibrationDataReader):
@@ -45,7 +52,7 @@ class TestMinimumRealRangeOption(unittest.TestCase):
                 return next(self.iterator, None)
 
         quantization.quantize_static(
-            model_input="model.onnx",
+            model_input=self.model_name,
             model_output=self.qdq_model_name,
             calibration_data_reader=DummyDataReader(),
             quant_format=quantization.QuantFormat.QDQ,
@@ -57,7 +57,6 @@ class TestMixedPrecisionQuantOverridesFixer(unittest.TestCase):
     def test_fixer_1(self):
         shape = (1, 2, 3)
         model = self.build_test_model_1(shape)
-        onnx.save_model(model, "model.onnx")
 
         default_act_qtype = QuantType.QUInt8
         raw_overrides = {"op4_out": [{"quant_type": QuantType.QUInt16}]}
@@ -82,7 +81,6 @@ class TestMixedPrecisionQuantOverridesFixer(unittest.TestCase):
     def test_fixer_with_symmetric(self):
         shape = (1, 2, 3)
         model = self.build_test_model_1(shape)
-        onnx.save_model(model, "model.onnx")
 
         default_act_qtype = QuantType.QInt8
         raw_overrides = {"op4_out": [{"quant_type": QuantType.QInt16, "symmetric": True}]}
@@ -117,7 +115,6 @@ class TestMixedPrecisionQuantOverridesFixer(unittest.TestCase):
     def test_fixer_upgrade_output(self):
         shape = (1, 2, 3)
         model = self.build_test_model_1(shape)
-        onnx.save_model(model, "model.onnx")
 
         default_act_qtype = QuantType.QUInt8
         raw_overrides = {
@@ -144,7 +141,6 @@ class TestMixedPrecisionQuantOverridesFixer(unittest.TestCase):
     def test_fixer_upgrade_input(self):
         shape = (1, 2, 3)
         model = self.build_test_model_1(shape)
-        onnx.save_model(model, "model.onnx")
 
         default_act_qtype = QuantType.QUInt8
         raw_overrides = {"op4_out": [{"quant_type": QuantType.QUInt16}], "input_0": [{"quant_type": QuantType.QUInt16}]}
@@ -367,8 +367,6 @@ class TestOpMatMul4Bits(unittest.TestCase):
         self.quant_test_with_algo("GPTQ", model_fp32_path, data_reader, 32, False)
 
     def test_quantize_matmul_int4_using_hqq_algo(self):
-        if not find_spec("torch"):
-            self.skipTest("skip test_hqq_quant since torch is not installed")
         model_fp32_path = str(Path(self._tmp_model_dir.name).joinpath("matmul_fp32_offset.onnx").absolute())
         self.construct_model_matmul(model_fp32_path, symmetric=False)
         data_reader = self.input_feeds(1, {"input": (100, 52)})
@@ -453,8 +451,6 @@ class TestOpMatMul4Bits(unittest.TestCase):
 
     def test_quantize_matmul_int4_3d_weight_hqq(self):
         """Test that HQQ quantizer handles weight with unit leading dim, e.g. shape [1, K, N]."""
-        if not find_spec("torch"):
-            self.skipTest("skip test since torch is not installed")
         np.random.seed(42)
         weight_shape = (1, 52, 288)
         model_fp32_path = str(Path(self._tmp_model_dir.name).joinpath("matmul_fp32_3d_hqq.onnx").absolute())
@@ -596,6 +592,138 @@ class TestOpMatMul4Bits(unittest.TestCase):
         data_reader = self.input_feeds(1, {"input": (100, 52)})
         self.quant_test(model_fp32_path, data_reader, 32, True, extra_quant_nodes=self._RESHAPE_HELPER_OP_COUNTS)
 
+    def construct_model_external_data(self, model_dir: Path) -> str:
+        #  (input) --> MatMul --> MatMul --> MatMul --> (output)
+        #  (indices) --> Gather (not quantized) --> (gather_output)
+        initializers = [
+            onnx.numpy_helper.from_array(np.random.rand(64, 64).astype(np.float32), name=f"linear{i}.weight")
+            for i in range(3)
+        ]
+        initializers.append(onnx.numpy_helper.from_array(np.random.rand(100, 64).astype(np.float32), name="embedding"))
+        nodes = [
+            helper.make_node("MatMul", ["input", "linear0.weight"], ["matmul0"], "MatMul_0"),
+            helper.make_node("MatMul", ["matmul0", "linear1.weight"], ["matmul1"], "MatMul_1"),
+            helper.make_node("MatMul", ["matmul1", "linear2.weight"], ["output"], "MatMul_2"),
+            helper.make_node("Gather", ["embedding", "indices"], ["gather_output"], "Gather_0"),
+        ]
+        graph = helper.make_graph(
+            nodes,
+            "matmul_4bits_external_data_test",
+            [
+                helper.make_tensor_value_info("input", TensorProto.FLOAT, [-1, 64]),
+                helper.make_tensor_value_info("indices", TensorProto.INT64, [-1]),
+            ],
+            [
+                helper.make_tensor_value_info("output", TensorProto.FLOAT, [-1, 64]),
+                helper.make_tensor_value_info("gather_output", TensorProto.FLOAT, [-1, 64]),
+            ],
+            initializer=initializers,
+        )
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 21)])
+        model.ir_version = 10
+
+        model_path = str(model_dir / "model.onnx")
+        onnx.save(model, model_path, save_as_external_data=True, location="model.onnx.data", size_threshold=0)
+        return model_path
+
+    def test_quantize_matmul_int4_parallel_with_external_data(self):
+        from onnxruntime.quantization import matmul_nbits_quantizer  # noqa: PLC0415
+
+        np.random.seed(13)
+        model_dir = Path(self._tmp_model_dir.name) / "external_data"
+        output_dir = model_dir / "output"
+        output_dir.mkdir(parents=True)
+        model_fp32_path = self.construct_model_external_data(model_dir)
+        quant_config = matmul_nbits_quantizer.DefaultWeightOnlyQuantConfig(block_size=32, is_symmetric=False)
+
+        # Reference: load the whole model, and quantize weights one by one.
+        quant = matmul_nbits_quantizer.MatMulNBitsQuantizer(onnx.load(model_fp32_path), algo_config=quant_config)
+        quant.process()
+        expected_path = str(output_dir / "expected.onnx")
+        quant.model.save_model_to_file(expected_path, True)
+
+        # Memory map weights of the input model, quantize them in a process pool, and stream to the output file.
+        quant = matmul_nbits_quantizer.MatMulNBitsQuantizer(model_fp32_path, algo_config=quant_config, num_workers=2)
+        output_path = str(output_dir / "model_int4.onnx")
+        quant.process_and_save(output_path)
+
+        check_op_type_count(self, output_path, MatMulNBits=3, Gather=1)
+        # Quantized weights and the copied embedding are in external data.
+        external_names = {
+            t.name
+            for t in onnx.load(output_path, load_external_data=False).graph.initializer
+            if onnx.external_data_helper.uses_external_data(t)
+        }
+        self.assertEqual(external_names, {"embedding", "linear0.weight_Q4", "linear1.weight_Q4", "linear2.weight_Q4"})
+
+        expected = onnx.load(expected_path)
+        actual = onnx.load(output_path)
+        self.assertEqual(
+            {t.name: onnx.numpy_helper.to_array(t).tobytes() for t in expected.graph.initializer},
+            {t.name: onnx.numpy_helper.to_array(t).tobytes() for t in actual.graph.initializer},
+        )
+
+        inputs = {"input": np.random.rand(10, 64).astype(np.float32), "indices": np.array([0, 42, 99], dtype=np.int64)}
+        check_model_correctness(self, expected_path, output_path, inputs)
+
+        # Saving again to the same output, and saving over the input model, overwrite the external data.
+        for path in [output_path, model_fp32_path]:
+            with self.subTest(path=path):
+                quant = matmul_nbits_quantizer.MatMulNBitsQuantizer(model_fp32_path, algo_config=quant_config)
+                quant.process_and_save(path)
+                check_model_correctness(self, expected_path, path, inputs)
+        self.assertEqual([p.name for p in model_dir.iterdir() if p.suffix == ".tmp"], [])
+
+        # External data of the input model cannot be found when the model is given without its path.
+        quant = matmul_nbits_quantizer.MatMulNBitsQuantizer(
+            onnx.load(expected_path, load_external_data=False), algo_config=quant_config
+        )
+        with self.assertRaises(ValueError):
+            quant.process_and_save(str(output_dir / "no_base_dir.onnx"))
+        self.assertFalse((output_dir / "no_base_dir.onnx.data").exists())
+
+    def test_quantize_matmul_int4_hqq_batch(self):
+        from onnxruntime.quantization import matmul_nbits_quantizer  # noqa: PLC0415
+
+        np.random.seed(13)
+        model_dir = Path(self._tmp_model_dir.name) / "hqq_batch"
+        model_dir.mkdir()
+        model_fp32_path = self.construct_model_external_data(model_dir)
+
+        initializers = {}
+        for batch_size in [1, 2, 3]:
+            with self.subTest(batch_size=batch_size):
+                quant_config = matmul_nbits_quantizer.HQQWeightOnlyQuantConfig(block_size=32, batch_size=batch_size)
+                quant = matmul_nbits_quantizer.MatMulNBitsQuantizer(model_fp32_path, algo_config=quant_config)
+                quant.process()
+                self.assertEqual([n.op_type for n in quant.model.nodes()].count("MatMulNBits"), 3)
+                initializers[batch_size] = {
+                    t.name: onnx.numpy_helper.to_array(t).tobytes() for t in quant.model.initializer()
+                }
+                # Weights optimized together shall get the same result as weights optimized one by one.
+                self.assertEqual(initializers[batch_size], initializers[1])
+
+    def test_hqq_quantize_internal_2d(self):
+        from onnxruntime.quantization import matmul_nbits_quantizer  # noqa: PLC0415
+
+        np.random.seed(17)
+        weight = np.random.rand(52, 96).astype(np.float32)
+        quant = matmul_nbits_quantizer.HQQWeightOnlyQuantizer(
+            matmul_nbits_quantizer.HQQWeightOnlyQuantConfig(block_size=32)
+        )
+        packed, scales, zero_points = quant.quantize_weights([weight])[0]
+
+        # The per-weight API quantizes the transposed weight [N, K] with K padded to a multiple of group_size.
+        w_q, scale, zero = quant.quantize_internal(weight.T, bits=4, group_size=32)
+        self.assertEqual((w_q.shape, scale.shape, zero.shape), ((96, 64), (96, 2), (96, 2)))
+        unpacked = np.stack([(packed.reshape(96, -1) >> (4 * j)) & 15 for j in range(2)], -1).reshape(96, 64)
+        np.testing.assert_array_equal(w_q, unpacked)
+        np.testing.assert_array_equal(scale.reshape(-1), scales)
+        np.testing.assert_array_equal(zero.reshape(-1), zero_points)
+
+        w_q, scale, zero = quant.quantize_internal(weight, bits=4, group_size=32, axis=0)
+        self.assertEqual((w_q.shape, scale.shape, zero.shape), ((64, 96), (2, 96), (2, 96)))
+
 
 if __name__ == "__main__":
     unittest.main()
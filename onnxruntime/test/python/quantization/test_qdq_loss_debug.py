@@ -20,6 +20,8 @@ from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
 from onnxruntime.quantization.calibrate import CalibrationDataReader
 from onnxruntime.quantization.qdq_loss_debug import (
     QUANT_INPUT_SUFFIX,
+    SignalToQuantizationNoiseRatio,
+    collect_activation_error,
     collect_activations,
     compute_activation_error,
     compute_weight_error,
@@ -213,6 +215,61 @@ class TestSaveActivations(unittest.TestCase):
                 f"{tensor_name} qdq error {activations_error[tensor_name]['qdq_err']} exceeds threashold.",
             )
 
+    def test_collect_activation_error(self):
+        float_model_path = str(Path(self._tmp_model_dir.name) / "float_model_streaming.onnx")
+        construct_test_model1(float_model_path, activations_as_outputs=False)
+        data_reader = TestDataReader()
+
+        qdq_model_path = str(Path(self._tmp_model_dir.name) / "qdq_model_streaming.onnx")
+        quantize_static(
+            float_model_path,
+            qdq_model_path,
+            data_reader,
+            quant_format=QuantFormat.QDQ,
+            per_channel=False,
+            reduce_range=False,
+            activation_type=QuantType.QInt8,
+            weight_type=QuantType.QInt8,
+        )
+
+        data_reader.rewind()
+        augmented_float_model_path = str(Path(self._tmp_model_dir.name).joinpath("augmented_float_streaming.onnx"))
+        float_activations = augment_model_collect_activations(float_model_path, augmented_float_model_path, data_reader)
+
+        data_reader.rewind()
+        augmented_qdq_model_path = str(Path(self._tmp_model_dir.name).joinpath("augmented_qdq_streaming.onnx"))
+        qdq_activations = augment_model_collect_activations(qdq_model_path, augmented_qdq_model_path, data_reader)
+
+        expected = compute_activation_error(create_activation_matching(qdq_activations, float_activations))
+
+        # Errors accumulated one batch at a time are the same as errors computed with activations of all batches.
+        data_reader.rewind()
+        activations_error = collect_activation_error(augmented_qdq_model_path, data_reader, augmented_float_model_path)
+        self.assertEqual(activations_error.keys(), expected.keys())
+        for tensor_name, errors in expected.items():
+            self.assertEqual(activations_error[tensor_name].keys(), errors.keys())
+            for key, error in errors.items():
+                self.assertAlmostEqual(activations_error[tensor_name][key], error, places=3)
+
+        data_reader.rewind()
+        qdq_error = collect_activation_error(augmented_qdq_model_path, data_reader)
+        for tensor_name, errors in qdq_error.items():
+            self.assertEqual(list(errors.keys()), ["qdq_err"])
+            self.assertAlmostEqual(errors["qdq_err"], expected[tensor_name]["qdq_err"], places=3)
+
+        # One accumulator is created per tensor and error, not per batch.
+        accumulators = []
+
+        def err_accumulator():
+            accumulators.append(SignalToQuantizationNoiseRatio())
+            return accumulators[-1]
+
+        data_reader.rewind()
+        activations_error = collect_activation_error(
+            augmented_qdq_model_path, data_reader, augmented_float_model_path, err_accumulator=err_accumulator
+        )
+        self.assertEqual(len(accumulators), sum(len(errors) for errors in activations_error.values()))
+
     def test_create_weight_matching(self):
         # Setup: create float model:
         float_model_path = str(Path(self._tmp_model_dir.name) / "float_model3.onnx")
@@ -7,6 +7,7 @@
 
 import math
 import os
+import tempfile
 import unittest
 from pathlib import Path
 
@@ -19,6 +20,14 @@ from onnxruntime.quantization.quant_utils import model_has_external_data, ms_dom
 
 
 class TestQnnPreprocessModel(unittest.TestCase):
+    def setUp(self):
+        self._tmp_model_dir = tempfile.TemporaryDirectory(prefix="ort.qnn_preprocess_model_")
+        self.model_path = os.path.join(self._tmp_model_dir.name, "model.onnx")
+        self.qnn_pp_model_path = os.path.join(self._tmp_model_dir.name, "model.qnn_pp.onnx")
+
+    def tearDown(self):
+        self._tmp_model_dir.cleanup()
+
     def build_model(self, shape, scale_val, bias_val):
         """
         Build a model that supports 3 kinds of fusions:
@@ -132,12 +141,12 @@ class TestQnnPreprocessModel(unittest.TestCase):
         Test calling qnn_preprocess_model() with a model that supports all 3 fusions.
         """
         model = self.build_model((1, 2, 3), [2.0, 2.0, 2.0], [1.0, 1.0, 1.0])
-        onnx.save_model(model, "model.onnx")
-        modified = qnn_preprocess_model("model.onnx", "model.qnn_pp.onnx", fuse_layernorm=True)
+        onnx.save_model(model, self.model_path)
+        modified = qnn_preprocess_model(self.model_path, self.qnn_pp_model_path, fuse_layernorm=True)
 
         self.assertTrue(modified)
 
-        fused_model = onnx.load_model("model.qnn_pp.onnx")
+        fused_model = onnx.load_model(self.qnn_pp_model_path)
 
         # 4 fused Ops: Gelu, LpNorm, LayerNorm of two patterns
         self.assertEqual(len(fused_model.graph.node), 4)
@@ -157,22 +166,17 @@ class TestQnnPreprocessModel(unittest.TestCase):
         """
         model = self.build_model((1, 2, 3), [2.0, 2.0, 2.0], [1.0, 1.0, 1.0])
 
-        # remove external data leftovers from previous runs
-        for file in ["weights.bin", "weights2.bin"]:
-            if os.path.exists(file):
-                os.remove(file)
-
         onnx.save_model(
             model,
-            "model.onnx",
+            self.model_path,
             save_as_external_data=True,
             all_tensors_to_one_file=True,
             location="weights.bin",
             size_threshold=0,
         )
         modified = qnn_preprocess_model(
-            "model.onnx",
-            "model.qnn_pp.onnx",
+            self.model_path,
+            self.qnn_pp_model_path,
             fuse_layernorm=True,
             save_as_external_data=True,
             all_tensors_to_one_file=True,
@@ -183,9 +187,9 @@ class TestQnnPreprocessModel(unittest.TestCase):
         self.assertTrue(modified)
 
         # Model should still have external data.
-        self.assertTrue(model_has_external_data(Path("model.qnn_pp.onnx")))
+        self.assertTrue(model_has_external_data(Path(self.qnn_pp_model_path)))
 
-        fused_model = onnx.load_model("model.qnn_pp.onnx", load_external_data=False)
+        fused_model = onnx.load_model(self.qnn_pp_model_path, load_external_data=False)
 
         # 4 fused Ops: Gelu, LpNorm, LayerNorm of two patterns
         self.assertEqual(len(fused_model.graph.node), 4)
@@ -229,17 +233,17 @@ class TestQnnPreprocessModel(unittest.TestCase):
         Test making a model's inputs and outputs channel-last.
         """
         model = self.build_multi_input_output_model((1, 2, 3, 4))
-        onnx.save_model(model, "model.onnx")
+        onnx.save_model(model, self.model_path)
         modified = qnn_preprocess_model(
-            "model.onnx",
-            "model.qnn_pp.onnx",
+            self.model_path,
+            self.qnn_pp_model_path,
             inputs_to_make_channel_last=["A", "B"],
             outputs_to_make_channel_last=["X", "Y"],
         )
 
         self.assertTrue(modified)
 
-        preproc_model = onnx.load_model("model.qnn_pp.onnx")
+        preproc_model = onnx.load_model(self.qnn_pp_model_path)
         self.assertEqual(len(preproc_model.graph.node), 7)
 
         num_transposes = sum(1 for node in preproc_model.graph.node if node.op_type == "Transpose")
@@ -273,12 +277,12 @@ class TestQnnPreprocessModel(unittest.TestCase):
         Test making a model's inputs and outputs channel-last with a rank < 3 (error).
         """
         model = self.build_multi_input_output_model((1, 2))
-        onnx.save_model(model, "model.onnx")
+        onnx.save_model(model, self.model_path)
 
         with self.assertRaises(ValueError) as context:
             qnn_preprocess_model(
-                "model.onnx",
-                "model.qnn_pp.onnx",
+                self.model_path,
+                self.qnn_pp_model_path,
                 inputs_to_make_channel_last=["A", "B"],
                 outputs_to_make_channel_last=["X", "Y"],
             )
@@ -19,6 +19,8 @@ from onnxruntime.quantization.quant_utils import snap_zero_point_to_uint8
 
 class TestSymmetricFlag(unittest.TestCase):
     def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory(prefix="ort.symmetric_flag_")
+
         # Set up symmetrically and asymmetrically disributed values for activations
         self.symmetric_activations = [
             -1 * np.ones([1, 2, 32, 32], dtype="float32"),
@@ -45,6 +47,9 @@ class TestSymmetricFlag(unittest.TestCase):
             axis=1,
         )
 
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
     def perform_quantization(self, activations, weight, act_sym, wgt_sym):
         # One-layer convolution model
         act = helper.make_tensor_value_info("ACT", TensorProto.FLOAT, activations[0].shape)
@@ -54,7 +59,9 @@ class TestSymmetricFlag(unittest.TestCase):
         conv_node = onnx.helper.make_node("Conv", ["ACT", "WGT"], ["RES"])
         graph = helper.make_graph([conv_node], "test", [act], [res], initializer=[wgt_init])
         model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 11)])
-        onnx.save(model, "model.onnx")
+        model_path = os.path.join(self._tmp_dir.name, "model.onnx")
+        quantized_model_path = os.path.join(self._tmp_dir.name, "quantized-model.onnx")
+        onnx.save(model, model_path)
 
         # Quantize model
         class DummyDataReader(quantization.CalibrationDataReader):
@@ -65,8 +72,8 @@ class TestSymmetricFlag(unittest.TestCase):
                 return next(self.iterator, None)
 
         quantization.quantize_static(
-            model_input="model.onnx",
-            model_output="quantized-model.onnx",
+            model_input=model_path,
+            model_output=quantized_model_path,
             calibration_data_reader=DummyDataReader(),
             quant_format=quantization.QuantFormat.QOperator,
             activation_type=quantization.QuantType.QInt8,
@@ -76,7 +83,7 @@ class TestSymmetricFlag(unittest.TestCase):
         )
 
         # Extract quantization parameters: scales and zero points for activations, weights, and results
-        model = onnx.load("quantized-model.onnx")
+        model = onnx.load(quantized_model_path)
         act_zp = next(init for init in model.graph.initializer if init.name == "ACT_zero_point").int32_data[0]
         act_sc = next(init for init in model.graph.initializer if init.name == "ACT_scale").float_data[0]
         wgt_zp = next(init for init in model.graph.initializer if init.name == "WGT_zero_point").int32_data[0]
@@ -28,6 +28,10 @@ class DummyDataReader(CalibrationDataReader):
 
 class TestTensorQuantOverridesOption(unittest.TestCase):
     def setUp(self):
+        self._tmp_model_dir = tempfile.TemporaryDirectory(prefix="ort.tensor_quant_overrides_")
+        self._tmp_dir_path = self._tmp_model_dir.name
+        self.float_model_path = os.path.join(self._tmp_dir_path, "model.onnx")
+
         self.activations = [
             np.array([[[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]], dtype="float32"),
         ]
@@ -55,6 +59,9 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
             "OUT": (0, np.float32(0.005075461231172085)),
         }
 
+    def tearDown(self):
+        self._tmp_model_dir.cleanup()
+
     def build_float32_model(self, opset=13):
         #    (input)
         #       |
@@ -76,7 +83,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
             [sigmoid_node, conv_node], "test", [inp], [out], initializer=[wgt_init, bias_init]
         )
         model = onnx.helper.make_model(graph, opset_imports=[onnx.helper.make_opsetid("", opset)])
-        onnx.save(model, "model.onnx")
+        onnx.save(model, self.float_model_path)
 
     def perform_qdq_quantization(
         self, output_model_name, extra_options=None, per_channel=False, activation_type=None, opset=13
@@ -87,7 +94,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
             activation_type = self.default_act_qtype
 
         quantize_static(
-            model_input="model.onnx",
+            model_input=self.float_model_path,
             model_output=output_model_name,
             calibration_data_reader=DummyDataReader(self.activations),
             quant_format=QuantFormat.QDQ,
@@ -136,7 +143,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
             out_zp,
             out_sc,
         ) = self.perform_qdq_quantization(
-            "model_default_quant_overrides.onnx",
+            os.path.join(self._tmp_dir_path, "model_default_quant_overrides.onnx"),
             extra_options=None,  # default behavior
         )
 
@@ -178,7 +185,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
             out_zp,
             out_sc,
         ) = self.perform_qdq_quantization(
-            "model_default_per_channel_quant_overrides.onnx",
+            os.path.join(self._tmp_dir_path, "model_default_per_channel_quant_overrides.onnx"),
             extra_options=None,  # default behavior
             per_channel=True,
         )
@@ -222,7 +229,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
           - quant_type, symmetric, reduce_range for Conv bias
         """
         inp_zp, inp_sc, sig_out_zp, sig_out_sc, wgt_zp, wgt_sc, bias_zp, bias_sc, _, _ = self.perform_qdq_quantization(
-            "model_quant_overrides1.onnx",
+            os.path.join(self._tmp_dir_path, "model_quant_overrides1.onnx"),
             extra_options={
                 "TensorQuantOverrides": {
                     "SIG_OUT": [
@@ -268,7 +275,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
         """
         sigmoid_rmin, sigmoid_rmax = np.array(0.0, dtype=np.float32), np.array(0.5, dtype=np.float32)
         inp_zp, inp_sc, sig_out_zp, sig_out_sc, _, _, _, _, _, _ = self.perform_qdq_quantization(
-            "model_quant_overrides2.onnx",
+            os.path.join(self._tmp_dir_path, "model_quant_overrides2.onnx"),
             extra_options={"TensorQuantOverrides": {"SIG_OUT": [{"rmin": sigmoid_rmin, "rmax": sigmoid_rmax}]}},
         )
 
@@ -291,7 +298,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
         """
         wgt_rmin, wgt_rmax = np.array(0.0, dtype=np.float32), np.array(1.0, dtype=np.float32)
         _, _, _, _, wgt_zp, wgt_sc, _, _, _, _ = self.perform_qdq_quantization(
-            "model_quant_overrides3.onnx",
+            os.path.join(self._tmp_dir_path, "model_quant_overrides3.onnx"),
             extra_options={
                 "TensorQuantOverrides": {
                     "WGT": [{"rmin": wgt_rmin, "rmax": wgt_rmax}],
@@ -315,7 +322,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
         """
         wgt_zp_val, wgt_scale_val = np.array(4, dtype=np.float32), np.array(0.5, dtype=np.float32)
         _, _, _, _, wgt_zp, wgt_sc, _, _, _, _ = self.perform_qdq_quantization(
-            "model_quant_overrides4.onnx",
+            os.path.join(self._tmp_dir_path, "model_quant_overrides4.onnx"),
             extra_options={
                 "TensorQuantOverrides": {
                     "WGT": [{"zero_point": wgt_zp_val, "scale": wgt_scale_val}],
@@ -345,7 +352,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
             _,
             _,
         ) = self.perform_qdq_quantization(
-            "model_per_channel_quant_overrides1.onnx",
+            os.path.join(self._tmp_dir_path, "model_per_channel_quant_overrides1.onnx"),
             extra_options={
                 "TensorQuantOverrides": {
                     "WGT": [
@@ -380,7 +387,9 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
         """
         for reduce_range in (False, True):
             with self.subTest(reduce_range=reduce_range):
-                qdq_model_name = f"model_per_chan_overrides_2_reduce_range_{reduce_range}.onnx"
+                qdq_model_name = os.path.join(
+                    self._tmp_dir_path, f"model_per_chan_overrides_2_reduce_range_{reduce_range}.onnx"
+                )
                 rmin_vals = [0.0, 0.2]
                 rmax_vals = [1.0, 0.8]
                 quant_type = QuantType.QUInt8
@@ -444,7 +453,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
         Previously (before the opset-bump heuristic), a sub-opset-21 model with INT16 overrides would
         use the 'com.microsoft' domain.  Now the model is auto-upgraded so the standard domain is used.
         """
-        qdq_model_name = "model_quant_overrides_to_16bit.onnx"
+        qdq_model_name = os.path.join(self._tmp_dir_path, "model_quant_overrides_to_16bit.onnx")
         inp_zp, _, sig_out_zp, _, _, _, _, _, out_zp, _ = self.perform_qdq_quantization(
             qdq_model_name,
             activation_type=onnx.TensorProto.UINT8,  # Default to 8bit activations
@@ -484,7 +493,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
         sets the 'com.microsoft' domain on DQ and Q ops for opset >= 21.
         Before ONNX 1.16.0, we had to use the 'com.microsoft' domain to be able to use 16-bit quantization.
         """
-        qdq_model_name = "model_quant_overrides_to_16bit.onnx"
+        qdq_model_name = os.path.join(self._tmp_dir_path, "model_quant_overrides_to_16bit.onnx")
         inp_zp, _, sig_out_zp, _, _, _, _, _, out_zp, _ = self.perform_qdq_quantization(
             qdq_model_name,
             activation_type=onnx.TensorProto.UINT8,  # Default to 8bit activations
@@ -523,7 +532,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
         Verifies that the resulting model has ai.onnx opset >= 21 and that QuantizeLinear /
         DequantizeLinear nodes are in the default domain (not 'com.microsoft').
         """
-        qdq_model_name = "model_quant_overrides_convert_16bit.onnx"
+        qdq_model_name = os.path.join(self._tmp_dir_path, "model_quant_overrides_convert_16bit.onnx")
         inp_zp, _, sig_out_zp, _, _, _, _, _, out_zp, _ = self.perform_qdq_quantization(
             qdq_model_name,
             activation_type=onnx.TensorProto.UINT8,  # Default to 8bit activations
@@ -562,7 +571,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
         """
         with self.assertRaises(ValueError) as context:
             self.perform_qdq_quantization(
-                "model_validation.onnx",
+                os.path.join(self._tmp_dir_path, "model_validation.onnx"),
                 extra_options={
                     "TensorQuantOverrides": {
                         "NON_EXISTING": [
@@ -580,7 +589,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
         """
         with self.assertRaises(ValueError) as context:
             self.perform_qdq_quantization(
-                "model_validation.onnx",
+                os.path.join(self._tmp_dir_path, "model_validation.onnx"),
                 extra_options={"TensorQuantOverrides": {"SIG_OUT": [{"scale": np.array(0.0, dtype=np.float32)}]}},
             )
 
@@ -592,7 +601,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
         """
         with self.assertRaises(ValueError) as context:
             self.perform_qdq_quantization(
-                "model_validation.onnx",
+                os.path.join(self._tmp_dir_path, "model_validation.onnx"),
                 extra_options={
                     "TensorQuantOverrides": {
                         "SIG_OUT": [
@@ -610,7 +619,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
 
         with self.assertRaises(ValueError) as context:
             self.perform_qdq_quantization(
-                "model_validation.onnx",
+                os.path.join(self._tmp_dir_path, "model_validation.onnx"),
                 extra_options={
                     "TensorQuantOverrides": {
                         "SIG_OUT": [
@@ -628,7 +637,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
 
         with self.assertRaises(ValueError) as context:
             self.perform_qdq_quantization(
-                "model_validation.onnx",
+                os.path.join(self._tmp_dir_path, "model_validation.onnx"),
                 extra_options={
                     "TensorQuantOverrides": {
                         "SIG_OUT": [
@@ -646,7 +655,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
 
         with self.assertRaises(ValueError) as context:
             self.perform_qdq_quantization(
-                "model_validation.onnx",
+                os.path.join(self._tmp_dir_path, "model_validation.onnx"),
                 extra_options={
                     "TensorQuantOverrides": {
                         "SIG_OUT": [
@@ -681,7 +690,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
         ]
         model = onnx.helper.make_model(graph, opset_imports=opset_imports)
         model = onnx.shape_inference.infer_shapes(model)
-        float_model_path = "model.onnx"
+        float_model_path = self.float_model_path
         onnx.save_model(model, float_model_path)
 
         other_override_0 = {"abs_out": [{"symmetric": True}]}
@@ -783,7 +792,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
         ]
         model = onnx.helper.make_model(graph, opset_imports=opset_imports)
         model = onnx.shape_inference.infer_shapes(model)
-        float_model_path = "model.onnx"
+        float_model_path = self.float_model_path
         onnx.save_model(model, float_model_path)
 
         other_override_0 = {"abs_out": [{"symmetric": True}]}
@@ -881,7 +890,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
         ]
         model = onnx.helper.make_model(graph, opset_imports=opset_imports)
         model = onnx.shape_inference.infer_shapes(model)
-        float_model_path = "model.onnx"
+        float_model_path = self.float_model_path
         onnx.save_model(model, float_model_path)
 
         q16_qtypes = {QuantType.QUInt16, QuantType.QInt16}
@@ -1000,7 +1009,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
         ]
         model = onnx.helper.make_model(graph, opset_imports=opset_imports)
         model = onnx.shape_inference.infer_shapes(model)
-        float_model_path = "model.onnx"
+        float_model_path = self.float_model_path
         onnx.save_model(model, float_model_path)
 
         symmetric_wgt_qtypes = {QuantType.QInt8, QuantType.QInt16}
@@ -1085,7 +1094,7 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
         ]
         model = onnx.helper.make_model(graph, opset_imports=opset_imports)
         model = onnx.shape_inference.infer_shapes(model)
-        float_model_path = "model.onnx"
+        float_model_path = self.float_model_path
         onnx.save_model(model, float_model_path)
 
         q16_qtypes = {QuantType.QUInt16, QuantType.QInt16}
@@ -1203,19 +1212,16 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
             opset_imports=[onnx.helper.make_opsetid("", 18)],
         )
 
-        # Remove potential leftover external data file.
-        if os.path.exists("add_ext_data.bin"):
-            os.remove("add_ext_data.bin")
-
+        model_path = os.path.join(self._tmp_dir_path, "add_ext_data.onnx")
         onnx.save_model(
             model,
-            "add_ext_data.onnx",
+            model_path,
             save_as_external_data=True,
             all_tensors_to_one_file=True,
             location="add_ext_data.bin",
         )
 
-        qnn_config = get_qnn_qdq_config("add_ext_data.onnx", DummyDataReader(self.activations))
+        qnn_config = get_qnn_qdq_config(model_path, DummyDataReader(self.activations))
         self.assertEqual(set(qnn_config.op_types_to_quantize), {"Add"})
         self.assertTrue(qnn_config.use_external_data_format)
 
@@ -1240,7 +1246,8 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
         )
 
         # Make a separate directory in which to save model and its external data.
-        model_dir_path = tempfile.mkdtemp(prefix="model_ext_data")
+        model_dir_path = os.path.join(self._tmp_dir_path, "model_ext_data")
+        os.mkdir(model_dir_path)
         model_name = "conv_ext_data.onnx"
         model_path = os.path.join(model_dir_path, model_name)
 
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+"""Round trip tests of tools/python/sparsify_initializers.py: sparse initializers shall densify to the input."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+import onnxruntime as ort
+
+# Make the script importable regardless of CWD.
+_TOOLS_PYTHON = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "tools", "python"))
+if _TOOLS_PYTHON not in sys.path:
+    sys.path.insert(0, _TOOLS_PYTHON)
+
+import sparsify_initializers  # noqa: E402
+
+
+def _densify(sparse_tensor: onnx.SparseTensorProto, base_dir: str) -> np.ndarray:
+    values = numpy_helper.to_array(sparse_tensor.values, base_dir)
+    indices = numpy_helper.to_array(sparse_tensor.indices, base_dir)
+    dense = np.zeros(int(np.prod(sparse_tensor.dims)), dtype=values.dtype)
+    if indices.ndim == 2:
+        # coordinates of shape [NNZ, rank]
+        indices = np.ravel_multi_index(tuple(indices.T), tuple(sparse_tensor.dims))
+    dense[indices] = values
+    return dense.reshape(tuple(sparse_tensor.dims))
+
+
+class TestSparsifyInitializers(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def create_model(self):
+        rng = np.random.default_rng(0)
+
+        def sparse_array(shape, density=0.1):
+            array = rng.standard_normal(shape).astype(np.float32)
+            array[rng.random(shape) > density] = 0
+            return array
+
+        # Flat indices of "flat" need int16, same bytes as int8 coordinates. Flat indices of "coordinate" need
+        # int32, and its int8 coordinates take 3 bytes.
+        initializers = {
+            "flat": sparse_array((64, 64)),
+            "coordinate": sparse_array((64, 64, 64), density=0.01),
+            "small": np.full((16, 16), 1e-7, dtype=np.float32) * (np.arange(256).reshape(16, 16) % 4 == 0),
+            "dense": rng.standard_normal((16, 16)).astype(np.float32),
+        }
+        nodes = []
+        outputs = []
+        for name in initializers:
+            nodes.append(helper.make_node("Add", ["x", name], [name + "_out"]))
+            outputs.append(helper.make_tensor_value_info(name + "_out", TensorProto.FLOAT, None))
+        graph = helper.make_graph(
+            nodes,
+            "sparsify_test",
+            [helper.make_tensor_value_info("x", TensorProto.FLOAT, [1])],
+            outputs,
+            [numpy_helper.from_array(array, name) for name, array in initializers.items()],
+        )
+        return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)]), initializers
+
+    def sparsify(self, input_path, output_path, *args):
+        subprocess.run(
+            [
+                sys.executable,
+                os.path.join(_TOOLS_PYTHON, "sparsify_initializers.py"),
+                "--input",
+                input_path,
+                "--output",
+                output_path,
+                *args,
+            ],
+            check=True,
+            capture_output=True,
+        )
+
+    def check_output(self, output_path, initializers, sparse_names):
+        output_dir = os.path.dirname(output_path)
+        model = onnx.load(output_path, load_external_data=False)
+        self.assertEqual({t.values.name for t in model.graph.sparse_initializer}, sparse_names)
+        for sparse_tensor in model.graph.sparse_initializer:
+            np.testing.assert_array_equal(_densify(sparse_tensor, output_dir), initializers[sparse_tensor.values.name])
+        for tensor in model.graph.initializer:
+            np.testing.assert_array_equal(numpy_helper.to_array(tensor, output_dir), initializers[tensor.name])
+
+        # ORT densifies sparse initializers, so outputs are the same as with the input model.
+        session = ort.InferenceSession(output_path, providers=["CPUExecutionProvider"])
+        outputs = session.run(None, {"x": np.zeros(1, dtype=np.float32)})
+        for name, output in zip(initializers, outputs, strict=True):
+            np.testing.assert_array_equal(output, initializers[name])
+        return model
+
+    def test_round_trip(self):
+        model, initializers = self.create_model()
+        input_path = os.path.join(self.tmp_dir.name, "model.onnx")
+        onnx.save(model, input_path)
+        for num_workers in ["1", "2"]:
+            with self.subTest(num_workers=num_workers):
+                output_path = os.path.join(self.tmp_dir.name, f"sparse_{num_workers}.onnx")
+                self.sparsify(input_path, output_path, "--num_workers", num_workers)
+                output = self.check_output(output_path, initializers, {"flat", "coordinate", "small"})
+                layouts = {t.values.name: t.indices.dims for t in output.graph.sparse_initializer}
+                self.assertEqual(len(layouts["flat"]), 1)
+                self.assertEqual(list(layouts["coordinate"])[1:], [3])
+
+    def test_external_data(self):
+        model, initializers = self.create_model()
+        input_dir = os.path.join(self.tmp_dir.name, "input")
+        output_dir = os.path.join(self.tmp_dir.name, "output")
+        os.makedirs(input_dir)
+        os.makedirs(output_dir)
+        input_path = os.path.join(input_dir, "model.onnx")
+        onnx.save(model, input_path, save_as_external_data=True, location="model.data", size_threshold=0)
+
+        # Dense external data is copied next to the output model, with sparse initializers in external data.
+        output_path = os.path.join(output_dir, "model.onnx")
+        self.sparsify(input_path, output_path, "--external_data", "sparse.data", "--num_workers", "2")
+        self.assertEqual(sorted(os.listdir(output_dir)), ["model.onnx", "sparse.data"])
+        model = self.check_output(output_path, initializers, {"flat", "coordinate", "small"})
+        for sparse_tensor in model.graph.sparse_initializer:
+            self.assertTrue(onnx.external_data_helper.uses_external_data(sparse_tensor.values))
+            self.assertTrue(onnx.external_data_helper.uses_external_data(sparse_tensor.indices))
+
+    def test_tolerance(self):
+        model, initializers = self.create_model()
+        initializer = next(t for t in model.graph.initializer if t.name == "small")
+        sparse_tensor, sparsity = sparsify_initializers.convert_tensor_to_sparse(initializer, 0.5, 0.0)
+        self.assertEqual(sparsity, 0.75)
+        np.testing.assert_array_equal(_densify(sparse_tensor, ""), initializers["small"])
+
+        # All values are dropped with a tolerance above them.
+        sparse_tensor, sparsity = sparsify_initializers.convert_tensor_to_sparse(initializer, 0.5, 1e-6)
+        self.assertEqual(sparsity, 1.0)
+        self.assertEqual(list(sparse_tensor.values.dims), [0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation.  All rights reserved.
+# Licensed under the MIT License.
+# --------------------------------------------------------------------------
+
+"""
+Benchmark float16 conversion of a generated decoder-like model against loading and saving the model.
+
+Every layer has four attention and three MLP MatMul weights of a hidden size, and a few blocked nodes that stay in
+float32. The model is saved with external data, loaded, converted to float16 and saved again, and the time of each
+step is reported. Then the model is converted out of core by convert_float_to_float16_with_external_data. Each
+conversion runs in a new process to report its peak resident memory.
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+from parity_utilities import find_transformers_source
+
+if find_transformers_source():
+    from float16 import convert_float_to_float16, convert_float_to_float16_with_external_data
+else:
+    from onnxruntime.transformers.float16 import convert_float_to_float16, convert_float_to_float16_with_external_data
+
+
+def create_decoder_model(num_layers: int, hidden_size: int):
+    rng = np.random.default_rng(0)
+    nodes = []
+    initializers = []
+    x = "input"
+    for i in range(num_layers):
+
+        def t(name, i=i):
+            return f"layer_{i}_{name}"
+
+        for name in ["q", "k", "v", "o", "gate", "up", "down"]:
+            initializers.append(
+                numpy_helper.from_array(rng.standard_normal((hidden_size, hidden_size), dtype=np.float32), t(name))
+            )
+        nodes.extend(
+            [
+                helper.make_node("MatMul", [x, t("q")], [t("q_out")], name=t("q_proj")),
+                helper.make_node("MatMul", [x, t("k")], [t("k_out")], name=t("k_proj")),
+                helper.make_node("MatMul", [x, t("v")], [t("v_out")], name=t("v_proj")),
+                # Max is in the default op block list, so it stays in float32 with casts around it.
+                helper.make_node("Max", [t("q_out"), t("k_out")], [t("qk_out")], name=t("max")),
+                helper.make_node("Add", [t("qk_out"), t("v_out")], [t("attn_out")], name=t("attn")),
+                helper.make_node("MatMul", [t("attn_out"), t("o")], [t("o_out")], name=t("o_proj")),
+                helper.make_node("Add", [x, t("o_out")], [t("residual")], name=t("residual_add")),
+                helper.make_node("MatMul", [t("residual"), t("gate")], [t("gate_out")], name=t("gate_proj")),
+                helper.make_node("Sigmoid", [t("gate_out")], [t("gate_act")], name=t("act")),
+                helper.make_node("MatMul", [t("residual"), t("up")], [t("up_out")], name=t("up_proj")),
+                helper.make_node("Mul", [t("gate_act"), t("up_out")], [t("mlp_in")], name=t("mlp_mul")),
+                helper.make_node("MatMul", [t("mlp_in"), t("down")], [t("down_out")], name=t("down_proj")),
+                helper.make_node("Add", [t("residual"), t("down_out")], [t("output")], name=t("output_add")),
+            ]
+        )
+        x = t("output")
+
+    graph = helper.make_graph(
+        nodes,
+        "decoder",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["batch", "seq", hidden_size])],
+        [helper.make_tensor_value_info(x, TensorProto.FLOAT, ["batch", "seq", hidden_size])],
+        initializers,
+    )
+    return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+
+
+def convert_in_memory(fp32_path, fp16_path, queue):
+    start = time.perf_counter()
+    model = onnx.load(fp32_path)
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model = convert_float_to_float16(model, keep_io_types=True)
+    convert_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    onnx.save(model, fp16_path, save_as_external_data=True, location=os.path.basename(fp16_path) + ".data")
+    save_time = time.perf_counter() - start
+    queue.put((load_time, convert_time, save_time, len(model.graph.node), get_peak_rss()))
+
+
+def convert_out_of_core(fp32_path, fp16_path, queue):
+    start = time.perf_counter()
+    convert_float_to_float16_with_external_data(fp32_path, fp16_path, keep_io_types=True)
+    queue.put((time.perf_counter() - start, get_peak_rss()))
+
+
+def save_decoder_model(num_layers, hidden_size, fp32_path, queue):
+    onnx.save(
+        create_decoder_model(num_layers, hidden_size),
+        fp32_path,
+        save_as_external_data=True,
+        location=os.path.basename(fp32_path) + ".data",
+    )
+    queue.put(None)
+
+
+def get_peak_rss():
+    """Peak resident memory of current process in GB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 / 1e9
+
+
+def run_in_new_process(target, *args):
+    """Run target in a new process, and return its result.
+
+    Peak memory of a new process starts from the memory of this process, so large models are only created in child
+    processes.
+    """
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=target, args=(*args, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num_layers", type=int, default=8)
+    parser.add_argument("--hidden_size", type=int, default=1024)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fp32_path = os.path.join(tmp_dir, "model_fp32.onnx")
+        run_in_new_process(save_decoder_model, args.num_layers, args.hidden_size, fp32_path)
+        size_gb = os.path.getsize(fp32_path + ".data") / 1e9
+
+        out_of_core_time, out_of_core_rss = run_in_new_process(
+            convert_out_of_core, fp32_path, os.path.join(tmp_dir, "model_fp16_out_of_core.onnx")
+        )
+        load_time, convert_time, save_time, num_nodes, in_memory_rss = run_in_new_process(
+            convert_in_memory, fp32_path, os.path.join(tmp_dir, "model_fp16.onnx")
+        )
+
+    print(f"layers={args.num_layers} hidden_size={args.hidden_size} nodes={num_nodes} fp32={size_gb:.2f} GB")
+    print(f"load: {load_time:.2f} s ({size_gb / load_time:.2f} GB/s)")
+    print(f"convert to float16: {convert_time:.2f} s ({size_gb / convert_time:.2f} GB/s)")
+    print(f"save: {save_time:.2f} s ({size_gb / 2 / save_time:.2f} GB/s)")
+    print(f"in memory peak RSS: {in_memory_rss:.2f} GB")
+    print(f"out of core conversion: {out_of_core_time:.2f} s ({size_gb / out_of_core_time:.2f} GB/s)")
+    print(f"out of core peak RSS: {out_of_core_rss:.2f} GB")
+
+
+if __name__ == "__main__":
+    main()
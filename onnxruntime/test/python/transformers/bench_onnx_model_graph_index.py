@@ -0,0 +1,119 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation.  All rights reserved.
+# Licensed under the MIT License.
+# --------------------------------------------------------------------------
+
+"""
+Benchmark the graph index of OnnxModel on a generated deep BERT-like graph.
+
+Every layer has a decomposed LayerNormalization, a MatMul with bias and a decomposed Gelu. The script
+applies LayerNormalization and Gelu fusions with and without the graph index, and checks that both
+produce the same graph.
+"""
+
+import argparse
+import time
+from contextlib import nullcontext
+
+import numpy as np
+from onnx import ModelProto, TensorProto, helper, numpy_helper
+from parity_utilities import find_transformers_source
+
+if find_transformers_source():
+    from fusion_gelu import FusionGelu
+    from fusion_layernorm import FusionLayerNormalization
+    from onnx_model import OnnxModel
+else:
+    from onnxruntime.transformers.fusion_gelu import FusionGelu
+    from onnxruntime.transformers.fusion_layernorm import FusionLayerNormalization
+    from onnxruntime.transformers.onnx_model import OnnxModel
+
+
+def create_deep_model(num_layers: int, hidden_size: int):
+    nodes = []
+    initializers = [
+        numpy_helper.from_array(np.array(value, dtype=np.float32), name)
+        for name, value in [("eps", 1e-12), ("two", 2.0), ("sqrt2", 1.4142), ("one", 1.0), ("half", 0.5)]
+    ]
+    rng = np.random.default_rng(0)
+    x = "input"
+    for i in range(num_layers):
+        for name, shape in [
+            ("gamma", [hidden_size]),
+            ("beta", [hidden_size]),
+            ("weight", [hidden_size] * 2),
+            ("bias", [hidden_size]),
+        ]:
+            initializers.append(numpy_helper.from_array(rng.standard_normal(shape).astype(np.float32), f"{name}_{i}"))
+
+        def t(name, i=i):
+            return f"{name}_{i}"
+
+        nodes.extend(
+            [
+                helper.make_node("ReduceMean", [x], [t("mean")], axes=[-1]),
+                helper.make_node("Sub", [x, t("mean")], [t("sub")]),
+                helper.make_node("Pow", [t("sub"), "two"], [t("pow")]),
+                helper.make_node("ReduceMean", [t("pow")], [t("var")], axes=[-1]),
+                helper.make_node("Add", [t("var"), "eps"], [t("var_eps")]),
+                helper.make_node("Sqrt", [t("var_eps")], [t("std")]),
+                helper.make_node("Div", [t("sub"), t("std")], [t("norm")]),
+                helper.make_node("Mul", [t("norm"), t("gamma")], [t("scaled")]),
+                helper.make_node("Add", [t("scaled"), t("beta")], [t("ln")]),
+                helper.make_node("MatMul", [t("ln"), t("weight")], [t("matmul")]),
+                helper.make_node("Add", [t("matmul"), t("bias")], [t("fc")]),
+                helper.make_node("Div", [t("fc"), "sqrt2"], [t("gelu_div")]),
+                helper.make_node("Erf", [t("gelu_div")], [t("erf")]),
+                helper.make_node("Add", [t("erf"), "one"], [t("erf_plus_one")]),
+                helper.make_node("Mul", [t("fc"), t("erf_plus_one")], [t("gelu_mul")]),
+                helper.make_node("Mul", [t("gelu_mul"), "half"], [t("gelu")]),
+                helper.make_node("Add", [t("gelu"), x], [t("output")]),
+            ]
+        )
+        x = t("output")
+
+    graph = helper.make_graph(
+        nodes,
+        "deep_bert",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["batch", "seq", hidden_size])],
+        [helper.make_tensor_value_info(x, TensorProto.FLOAT, ["batch", "seq", hidden_size])],
+        initializers,
+    )
+    return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+
+
+def fuse(onnx_model, use_graph_index: bool):
+    model = OnnxModel(ModelProto())
+    model.model.CopyFrom(onnx_model)
+    if not use_graph_index:
+        model.graph_index = nullcontext
+
+    start = time.perf_counter()
+    FusionLayerNormalization(model).apply()
+    FusionGelu(model).apply()
+    latency = time.perf_counter() - start
+
+    model.topological_sort()
+    return model.model, latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num_layers", type=int, default=100)
+    parser.add_argument("--hidden_size", type=int, default=8)
+    args = parser.parse_args()
+
+    onnx_model = create_deep_model(args.num_layers, args.hidden_size)
+    indexed_model, indexed_time = fuse(onnx_model, use_graph_index=True)
+    scanned_model, scanned_time = fuse(onnx_model, use_graph_index=False)
+
+    print(f"layers={args.num_layers} nodes={len(onnx_model.graph.node)}")
+    print(f"without graph index: {scanned_time:.3f} s")
+    print(f"with graph index: {indexed_time:.3f} s")
+    print(f"speedup: {scanned_time / indexed_time:.1f}x")
+    print(f"fused nodes: {len(indexed_model.graph.node)}")
+    print(f"same graph: {indexed_model.SerializeToString() == scanned_model.SerializeToString()}")
+
+
+if __name__ == "__main__":
+    main()
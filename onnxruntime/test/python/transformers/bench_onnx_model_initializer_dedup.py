@@ -0,0 +1,106 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation.  All rights reserved.
+# Licensed under the MIT License.
+# --------------------------------------------------------------------------
+
+"""
+Benchmark OnnxModel.remove_duplicated_initializer on a generated model with shared weights.
+
+Every layer adds a few unique weights and a weight that is shared by all layers. The hash-bucketed deduplication is
+compared with the pairwise comparison of initializers by has_same_value, and both shall remove the same initializers.
+"""
+
+import argparse
+import time
+
+import numpy as np
+from onnx import ModelProto, TensorProto, helper, numpy_helper
+from parity_utilities import find_transformers_source
+
+if find_transformers_source():
+    from onnx_model import OnnxModel
+else:
+    from onnxruntime.transformers.onnx_model import OnnxModel
+
+
+def create_model(num_layers: int, hidden_size: int):
+    rng = np.random.default_rng(0)
+    shared = rng.standard_normal((hidden_size, hidden_size), dtype=np.float32)
+    nodes = []
+    initializers = []
+    x = "input"
+    for i in range(num_layers):
+        names = [f"weight_{i}", f"bias_{i}", f"shared_{i}"]
+        initializers.extend(
+            [
+                numpy_helper.from_array(rng.standard_normal((hidden_size, hidden_size), dtype=np.float32), names[0]),
+                numpy_helper.from_array(rng.standard_normal(hidden_size, dtype=np.float32), names[1]),
+                numpy_helper.from_array(shared, names[2]),
+            ]
+        )
+        nodes.extend(
+            [
+                helper.make_node("MatMul", [x, names[0]], [f"matmul_{i}"]),
+                helper.make_node("Add", [f"matmul_{i}", names[1]], [f"add_{i}"]),
+                helper.make_node("MatMul", [f"add_{i}", names[2]], [f"output_{i}"]),
+            ]
+        )
+        x = f"output_{i}"
+
+    graph = helper.make_graph(
+        nodes,
+        "shared_weights",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["batch", hidden_size])],
+        [helper.make_tensor_value_info(x, TensorProto.FLOAT, ["batch", hidden_size])],
+        initializers,
+    )
+    return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+
+
+def remove_duplicated_initializer_pairwise(model: OnnxModel):
+    initializers = model.model.graph.initializer
+    same = [-1] * len(initializers)
+    for i in range(len(initializers) - 1):
+        if same[i] >= 0:
+            continue
+        for j in range(i + 1, len(initializers)):
+            if OnnxModel.has_same_value(initializers[i], initializers[j]):
+                same[j] = i
+    for i in range(len(initializers)):
+        if same[i] >= 0:
+            model.replace_input_of_all_nodes(initializers[i].name, initializers[same[i]].name)
+    model.update_graph()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num_layers", type=int, default=100)
+    parser.add_argument("--hidden_size", type=int, default=64)
+    args = parser.parse_args()
+
+    onnx_model = create_model(args.num_layers, args.hidden_size)
+
+    model = OnnxModel(ModelProto())
+    model.model.CopyFrom(onnx_model)
+    start = time.perf_counter()
+    remove_duplicated_initializer_pairwise(model)
+    pairwise_time = time.perf_counter() - start
+    expected = [initializer.name for initializer in model.model.graph.initializer]
+
+    model = OnnxModel(ModelProto())
+    model.model.CopyFrom(onnx_model)
+    start = time.perf_counter()
+    saved_bytes = model.remove_duplicated_initializer(None)
+    bucketed_time = time.perf_counter() - start
+    actual = [initializer.name for initializer in model.model.graph.initializer]
+
+    print(f"layers={args.num_layers} initializers={len(onnx_model.graph.initializer)} remaining={len(actual)}")
+    print(f"pairwise: {pairwise_time:.3f} s")
+    print(f"hash-bucketed: {bucketed_time:.3f} s")
+    print(f"speedup: {pairwise_time / bucketed_time:.1f}x")
+    print(f"saved: {saved_bytes / 1e6:.2f} MB")
+    print(f"same initializers: {actual == expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@
 
 """Tests for float16 conversion (convert_float_to_float16)."""
 
+import os
+import tempfile
 import unittest
 
 import numpy as np
@@ -15,9 +17,19 @@ from onnx import TensorProto, helper, numpy_helper
 from parity_utilities import find_transformers_source
 
 if find_transformers_source():
-    from float16 import convert_float_to_float16
+    from float16 import (
+        convert_float_to_float16,
+        convert_float_to_float16_with_external_data,
+        convert_np_to_float16,
+        convert_tensor_float_to_float16,
+    )
 else:
-    from onnxruntime.transformers.float16 import convert_float_to_float16
+    from onnxruntime.transformers.float16 import (
+        convert_float_to_float16,
+        convert_float_to_float16_with_external_data,
+        convert_np_to_float16,
+        convert_tensor_float_to_float16,
+    )
 
 
 def _make_resize_model_opset11(num_resize_nodes=2, use_empty_names=True):
@@ -271,5 +283,128 @@ class TestFloat16Conversion(unittest.TestCase):
         )
 
 
+class TestFloat16TensorConversion(unittest.TestCase):
+    """Tests for float16 conversion of tensors."""
+
+    def test_truncate_out_of_range_values(self):
+        values = np.array(
+            [[0.0, -0.0, 1e-9, -1e-9, 1.5, -2.5], [1e5, -1e5, 65504.0, np.inf, -np.inf, np.nan]], dtype=np.float32
+        )
+        converted = convert_np_to_float16(values)
+        self.assertEqual(converted.dtype, np.float16)
+        self.assertEqual(converted.shape, values.shape)
+        expected = np.array(
+            [[0.0, -0.0, 5.96e-08, -5.96e-08, 1.5, -2.5], [65504.0, -65504.0, 65504.0, np.inf, -np.inf, np.nan]],
+            dtype=np.float16,
+        )
+        np.testing.assert_array_equal(converted, expected)
+        np.testing.assert_array_equal(np.signbit(converted), np.signbit(expected))
+
+        # Input array is not changed.
+        self.assertEqual(values[0, 2], np.float32(1e-9))
+
+        converted = convert_np_to_float16(values, min_positive_val=1e-4, max_finite_val=1e4)
+        np.testing.assert_array_equal(converted[:, 2:4], np.array([[1e-4, -1e-4], [1e4, np.inf]], dtype=np.float16))
+        np.testing.assert_array_equal(converted[1, :3], np.array([1e4, -1e4, 1e4], dtype=np.float16))
+
+    def test_convert_float_data(self):
+        values = np.array([1.0, -2.0, 1e-9, 1e5], dtype=np.float32)
+        tensor = helper.make_tensor("t", TensorProto.FLOAT, [4], values.tolist())
+        converted = convert_tensor_float_to_float16(tensor)
+        self.assertEqual(converted.data_type, TensorProto.FLOAT16)
+        self.assertFalse(converted.float_data)
+        np.testing.assert_array_equal(numpy_helper.to_array(converted), convert_np_to_float16(values))
+
+        tensor = numpy_helper.from_array(values, "t")
+        converted = convert_tensor_float_to_float16(tensor)
+        np.testing.assert_array_equal(numpy_helper.to_array(converted), convert_np_to_float16(values))
+
+
+class TestFloat16ExternalDataConversion(unittest.TestCase):
+    """Tests for float16 conversion of models with external data (convert_float_to_float16_with_external_data)."""
+
+    def _make_model(self):
+        rng = np.random.default_rng(0)
+        weight = rng.standard_normal((64, 48), dtype=np.float32)
+        weight[0, :3] = [1e-9, 1e5, -1e5]
+        initializers = [
+            numpy_helper.from_array(weight, "weight"),
+            numpy_helper.from_array(rng.standard_normal(48, dtype=np.float32), "blocked_bias"),
+            numpy_helper.from_array(np.arange(300, dtype=np.int64), "indices"),
+            numpy_helper.from_array(np.array([1.0], dtype=np.float32), "small"),
+        ]
+        nodes = [
+            helper.make_node("MatMul", ["input", "weight"], ["matmul_out"], name="matmul"),
+            helper.make_node("Add", ["matmul_out", "small"], ["add_out"], name="add"),
+            helper.make_node("Max", ["add_out", "blocked_bias"], ["output"], name="max"),
+            helper.make_node("Gather", ["indices", "gather_index"], ["gather_out"], name="gather"),
+        ]
+        graph = helper.make_graph(
+            nodes,
+            "external_data",
+            [
+                helper.make_tensor_value_info("input", TensorProto.FLOAT, [2, 64]),
+                helper.make_tensor_value_info("gather_index", TensorProto.INT64, [1]),
+            ],
+            [
+                helper.make_tensor_value_info("output", TensorProto.FLOAT, [2, 48]),
+                helper.make_tensor_value_info("gather_out", TensorProto.INT64, [1]),
+            ],
+            initializers,
+        )
+        return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+
+    def test_same_result_as_in_memory_conversion(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_path = os.path.join(tmp_dir, "model.onnx")
+            output_path = os.path.join(tmp_dir, "model_fp16.onnx")
+            onnx.save(self._make_model(), input_path, save_as_external_data=True, size_threshold=16)
+            expected = convert_float_to_float16(onnx.load(input_path), keep_io_types=True)
+
+            # A small chunk size splits the weight into several chunks.
+            converted = convert_float_to_float16_with_external_data(
+                input_path, output_path, alignment=64, chunk_size=1000, keep_io_types=True
+            )
+            self.assertFalse(any(tensor.raw_data for tensor in converted.graph.initializer if tensor.name != "small"))
+            self.assertEqual(os.listdir(tmp_dir).count("model_fp16.onnx.data"), 1)
+
+            for tensor in converted.graph.initializer:
+                if tensor.name != "small":
+                    offset = next(int(entry.value) for entry in tensor.external_data if entry.key == "offset")
+                    self.assertEqual(offset % 64, 0)
+
+            actual = onnx.load(output_path)
+            self.assertEqual(
+                [node.op_type for node in actual.graph.node], [node.op_type for node in expected.graph.node]
+            )
+            self.assertEqual(len(actual.graph.initializer), len(expected.graph.initializer))
+            for actual_tensor, expected_tensor in zip(
+                actual.graph.initializer, expected.graph.initializer, strict=True
+            ):
+                self.assertEqual(actual_tensor.name, expected_tensor.name)
+                self.assertEqual(actual_tensor.data_type, expected_tensor.data_type)
+                np.testing.assert_array_equal(
+                    numpy_helper.to_array(actual_tensor), numpy_helper.to_array(expected_tensor)
+                )
+            self.assertEqual(
+                {tensor.name: tensor.data_type for tensor in actual.graph.initializer},
+                {
+                    "weight": TensorProto.FLOAT16,
+                    "blocked_bias": TensorProto.FLOAT,
+                    "indices": TensorProto.INT64,
+                    "small": TensorProto.FLOAT16,
+                },
+            )
+
+    def test_output_cannot_overwrite_input_data(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_path = os.path.join(tmp_dir, "model.onnx")
+            onnx.save(self._make_model(), input_path, save_as_external_data=True, location="weights.data")
+            with self.assertRaises(ValueError):
+                convert_float_to_float16_with_external_data(
+                    input_path, os.path.join(tmp_dir, "model_fp16.onnx"), external_data_name="weights.data"
+                )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,93 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation.  All rights reserved.
+# Licensed under the MIT License.  See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+import unittest
+
+from onnx import TensorProto, helper
+from parity_utilities import find_transformers_source
+
+if find_transformers_source():
+    from fusion_base import Fusion, FusionGroup
+    from onnx_model import OnnxModel
+else:
+    from onnxruntime.transformers.fusion_base import Fusion, FusionGroup
+    from onnxruntime.transformers.onnx_model import OnnxModel
+
+
+class FusionParentChild(Fusion):
+    """Fuse a node of search operator and its only child of the given operator into one node."""
+
+    def __init__(self, model: OnnxModel, fused_op_type: str, search_op_type: str, child_op_type: str):
+        super().__init__(model, fused_op_type, search_op_type)
+        self.child_op_type = child_op_type
+
+    def fuse(self, node, input_name_to_nodes, output_name_to_node):
+        children = self.model.get_children(node, input_name_to_nodes)
+        if len(children) != 1 or children[0].op_type != self.child_op_type:
+            return
+        self.nodes_to_remove.extend([node, children[0]])
+        fused_node = helper.make_node(
+            self.fused_op_type,
+            [node.input[0]],
+            [children[0].output[0]],
+            name=self.model.create_node_name(self.fused_op_type),
+        )
+        self.nodes_to_add.append(fused_node)
+        self.node_name_to_graph_name[fused_node.name] = self.this_graph_name
+
+
+class TestFusionGroup(unittest.TestCase):
+    def create_model(self):
+        # x --> Relu --> Sigmoid --> Tanh --> y
+        graph = helper.make_graph(
+            [
+                helper.make_node("Relu", ["x"], ["a"], name="relu"),
+                helper.make_node("Sigmoid", ["a"], ["b"], name="sigmoid"),
+                helper.make_node("Tanh", ["b"], ["y"], name="tanh"),
+            ],
+            "graph",
+            [helper.make_tensor_value_info("x", TensorProto.FLOAT, [2])],
+            [helper.make_tensor_value_info("y", TensorProto.FLOAT, [2])],
+        )
+        return OnnxModel(helper.make_model(graph))
+
+    def fuse(self, fusion_types, use_group):
+        model = self.create_model()
+        fusions = [FusionParentChild(model, *fusion_type) for fusion_type in fusion_types]
+        if use_group:
+            FusionGroup(model, fusions).apply()
+        else:
+            for fusion in fusions:
+                fusion.apply()
+        model.topological_sort()
+        return model
+
+    def test_same_result_as_sequential_fusions(self):
+        for fusion_types in [
+            [("ReluSigmoid", "Relu", "Sigmoid"), ("SigmoidTanh", "Sigmoid", "Tanh")],
+            # The fusion with lower priority is matched first in traversal, and then rolled back.
+            [("SigmoidTanh", "Sigmoid", "Tanh"), ("ReluSigmoid", "Relu", "Sigmoid")],
+            [("ReluTanh", "Relu", "Tanh"), ("SigmoidTanh", "Sigmoid", "Tanh")],
+        ]:
+            with self.subTest(fusion_types=fusion_types):
+                sequential = self.fuse(fusion_types, use_group=False)
+                grouped = self.fuse(fusion_types, use_group=True)
+                self.assertEqual(
+                    [node.op_type for node in grouped.nodes()], [node.op_type for node in sequential.nodes()]
+                )
+                self.assertEqual(
+                    [list(node.input) for node in grouped.nodes()], [list(node.input) for node in sequential.nodes()]
+                )
+
+    def test_fusion_latency(self):
+        model = self.fuse([("SigmoidTanh", "Sigmoid", "Tanh"), ("ReluSigmoid", "Relu", "Sigmoid")], use_group=True)
+        self.assertEqual([node.op_type for node in model.nodes()], ["Relu", "SigmoidTanh"])
+        self.assertEqual(set(model.fusion_latency.keys()), {"SigmoidTanh", "ReluSigmoid"})
+        self.assertTrue(all(latency >= 0 for latency in model.fusion_latency.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation.  All rights reserved.
+# Licensed under the MIT License.  See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+import unittest
+
+from onnx import TensorProto, helper
+from parity_utilities import find_transformers_source
+
+if find_transformers_source():
+    from onnx_model import OnnxModel
+else:
+    from onnxruntime.transformers.onnx_model import OnnxModel
+
+
+class TestOnnxModelGraphIndex(unittest.TestCase):
+    def create_model(self):
+        #   x --> Relu --> a --> Sigmoid --> b --> Add --> y
+        #         |                               ^
+        #         +-------------------------------+
+        graph = helper.make_graph(
+            [
+                helper.make_node("Relu", ["x"], ["a"], name="relu"),
+                helper.make_node("Sigmoid", ["a"], ["b"], name="sigmoid"),
+                helper.make_node("Add", ["a", "b"], ["y"], name="add"),
+            ],
+            "graph",
+            [helper.make_tensor_value_info("x", TensorProto.FLOAT, [2])],
+            [helper.make_tensor_value_info("y", TensorProto.FLOAT, [2])],
+        )
+        return OnnxModel(helper.make_model(graph))
+
+    def assert_index_consistent(self, model):
+        # The index shall give same results as scanning the graph.
+        input_name_to_nodes = model.input_name_to_nodes()
+        output_name_to_node = model.output_name_to_node()
+        for node in model.nodes():
+            self.assertEqual(model.get_parents(node), model.get_parents(node, output_name_to_node))
+            self.assertEqual(model.get_children(node), model.get_children(node, input_name_to_nodes))
+
+    def test_lookups_use_graph_nodes(self):
+        model = self.create_model()
+        with model.graph_index():
+            add = model.model.graph.node[2]
+            relu = model.get_parent(add, 0)
+            self.assertIs(relu, model.model.graph.node[0])
+            self.assertEqual(
+                model.match_parent_path(add, ["Sigmoid", "Relu"], [1, 0]), [model.model.graph.node[1], relu]
+            )
+            self.assertEqual([n.name for n in model.get_children(relu)], ["sigmoid", "add"])
+        self.assertIsNone(model._output_name_to_node_index)
+        self.assertIsNone(model._input_name_to_nodes_index)
+
+    def test_index_is_updated_by_mutators(self):
+        model = self.create_model()
+        with model.graph_index():
+            self.assert_index_consistent(model)
+
+            sigmoid = model.model.graph.node[1]
+            tanh = helper.make_node("Tanh", ["a"], ["c"], name="tanh")
+            model.add_node(tanh)
+            model.replace_input_of_all_nodes("b", "c")
+            model.remove_node(sigmoid)
+            self.assert_index_consistent(model)
+
+            add = model.get_nodes_by_op_type("Add")[0]
+            self.assertEqual(model.get_parent(add, 1).name, "tanh")
+            self.assertIsNone(model.match_parent(add, "Sigmoid", 1))
+            self.assertEqual([n.name for n in model.get_children(model.get_parent(add, 1))], ["add"])
+
+            model.replace_output_of_all_nodes("c", "d")
+            model.replace_input_of_all_nodes("c", "d")
+            self.assert_index_consistent(model)
+            self.assertEqual(model.get_parent(add, 1).name, "tanh")
+
+            model.remove_nodes(model.get_nodes_by_op_type("Tanh"))
+            model.add_nodes([helper.make_node("Neg", ["a"], ["d"], name="neg")])
+            self.assert_index_consistent(model)
+            self.assertEqual(model.get_parent(add, 1).name, "neg")
+
+    def test_replace_input_of_node(self):
+        model = self.create_model()
+        with model.graph_index():
+            relu, sigmoid, add = model.model.graph.node
+            self.assertEqual([n.name for n in model.get_children(relu)], ["sigmoid", "add"])
+            model.replace_input_of_node(add, "a", "x")
+            self.assert_index_consistent(model)
+            self.assertEqual([n.name for n in model.get_children(relu)], ["sigmoid"])
+            self.assertIsNone(model.get_parent(add, 0))
+            self.assertEqual([n.name for n in model._lookup_input_name_to_nodes()["x"]], ["relu", "add"])
+
+    def test_set_node_input_and_output(self):
+        model = self.create_model()
+        with model.graph_index():
+            relu, sigmoid, add = model.model.graph.node
+            # The node still consumes "a" from another input after the first input is changed.
+            model.set_node_input(add, 1, "a")
+            model.set_node_input(add, 0, "x")
+            self.assert_index_consistent(model)
+            self.assertEqual([n.name for n in model.get_children(relu)], ["sigmoid", "add"])
+            self.assertEqual(model.get_children(sigmoid), [])
+            model.set_node_input(add, 1, "b")
+            self.assert_index_consistent(model)
+            self.assertEqual([n.name for n in model.get_children(relu)], ["sigmoid"])
+            self.assertEqual([n.name for n in model.get_children(sigmoid)], ["add"])
+
+            model.set_node_output(sigmoid, 0, "c")
+            model.set_node_input(add, 0, "c")
+            self.assert_index_consistent(model)
+            self.assertIs(model.get_parent(add, 0), sigmoid)
+
+            # Nodes that are not in graph are not indexed.
+            neg = helper.make_node("Neg", ["x"], ["n"], name="neg")
+            model.set_node_input(neg, 0, "a")
+            model.set_node_output(neg, 0, "c")
+            self.assert_index_consistent(model)
+            self.assertIs(model.get_parent(add, 0), sigmoid)
+
+    def test_nested_graph_index(self):
+        model = self.create_model()
+        with model.graph_index():
+            with model.graph_index():
+                self.assertEqual(model.get_parent(model.model.graph.node[2], 1).name, "sigmoid")
+            self.assertIsNotNone(model._output_name_to_node_index)
+
+            model.prune_graph()
+            self.assertIsNone(model._output_name_to_node_index)
+            self.assert_index_consistent(model)
+
+    def test_initializer_and_graph_lookups(self):
+        model = self.create_model()
+        with model.graph_index():
+            self.assertIsNone(model.get_initializer("w"))
+            tensor = helper.make_tensor("w", TensorProto.FLOAT, [1], [1.0])
+            model.add_initializer(tensor)
+            self.assertEqual(model.get_initializer("w"), tensor)
+            model.remove_initializer(model.get_initializer("w"))
+            self.assertIsNone(model.get_initializer("w"))
+
+            relu, sigmoid, add = model.model.graph.node
+            self.assertIs(model.get_graph_by_node(add), model.model.graph)
+            neg = helper.make_node("Neg", ["x"], ["n"], name="neg")
+            model.add_node(neg)
+            self.assertIs(model.get_graph_by_node(model.model.graph.node[-1]), model.model.graph)
+
+            # A copy of node is removed by comparing content.
+            sigmoid_copy = helper.make_node("Sigmoid", ["a"], ["b"], name="sigmoid")
+            model.remove_nodes([sigmoid_copy, model.model.graph.node[-1], relu])
+            self.assertEqual([n.name for n in model.model.graph.node], ["add"])
+            self.assertIsNone(model.get_graph_by_node(relu))
+            self.assert_index_consistent(model)
+
+    def test_topological_sort(self):
+        # Same order as repeated scans of nodes: d, a and b are sorted in the first scan, c in the second and e in the third.
+        graph = helper.make_graph(
+            [
+                helper.make_node("Add", ["c", "b"], ["e"], name="e"),
+                helper.make_node("Relu", ["a"], ["c"], name="c"),
+                helper.make_node("Relu", ["x"], ["d"], name="d"),
+                helper.make_node("Relu", ["x"], ["a"], name="a"),
+                helper.make_node("Relu", ["a"], ["b"], name="b"),
+            ],
+            "graph",
+            [helper.make_tensor_value_info("x", TensorProto.FLOAT, [2])],
+            [helper.make_tensor_value_info("e", TensorProto.FLOAT, [2])],
+        )
+        OnnxModel.graph_topological_sort(graph)
+        self.assertEqual([n.name for n in graph.node], ["d", "a", "b", "c", "e"])
+
+        graph.node.extend([helper.make_node("Relu", ["missing"], ["f"], name="f")])
+        with self.assertRaises(RuntimeError):
+            OnnxModel.graph_topological_sort(graph)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation.  All rights reserved.
+# Licensed under the MIT License.  See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+from parity_utilities import find_transformers_source
+
+if find_transformers_source():
+    from onnx_model import OnnxModel
+else:
+    from onnxruntime.transformers.onnx_model import OnnxModel
+
+
+class TestRemoveDuplicatedInitializer(unittest.TestCase):
+    def create_model(self):
+        rng = np.random.default_rng(0)
+        embedding = rng.standard_normal((16, 8), dtype=np.float32)
+        initializers = [
+            numpy_helper.from_array(embedding, "embedding"),
+            numpy_helper.from_array(embedding.copy(), "lm_head"),
+            # Same bytes as embedding but a different shape.
+            numpy_helper.from_array(embedding.reshape(8, 16), "reshaped"),
+            numpy_helper.from_array(embedding.astype(np.float16), "embedding_fp16"),
+            numpy_helper.from_array(np.array([1.0], dtype=np.float32), "one"),
+            helper.make_tensor("one_float_data", TensorProto.FLOAT, [1], [1.0]),
+            numpy_helper.from_array(np.array([2.0], dtype=np.float32), "two"),
+        ]
+        nodes = [
+            helper.make_node("Add", ["embedding", "lm_head"], ["a"], name="add_a"),
+            helper.make_node("Add", ["reshaped", "two"], ["b"], name="add_b"),
+            helper.make_node("Add", ["one", "one_float_data"], ["c"], name="add_c"),
+            helper.make_node("Cast", ["embedding_fp16"], ["d"], to=TensorProto.FLOAT, name="cast"),
+        ]
+        graph = helper.make_graph(
+            nodes,
+            "graph",
+            [],
+            [helper.make_tensor_value_info(name, TensorProto.FLOAT, None) for name in "abcd"],
+            initializers,
+        )
+        return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+
+    def assert_deduplicated(self, model, saved_bytes, cache):
+        self.assertEqual(saved_bytes, 16 * 8 * 4 + 4)
+        self.assertEqual(
+            [initializer.name for initializer in model.model.graph.initializer],
+            ["embedding", "reshaped", "embedding_fp16", "one", "two"],
+        )
+        node_inputs = [list(node.input) for node in model.nodes()]
+        self.assertEqual(node_inputs[0], ["embedding", "embedding"])
+        self.assertEqual(node_inputs[2], ["one", "one"])
+        self.assertEqual(cache["embedding"], cache["lm_head"])
+        self.assertEqual(cache["embedding"], cache["reshaped"])
+        self.assertNotEqual(cache["one"], cache["two"])
+
+    def test_remove_duplicated_initializer(self):
+        model = OnnxModel(self.create_model())
+        cache = {}
+        saved_bytes = model.remove_duplicated_initializer(cache)
+        self.assert_deduplicated(model, saved_bytes, cache)
+        self.assertEqual(model.remove_duplicated_initializer(None), 0)
+
+    def test_external_data(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_path = os.path.join(tmp_dir, "model.onnx")
+            onnx.save(self.create_model(), model_path, save_as_external_data=True, size_threshold=64)
+            model = OnnxModel(onnx.load(model_path, load_external_data=False))
+            cache = {}
+            saved_bytes = model.remove_duplicated_initializer(cache, base_dir=tmp_dir)
+            self.assert_deduplicated(model, saved_bytes, cache)
+            # External data is not loaded into the model.
+            self.assertFalse(model.get_initializer("embedding").HasField("raw_data"))
+
+
+if __name__ == "__main__":
+    unittest.main()
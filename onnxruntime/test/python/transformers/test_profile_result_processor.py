@@ -0,0 +1,103 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation.  All rights reserved.
+# Licensed under the MIT License.  See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+import json
+import math
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from parity_utilities import find_transformers_source
+
+if find_transformers_source():
+    from profile_result_processor import _is_regression, _t_critical, compare_latency, compare_profiles, parse_arguments
+else:
+    from onnxruntime.transformers.profile_result_processor import (
+        _is_regression,
+        _t_critical,
+        compare_latency,
+        compare_profiles,
+        parse_arguments,
+    )
+
+
+class TestProfileComparison(unittest.TestCase):
+    def save_profile(self, path, node_latency, num_runs=10):
+        # Each node has a kernel event and a fence event, and each run ends with a model_run event.
+        rng = np.random.default_rng(len(path))
+        events = []
+        for _ in range(num_runs):
+            for (node_name, op_name), latency in node_latency.items():
+                events.append(
+                    {
+                        "cat": "Node",
+                        "name": f"{node_name}_kernel_time",
+                        "dur": float(latency * rng.normal(1, 0.01)),
+                        "args": {"op_name": op_name, "provider": "CPUExecutionProvider"},
+                    }
+                )
+                events.append(
+                    {"cat": "Node", "name": f"{node_name}_fence_before", "dur": 1, "args": {"op_name": op_name}}
+                )
+            events.append({"cat": "Session", "name": "model_run", "dur": 1000})
+        with open(path, "w") as f:
+            json.dump(events, f)
+        return path
+
+    def test_compare_latency(self):
+        result = compare_latency([10, 11, 12], [10, 11, 12])
+        self.assertEqual(result["delta_us"], 0)
+        self.assertLess(result["ci_low_us"], 0)
+        self.assertGreater(result["ci_high_us"], 0)
+
+        result = compare_latency([10, 12], [15, 17])
+        self.assertEqual((result["delta_us"], result["relative_delta"]), (5, 5 / 11))
+        # t critical value of 95% with 2 degrees of freedom is 4.303.
+        self.assertAlmostEqual(result["ci_low_us"], 5 - 4.303 * math.sqrt(2), places=3)
+        self.assertIsNone(compare_latency([0, 0], [1, 2])["relative_delta"])
+
+        # The interval is unknown with a single run.
+        result = compare_latency([100.0], [106.0])
+        self.assertEqual((result["delta_us"], result["ci_low_us"], result["ci_high_us"]), (6, None, None))
+        self.assertFalse(_is_regression(result, 0.05, 0))
+
+    def test_t_critical(self):
+        for df, expected in [(1, 12.706), (2, 4.303), (5, 2.571), (29, 2.045), (30, 2.042), (120, 1.980)]:
+            self.assertAlmostEqual(_t_critical(0.95, df), expected, places=3)
+        self.assertAlmostEqual(_t_critical(0.99, 1), 63.657, places=3)
+
+    def test_compare_profiles(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            baseline = {("conv", "Conv"): 100, ("relu", "Relu"): 10, ("matmul", "MatMul"): 200}
+            regressed = {("conv", "Conv"): 100, ("relu", "Relu"): 10.2, ("matmul", "MatMul"): 240, ("gelu", "Gelu"): 5}
+            files = [
+                self.save_profile(os.path.join(tmp_dir, "baseline.json"), baseline),
+                self.save_profile(os.path.join(tmp_dir, "regressed.json"), regressed),
+                self.save_profile(os.path.join(tmp_dir, "same.json"), baseline),
+            ]
+            args = parse_arguments(["--compare", *files, "--regression_threshold", "0.05"])
+            lines, report = compare_profiles(args.compare, args)
+
+        self.assertTrue(len(lines) > 1)
+        self.assertTrue(report["has_regression"])
+        json.dumps(report, allow_nan=False)
+
+        regressed_report, same_report = report["candidates"]
+        self.assertEqual(regressed_report["candidate_runs"], 9)
+        self.assertEqual(regressed_report["added_nodes"], [{"node": "gelu", "op_type": "Gelu"}])
+        self.assertEqual(regressed_report["removed_nodes"], [])
+        # Latency of a node includes its fence.
+        self.assertAlmostEqual(regressed_report["nodes"][0]["candidate_us"], 241, delta=3)
+        self.assertEqual(
+            [(x["scope"], x.get("op_type")) for x in regressed_report["regressions"]],
+            [("total", None), ("op", "MatMul"), ("op", "Gelu"), ("node", "MatMul")],
+        )
+        self.assertEqual(same_report["regressions"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
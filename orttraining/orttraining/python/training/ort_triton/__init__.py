@@ -8,6 +8,7 @@ from functools import wraps
 
 from onnxruntime.capi import _pybind_state as _C
 
+from ._cache import warm_start_cache  # noqa: F401
 from .kernel import *  # noqa: F403
 from .triton_op_executor import (
     call_triton_by_name,
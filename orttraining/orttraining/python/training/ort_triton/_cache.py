@@ -5,17 +5,31 @@
 
 # from torch/_inductor/codecache.py
 import base64
+import contextlib
 import functools
 import getpass
 import hashlib
+import json
 import os
+import shutil
 import sys
 import tempfile
+import threading
+import time
 from types import ModuleType
 
+_CACHE_DIR_ENV = "ORTMODULE_TRITON_CACHE_DIR"
+_CACHE_SIZE_LIMIT_ENV = "ORTMODULE_TRITON_CACHE_SIZE_LIMIT_MB"
+_DEFAULT_CACHE_SIZE_LIMIT_MB = 1024
+_MANIFEST_NAME = "manifest.json"
+_MANIFEST_VERSION = 1
+
 
 @functools.lru_cache(None)
 def _cache_dir():
+    persistent_cache = PersistentCache.get()
+    if persistent_cache is not None:
+        return persistent_cache.cache_dir
     return f"{tempfile.gettempdir()}/ort_triton_{getpass.getuser()}"
 
 
@@ -35,7 +49,7 @@ def _write_atomic(path: str, source_code: str):
     fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
     with os.fdopen(fd, "w") as f:
         f.write(source_code)
-    os.rename(tmp_path, path)
+    os.replace(tmp_path, path)
 
 
 def _write(source_code, ext, extra=""):
@@ -78,3 +92,156 @@ class ModuleCache:
             func_name, mod = mod_func(*args)
             cls.cache[key] = (func_name, mod)
         return cls.cache[key]
+
+
+class PersistentCache:
+    """
+    On-disk cache of the generated modules and the symbolic shapes of ONNX graphs, so that restarted processes,
+    e.g. restarted training jobs, skip the codegen. Reusing the same generated source code also lets Triton's
+    own cache skip the compile of the kernels.
+
+    It's enabled by env ORTMODULE_TRITON_CACHE_DIR or "cache_dir" in the config file. The entries are listed in
+    a manifest file in the cache directory, which can be shared by processes. When the generated modules take
+    more than ORTMODULE_TRITON_CACHE_SIZE_LIMIT_MB (or "cache_size_limit_mb" in the config file, 1024 by default)
+    megabytes, the least recently used ones are removed.
+    """
+
+    _instance = None
+
+    def __init__(self, cache_dir: str, size_limit_mb: float | None = None):
+        self.cache_dir = os.path.abspath(cache_dir)
+        if size_limit_mb is None:
+            size_limit_mb = float(os.getenv(_CACHE_SIZE_LIMIT_ENV, _DEFAULT_CACHE_SIZE_LIMIT_MB))
+        self.size_limit = int(size_limit_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._manifest = self._read_manifest(self.cache_dir)
+
+    @classmethod
+    def get(cls) -> "PersistentCache | None":
+        if cls._instance is None and os.getenv(_CACHE_DIR_ENV):
+            cls.configure(os.getenv(_CACHE_DIR_ENV))
+        return cls._instance
+
+    @classmethod
+    def configure(cls, cache_dir: str | None, size_limit_mb: float | None = None):
+        """Enable the persistent cache in cache_dir, or disable it if cache_dir is None."""
+        cls._instance = cls(cache_dir, size_limit_mb) if cache_dir else None
+        _cache_dir.cache_clear()
+
+    @staticmethod
+    def _read_manifest(cache_dir: str) -> dict:
+        try:
+            with open(os.path.join(cache_dir, _MANIFEST_NAME), encoding="UTF-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        if not isinstance(manifest, dict) or manifest.get("version") != _MANIFEST_VERSION:
+            manifest = {}
+        return {
+            "version": _MANIFEST_VERSION,
+            "modules": manifest.get("modules", {}),
+            "shapes": manifest.get("shapes", {}),
+        }
+
+    def _save(self):
+        # Merge the entries added by other processes since the manifest was read, and keep the most recent use.
+        manifest = self._read_manifest(self.cache_dir)
+        for key, entry in manifest["modules"].items():
+            current = self._manifest["modules"].get(key)
+            if current is None or current["last_used"] < entry["last_used"]:
+                self._manifest["modules"][key] = entry
+        for key, shapes in manifest["shapes"].items():
+            self._manifest["shapes"].setdefault(key, shapes)
+        self._evict()
+        _write_atomic(os.path.join(self.cache_dir, _MANIFEST_NAME), json.dumps(self._manifest))
+
+    def _evict(self):
+        modules = self._manifest["modules"]
+        total_size = sum(entry["size"] for entry in modules.values())
+        for key in sorted(modules, key=lambda k: modules[k]["last_used"]):
+            if total_size <= self.size_limit:
+                break
+            entry = modules.pop(key)
+            total_size -= entry["size"]
+            with contextlib.suppress(OSError):
+                os.remove(os.path.join(self.cache_dir, entry["path"]))
+
+    def get_module(self, key: str) -> tuple[str, ModuleType] | None:
+        with self._lock:
+            entry = self._manifest["modules"].get(key)
+            if entry is None:
+                return None
+            try:
+                with open(os.path.join(self.cache_dir, entry["path"]), encoding="UTF-8") as f:
+                    source_code = f.read()
+            except OSError:
+                # Removed by another process.
+                del self._manifest["modules"][key]
+                return None
+            entry["last_used"] = time.time()
+            self._save()
+        return entry["func_name"], PyCodeCache.load(source_code)
+
+    def put_module(self, key: str, func_name: str, mod: ModuleType):
+        with self._lock:
+            self._manifest["modules"][key] = {
+                "func_name": func_name,
+                "path": os.path.relpath(mod.__file__, self.cache_dir),
+                "size": os.path.getsize(mod.__file__),
+                "last_used": time.time(),
+            }
+            self._save()
+
+    def get_shapes(self, key: str) -> list[list[int | str]] | None:
+        with self._lock:
+            return self._manifest["shapes"].get(key)
+
+    def put_shapes(self, key: str, shapes: list[list[int | str]]):
+        with self._lock:
+            self._manifest["shapes"][key] = shapes
+            self._save()
+
+    def warm_start(self, source_dir: str | None = None) -> int:
+        """
+        Load the cached modules ahead of the first run. If source_dir is given, the modules and shapes in the
+        cache directory of a previous run are added to this cache first. Returns the number of loaded modules.
+        """
+        with self._lock:
+            if source_dir is not None and os.path.abspath(source_dir) != self.cache_dir:
+                manifest = self._read_manifest(source_dir)
+                for key, entry in manifest["modules"].items():
+                    path = os.path.join(self.cache_dir, entry["path"])
+                    if not os.path.exists(path):
+                        try:
+                            os.makedirs(os.path.dirname(path), exist_ok=True)
+                            shutil.copyfile(os.path.join(source_dir, entry["path"]), path)
+                        except OSError:
+                            continue
+                    self._manifest["modules"].setdefault(key, entry)
+                for key, shapes in manifest["shapes"].items():
+                    self._manifest["shapes"].setdefault(key, shapes)
+                self._save()
+            entries = list(self._manifest["modules"].values())
+
+        loaded = 0
+        for entry in entries:
+            try:
+                with open(os.path.join(self.cache_dir, entry["path"]), encoding="UTF-8") as f:
+                    PyCodeCache.load(f.read())
+                loaded += 1
+            except OSError:
+                continue
+        return loaded
+
+
+def warm_start_cache(source_dir: str | None = None) -> int:
+    """
+    Load the modules in the persistent cache (see PersistentCache) ahead of the first run, after adding the
+    entries in source_dir if given, so that the first steps of a restarted job don't need codegen.
+    Returns the number of loaded modules.
+    """
+    persistent_cache = PersistentCache.get()
+    if persistent_cache is None:
+        raise ValueError(f"Persistent cache is not enabled. Set env {_CACHE_DIR_ENV} to enable it.")
+    return persistent_cache.warm_start(source_dir)
@@ -4,6 +4,7 @@
 # --------------------------------------------------------------------------
 
 import functools
+import hashlib
 import json
 import os
 import re
@@ -15,7 +16,9 @@ from onnx import ModelProto
 from torch._C import _from_dlpack
 from torch.utils.dlpack import to_dlpack
 
-from ._cache import ModuleCache, PyCodeCache
+import onnxruntime
+
+from ._cache import ModuleCache, PersistentCache, PyCodeCache
 from ._codegen import codegen
 from ._op_config import get_supported_ops
 from ._sorted_graph import SortedGraph
@@ -26,6 +29,9 @@ _DEBUG_MODE = "ORTMODULE_TRITON_DEBUG" in os.environ and int(os.getenv("ORTMODUL
 
 _CUSTOM_KERNELS = {}
 
+# onnx_key -> SHA256 of the ONNX model string, which is same in different processes.
+_MODEL_HASHES = {}
+
 
 @functools.lru_cache(None)
 def _gen_module_internal(sorted_graph: SortedGraph) -> tuple[str, str, ModuleType]:
@@ -57,7 +63,22 @@ class _ShapeCache:
                 cls.symbolic_shape_hint[k] = v
 
     @classmethod
-    def get_shape(cls, onnx_key: int, model: ModelProto, shapes: list[list[int]]) -> list[list[int | str]]:
+    def _persistent_key(cls, model_hash: str) -> str:
+        hint = json.dumps([cls.symbolic_shape_hint, cls.min_symbolic_shape], sort_keys=True)
+        return hashlib.sha256(f"{model_hash}|{hint}".encode()).hexdigest()
+
+    @classmethod
+    def get_shape(
+        cls, onnx_key: int, model: ModelProto, shapes: list[list[int]], model_hash: str | None = None
+    ) -> list[list[int | str]]:
+        # Start from the shapes of a previous process if persistent cache is enabled.
+        persistent_cache = PersistentCache.get() if model_hash is not None else None
+        if persistent_cache is not None and onnx_key not in cls.cache:
+            cached_shapes = persistent_cache.get_shapes(cls._persistent_key(model_hash))
+            if cached_shapes is not None:
+                cls.cache[onnx_key] = cached_shapes
+        previous_shapes = cls.cache.get(onnx_key)
+
         if onnx_key not in cls.cache:
             if cls.symbolic_shape_hint is not None:
                 for i, input in enumerate(model.graph.input):
@@ -86,15 +107,31 @@ class _ShapeCache:
                             changed = True
             if changed:
                 cls.cache[onnx_key] = shapes
+        if persistent_cache is not None and cls.cache[onnx_key] is not previous_shapes:
+            persistent_cache.put_shapes(cls._persistent_key(model_hash), cls.cache[onnx_key])
         return cls.cache[onnx_key]
 
 
-def _gen_key(onnx_key: int, model: ModelProto, shapes: list[list[int | str]]) -> int:
+def _gen_key(onnx_key: int, model: ModelProto, shapes: list[list[int | str]], model_hash: str | None = None) -> int:
     # pylint: disable=unused-argument
     return hash(f"{onnx_key}|{str(shapes).replace(' ', '')}")
 
 
-def _gen_module(onnx_key: int, model: ModelProto, shapes: list[list[int | str]]) -> tuple[str, ModuleType]:
+def _gen_persistent_key(model_hash: str, shapes: list[list[int | str]]) -> str:
+    # Generated code may change with the version of onnxruntime.
+    return hashlib.sha256(f"{onnxruntime.__version__}|{model_hash}|{json.dumps(shapes)}".encode()).hexdigest()
+
+
+def _gen_module(
+    onnx_key: int, model: ModelProto, shapes: list[list[int | str]], model_hash: str | None = None
+) -> tuple[str, ModuleType]:
+    persistent_cache = PersistentCache.get() if model_hash is not None else None
+    if persistent_cache is not None:
+        persistent_key = _gen_persistent_key(model_hash, shapes)
+        cached = persistent_cache.get_module(persistent_key)
+        if cached is not None:
+            return cached
+
     sorted_graph = SortedGraph(model, [parse_shape(shape) for shape in shapes])
     if _DEBUG_MODE:
         os.makedirs(os.path.dirname("triton_debug/"), exist_ok=True)
@@ -104,6 +141,8 @@ def _gen_module(onnx_key: int, model: ModelProto, shapes: list[list[int | str]])
         py_file_path = f"triton_debug/{func_name}_{onnx_key}.py"
         with open(py_file_path, "w", encoding="UTF-8") as f:
             f.write(src_code)
+    if persistent_cache is not None:
+        persistent_cache.put_module(persistent_key, func_name, mod)
     return func_name, mod
 
 
@@ -120,6 +159,8 @@ def get_config() -> str:
     User can also specify symbolic_shape_hint in the config, which is a dict to control the symbolic shape hint.
     Each entry is a regex pattern to match the dim_param in ONNX model and the value is the power of 2 for the symbolic
     shape. Each dim_param will be replaced by i{input_index}_dim{dim_index}_{power_of_2} in the symbolic shape.
+    User can also specify cache_dir and cache_size_limit_mb in the config to enable the persistent cache of generated
+    code, same as env ORTMODULE_TRITON_CACHE_DIR and ORTMODULE_TRITON_CACHE_SIZE_LIMIT_MB.
     """
 
     config = {}
@@ -139,6 +180,9 @@ def get_config() -> str:
         _ShapeCache.set_symbolic_shape_hint(config["symbolic_shape_hint"])
         del config["symbolic_shape_hint"]
 
+    if "cache_dir" in config:
+        PersistentCache.configure(config.pop("cache_dir"), config.pop("cache_size_limit_mb", None))
+
     return json.dumps(config)
 
 
@@ -172,8 +216,13 @@ def call_triton_by_onnx(onnx_key: int, onnx_str: bytes, *tensors):
     torch_tensors = [_from_dlpack(tensor) for tensor in tensors]
     concrete_shapes = [list(tensor.size()) for tensor in torch_tensors]
     model = onnx.load_model_from_string(onnx_str)
-    shapes = _ShapeCache.get_shape(onnx_key, model, concrete_shapes)
-    func_name, mod = ModuleCache.load(_gen_key, _gen_module, onnx_key, model, shapes)
+    model_hash = None
+    if PersistentCache.get() is not None:
+        model_hash = _MODEL_HASHES.get(onnx_key)
+        if model_hash is None:
+            model_hash = _MODEL_HASHES[onnx_key] = hashlib.sha256(onnx_str).hexdigest()
+    shapes = _ShapeCache.get_shape(onnx_key, model, concrete_shapes, model_hash)
+    func_name, mod = ModuleCache.load(_gen_key, _gen_module, onnx_key, model, shapes, model_hash)
     func = getattr(mod, func_name)
     output = func(*torch_tensors)
     if isinstance(output, tuple):
@@ -0,0 +1,122 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import itertools
+import json
+import os
+import types
+
+import pytest
+from onnx import TensorProto, helper
+
+pytest.importorskip("triton")
+
+from onnxruntime.training.ort_triton import _cache, triton_op_executor
+from onnxruntime.training.ort_triton._cache import ModuleCache, PersistentCache, PyCodeCache
+
+# Everything in this file runs on CPU. Only the compile of Triton kernels requires GPU, which happens at the first
+# call of the generated function.
+
+
+@pytest.fixture
+def persistent_cache(tmp_path):
+    def restart():
+        # Clear the in-memory caches as if the process is restarted.
+        PyCodeCache.clear()
+        ModuleCache.clear()
+        triton_op_executor._ShapeCache.clear()
+        PersistentCache.configure(str(tmp_path / "cache"), size_limit_mb=1)
+        return PersistentCache.get()
+
+    yield restart
+    PersistentCache.configure(None)
+    PyCodeCache.clear()
+    ModuleCache.clear()
+    triton_op_executor._ShapeCache.clear()
+
+
+def _create_model():
+    graph = helper.make_graph(
+        [helper.make_node("Add", ["x", "y"], ["s"]), helper.make_node("Mul", ["s", "y"], ["z"])],
+        "triton_cache_test",
+        [
+            helper.make_tensor_value_info("x", TensorProto.FLOAT, ["N", 16]),
+            helper.make_tensor_value_info("y", TensorProto.FLOAT, ["N", 16]),
+        ],
+        [helper.make_tensor_value_info("z", TensorProto.FLOAT, ["N", 16])],
+    )
+    return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 15)])
+
+
+def test_generated_module_is_persisted(persistent_cache, monkeypatch):
+    cache = persistent_cache()
+    model = _create_model()
+    model_hash = "model_hash"
+    func_name, mod = triton_op_executor._gen_module(1, model, [[8, 16], [8, 16]], model_hash)
+    with open(os.path.join(cache.cache_dir, "manifest.json"), encoding="UTF-8") as f:
+        manifest = json.load(f)
+    assert len(manifest["modules"]) == 1
+    assert os.path.dirname(mod.__file__).startswith(cache.cache_dir)
+
+    # The restarted process loads the same code without codegen.
+    persistent_cache()
+
+    def fail_codegen(*args):
+        raise AssertionError("codegen shall be skipped")
+
+    monkeypatch.setattr(triton_op_executor, "codegen", fail_codegen)
+    cached_func_name, cached_mod = triton_op_executor._gen_module(2, model, [[8, 16], [8, 16]], model_hash)
+    assert cached_func_name == func_name
+    assert cached_mod.__file__ == mod.__file__
+    assert callable(getattr(cached_mod, func_name))
+
+    # Different shapes need codegen.
+    with pytest.raises(AssertionError):
+        triton_op_executor._gen_module(2, model, [[4, 16], [4, 16]], model_hash)
+
+
+def test_symbolic_shapes_are_persisted(persistent_cache):
+    persistent_cache()
+    model = _create_model()
+    shape_cache = triton_op_executor._ShapeCache
+    assert shape_cache.get_shape(1, model, [[8, 16], [8, 16]], "model_hash") == [[8, 16], [8, 16]]
+    assert shape_cache.get_shape(1, model, [[12, 16], [12, 16]], "model_hash") == [
+        ["i0_dim0_16", 16],
+        ["i1_dim0_16", 16],
+    ]
+
+    # The restarted process starts with the symbolic shapes, even if the onnx_key is different.
+    persistent_cache()
+    assert shape_cache.get_shape(2, model, [[8, 16], [8, 16]], "model_hash") == [
+        ["i0_dim0_16", 16],
+        ["i1_dim0_16", 16],
+    ]
+    assert shape_cache.get_shape(3, model, [[8, 16], [8, 16]], "other_model_hash") == [[8, 16], [8, 16]]
+
+
+def test_size_limit_and_warm_start(persistent_cache, tmp_path, monkeypatch):
+    # Use increasing time of use, since the clock may not advance between calls.
+    monkeypatch.setattr(_cache, "time", types.SimpleNamespace(time=itertools.count().__next__))
+    cache = persistent_cache()
+    cache.size_limit = 2500
+    for i in range(3):
+        mod = PyCodeCache.load(f"# {'x' * 1000}\nvalue = {i}\n")
+        cache.put_module(f"key_{i}", "value", mod)
+        cache.get_module("key_0")
+
+    # key_1 is the least recently used one.
+    assert cache.get_module("key_1") is None
+    assert cache.get_module("key_0")[1].value == 0
+    assert sum(len(files) for _, _, files in os.walk(cache.cache_dir)) == 3
+
+    cache.put_shapes("shape_key", [["i0_dim0_16", 16]])
+    source_dir = cache.cache_dir
+    PersistentCache.configure(str(tmp_path / "new_cache"))
+    assert _cache.warm_start_cache(source_dir) == 2
+    new_cache = PersistentCache.get()
+    assert new_cache.get_module("key_2")[1].value == 2
+    assert new_cache.get_shapes("shape_key") == [["i0_dim0_16", 16]]
+
+    PersistentCache.configure(None)
+    with pytest.raises(ValueError):
+        _cache.warm_start_cache()
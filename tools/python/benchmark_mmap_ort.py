@@ -7,27 +7,43 @@ Compares session construction time and process memory across loading configurati
   2. Memory-mapped .ort load (session.use_memory_mapped_ort_model)
   3. Memory-mapped + direct initializers (+ session.use_ort_model_bytes_for_initializers)
 
+Without --perf-test, sessions are created in-process by the onnxruntime Python package. Each configuration
+runs in N concurrent fresh processes that report cold (first) and warm session creation time, first inference
+latency, USS/RSS and page faults of the cold session creation. Results are written as JSON with
+--output, and --compare prints the change relative to a JSON file of another build.
+
 Not intended for CI gating or official performance measurement.
 
 Usage:
+    python benchmark_mmap_ort.py --model <model.ort> --num-processes 4 --output results.json
+    python benchmark_mmap_ort.py --model <model.ort> --compare baseline.json
     python benchmark_mmap_ort.py --perf-test <path_to_onnxruntime_perf_test> --model <model.ort>
     python benchmark_mmap_ort.py --perf-test <path> --model <model.ort> --multi-process
 
 Requirements:
-    - Built onnxruntime_perf_test executable (with --hold_ms_after_session_creation support for --multi-process)
+    - onnxruntime Python package, or a built onnxruntime_perf_test executable for --perf-test
+      (with --hold_ms_after_session_creation support for --multi-process)
     - .ort model file
     - psutil package (pip install psutil) for memory measurements
 """
 
 import argparse
 import json
+import multiprocessing
 import os
+import queue
 import re
 import statistics
 import subprocess
 import sys
+import threading
 import time
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 try:
     import psutil
 
@@ -260,6 +276,255 @@ def run_multi_process_benchmark(
     }
 
 
+# -- In-process benchmark --
+
+
+_NUMPY_TYPES = {
+    "tensor(float)": "float32",
+    "tensor(float16)": "float16",
+    "tensor(double)": "float64",
+    "tensor(int64)": "int64",
+    "tensor(int32)": "int32",
+    "tensor(int16)": "int16",
+    "tensor(int8)": "int8",
+    "tensor(uint8)": "uint8",
+    "tensor(bool)": "bool",
+}
+
+
+def _get_page_faults() -> tuple[int, int]:
+    """Get (minor, major) page faults of current process. Windows only reports the total as minor faults."""
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_minflt, usage.ru_majflt
+    if HAS_PSUTIL:
+        return getattr(psutil.Process().memory_info(), "num_page_faults", 0), 0
+    return 0, 0
+
+
+def _get_memory() -> tuple[int, int]:
+    """Get (USS, RSS) in bytes of current process. USS falls back to RSS or peak RSS without psutil."""
+    if HAS_PSUTIL:
+        return _get_private_and_ws(psutil.Process())
+    if resource is not None:
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_rss *= 1 if sys.platform == "darwin" else 1024
+        return peak_rss, peak_rss
+    return 0, 0
+
+
+def _create_session(model_path: str, session_configs: dict):
+    import onnxruntime  # noqa: PLC0415
+
+    so = onnxruntime.SessionOptions()
+    for key, value in session_configs.items():
+        so.add_session_config_entry(key, value)
+    return onnxruntime.InferenceSession(model_path, so, providers=["CPUExecutionProvider"])
+
+
+def _make_inputs(session) -> dict:
+    """Create zero inputs for a session. Symbolic or unknown dimensions are 1."""
+    import numpy as np  # noqa: PLC0415
+
+    inputs = {}
+    for node_arg in session.get_inputs():
+        shape = [dim if isinstance(dim, int) and dim >= 0 else 1 for dim in node_arg.shape]
+        inputs[node_arg.name] = np.zeros(shape, dtype=_NUMPY_TYPES.get(node_arg.type, "float32"))
+    return inputs
+
+
+def _in_process_worker(model_path: str, session_configs: dict, warm_iterations: int, results, barrier, release):
+    """Measure sessions in a fresh process, report to results and keep the session alive until release is set.
+
+    Memory is measured after all processes have passed the barrier, i.e. when every process holds its session.
+    """
+    try:
+        # Import onnxruntime before measuring, so that the cold session creation does not include the import.
+        import onnxruntime  # noqa: F401, PLC0415
+
+        faults_before = _get_page_faults()
+        start = time.perf_counter()
+        session = _create_session(model_path, session_configs)
+        cold_ms = (time.perf_counter() - start) * 1000
+        faults_after = _get_page_faults()
+
+        inputs = _make_inputs(session)
+        start = time.perf_counter()
+        session.run(None, inputs)
+        first_inference_ms = (time.perf_counter() - start) * 1000
+
+        warm_ms = []
+        for _ in range(warm_iterations):
+            start = time.perf_counter()
+            _create_session(model_path, session_configs)
+            warm_ms.append((time.perf_counter() - start) * 1000)
+
+        barrier.wait(timeout=600)
+        uss, rss = _get_memory()
+        results.put(
+            {
+                "pid": os.getpid(),
+                "cold_session_ms": cold_ms,
+                "warm_session_ms": warm_ms,
+                "first_inference_ms": first_inference_ms,
+                "minor_page_faults": faults_after[0] - faults_before[0],
+                "major_page_faults": faults_after[1] - faults_before[1],
+                "uss_mb": uss / 1024 / 1024,
+                "rss_mb": rss / 1024 / 1024,
+            }
+        )
+        # Keep the session alive so that memory of all processes is measured while they share the model.
+        release.wait(timeout=300)
+    except threading.BrokenBarrierError:
+        results.put({"pid": os.getpid(), "error": "another process failed"})
+    except Exception as e:
+        # Let other processes stop waiting at the barrier.
+        barrier.abort()
+        results.put({"pid": os.getpid(), "error": str(e)})
+
+
+def _collect_results(results, processes, timeout: float) -> list[dict]:
+    """Get the result of each process, and fail fast when a process exits without reporting."""
+    per_process = []
+    deadline = time.monotonic() + timeout
+    while len(per_process) < len(processes):
+        try:
+            per_process.append(results.get(timeout=1))
+            continue
+        except queue.Empty:
+            pass
+        reported = {r["pid"] for r in per_process}
+        exited = [p for p in processes if p.exitcode is not None and p.pid not in reported]
+        if exited:
+            # The result might arrive right after the process exits.
+            try:
+                per_process.append(results.get(timeout=1))
+                continue
+            except queue.Empty:
+                pass
+            process = exited[0]
+            per_process.append(
+                {"pid": process.pid, "error": f"process exited with code {process.exitcode} without result"}
+            )
+            break
+        if time.monotonic() > deadline:
+            per_process.append({"pid": None, "error": f"no result within {timeout} seconds"})
+            break
+    return per_process
+
+
+def _stats(samples: list[float]) -> dict:
+    return {
+        "mean": statistics.mean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0,
+        "min": min(samples),
+        "max": max(samples),
+    }
+
+
+def run_in_process_benchmark(
+    model_path: str,
+    config_name: str,
+    session_configs: dict,
+    num_processes: int = 1,
+    warm_iterations: int = 5,
+) -> dict:
+    """Create sessions in N concurrent fresh processes and aggregate their metrics."""
+    print(f"\n{'=' * 60}")
+    print(f"  {config_name} ({num_processes} processes, {warm_iterations} warm iterations)")
+    print(f"{'=' * 60}")
+
+    # Fresh interpreters, so that the first session of each process is created cold.
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    barrier = context.Barrier(num_processes)
+    release = context.Event()
+    processes = [
+        context.Process(
+            target=_in_process_worker,
+            args=(model_path, session_configs, warm_iterations, results, barrier, release),
+        )
+        for _ in range(num_processes)
+    ]
+    try:
+        for process in processes:
+            process.start()
+        per_process = _collect_results(results, processes, timeout=600)
+    finally:
+        release.set()
+        barrier.abort()
+        for process in processes:
+            process.join(timeout=30)
+            if process.is_alive():
+                process.terminate()
+
+    # Errors of processes that stopped at the barrier come after the error that broke it.
+    errors = sorted((r["error"] for r in per_process if "error" in r), key=lambda e: e == "another process failed")
+    if errors:
+        print(f"  FAILED: {errors[0]}")
+        return {"config_name": config_name, "session_configs": session_configs, "errors": errors}
+
+    for i, r in enumerate(per_process):
+        print(
+            f"  Process {i + 1} (PID={r['pid']}): cold={r['cold_session_ms']:.2f}ms, "
+            f"first_inference={r['first_inference_ms']:.2f}ms, uss={r['uss_mb']:.1f}MB, rss={r['rss_mb']:.1f}MB, "
+            f"page_faults={r['minor_page_faults']}+{r['major_page_faults']}"
+        )
+
+    result = {
+        "config_name": config_name,
+        "session_configs": session_configs,
+        "num_processes": num_processes,
+        "session_ms": _stats([r["cold_session_ms"] for r in per_process]),
+        "first_inference_ms": _stats([r["first_inference_ms"] for r in per_process]),
+        "uss_mb": _stats([r["uss_mb"] for r in per_process]),
+        "rss_mb": _stats([r["rss_mb"] for r in per_process]),
+        "minor_page_faults": _stats([r["minor_page_faults"] for r in per_process]),
+        "major_page_faults": _stats([r["major_page_faults"] for r in per_process]),
+        "total_uss_mb": sum(r["uss_mb"] for r in per_process),
+        "per_process": per_process,
+    }
+    warm = [t for r in per_process for t in r["warm_session_ms"]]
+    if warm:
+        result["warm_session_ms"] = _stats(warm)
+    # Keys used by print_summary
+    result["private_mb"] = {"mean": result["uss_mb"]["mean"]}
+    result["ws_mb"] = {"mean": result["rss_mb"]["mean"]}
+    return result
+
+
+_COMPARED_METRICS = [
+    "session_ms",
+    "warm_session_ms",
+    "first_inference_ms",
+    "uss_mb",
+    "rss_mb",
+    "minor_page_faults",
+    "major_page_faults",
+]
+
+
+def print_comparison(results: list[dict], baseline_results: list[dict]):
+    """Print the change of mean of each metric relative to results of another build."""
+    print(f"\n{'=' * 90}")
+    print("COMPARISON WITH BASELINE")
+    print(f"{'=' * 90}")
+    baseline_by_name = {r.get("config_name"): r for r in baseline_results}
+    for r in results:
+        baseline = baseline_by_name.get(r.get("config_name"))
+        if baseline is None:
+            print(f"  {r.get('config_name')}: not in baseline")
+            continue
+        print(f"  {r['config_name']}:")
+        for metric in _COMPARED_METRICS:
+            if metric not in r or metric not in baseline:
+                continue
+            value = r[metric]["mean"]
+            base = baseline[metric]["mean"]
+            change = f"{(value - base) / base * 100:+.1f}%" if base else "n/a"
+            print(f"    {metric:<20} {base:>12.2f} -> {value:>12.2f} ({change})")
+
+
 # -- Output --
 
 
@@ -316,14 +581,32 @@ CONFIGS = [
 
 def main():
     parser = argparse.ArgumentParser(description="Benchmark memory-mapped .ort model loading")
-    parser.add_argument("--perf-test", required=True, help="Path to onnxruntime_perf_test executable")
+    parser.add_argument(
+        "--perf-test",
+        help="Path to onnxruntime_perf_test executable. Sessions are created in-process by Python when not given.",
+    )
     parser.add_argument("--model", required=True, help="Path to .ort model file")
-    parser.add_argument("--iterations", type=int, default=10, help="Number of measured iterations per config")
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=10,
+        help="Number of measured iterations per config, or warm session creations per process in-process",
+    )
     parser.add_argument("--multi-process", action="store_true", help="Run multi-process memory sharing benchmark")
-    parser.add_argument("--num-processes", type=int, default=4, help="Number of processes for --multi-process")
+    parser.add_argument(
+        "--num-processes",
+        type=int,
+        default=4,
+        help="Number of processes for --multi-process, or concurrent processes in-process",
+    )
     parser.add_argument("--output", help="Save results to JSON file")
+    parser.add_argument("--compare", help="JSON file saved by --output of another build to compare with")
     args = parser.parse_args()
 
+    if args.perf_test is None:
+        run_in_process(args)
+        return
+
     perf_test = os.path.abspath(args.perf_test)
     model_path = os.path.abspath(args.model)
 
@@ -381,5 +664,53 @@ def main():
         print(f"\nResults saved to: {args.output}")
 
 
+def run_in_process(args):
+    model_path = os.path.abspath(args.model)
+    if not os.path.exists(model_path):
+        print(f"ERROR: model not found: {model_path}")
+        sys.exit(1)
+
+    import onnxruntime  # noqa: PLC0415
+
+    model_size_mb = os.path.getsize(model_path) / 1024 / 1024
+    print(f"\nModel: {os.path.basename(model_path)} ({model_size_mb:.1f} MB)")
+    print(f"onnxruntime: {onnxruntime.__version__} ({os.path.dirname(onnxruntime.__file__)})")
+    if not HAS_PSUTIL:
+        print("WARNING: psutil not installed — USS is not collected, and peak RSS is reported instead of RSS")
+
+    results = [
+        run_in_process_benchmark(
+            model_path,
+            config_name,
+            session_configs,
+            num_processes=args.num_processes,
+            warm_iterations=args.iterations,
+        )
+        for config_name, session_configs in CONFIGS
+    ]
+    print_summary([r for r in results if "errors" not in r])
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f).get("single", []))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "model": os.path.basename(model_path),
+                    "model_size_mb": model_size_mb,
+                    "mode": "in_process",
+                    "onnxruntime_version": onnxruntime.__version__,
+                    "python_version": sys.version.split()[0],
+                    "platform": sys.platform,
+                    "single": results,
+                },
+                f,
+                indent=2,
+            )
+        print(f"\nResults saved to: {args.output}")
+
+
 if __name__ == "__main__":
     main()
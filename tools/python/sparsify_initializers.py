@@ -4,20 +4,35 @@
 # --------------------------------------------------------------------------
 # This script opens an existing model in onnx format and attempts to
 # move initializers from model.graph.initializer field to model.graph.sparse_initializer field
-# and convert them into ONNX COO flat index format.
+# and convert them into ONNX COO format.
+# Initializers are converted in parallel by worker processes, and external data is read through memory maps
+# instead of being loaded into the model.
 from __future__ import annotations
 
 import argparse
 import logging
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import onnx
-from onnx import ModelProto, TensorProto, numpy_helper
+from onnx import ModelProto, TensorProto, helper, numpy_helper
+from onnx.external_data_helper import ExternalDataInfo, uses_external_data
 
 logger = logging.getLogger(__name__)
 
-real_types = {int(TensorProto.FLOAT), int(TensorProto.DOUBLE)}
+real_types = {int(TensorProto.FLOAT), int(TensorProto.DOUBLE), int(TensorProto.FLOAT16), int(TensorProto.BFLOAT16)}
+
+# Number of elements scanned at a time, which bounds the memory used for masks of large tensors.
+_CHUNK_SIZE = 1 << 24
+
+_index_types = [
+    (TensorProto.INT8, np.int8),
+    (TensorProto.INT16, np.int16),
+    (TensorProto.INT32, np.int32),
+    (TensorProto.INT64, np.int64),
+]
 
 
 def parse_arguments():
@@ -27,7 +42,14 @@ def parse_arguments():
     parser.add_argument(
         "--exclude", required=False, type=str, help="semicolon separated list of initializer names to exclude"
     )
-    parser.add_argument("--tolerance", required=False, type=float, default=1e-6, help="FP absolute tolerance.")
+    parser.add_argument(
+        "--tolerance",
+        required=False,
+        type=float,
+        default=0.0,
+        help="FP absolute tolerance. Floating point values with absolute value at most this much are dropped as "
+        "zeros, which is lossy when it is above 0.",
+    )
     parser.add_argument(
         "--sparsity_threshold",
         required=False,
@@ -35,6 +57,20 @@ def parse_arguments():
         default=0.5,
         help="convert to sparse initializers if sparsity is at least this much",
     )
+    parser.add_argument(
+        "--num_workers",
+        required=False,
+        type=int,
+        default=os.cpu_count(),
+        help="number of processes to convert initializers. Use 1 to convert in the main process.",
+    )
+    parser.add_argument(
+        "--external_data",
+        required=False,
+        type=str,
+        default=None,
+        help="file name to save values and indices of sparse initializers as external data in the output directory",
+    )
     parser.add_argument("--verbose", required=False, action="store_true")
     parser.set_defaults(verbose=False)
     args = parser.parse_args()
@@ -54,68 +90,90 @@ def setup_logging(verbose):  # type: (bool)  -> None
     logger.setLevel(logging_level)
 
 
-def convert_tensor_to_sparse(tensor, sparsity_threshold, tolerance):  # type: (TensorProto, float, float) -> Tuple[SparseTensorProto, float]
-    """returns a tuple of sparse_tensor and sparsity level"""
-    values = []
+def _get_tensor_data(tensor, base_dir):  # type: (TensorProto, str) -> np.ndarray
+    """returns flattened tensor data. External data is memory mapped instead of being read."""
+    if not uses_external_data(tensor):
+        return numpy_helper.to_array(tensor).reshape(-1)
+
+    info = ExternalDataInfo(tensor)
+    dtype = helper.tensor_dtype_to_np_dtype(tensor.data_type)
+    count = int(np.prod(tensor.dims, dtype=np.int64))
+    if info.length and info.length != count * dtype.itemsize:
+        raise ValueError(f"initializer={tensor.name} external data length {info.length} does not match its shape")
+    return np.memmap(
+        os.path.join(base_dir, info.location), dtype=dtype, mode="r", offset=info.offset or 0, shape=(count,)
+    )
+
+
+def _find_nonzero(tensor_data, is_real, tolerance):  # type: (np.ndarray, bool, float) -> np.ndarray
+    """returns flat indices of elements that are not zero, scanning the data chunk by chunk"""
     indices = []
-    nnz_count = 0
-    tensor_data = numpy_helper.to_array(tensor).flatten()
-    data_len = len(tensor_data)
-    if tensor_data.dtype in real_types:
-        for index in range(data_len):
-            el = tensor_data[index]
-            if abs(el) <= tolerance:
-                values.append(el)
-                indices.append(index)
-                nnz_count += 1
-    else:
-        for index in range(data_len):
-            el = tensor_data[index]
-            if el != 0:
-                values.append(el)
-                indices.append(index)
-                nnz_count += 1
+    for start in range(0, tensor_data.size, _CHUNK_SIZE):
+        chunk = np.asarray(tensor_data[start : start + _CHUNK_SIZE])
+        # bfloat16 and float8 types are not native numpy types, so compare them as float32.
+        if chunk.dtype.kind not in "biufc":
+            chunk = chunk.astype(np.float32)
+        # NaN is not zero, so it is kept without tolerance.
+        mask = np.abs(chunk) > tolerance if is_real and tolerance > 0 else chunk != 0
+        indices.append(np.flatnonzero(mask).astype(np.int64) + start)
+    return np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64)
 
-    sparsity = 1.0 - float(nnz_count) / data_len
 
-    ind_data_type = TensorProto.INT8
-    ind_dtype = np.int8
-    ind_len = len(indices)
-    max_indices_value = 0
-    if ind_len > 0:
-        max_indices_value = indices[-1]
-        if max_indices_value <= np.iinfo(np.int8).max:
-            ind_data_type = TensorProto.INT8
-            ind_dtype = np.int8
-        elif max_indices_value <= np.iinfo(np.int16).max:
-            ind_data_type = TensorProto.INT16
-            ind_dtype = np.int16
-        elif max_indices_value <= np.iinfo(np.int32).max:
-            ind_data_type = TensorProto.INT32
-            ind_dtype = np.int32
-        else:
-            ind_data_type = TensorProto.INT64
-            ind_dtype = np.int64
+def _smallest_index_type(max_value):  # type: (int) -> Tuple[int, type]
+    for data_type, dtype in _index_types:
+        if max_value <= np.iinfo(dtype).max:
+            return data_type, dtype
+    return _index_types[-1]
+
+
+def _choose_indices(flat_indices, dims):  # type: (np.ndarray, List[int]) -> Tuple[int, np.ndarray, str]
+    """
+    Choose the COO layout with fewer bytes of indices: flat indices of shape [NNZ], or coordinates of shape
+    [NNZ, rank], which could use a smaller index type than flat indices for tensors of rank > 1.
+    """
+    max_flat_index = int(flat_indices[-1]) if flat_indices.size > 0 else 0
+    flat_type, flat_dtype = _smallest_index_type(max_flat_index)
+    flat_bytes = flat_indices.size * np.dtype(flat_dtype).itemsize
+
+    if len(dims) > 1:
+        coordinate_type, coordinate_dtype = _smallest_index_type(max(dims) - 1)
+        coordinate_bytes = flat_indices.size * len(dims) * np.dtype(coordinate_dtype).itemsize
+        if coordinate_bytes < flat_bytes:
+            coordinates = np.stack(np.unravel_index(flat_indices, dims), axis=-1).astype(coordinate_dtype)
+            return coordinate_type, coordinates, "coordinate"
+
+    return flat_type, flat_indices.astype(flat_dtype), "flat"
+
+
+def _sparsify_tensor(tensor, sparsity_threshold, tolerance, base_dir):  # type: (TensorProto, float, float, str) -> Tuple[Optional[Tuple], float, int, int]
+    """
+    returns a tuple of (values, indices data type, indices, layout) or None if the tensor is not converted,
+    sparsity level, number of bytes of the dense tensor and number of bytes of the sparse tensor.
+    """
+    tensor_data = _get_tensor_data(tensor, base_dir)
+    data_len = tensor_data.size
+    if data_len == 0:
+        return (None, 0.0, 0, 0)
+
+    flat_indices = _find_nonzero(tensor_data, tensor.data_type in real_types, tolerance)
+    nnz_count = flat_indices.size
+    sparsity = 1.0 - float(nnz_count) / data_len
 
     logger.debug(
-        f"initializer={tensor.name}, dtype={tensor_data.dtype}, \
-                 data_len={data_len}, nnz={nnz_count}, sparsity={sparsity}, \
-                 max_indices_value={max_indices_value}, sparse_indices_type={ind_dtype}"
+        f"initializer={tensor.name}, dtype={tensor_data.dtype}, data_len={data_len}, nnz={nnz_count}, sparsity={sparsity}"
     )
 
+    tensor_data_bytes = tensor_data.nbytes
     if sparsity < sparsity_threshold:
-        return (object(), sparsity)
+        return (None, sparsity, tensor_data_bytes, 0)
 
-    tensor_data_bytes = tensor_data.nbytes
-    # create np array and cast data to the appropriate type
-    np_values = np.array(values).astype(tensor_data.dtype)
-    # create np array and cast data to the inferred index type
-    np_indices = np.array(indices).astype(ind_dtype)
+    ind_data_type, np_indices, layout = _choose_indices(flat_indices, list(tensor.dims))
+    np_values = np.asarray(tensor_data[flat_indices])
     total_sparse_bytes = np_values.nbytes + np_indices.nbytes
 
     logger.debug(
-        f"initializer={tensor.name}, initializer_bytes={tensor_data_bytes}, \
-                sparse_initializer_bytes={total_sparse_bytes}"
+        f"initializer={tensor.name}, initializer_bytes={tensor_data_bytes}, "
+        f"sparse_initializer_bytes={total_sparse_bytes}, indices_layout={layout}, sparse_indices_type={np_indices.dtype}"
     )
 
     # This check is usually useful for sparsity_threshold=0.5 where much
@@ -126,42 +184,139 @@ def convert_tensor_to_sparse(tensor, sparsity_threshold, tolerance):  # type: (T
     if tensor_data_bytes <= total_sparse_bytes:
         sparsity = 1.0 - float(tensor_data_bytes) / total_sparse_bytes
         logger.debug(f"initializer={tensor.name}, adjusted_sparsity={sparsity}")
-        return (object(), sparsity)
+        return (None, sparsity, tensor_data_bytes, total_sparse_bytes)
+
+    return ((np_values, ind_data_type, np_indices, layout), sparsity, tensor_data_bytes, total_sparse_bytes)
 
-    values_tensor = onnx.helper.make_tensor(tensor.name, tensor.data_type, [len(values)], np_values.tobytes(), raw=True)
 
+def _make_sparse_tensor(tensor, values, ind_data_type, indices):  # type: (TensorProto, np.ndarray, int, np.ndarray) -> SparseTensorProto
+    values_tensor = onnx.helper.make_tensor(tensor.name, tensor.data_type, [values.size], values.tobytes(), raw=True)
     indicies_tensor = onnx.helper.make_tensor(
-        tensor.name + "_indicies", ind_data_type, [ind_len], np_indices.tobytes(), raw=True
+        tensor.name + "_indicies", ind_data_type, list(indices.shape), indices.tobytes(), raw=True
     )
+    return onnx.helper.make_sparse_tensor(values_tensor, indicies_tensor, tensor.dims)
+
+
+def convert_tensor_to_sparse(tensor, sparsity_threshold, tolerance, base_dir=""):  # type: (TensorProto, float, float, str) -> Tuple[SparseTensorProto, float]
+    """returns a tuple of sparse_tensor and sparsity level"""
+    converted, sparsity, _, _ = _sparsify_tensor(tensor, sparsity_threshold, tolerance, base_dir)
+    if converted is None:
+        return (object(), sparsity)
+    values, ind_data_type, indices, _ = converted
+    return (_make_sparse_tensor(tensor, values, ind_data_type, indices), sparsity)
+
+
+def _sparsify_worker(args):
+    tensor_bytes, sparsity_threshold, tolerance, base_dir = args
+    tensor = TensorProto()
+    tensor.ParseFromString(tensor_bytes)
+    return _sparsify_tensor(tensor, sparsity_threshold, tolerance, base_dir)
+
+
+def _set_external_data(tensor, location, offset, length):  # type: (TensorProto, str, int, int) -> None
+    tensor.ClearField("raw_data")
+    del tensor.external_data[:]
+    tensor.data_location = TensorProto.EXTERNAL
+    for key, value in [("location", location), ("offset", str(offset)), ("length", str(length))]:
+        entry = tensor.external_data.add()
+        entry.key = key
+        entry.value = value
+
+
+def _save_as_external_data(tensor, data_file, location):  # type: (TensorProto, BinaryIO, str) -> None
+    offset = data_file.tell()
+    data_file.write(tensor.raw_data)
+    _set_external_data(tensor, location, offset, data_file.tell() - offset)
 
-    sparse_tensor = onnx.helper.make_sparse_tensor(values_tensor, indicies_tensor, tensor.dims)
-    return (sparse_tensor, sparsity)
 
+def _copy_external_data(tensor, base_dir, data_file, location):  # type: (TensorProto, str, BinaryIO, str) -> None
+    """copy external data of a tensor to data_file chunk by chunk"""
+    info = ExternalDataInfo(tensor)
+    offset = data_file.tell()
+    with open(os.path.join(base_dir, info.location), "rb") as source_file:
+        source_file.seek(info.offset or 0)
+        remaining = info.length or None
+        while remaining is None or remaining > 0:
+            chunk = source_file.read(_CHUNK_SIZE if remaining is None else min(_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            data_file.write(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    _set_external_data(tensor, location, offset, data_file.tell() - offset)
 
-def convert_initializers(model, exclude_names, sparsity_threshold, tolerance):  # type: (ModelProto, List[str], float, float) -> None
+
+def convert_initializers(
+    model,
+    exclude_names,
+    sparsity_threshold,
+    tolerance,
+    base_dir="",
+    num_workers=1,
+    external_data_path=None,
+):  # type: (ModelProto, Set[str], float, float, str, int, Optional[str]) -> int
+    """
+    Convert initializers of the main graph to sparse initializers, and returns the expected number of bytes saved.
+
+    Initializers with external data are read from files under base_dir through memory maps.
+    When num_workers > 1, initializers are converted by a pool of processes.
+    When external_data_path is given, values and indices of sparse initializers are saved to that file.
+    """
     graph = model.graph
-    converted_sparse = []
-    remaining_initializers = []
+    candidates = []
     for initializer in graph.initializer:
         if initializer.name in exclude_names:
             logger.info(f"initializer={initializer.name} was excluded")
-            continue
-        if initializer.data_type == TensorProto.BOOL:
-            logger.info(f"initializer={initializer.name} contains bool, not converted")
-            remaining_initializers.append(initializer)
-            continue
-        sparse_tensor, sparsity = convert_tensor_to_sparse(initializer, sparsity_threshold, tolerance)
-        if sparsity >= sparsity_threshold:
-            logger.info(f"initializer={initializer.name} converted. sparsity={sparsity}")
-            converted_sparse.append(sparse_tensor)
+        elif initializer.data_type in (TensorProto.BOOL, TensorProto.STRING, TensorProto.UNDEFINED):
+            logger.info(f"initializer={initializer.name} contains {initializer.data_type}, not converted")
         else:
-            remaining_initializers.append(initializer)
-            logger.info(f"initializer={initializer.name} is not converted. sparsity={sparsity}")
+            candidates.append(initializer)
+
+    if num_workers > 1 and len(candidates) > 1:
+        tasks = [(c.SerializeToString(), sparsity_threshold, tolerance, base_dir) for c in candidates]
+        with ProcessPoolExecutor(max_workers=min(num_workers, len(tasks))) as executor:
+            results = list(executor.map(_sparsify_worker, tasks))
+    else:
+        results = [_sparsify_tensor(c, sparsity_threshold, tolerance, base_dir) for c in candidates]
+
+    converted_sparse = []
+    converted_names = set()
+    dense_bytes = 0
+    sparse_bytes = 0
+    data_file = open(external_data_path, "wb") if external_data_path else None  # noqa: SIM115
+    try:
+        for initializer, (converted, sparsity, tensor_bytes, total_sparse_bytes) in zip(
+            candidates, results, strict=True
+        ):
+            if converted is None:
+                logger.info(f"initializer={initializer.name} is not converted. sparsity={sparsity}")
+                continue
+            values, ind_data_type, indices, layout = converted
+            sparse_tensor = _make_sparse_tensor(initializer, values, ind_data_type, indices)
+            if data_file is not None:
+                location = os.path.basename(external_data_path)
+                _save_as_external_data(sparse_tensor.values, data_file, location)
+                _save_as_external_data(sparse_tensor.indices, data_file, location)
+            logger.info(f"initializer={initializer.name} converted. sparsity={sparsity} indices={layout}")
+            converted_sparse.append(sparse_tensor)
+            converted_names.add(initializer.name)
+            dense_bytes += tensor_bytes
+            sparse_bytes += total_sparse_bytes
+    finally:
+        if data_file is not None:
+            data_file.close()
 
+    remaining_initializers = [i for i in graph.initializer if i.name not in converted_names]
     graph.sparse_initializer.extend(converted_sparse)
     del graph.initializer[:]
     graph.initializer.extend(remaining_initializers)
 
+    logger.info(
+        f"converted {len(converted_sparse)} initializers from {dense_bytes} to {sparse_bytes} bytes, "
+        f"expected memory savings={dense_bytes - sparse_bytes} bytes"
+    )
+    return dense_bytes - sparse_bytes
+
 
 def main():
     args = parse_arguments()
@@ -173,7 +328,32 @@ def main():
     with open(args.input, "rb") as input_file:
         model.ParseFromString(input_file.read())
 
-    convert_initializers(model, exclude_names, args.sparsity_threshold, args.tolerance)
+    input_dir = os.path.dirname(os.path.abspath(args.input))
+    output_dir = os.path.dirname(os.path.abspath(args.output))
+    external_data_name = args.external_data or os.path.basename(args.output) + ".data"
+    external_data_path = os.path.join(output_dir, external_data_name)
+    for initializer in model.graph.initializer:
+        if uses_external_data(initializer):
+            if os.path.abspath(os.path.join(input_dir, ExternalDataInfo(initializer).location)) == external_data_path:
+                raise ValueError(f"External data file {external_data_path} cannot be both input and output")
+
+    convert_initializers(
+        model,
+        exclude_names,
+        args.sparsity_threshold,
+        args.tolerance,
+        base_dir=input_dir,
+        num_workers=args.num_workers,
+        external_data_path=external_data_path if args.external_data else None,
+    )
+
+    # External data of dense initializers shall be in the directory of the output model, so copy it when needed.
+    if input_dir != output_dir:
+        external_initializers = [i for i in model.graph.initializer if uses_external_data(i)]
+        if external_initializers:
+            with open(external_data_path, "ab" if args.external_data else "wb") as data_file:
+                for initializer in external_initializers:
+                    _copy_external_data(initializer, input_dir, data_file, external_data_name)
 
     with open(args.output, "wb") as output_file:
         s = model.SerializeToString()